@@ -0,0 +1,13 @@
+"""
+Public interface of the package (see api.py). The names are imported on first use, so
+importing a submodule (ie: lfd_package.service) does not load the analysis first.
+"""
+
+__all__ = ["analyze", "read_profile", "make_profile", "AnalysisResult"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from lfd_package import api
+        return getattr(api, name)
+    raise AttributeError("module 'lfd_package' has no attribute '{}'".format(name))
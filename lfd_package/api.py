@@ -0,0 +1,221 @@
+"""
+Module Description:
+    Python interface - runs the analysis in the calling process on inputs held in memory and
+    returns the results as an AnalysisResult. Nothing is written to disk: a demand .csv file
+    is read from the profile cache if it is there but is not saved to it, and the unit
+    registry only reads pint's cache (see units.py). If the demand profile is passed in as
+    arrays no demand file is read either, so the analysis can be called many times from other
+    code (ie: an optimizer) without touching the file system.
+
+    Example:
+        from lfd_package import analyze, read_profile
+
+        profile = read_profile(config=inputs)
+        result = analyze(config=inputs, profile=profile)
+        result.value("Simple Payback [Yrs]", mode="TLF")
+"""
+
+import time
+import dataclasses
+import numpy as np
+import pandas as pd
+
+from lfd_package import command_line
+from lfd_package.modules import classes, calendar_index, profile_cache, engines
+
+# Column of the value of each operating mode in the results table. The units are in the next column.
+MODE_COLUMNS = {"Baseline": 1, "ELF": 3, "TLF": 5, "PP": 7}
+
+
+@dataclasses.dataclass(frozen=True)
+class AnalysisResult:
+    """
+    Results of one analysis.
+
+    Attributes
+    ----------
+    city: str
+        location analyzed (lower case).
+    state: str
+        two-letter state abbreviation (lower case).
+    engine: str
+        calculation engine used (see engines.py).
+    summary: pandas.DataFrame
+        results table, with the same rows and columns as the Excel output (see
+        command_line.calc_results()).
+    hourly: dict
+        hourly series of the demand and of each operating mode as float arrays, keyed by the
+        names in engines.HOURLY_SERIES. Empty if the analysis ran with hourly=False.
+    time_s: float
+        run time of the analysis in seconds.
+    """
+    city: str
+    state: str
+    engine: str
+    summary: pd.DataFrame
+    hourly: dict
+    time_s: float
+
+    def value(self, variable=None, mode="Baseline"):
+        """
+        Returns one value of the results table.
+
+        Parameters
+        ----------
+        variable: str
+            name in the "Variable Name" column (ie: "CHP Size").
+        mode: str
+            "Baseline", "ELF", "TLF", or "PP".
+
+        Returns
+        -------
+        value: float or str
+            the value, or "N/A" where the table has none.
+        """
+        return self.summary.iat[self._row(variable=variable), self._column(mode=mode)]
+
+    def units(self, variable=None, mode="Baseline"):
+        """
+        Returns the units of one value of the results table as a string (see value()).
+        """
+        return str(self.summary.iat[self._row(variable=variable), self._column(mode=mode) + 1])
+
+    def hourly_frame(self):
+        """
+        Returns the hourly series as a pandas.DataFrame, one column per series.
+        """
+        return pd.DataFrame(self.hourly)
+
+    def _row(self, variable=None):
+        rows = np.flatnonzero(self.summary.iloc[:, 0].to_numpy() == variable)
+        if len(rows) == 0:
+            raise Exception("{} is not in the results table".format(variable))
+        return int(rows[0])
+
+    def _column(self, mode=None):
+        if mode not in MODE_COLUMNS:
+            raise Exception("mode must be one of {}".format(", ".join(MODE_COLUMNS)))
+        return MODE_COLUMNS[mode]
+
+
+def read_profile(config=None):
+    """
+    Reads the demand profile named in a set of inputs once, so it can be passed to analyze()
+    many times. The .csv file is read from the profile cache if it is there (see
+    profile_cache.py); otherwise it is parsed, and the parsed profile is not saved.
+
+    Parameters
+    ----------
+    config: dict
+        input data with the same keys as the .yaml files.
+
+    Returns
+    -------
+    profile: dict
+        contains the demand and calendar arrays (see make_profile()).
+    """
+    if config is not None:
+        demand = classes.get_energy_demand(file_name=config['demand_filename'], city=config['city'],
+                                           state=config['state'], grid_efficiency=config['grid_efficiency'],
+                                           sim_ab_efficiency=config['energy_plus_eff'],
+                                           winter_start_inclusive=config['winter_start_inclusive'],
+                                           summer_start_inclusive=config['summer_start_inclusive'],
+                                           save_cache=False)
+        return make_profile(el_kw=demand.el.magnitude, hl_btuh=demand.hl.magnitude,
+                            months=demand.meter_months_hourly, days=demand.meter_days_hourly,
+                            hours=demand.meter_hours_hourly, hour_of_year=demand.meter_hour_of_year)
+
+
+def make_profile(el_kw=None, hl_btuh=None, months=None, days=None, hours=None, hour_of_year=None):
+    """
+    Builds a demand profile from hourly arrays.
+
+    Parameters
+    ----------
+    el_kw: array-like
+        hourly electrical demand in kW.
+    hl_btuh: array-like
+        hourly heating demand in Btu/hr (after the EnergyPlus boiler efficiency is applied).
+    months, days, hours, hour_of_year: array-like
+        Optional. Calendar of each hour (see calendar_index.parse_energyplus_dates()). If not
+        given, the hours are taken to start on Jan 1 as in an EnergyPlus annual meter file.
+
+    Returns
+    -------
+    profile: dict
+        contains the arrays, keyed by the names in profile_cache.PROFILE_ARRAY_NAMES.
+    """
+    args_list = [el_kw, hl_btuh]
+    if any(elem is None for elem in args_list) is False:
+        el_kw = np.asarray(el_kw, dtype=float)
+        hl_btuh = np.asarray(hl_btuh, dtype=float)
+        if el_kw.ndim != 1 or el_kw.shape != hl_btuh.shape:
+            raise Exception("el_kw and hl_btuh must be 1-D arrays of the same length")
+
+        calendar = [months, days, hours, hour_of_year]
+        if all(elem is None for elem in calendar):
+            calendar = calendar_index.energyplus_calendar(no_hours=len(el_kw))
+        elif any(elem is None for elem in calendar):
+            raise Exception("months, days, hours, and hour_of_year must be given together")
+        calendar = [np.asarray(elem, dtype=int) for elem in calendar]
+        if any(elem.shape != el_kw.shape for elem in calendar):
+            raise Exception("Calendar arrays must have the same length as the demand arrays")
+
+        profile = dict(zip(profile_cache.PROFILE_ARRAY_NAMES, [el_kw, hl_btuh] + calendar))
+        return profile
+
+
+def analyze(config=None, profile=None, engine=None, hourly=True):
+    """
+    Runs the analysis of one set of inputs in this process.
+
+    Parameters
+    ----------
+    config: dict
+        input data with the same keys as the .yaml files. If profile is given, "demand_filename"
+        and "energy_plus_eff" are not needed.
+    profile: dict
+        Optional. Demand profile from read_profile() or make_profile(). If not given, the
+        .csv file named by "demand_filename" is read the first time it is used in this process
+        (see read_profile()).
+    engine: str
+        "fast" or "reference" (see engines.py). Defaults to "fast".
+    hourly: bool
+        if False, the hourly series are left out of the result.
+
+    Returns
+    -------
+    result: AnalysisResult
+    """
+    if config is not None:
+        start = time.perf_counter()
+        if engine is None:
+            engine = engines.DEFAULT_ENGINE
+
+        if profile is not None:
+            missing = [name for name in profile_cache.PROFILE_ARRAY_NAMES if name not in profile]
+            if missing:
+                raise Exception("profile is missing {} (see make_profile())".format(", ".join(missing)))
+            demand = classes.EnergyDemand(file_name=config.get("demand_filename"), city=config['city'],
+                                          state=config['state'], grid_efficiency=config['grid_efficiency'],
+                                          summer_start_inclusive=config['summer_start_inclusive'],
+                                          winter_start_inclusive=config['winter_start_inclusive'],
+                                          sim_ab_efficiency=config.get("energy_plus_eff"), profile=profile)
+        else:
+            demand = classes.get_energy_demand(file_name=config['demand_filename'], city=config['city'],
+                                               state=config['state'], grid_efficiency=config['grid_efficiency'],
+                                               sim_ab_efficiency=config['energy_plus_eff'],
+                                               winter_start_inclusive=config['winter_start_inclusive'],
+                                               summer_start_inclusive=config['summer_start_inclusive'],
+                                               save_cache=False)
+        class_dict = command_line.build_class_dict(data=config, demand=demand)
+
+        hourly_series = {}
+        if hourly is True:
+            summary, df_hourly = command_line.calc_results(class_dict=class_dict, return_hourly=True, engine=engine)
+            hourly_series = {name: df_hourly[name].to_numpy() for name in df_hourly.columns}
+        else:
+            summary = command_line.calc_results(class_dict=class_dict, engine=engine)
+
+        return AnalysisResult(city=class_dict["demand"].city, state=class_dict["demand"].state, engine=engine,
+                              summary=summary, hourly=hourly_series, time_s=time.perf_counter() - start)
@@ -0,0 +1,221 @@
+"""
+Module Description:
+    Batch command line interface - runs the analysis of many .yaml files over a pool of
+    worker processes. Each worker imports the package once (unit registry, compiled
+    kernels) and keeps parsed demand profiles in memory between sites. Results are sent
+    back to the parent process and appended to the results store (see results_store.py)
+    one site at a time. A site that fails is reported at the end without stopping the others.
+
+    Example:
+        python -m lfd_package.batch --in "*.yaml" --workers 4
+"""
+
+import os
+import glob
+import time
+import pathlib
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from lfd_package import command_line, results_store, render_plots
+from lfd_package.modules import kernels
+
+YAML_DIR = pathlib.Path(command_line.__file__).parent.resolve() / 'input_yaml'
+
+# Blank input file to copy for a new site. Only run when named explicitly, not when matched by a glob pattern
+TEMPLATE_YAML = "template.yaml"
+
+
+def expand_yaml_paths(patterns=None):
+    """
+    Expands .yaml file names and glob patterns into a list of files. Each pattern is matched
+    against the current directory first and then against the /input_yaml folder. Glob patterns
+    skip the placeholder template.yaml of the /input_yaml folder.
+
+    Parameters
+    ----------
+    patterns: list
+        contains .yaml file names, paths, or glob patterns (ie: "*.yaml").
+
+    Returns
+    -------
+    yaml_paths: list
+        contains the matching .yaml files, without duplicates. Patterns that match nothing are
+        kept as-is so they are reported as failures along with the other sites.
+    """
+    if patterns is not None:
+        yaml_paths = []
+        for pattern in patterns:
+            matches = sorted(glob.glob(pattern)) or sorted(glob.glob(str(YAML_DIR / pattern))) or [pattern]
+            if any(char in pattern for char in "*?["):
+                matches = [match for match in matches if pathlib.Path(match).resolve() != YAML_DIR / TEMPLATE_YAML]
+            for match in matches:
+                if os.path.exists(match):
+                    match = str(pathlib.Path(match).resolve())
+                if match not in yaml_paths:
+                    yaml_paths.append(match)
+        return yaml_paths
+
+
+def init_worker():
+    """
+    Warms up a worker process before its first site. Importing this module builds the unit
+    registry; running the kernels once loads (or compiles) them when numba is installed.
+    """
+    kernels.tlf_chp_tes_soc(dem_hl_btuh=np.zeros(1), heat_min=0.0, heat_cap=1.0, tes_size=1.0, tes_start=0.5,
+                            tes_is_empty=False)
+    kernels.tes_heat_flow_and_soc_batch(excess_and_deficit_btuh=np.zeros((1, 1)), tes_sizes=np.ones(1),
+                                        current_status=np.zeros(1))
+
+
+def analyze_site(yaml_path=None, use_cache=True):
+    """
+    Runs the analysis of one .yaml file. Exceptions are caught and returned so one bad site
+    does not stop the batch.
+
+    Parameters
+    ----------
+    yaml_path: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    use_cache: bool
+        if False, the results cache is neither read nor written (see calc_results_cached()).
+
+    Returns
+    -------
+    site_result: dict
+        contains the .yaml file, the location (city, state, and sheet name), the results table
+        and hourly series (pandas.DataFrame), the run time in seconds, and the error message and
+        traceback if the analysis failed (None otherwise).
+    """
+    if yaml_path is not None:
+        start = time.perf_counter()
+        site_result = {"yaml": yaml_path, "city": None, "state": None, "sheet_name": None, "results": None,
+                       "hourly": None, "error": None, "traceback": None}
+        try:
+            run_result = command_line.calc_results_cached(yaml_filename=yaml_path, return_hourly=True,
+                                                          use_cache=use_cache)
+            for name in ("city", "state", "sheet_name", "results", "hourly"):
+                site_result[name] = run_result[name]
+        except Exception as e:
+            site_result["error"] = "{}: {}".format(type(e).__name__, e)
+            site_result["traceback"] = traceback.format_exc()
+        site_result["time"] = time.perf_counter() - start
+        return site_result
+
+
+def run_batch(yaml_paths=None, workers=None, store_path=None, use_cache=True):
+    """
+    Analyzes every .yaml file over a pool of worker processes.
+
+    Parameters
+    ----------
+    yaml_paths: list
+        contains .yaml file names or paths (see expand_yaml_paths()).
+    workers: int
+        number of worker processes. Defaults to the number of CPUs. With one worker the
+        sites are analyzed in this process.
+    store_path: str or pathlib.Path
+        path to the results store the sites are appended to. Defaults to
+        /results/results_store.sqlite.
+    use_cache: bool
+        if False, the results cache is neither read nor written (see calc_results_cached()).
+
+    Returns
+    -------
+    site_results: list
+        contains one dict per .yaml file, in the same order as yaml_paths (see analyze_site()).
+    """
+    if yaml_paths is not None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(int(workers), len(yaml_paths)))
+
+        site_results = [None] * len(yaml_paths)
+        if workers == 1:
+            init_worker()
+            for index, yaml_path in enumerate(yaml_paths):
+                site_results[index] = analyze_site(yaml_path=yaml_path, use_cache=use_cache)
+                _report_site(site_result=site_results[index], store_path=store_path)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+                futures = {executor.submit(analyze_site, yaml_path, use_cache): index for index, yaml_path in
+                           enumerate(yaml_paths)}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        site_results[index] = future.result()
+                    except Exception as e:
+                        # The worker itself died (ie: out of memory), so no result was returned
+                        site_results[index] = {"yaml": yaml_paths[index], "results": None, "time": None,
+                                               "error": "{}: {}".format(type(e).__name__, e),
+                                               "traceback": traceback.format_exc()}
+                    _report_site(site_result=site_results[index], store_path=store_path)
+        return site_results
+
+
+def _report_site(site_result=None, store_path=None):
+    # Stores the results of a finished site (in the parent process) and prints its status
+    if site_result["error"] is None:
+        try:
+            site_result["run_key"] = results_store.append_run(
+                df_results=site_result["results"], df_hourly=site_result["hourly"], city=site_result["city"],
+                state=site_result["state"], sheet_name=site_result["sheet_name"], source=site_result["yaml"],
+                store_path=store_path)
+        except Exception as e:
+            site_result["error"] = "Storing results failed - {}: {}".format(type(e).__name__, e)
+            site_result["traceback"] = traceback.format_exc()
+
+    if site_result["error"] is None:
+        print("Analysis for {}, {} completed in {:.1f} s ({}).".format(site_result["city"], site_result["state"],
+                                                                      site_result["time"], site_result["yaml"]))
+    else:
+        print("Analysis of {} FAILED: {}".format(site_result["yaml"], site_result["error"]))
+
+
+def main():
+    """
+    Batch command line interface. Analyzes every .yaml file given by --in and prints a
+    summary of the sites that failed. The exit status is 1 if any site failed.
+    """
+    parser = argparse.ArgumentParser(description="Analyze many .yaml files over a pool of worker processes")
+    parser.add_argument("--in", help="filenames, paths, or glob patterns of .yaml files with equipment data",
+                        dest="inputs", type=str, nargs="+", required=True)
+    parser.add_argument("--workers", help="number of worker processes (default: number of CPUs)", type=int,
+                        default=None)
+    parser.add_argument("--store", help="path to the results store (default: results/results_store.sqlite)",
+                        type=str, default=None)
+    parser.add_argument("--excel", help="export the results store to Excel after the batch", action="store_true")
+    parser.add_argument("--plots", help="draw the standard plots of every site after the batch", action="store_true")
+    parser.add_argument("--no-cache", help="always run the analyses, without reading or writing the results cache",
+                        dest="use_cache", action="store_false")
+    args = parser.parse_args()
+
+    yaml_paths = expand_yaml_paths(patterns=args.inputs)
+    start = time.perf_counter()
+    site_results = run_batch(yaml_paths=yaml_paths, workers=args.workers, store_path=args.store,
+                             use_cache=args.use_cache)
+    failures = [site_result for site_result in site_results if site_result["error"] is not None]
+    if args.excel is True:
+        results_store.export_excel(store_path=args.store)
+    if args.plots is True:
+        run_keys = [site_result["run_key"] for site_result in site_results if site_result["error"] is None]
+        plot_results, skipped = render_plots.render_runs(run_keys=run_keys, workers=args.workers,
+                                                         store_path=args.store)
+        print("{} plots drawn.".format(sum(plot_result["error"] is None for plot_result in plot_results)))
+
+    print("...")
+    print("{} of {} sites completed in {:.1f} s.".format(len(site_results) - len(failures), len(site_results),
+                                                         time.perf_counter() - start))
+    for site_result in failures:
+        print("")
+        print("{} failed:".format(site_result["yaml"]))
+        print(site_result["traceback"])
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,665 @@
+"""
+Module Description:
+    Benchmark command line interface - times the hot paths of the analysis (demand profile
+    loading, sizing, each dispatch function, the TES and aux boiler calculations, the utility
+    tariffs, and a full analysis) on every bundled demand profile, saves the timings as JSON, and
+    compares them with a stored baseline.
+
+    Each benchmark is run on every case (demand profile and location .yaml file) of a scenario
+    grid (see scenario_matrix.py), which defaults to /input_scenarios/bundled_matrix.yaml. The
+    "engine" suite times the functions used by calc_results(). The "reference" suite times the
+    original hour-by-hour functions in chp.py, thermal_storage.py, aux_boiler.py, sizing_calcs.py,
+    and costs.py, which take seconds per call, so it is best run on a few profiles.
+
+    A benchmark regresses if the sum of its median times over the cases it shares with the
+    baseline grows by more than its threshold (default 25%). The exit status is 1 if any
+    benchmark regressed.
+
+    Example:
+        python -m lfd_package.benchmark --save-baseline
+        python -m lfd_package.benchmark --threshold 0.1 --thresholds full_run=0.05
+        python -m lfd_package.benchmark --suite reference --profiles "STD2019_*" --repeat 1
+"""
+
+import gc
+import os
+import json
+import time
+import fnmatch
+import pathlib
+import platform
+import argparse
+import statistics
+
+import numpy as np
+import pandas as pd
+import pint
+from lfd_package import command_line, scenario_matrix, monte_carlo
+from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import classes, sizing_calcs as sizing, dispatch, costs, kernels, result_cache
+from lfd_package.modules import chp, thermal_storage, aux_boiler, cosizing, pareto, uncertainty
+
+BENCHMARK_DIR = scenario_matrix.PACKAGE_DIR / "results" / "benchmarks"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_GRID = "bundled_matrix.yaml"
+DEFAULT_THRESHOLD = 0.25
+
+# Differences smaller than this are timer noise and never count as a regression
+NOISE_FLOOR_S = 0.0005
+
+SUITES = ("engine", "reference")
+
+
+def build_case(job=None):
+    """
+    Initializes the classes of one case and precomputes the inputs of every benchmark with the
+    functions used by calc_results(), so each benchmark only times its own function.
+
+    Parameters
+    ----------
+    job: dict
+        job from scenario_matrix.expand_jobs() with the .yaml file, demand profile, and overrides.
+
+    Returns
+    -------
+    case: dict
+        contains the case name, .yaml file, overrides, class_dict, hourly arrays in fixed units
+        (kW, kWh, Btu/hr, Btu), and equipment sizes.
+    """
+    if job is not None:
+        overrides = dict(job["overrides"], demand_filename=job["profile"])
+        class_dict = command_line.load_class_dict(yaml_filename=job["yaml"], overrides=overrides)
+        demand = class_dict["demand"]
+        case = {"name": "{}|{}".format(pathlib.Path(job["yaml"]).name, job["profile"]), "yaml": job["yaml"],
+                "overrides": overrides, "class_dict": class_dict,
+                "dem_el_kw": demand.el.to(ureg.kW).magnitude,
+                "dem_hl_btuh": demand.hl.to(ureg.Btu / ureg.hour).magnitude,
+                "boiler_size_btuh": demand.annual_peak_hl.to(ureg.Btu / ureg.hour).magnitude,
+                "min_pl": class_dict["chp"].min_pl, "tes_start": class_dict["tes"].start,
+                "ab_eff": class_dict["ab"].eff}
+
+        for mode in ("ELF", "TLF", "Peak"):
+            chp_size = sizing.size_chp(load_following_type=mode, class_dict=class_dict)
+            case["chp_size_{}".format(mode)] = chp_size
+            case["chp_size_kw_{}".format(mode)] = chp_size.to(ureg.kW).magnitude
+            case["tes_size_btu_{}".format(mode)] = dispatch.size_tes(dem_hl_btuh=case["dem_hl_btuh"],
+                                                                     chp_size_kw=case["chp_size_kw_{}".format(mode)])
+
+        # Hourly dispatch of each operating mode, as in calc_results()
+        case["elf_gen_kwh"] = dispatch.elf_calc_electricity_generated(
+            dem_el_kw=case["dem_el_kw"], chp_size_kw=case["chp_size_kw_ELF"], min_pl=case["min_pl"])
+        case["elf_heat_btuh"] = dispatch.calc_hourly_heat_generated(chp_gen_kwh=case["elf_gen_kwh"])
+        case["elf_tes_flow_btuh"], _ = dispatch.calc_tes_heat_flow_and_soc(
+            dem_hl_btuh=case["dem_hl_btuh"], chp_gen_btuh=case["elf_heat_btuh"],
+            tes_size_btu=case["tes_size_btu_ELF"], tes_start=case["tes_start"])
+
+        case["tlf_heat_btuh"], case["tlf_tes_flow_btuh"], _ = dispatch.tlf_calc_hourly_heat_chp_tes_soc(
+            dem_hl_btuh=case["dem_hl_btuh"], chp_size_kw=case["chp_size_kw_TLF"],
+            tes_size_btu=case["tes_size_btu_TLF"], min_pl=case["min_pl"], tes_start=case["tes_start"])
+        case["tlf_gen_kwh"] = dispatch.tlf_calc_electricity_generated(chp_gen_btuh=case["tlf_heat_btuh"])
+        case["tlf_sold_kwh"] = dispatch.tlf_calc_electricity_sold(dem_el_kw=case["dem_el_kw"],
+                                                                  chp_gen_kwh=case["tlf_gen_kwh"])
+
+        case["peak_gen_kwh"], case["peak_sold_kwh"] = dispatch.pp_calc_electricity_gen_sold(
+            dem_el_kw=case["dem_el_kw"], chp_size_kw=case["chp_size_kw_Peak"], min_pl=case["min_pl"])
+        case["peak_heat_btuh"] = dispatch.calc_hourly_heat_generated(chp_gen_kwh=case["peak_gen_kwh"])
+        case["peak_tes_flow_btuh"], _ = dispatch.calc_tes_heat_flow_and_soc(
+            dem_hl_btuh=case["dem_hl_btuh"], chp_gen_btuh=case["peak_heat_btuh"],
+            tes_size_btu=case["tes_size_btu_Peak"], tes_start=case["tes_start"])
+
+        for prefix in ("elf", "tlf", "peak"):
+            case[prefix + "_bought_kwh"] = dispatch.calc_electricity_bought(dem_el_kw=case["dem_el_kw"],
+                                                                            chp_gen_kwh=case[prefix + "_gen_kwh"])
+            boiler_btuh = dispatch.calc_aux_boiler_output_rate(
+                dem_hl_btuh=case["dem_hl_btuh"], chp_gen_btuh=case[prefix + "_heat_btuh"],
+                tes_flow_btuh=case[prefix + "_tes_flow_btuh"], boiler_size_btuh=case["boiler_size_btuh"])
+            case[prefix + "_fuel_btu"] = dispatch.chp_calc_hourly_fuel_use(chp_gen_kwh=case[prefix + "_gen_kwh"]) + \
+                dispatch.ab_calc_hourly_fuel_use(ab_heat_rate_btuh=boiler_btuh, ab_eff=case["ab_eff"])
+        return case
+
+
+###########################
+# Engine suite: functions used by calc_results()
+###########################
+
+def _demand_kwargs(case):
+    data = command_line.read_inputs(yaml_filename=case["yaml"], overrides=case["overrides"])
+    return {"file_name": data["demand_filename"], "city": data["city"], "state": data["state"],
+            "grid_efficiency": data["grid_efficiency"], "sim_ab_efficiency": data["energy_plus_eff"],
+            "winter_start_inclusive": data["winter_start_inclusive"],
+            "summer_start_inclusive": data["summer_start_inclusive"]}
+
+
+def _bench_demand_load_csv(case):
+    kwargs = _demand_kwargs(case)
+
+    def run():
+        # An empty LFD_CACHE_DIR turns the profile cache off, so the .csv file is parsed
+        cache_dir = os.environ.get("LFD_CACHE_DIR")
+        os.environ["LFD_CACHE_DIR"] = ""
+        try:
+            classes.EnergyDemand(**kwargs)
+        finally:
+            if cache_dir is None:
+                del os.environ["LFD_CACHE_DIR"]
+            else:
+                os.environ["LFD_CACHE_DIR"] = cache_dir
+    return run
+
+
+def _bench_demand_load_cached(case):
+    kwargs = _demand_kwargs(case)
+    return lambda: classes.EnergyDemand(**kwargs)
+
+
+def _bench_size_chp(case):
+    return lambda: [sizing.size_chp(load_following_type=mode, class_dict=case["class_dict"])
+                    for mode in ("ELF", "TLF", "Peak")]
+
+
+def _bench_max_rect_curve(case):
+    # size_chp() reuses the curves cached by EnergyDemand, so this times building them
+    return lambda: [sizing.LoadDurationCurve(demand=case[name]).max_rect_size()
+                    for name in ("dem_el_kw", "dem_hl_btuh")]
+
+
+def _bench_size_tes(case):
+    return lambda: [dispatch.size_tes(dem_hl_btuh=case["dem_hl_btuh"], chp_size_kw=case["chp_size_kw_" + mode])
+                    for mode in ("ELF", "TLF", "Peak")]
+
+
+def _bench_size_tes_sweep(case):
+    # TES sizes of 1000 candidate CHP sizes, up to the peak electrical demand, in one call
+    chp_sizes_kw = np.linspace(0.0, float(np.max(case["dem_el_kw"])), 1000)
+    return lambda: dispatch.size_tes(dem_hl_btuh=case["dem_hl_btuh"], chp_size_kw=chp_sizes_kw)
+
+
+def _bench_cosize_grid(case):
+    # 20 CHP sizes x 10 TES sizes for each operating mode
+    return lambda: cosizing.cosize(class_dict=case["class_dict"], no_chp_sizes=20, no_tes_sizes=10)
+
+
+def _bench_pareto_front(case):
+    # Frontier of 20 CHP sizes x 10 TES sizes for each operating mode, in this process
+    candidates = pareto.candidate_designs(class_dict=case["class_dict"], no_chp_sizes=20, no_tes_sizes=10)
+    return lambda: pareto.explore(class_dict=case["class_dict"], candidates=candidates)
+
+
+def _bench_monte_carlo(case):
+    # 100,000 samples of the bundled input distributions, including the dispatch of each mode
+    inputs = monte_carlo.load_distributions(dist_filename="bundled_uncertainty.yaml")["inputs"]
+    return lambda: uncertainty.simulate(class_dict=case["class_dict"], inputs=inputs, no_samples=100000)
+
+
+def _bench_elf_calc_electricity_generated(case):
+    return lambda: dispatch.elf_calc_electricity_generated(dem_el_kw=case["dem_el_kw"], min_pl=case["min_pl"],
+                                                           chp_size_kw=case["chp_size_kw_ELF"])
+
+
+def _bench_pp_calc_electricity_gen_sold(case):
+    return lambda: dispatch.pp_calc_electricity_gen_sold(dem_el_kw=case["dem_el_kw"], min_pl=case["min_pl"],
+                                                         chp_size_kw=case["chp_size_kw_Peak"])
+
+
+def _bench_calc_hourly_heat_generated(case):
+    return lambda: dispatch.calc_hourly_heat_generated(chp_gen_kwh=case["elf_gen_kwh"])
+
+
+def _bench_calc_electricity_bought(case):
+    return lambda: dispatch.calc_electricity_bought(dem_el_kw=case["dem_el_kw"], chp_gen_kwh=case["elf_gen_kwh"])
+
+
+def _bench_tlf_calc_hourly_heat_chp_tes_soc(case):
+    return lambda: dispatch.tlf_calc_hourly_heat_chp_tes_soc(dem_hl_btuh=case["dem_hl_btuh"],
+                                                             chp_size_kw=case["chp_size_kw_TLF"],
+                                                             tes_size_btu=case["tes_size_btu_TLF"],
+                                                             min_pl=case["min_pl"], tes_start=case["tes_start"])
+
+
+def _bench_tlf_calc_electricity_generated(case):
+    return lambda: dispatch.tlf_calc_electricity_generated(chp_gen_btuh=case["tlf_heat_btuh"])
+
+
+def _bench_tlf_calc_electricity_sold(case):
+    return lambda: dispatch.tlf_calc_electricity_sold(dem_el_kw=case["dem_el_kw"], chp_gen_kwh=case["tlf_gen_kwh"])
+
+
+def _bench_chp_calc_hourly_fuel_use(case):
+    return lambda: dispatch.chp_calc_hourly_fuel_use(chp_gen_kwh=case["elf_gen_kwh"])
+
+
+def _bench_calc_tes_heat_flow_and_soc(case):
+    return lambda: dispatch.calc_tes_heat_flow_and_soc(dem_hl_btuh=case["dem_hl_btuh"],
+                                                       chp_gen_btuh=case["elf_heat_btuh"],
+                                                       tes_size_btu=case["tes_size_btu_ELF"],
+                                                       tes_start=case["tes_start"])
+
+
+def _bench_calc_aux_boiler_output_rate(case):
+    return lambda: dispatch.calc_aux_boiler_output_rate(dem_hl_btuh=case["dem_hl_btuh"],
+                                                        chp_gen_btuh=case["elf_heat_btuh"],
+                                                        tes_flow_btuh=case["elf_tes_flow_btuh"],
+                                                        boiler_size_btuh=case["boiler_size_btuh"])
+
+
+def _bench_electric_tariff(case):
+    # Baseline and the three operating modes in one batched evaluation, as in calc_results()
+    electric_tariff = case["class_dict"]["costs"].electric_tariff
+    bought = np.vstack([case["dem_el_kw"], case["elf_bought_kwh"], case["tlf_bought_kwh"], case["peak_bought_kwh"]])
+    sold = np.vstack([case["tlf_sold_kwh"], case["peak_sold_kwh"]])
+    return lambda: (electric_tariff.calc_annual_charges(electricity_bought_hourly=bought),
+                    electric_tariff.calc_annual_charges(electricity_bought_hourly=sold, pp_rev=True))
+
+
+def _bench_fuel_tariff(case):
+    fuel_tariff = case["class_dict"]["costs"].fuel_tariff
+    fuel = np.vstack([case["dem_hl_btuh"] / case["ab_eff"], case["elf_fuel_btu"], case["tlf_fuel_btu"],
+                      case["peak_fuel_btu"]])
+    return lambda: fuel_tariff.calc_annual_charges(fuel_bought_hourly=fuel)
+
+
+def _bench_calc_costs(case):
+    bill = Q_(1000, '')
+    return lambda: costs.calc_costs(thermal_cost_new=bill, electrical_cost_new=bill, pct_incentive=0.375,
+                                    tes_size=Q_(case["tes_size_btu_ELF"], ureg.Btu), class_dict=case["class_dict"],
+                                    thermal_cost_baseline=2 * bill, electrical_cost_baseline=2 * bill,
+                                    load_following_type="ELF", chp_size=case["chp_size_ELF"],
+                                    chp_gen_hourly_kwh=Q_(case["elf_gen_kwh"], ureg.kWh),
+                                    tes_heat_flow_list=Q_(case["elf_tes_flow_btuh"], ureg.Btu / ureg.hour),
+                                    pp_revenue=Q_(0, ''))
+
+
+def _bench_calc_results(case):
+    return lambda: command_line.calc_results(class_dict=case["class_dict"], return_hourly=True)
+
+
+def _bench_full_run(case):
+    def run():
+        # Same work as main() apart from storing the results: read the .yaml file, load the
+        # profile (from the profile cache), and run every operating mode
+        classes.clear_energy_demand_cache()
+        command_line.calc_results_cached(yaml_filename=case["yaml"], overrides=case["overrides"],
+                                         return_hourly=True, use_cache=False)
+    return run
+
+
+###########################
+# Reference suite: hour-by-hour Quantity functions
+###########################
+
+def _quantity_list(values, units):
+    return list(Q_(np.asarray(values, dtype=float), units))
+
+
+def _bench_ref_size_tes(case):
+    return lambda: sizing.size_tes(chp_size=case["chp_size_ELF"], class_dict=case["class_dict"])
+
+
+def _bench_ref_elf_calc_electricity_generated(case):
+    return lambda: chp.elf_calc_electricity_generated(chp_size=case["chp_size_ELF"], class_dict=case["class_dict"])
+
+
+def _bench_ref_elf_calc_hourly_heat_generated(case):
+    gen = _quantity_list(case["elf_gen_kwh"], ureg.kWh)
+    return lambda: chp.elf_calc_hourly_heat_generated(chp_gen_hourly_kwh=gen, class_dict=case["class_dict"])
+
+
+def _bench_ref_pp_calc_electricity_gen_sold(case):
+    return lambda: chp.pp_calc_electricity_gen_sold(chp_size=case["chp_size_Peak"], class_dict=case["class_dict"])
+
+
+def _bench_ref_pp_calc_hourly_heat_generated(case):
+    gen = _quantity_list(case["peak_gen_kwh"], ureg.kWh)
+    return lambda: chp.pp_calc_hourly_heat_generated(chp_gen_hourly_kwh=gen, class_dict=case["class_dict"])
+
+
+def _bench_ref_calc_electricity_bought(case):
+    gen = _quantity_list(case["elf_gen_kwh"], ureg.kWh)
+    return lambda: chp.calc_electricity_bought(chp_gen_hourly_kwh=gen, chp_size=case["chp_size_ELF"],
+                                               class_dict=case["class_dict"])
+
+
+def _bench_ref_calc_hourly_fuel_use(case):
+    gen = _quantity_list(case["elf_gen_kwh"], ureg.kWh)
+    return lambda: chp.calc_hourly_fuel_use(chp_size=case["chp_size_ELF"], class_dict=case["class_dict"],
+                                            chp_electric_gen_hourly_kwh=gen)
+
+
+def _bench_ref_tlf_calc_hourly_heat_chp_tes_soc(case):
+    tes_size = Q_(case["tes_size_btu_TLF"], ureg.Btu)
+    return lambda: chp.tlf_calc_hourly_heat_chp_tes_soc(chp_size=case["chp_size_TLF"], tes_size=tes_size,
+                                                        class_dict=case["class_dict"])
+
+
+def _bench_ref_tlf_calc_electricity_generated(case):
+    heat = _quantity_list(case["tlf_heat_btuh"], ureg.Btu / ureg.hour)
+    return lambda: chp.tlf_calc_electricity_generated(chp_gen_hourly_btuh=heat, class_dict=case["class_dict"])
+
+
+def _bench_ref_tlf_calc_electricity_sold(case):
+    gen = _quantity_list(case["tlf_gen_kwh"], ureg.kWh)
+    return lambda: chp.tlf_calc_electricity_sold(chp_gen_hourly_kwh=gen, class_dict=case["class_dict"])
+
+
+def _bench_ref_calc_tes_heat_flow_and_soc(case):
+    heat = _quantity_list(case["elf_heat_btuh"], ureg.Btu / ureg.hour)
+    tes_size = Q_(case["tes_size_btu_ELF"], ureg.Btu)
+    return lambda: thermal_storage.calc_tes_heat_flow_and_soc(chp_gen_hourly_btuh=heat, tes_size=tes_size,
+                                                              load_following_type="ELF",
+                                                              class_dict=case["class_dict"])
+
+
+def _bench_ref_calc_aux_boiler_output_rate(case):
+    heat = {"ELF": _quantity_list(case["elf_heat_btuh"], ureg.Btu / ureg.hour)}
+    tes_flow = _quantity_list(case["elf_tes_flow_btuh"], ureg.Btu / ureg.hour)
+    tes_size = Q_(case["tes_size_btu_ELF"], ureg.Btu)
+    return lambda: aux_boiler.calc_aux_boiler_output_rate(chp_size=case["chp_size_ELF"], tes_size=tes_size,
+                                                          chp_gen_hourly_btuh_dict=heat, load_following_type="ELF",
+                                                          class_dict=case["class_dict"], tes_heat_flow_btuh=tes_flow)
+
+
+def _bench_ref_calc_electric_charges(case):
+    bought = _quantity_list(case["elf_bought_kwh"], ureg.kWh)
+    return lambda: costs.calc_electric_charges(class_dict=case["class_dict"], electricity_bought_hourly=bought)
+
+
+def _bench_ref_calc_fuel_charges(case):
+    fuel = _quantity_list(case["elf_fuel_btu"], ureg.Btu)
+    return lambda: costs.calc_fuel_charges(class_dict=case["class_dict"], fuel_bought_hourly=fuel)
+
+
+def _bench_ref_calc_pp_revenue(case):
+    sold = _quantity_list(case["tlf_sold_kwh"], ureg.kWh)
+    return lambda: costs.calc_pp_revenue(class_dict=case["class_dict"], electricity_sold_hourly=sold)
+
+
+# Benchmark name: (suite, function that takes a case and returns the call to time)
+BENCHMARKS = {
+    "demand_load_csv": ("engine", _bench_demand_load_csv),
+    "demand_load_cached": ("engine", _bench_demand_load_cached),
+    "size_chp": ("engine", _bench_size_chp),
+    "max_rect_curve": ("engine", _bench_max_rect_curve),
+    "size_tes": ("engine", _bench_size_tes),
+    "size_tes_sweep": ("engine", _bench_size_tes_sweep),
+    "cosize_grid": ("engine", _bench_cosize_grid),
+    "pareto_front": ("engine", _bench_pareto_front),
+    "monte_carlo": ("engine", _bench_monte_carlo),
+    "dispatch.elf_calc_electricity_generated": ("engine", _bench_elf_calc_electricity_generated),
+    "dispatch.pp_calc_electricity_gen_sold": ("engine", _bench_pp_calc_electricity_gen_sold),
+    "dispatch.calc_hourly_heat_generated": ("engine", _bench_calc_hourly_heat_generated),
+    "dispatch.calc_electricity_bought": ("engine", _bench_calc_electricity_bought),
+    "dispatch.tlf_calc_hourly_heat_chp_tes_soc": ("engine", _bench_tlf_calc_hourly_heat_chp_tes_soc),
+    "dispatch.tlf_calc_electricity_generated": ("engine", _bench_tlf_calc_electricity_generated),
+    "dispatch.tlf_calc_electricity_sold": ("engine", _bench_tlf_calc_electricity_sold),
+    "dispatch.chp_calc_hourly_fuel_use": ("engine", _bench_chp_calc_hourly_fuel_use),
+    "dispatch.calc_tes_heat_flow_and_soc": ("engine", _bench_calc_tes_heat_flow_and_soc),
+    "dispatch.calc_aux_boiler_output_rate": ("engine", _bench_calc_aux_boiler_output_rate),
+    "tariffs.electric": ("engine", _bench_electric_tariff),
+    "tariffs.fuel": ("engine", _bench_fuel_tariff),
+    "costs.calc_costs": ("engine", _bench_calc_costs),
+    "calc_results": ("engine", _bench_calc_results),
+    "full_run": ("engine", _bench_full_run),
+    "sizing.size_tes": ("reference", _bench_ref_size_tes),
+    "chp.elf_calc_electricity_generated": ("reference", _bench_ref_elf_calc_electricity_generated),
+    "chp.elf_calc_hourly_heat_generated": ("reference", _bench_ref_elf_calc_hourly_heat_generated),
+    "chp.pp_calc_electricity_gen_sold": ("reference", _bench_ref_pp_calc_electricity_gen_sold),
+    "chp.pp_calc_hourly_heat_generated": ("reference", _bench_ref_pp_calc_hourly_heat_generated),
+    "chp.calc_electricity_bought": ("reference", _bench_ref_calc_electricity_bought),
+    "chp.calc_hourly_fuel_use": ("reference", _bench_ref_calc_hourly_fuel_use),
+    "chp.tlf_calc_hourly_heat_chp_tes_soc": ("reference", _bench_ref_tlf_calc_hourly_heat_chp_tes_soc),
+    "chp.tlf_calc_electricity_generated": ("reference", _bench_ref_tlf_calc_electricity_generated),
+    "chp.tlf_calc_electricity_sold": ("reference", _bench_ref_tlf_calc_electricity_sold),
+    "thermal_storage.calc_tes_heat_flow_and_soc": ("reference", _bench_ref_calc_tes_heat_flow_and_soc),
+    "aux_boiler.calc_aux_boiler_output_rate": ("reference", _bench_ref_calc_aux_boiler_output_rate),
+    "costs.calc_electric_charges": ("reference", _bench_ref_calc_electric_charges),
+    "costs.calc_fuel_charges": ("reference", _bench_ref_calc_fuel_charges),
+    "costs.calc_pp_revenue": ("reference", _bench_ref_calc_pp_revenue),
+}
+
+
+def time_call(func=None, repeat=5):
+    """
+    Times a function after one untimed warm-up call (compiled kernels, caches). Garbage
+    collection is paused while timing, as in timeit.
+
+    Parameters
+    ----------
+    func: function
+        function without arguments.
+    repeat: int
+        number of timed calls.
+
+    Returns
+    -------
+    timing: dict
+        contains the minimum, median, and mean time of a call in seconds and the number of calls.
+    """
+    if func is not None:
+        func()
+        times = []
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(max(1, int(repeat))):
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return {"min": min(times), "median": statistics.median(times), "mean": statistics.mean(times),
+                "repeat": len(times)}
+
+
+def select_benchmarks(suite="engine", names=None):
+    """
+    Returns the names of the benchmarks to run.
+
+    Parameters
+    ----------
+    suite: str
+        "engine", "reference", or "all".
+    names: list
+        Optional. Benchmark names or glob patterns (ie: "dispatch.*") to keep.
+    """
+    selected = [name for name, (bench_suite, _) in BENCHMARKS.items() if suite in ("all", bench_suite)]
+    if names:
+        selected = [name for name in selected if any(fnmatch.fnmatch(name, pattern) for pattern in names)]
+    return selected
+
+
+def run_benchmarks(jobs=None, benchmark_names=None, repeat=5, verbose=True):
+    """
+    Runs the benchmarks on every case.
+
+    Parameters
+    ----------
+    jobs: list
+        cases from scenario_matrix.expand_jobs().
+    benchmark_names: list
+        keys of BENCHMARKS to run (see select_benchmarks()).
+    repeat: int
+        number of timed calls of each benchmark on each case.
+    verbose: bool
+        if True, each case is printed as it finishes.
+
+    Returns
+    -------
+    report: dict
+        contains the environment, the cases, the timing of each benchmark on each case, and the
+        total of the median times of each benchmark over all cases.
+    """
+    args_list = [jobs, benchmark_names]
+    if any(elem is None for elem in args_list) is False:
+        timings = {name: {} for name in benchmark_names}
+        case_names = []
+        start = time.perf_counter()
+        for job in jobs:
+            case = build_case(job=job)
+            case_names.append(case["name"])
+            for name in benchmark_names:
+                timings[name][case["name"]] = time_call(func=BENCHMARKS[name][1](case), repeat=repeat)
+            if verbose is True:
+                print("{} done ({:.1f} s)".format(case["name"], time.perf_counter() - start))
+
+        totals = {name: sum(timing["median"] for timing in timings[name].values()) for name in benchmark_names}
+        return {"created_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "environment": get_environment(),
+                "repeat": repeat, "cases": case_names, "totals": totals, "timings": timings}
+
+
+def get_environment():
+    """
+    Returns the versions and machine information saved with each benchmark report.
+    """
+    return {"package": result_cache.get_package_version(), "engine": result_cache.get_engine_version(),
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "pint": pint.__version__, "numba_compiled": kernels.is_compiled(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpu_count": os.cpu_count()}
+
+
+def compare_reports(report=None, baseline=None, threshold=DEFAULT_THRESHOLD, thresholds=None):
+    """
+    Compares the benchmarks of a report with a baseline report over the cases they share.
+
+    Parameters
+    ----------
+    report: dict
+        report from run_benchmarks().
+    baseline: dict
+        earlier report from run_benchmarks().
+    threshold: float
+        allowed slow-down as a fraction of the baseline time (ie: 0.25 allows 25% slower).
+    thresholds: dict
+        Optional. Benchmark names (or glob patterns) and the threshold of each, overriding
+        threshold.
+
+    Returns
+    -------
+    comparison: list
+        contains one dict per benchmark found in both reports with the baseline and current
+        total time, their ratio, the threshold, and whether the benchmark regressed.
+    """
+    args_list = [report, baseline]
+    if any(elem is None for elem in args_list) is False:
+        comparison = []
+        for name, case_timings in report["timings"].items():
+            baseline_timings = baseline.get("timings", {}).get(name)
+            if not baseline_timings:
+                continue
+            shared_cases = [case for case in case_timings if case in baseline_timings]
+            if not shared_cases:
+                continue
+
+            current_s = sum(case_timings[case]["median"] for case in shared_cases)
+            baseline_s = sum(baseline_timings[case]["median"] for case in shared_cases)
+            allowed = threshold
+            for pattern, value in (thresholds or {}).items():
+                if fnmatch.fnmatch(name, pattern):
+                    allowed = value
+            ratio = current_s / baseline_s if baseline_s > 0 else float("inf")
+            regressed = bool(current_s > baseline_s * (1 + allowed) and current_s - baseline_s > NOISE_FLOOR_S)
+            comparison.append({"benchmark": name, "cases": len(shared_cases), "baseline_s": baseline_s,
+                               "current_s": current_s, "ratio": ratio, "threshold": allowed,
+                               "regressed": regressed})
+        return comparison
+
+
+def format_comparison(comparison=None):
+    """
+    Formats a comparison from compare_reports() as a table for the terminal.
+    """
+    if comparison is not None:
+        lines = ["{:<46} {:>6} {:>12} {:>12} {:>7}  {}".format("Benchmark", "Cases", "Baseline [s]", "Current [s]",
+                                                              "Ratio", "Status")]
+        for row in comparison:
+            status = "REGRESSED (>{:.0%})".format(row["threshold"]) if row["regressed"] else "ok"
+            lines.append("{:<46} {:>6} {:>12.5f} {:>12.5f} {:>7.2f}  {}".format(
+                row["benchmark"][:46], row["cases"], row["baseline_s"], row["current_s"], row["ratio"], status))
+        return "\n".join(lines)
+
+
+def _parse_thresholds(items):
+    # "name=0.1" items from the command line
+    thresholds = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        try:
+            thresholds[name] = float(value)
+        except ValueError:
+            raise Exception("Threshold {} must be written as benchmark=fraction (ie: full_run=0.1)".format(item))
+    return thresholds
+
+
+def main():
+    """
+    Benchmark command line interface. Runs the benchmarks, saves the report, and compares it
+    with the baseline if one exists. The exit status is 1 if any benchmark regressed.
+    """
+    parser = argparse.ArgumentParser(description="Time the analysis on the bundled demand profiles")
+    parser.add_argument("--grid", help="scenario grid with the cases (default: {})".format(DEFAULT_GRID), type=str,
+                        default=DEFAULT_GRID)
+    parser.add_argument("--profiles", help="only run cases whose .csv file matches these glob patterns", type=str,
+                        nargs="+", default=None)
+    parser.add_argument("--suite", help="benchmarks to run (default: engine)", type=str, default="engine",
+                        choices=list(SUITES) + ["all"])
+    parser.add_argument("--bench", help="only run benchmarks matching these names or glob patterns",
+                        dest="bench_names", type=str, nargs="+", default=None)
+    parser.add_argument("--repeat", help="timed calls of each benchmark on each case (default: 5)", type=int,
+                        default=5)
+    parser.add_argument("--out", help="path of the JSON report (default: results/benchmarks/benchmark_{time}.json)",
+                        type=str, default=None)
+    parser.add_argument("--baseline", help="baseline report to compare with (default: {})".format(DEFAULT_BASELINE),
+                        type=str, default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", help="save this report as the baseline instead of comparing",
+                        action="store_true")
+    parser.add_argument("--threshold", help="allowed slow-down as a fraction (default: {})".format(DEFAULT_THRESHOLD),
+                        type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--thresholds", help="per-benchmark thresholds as name=fraction (glob patterns allowed)",
+                        type=str, nargs="+", default=None)
+    args = parser.parse_args()
+
+    thresholds = _parse_thresholds(args.thresholds)
+    jobs, _ = scenario_matrix.expand_jobs(grid=scenario_matrix.load_grid(grid_filename=args.grid))
+    if args.profiles:
+        jobs = [job for job in jobs if any(fnmatch.fnmatch(job["profile"], pattern) for pattern in args.profiles)]
+    benchmark_names = select_benchmarks(suite=args.suite, names=args.bench_names)
+    if not jobs or not benchmark_names:
+        raise Exception("No cases or benchmarks selected")
+
+    print("Running {} benchmarks on {} cases.".format(len(benchmark_names), len(jobs)))
+    report = run_benchmarks(jobs=jobs, benchmark_names=benchmark_names, repeat=args.repeat)
+    report["grid"] = args.grid
+
+    out_path = pathlib.Path(args.out) if args.out else \
+        BENCHMARK_DIR / "benchmark_{}.json".format(time.strftime("%Y%m%dT%H%M%S"))
+    out_paths = [out_path]
+    if args.save_baseline is True:
+        out_paths.append(pathlib.Path(args.baseline))
+    for path in out_paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+    print("...")
+    print("Report saved to {}".format(" and ".join(str(path) for path in out_paths)))
+
+    if args.save_baseline is True:
+        return
+    if not pathlib.Path(args.baseline).exists():
+        print("No baseline at {}. Run with --save-baseline to store one.".format(args.baseline))
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparison = compare_reports(report=report, baseline=baseline, threshold=args.threshold, thresholds=thresholds)
+    print(format_comparison(comparison=comparison))
+    if baseline.get("environment") != report["environment"]:
+        print("Note: the baseline was recorded in a different environment, so times may not be comparable.")
+
+    regressions = [row["benchmark"] for row in comparison if row["regressed"]]
+    if regressions:
+        print("{} benchmarks regressed: {}".format(len(regressions), ", ".join(regressions)))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,16 @@ Module Description:
     from the file to initialize the class variables.
 """
 
-import os.path
-import pint
-import pandas as pd
-import openpyxl
+import numpy as np
 from lfd_package.modules.__init__ import ureg, Q_
-from lfd_package.modules import aux_boiler as boiler, classes, chp as cogen
-from lfd_package.modules import sizing_calcs as sizing, plots, emissions
-from lfd_package.modules import thermal_storage as storage, costs
+from lfd_package.modules import classes
+from lfd_package.modules import sizing_calcs as sizing, emissions
+from lfd_package.modules import costs, dispatch, engines, result_cache, profiling
+from lfd_package import results_store, render_plots
 import pathlib
 import argparse
+import cProfile
+import time
 import yaml
 
 
@@ -35,70 +35,176 @@ def run(args):
 
     Returns
     -------
-    chp: CHP class
-        Initialized class using input data from .yaml file
-    ab: AuxBoiler class
-        Initialized class using input data from .yaml file
-    demand: EnergyDemand class
-        Initialized class using input data from .yaml file
-    tes: TES class
-        Initialized class using input data from .yaml file
+    class_dict: dict
+        contains initialized class data using CLI inputs (see load_class_dict())
     """
     yaml_filename = args.input   # these match the "dest": dest="input"
-    cwd = pathlib.Path(__file__).parent.resolve() / 'input_yaml'
-
-    with open(cwd / yaml_filename) as f:
-        data = yaml.load(f, Loader=Loader)
-    f.close()
-
-    # Class initialization using CLI arguments
-    demand = classes.EnergyDemand(file_name=data['demand_filename'], city=data['city'], state=data['state'],
-                                  grid_efficiency=data['grid_efficiency'], sim_ab_efficiency=data["energy_plus_eff"],
-                                  winter_start_inclusive=data['winter_start_inclusive'],
-                                  summer_start_inclusive=data['summer_start_inclusive'])
-    emissions_class = classes.Emissions(file_name=data['demand_filename'], city=data['city'], state=data['state'],
-                                        grid_efficiency=data['grid_efficiency'],
-                                        sim_ab_efficiency=data["energy_plus_eff"],
-                                        summer_start_inclusive=data['summer_start_inclusive'],
-                                        winter_start_inclusive=data['winter_start_inclusive'])
-    costs_class = classes.EnergyCosts(file_name=data['demand_filename'], city=data['city'], state=data['state'],
-                                      grid_efficiency=data['grid_efficiency'], no_apts=data['no_apts'],
-                                      winter_start_inclusive=data['winter_start_inclusive'],
-                                      summer_start_inclusive=data['summer_start_inclusive'],
-                                      sim_ab_efficiency=data["energy_plus_eff"], meter_type_el=data['meter_type_el'],
-                                      meter_type_fuel=data['meter_type_fuel'],
-                                      schedule_type_el=data['schedule_type_el'],
-                                      schedule_type_fuel=data['schedule_type_fuel'],
-                                      master_metered_el=data['master_metered_el'],
-                                      single_metered_el=data['single_metered_el'],
-                                      master_metered_fuel=data['master_metered_fuel'],
-                                      single_metered_fuel=data['single_metered_fuel'])
-    chp = classes.CHP(file_name=data['demand_filename'], city=data['city'], state=data['state'],
-                      grid_efficiency=data['grid_efficiency'], sim_ab_efficiency=data["energy_plus_eff"],
-                      summer_start_inclusive=data['summer_start_inclusive'],
-                      winter_start_inclusive=data['winter_start_inclusive'], turn_down_ratio=data['chp_turn_down'],
-                      chp_installed_cost=data['chp_installed_cost'], chp_om_cost=data['chp_om_cost'])
-    ab = classes.AuxBoiler(file_name=data['demand_filename'], city=data['city'], state=data['state'],
-                           grid_efficiency=data['grid_efficiency'],
-                           summer_start_inclusive=data['summer_start_inclusive'],
-                           winter_start_inclusive=data['winter_start_inclusive'],
-                           sim_ab_efficiency=data["energy_plus_eff"], efficiency=data['ab_eff'])
-    tes = classes.TES(file_name=data['demand_filename'], city=data['city'], state=data['state'],
-                      grid_efficiency=data['grid_efficiency'], sim_ab_efficiency=data["energy_plus_eff"],
-                      summer_start_inclusive=data['summer_start_inclusive'], start=data['tes_init'],
-                      winter_start_inclusive=data['winter_start_inclusive'],
-                      tes_installed_cost=data['tes_installed_cost'], tes_om_cost=data['tes_om_cost'])
-
-    class_dict = {
-        "demand": demand,
-        "emissions": emissions_class,
-        "costs": costs_class,
-        "chp": chp,
-        "ab": ab,
-        "tes": tes
-    }
-
-    return class_dict
+    return load_class_dict(yaml_filename=yaml_filename)
+
+
+def read_inputs(yaml_filename=None, overrides=None):
+    """
+    Reads a .yaml file and applies overrides to its values.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    overrides: dict
+        Optional. Contains .yaml keys and values that replace the ones read from the file
+        (ie: {"demand_filename": "STD2004_Fairbanks_AK.csv", "chp_turn_down": 2.0}).
+
+    Returns
+    -------
+    data: dict
+        input data from the .yaml file, after overrides.
+    """
+    if yaml_filename is not None:
+        cwd = pathlib.Path(__file__).parent.resolve() / 'input_yaml'
+
+        with open(cwd / yaml_filename) as f:
+            data = yaml.load(f, Loader=Loader)
+        f.close()
+
+        if overrides is not None:
+            data.update(overrides)
+        return data
+
+
+def load_class_dict(yaml_filename=None, overrides=None):
+    """
+    Reads a .yaml file and assigns its input data to the package's classes.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    overrides: dict
+        Optional. Contains .yaml keys and values that replace the ones read from the file
+        (see read_inputs()).
+
+    Returns
+    -------
+    class_dict: dict
+        contains the initialized CHP, AuxBoiler, EnergyDemand, TES, EnergyCosts, and
+        Emissions classes using input data from the .yaml file
+    """
+    if yaml_filename is not None:
+        data = read_inputs(yaml_filename=yaml_filename, overrides=overrides)
+        return build_class_dict(data=data)
+
+
+def build_class_dict(data=None, demand=None):
+    """
+    Assigns input data to the package's classes.
+
+    Parameters
+    ----------
+    data: dict
+        input data with the same keys as the .yaml files (see read_inputs()).
+    demand: EnergyDemand class
+        Optional. Demand profile to use instead of the one named in the input data, in which
+        case the demand file and its location parameters are not read from data.
+
+    Returns
+    -------
+    class_dict: dict
+        contains the initialized CHP, AuxBoiler, EnergyDemand, TES, EnergyCosts, and
+        Emissions classes (see load_class_dict())
+    """
+    if data is not None:
+        # Class initialization. The demand profile is parsed once and shared by reference.
+        if demand is None:
+            demand = classes.get_energy_demand(file_name=data['demand_filename'], city=data['city'],
+                                               state=data['state'],
+                                               grid_efficiency=data['grid_efficiency'],
+                                               sim_ab_efficiency=data["energy_plus_eff"],
+                                               winter_start_inclusive=data['winter_start_inclusive'],
+                                               summer_start_inclusive=data['summer_start_inclusive'])
+        emissions_class = classes.Emissions(demand=demand)
+        costs_class = classes.EnergyCosts(demand=demand, no_apts=data['no_apts'], meter_type_el=data['meter_type_el'],
+                                          meter_type_fuel=data['meter_type_fuel'],
+                                          schedule_type_el=data['schedule_type_el'],
+                                          schedule_type_fuel=data['schedule_type_fuel'],
+                                          master_metered_el=data['master_metered_el'],
+                                          single_metered_el=data['single_metered_el'],
+                                          master_metered_fuel=data['master_metered_fuel'],
+                                          single_metered_fuel=data['single_metered_fuel'])
+        chp = classes.CHP(demand=demand, turn_down_ratio=data['chp_turn_down'],
+                          chp_installed_cost=data['chp_installed_cost'], chp_om_cost=data['chp_om_cost'])
+        ab = classes.AuxBoiler(demand=demand, efficiency=data['ab_eff'])
+        tes = classes.TES(demand=demand, start=data['tes_init'], tes_installed_cost=data['tes_installed_cost'],
+                          tes_om_cost=data['tes_om_cost'])
+
+        class_dict = {
+            "demand": demand,
+            "emissions": emissions_class,
+            "costs": costs_class,
+            "chp": chp,
+            "ab": ab,
+            "tes": tes
+        }
+
+        return class_dict
+
+
+def calc_results_cached(yaml_filename=None, overrides=None, return_hourly=False, use_cache=True, engine=None):
+    """
+    Runs the analysis of a .yaml file, or returns the results of an identical earlier analysis
+    from the results cache (see result_cache.py) without building the classes.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    overrides: dict
+        Optional. Contains .yaml keys and values that replace the ones read from the file
+        (see read_inputs()).
+    return_hourly: bool
+        if True, the hourly series of each operating mode are returned as well.
+    use_cache: bool
+        if False, the analysis always runs and the cache is neither read nor written.
+    engine: str
+        "fast" or "reference" (see engines.py). Defaults to "fast". Results of each engine are
+        cached separately.
+
+    Returns
+    -------
+    run_result: dict
+        contains the location (city, state, and sheet name), the results table and hourly
+        series (pandas.DataFrame, hourly is None unless requested), and cache_hit (True if the
+        results came from the cache).
+    """
+    if yaml_filename is not None:
+        if engine is None:
+            engine = engines.DEFAULT_ENGINE
+        data = read_inputs(yaml_filename=yaml_filename, overrides=overrides)
+        run_result = {"city": str(data['city']).lower(), "state": str(data['state']).lower(),
+                      "sheet_name": data['demand_filename'], "results": None, "hourly": None, "cache_hit": False}
+
+        key = None
+        if use_cache is True:
+            with profiling.stage("cache_lookup"):
+                csv_path = classes.demand_file_path(file_name=data['demand_filename'])
+                key = result_cache.calc_result_key(inputs=data, csv_path=csv_path, engine=engine)
+                run_result["results"], run_result["hourly"] = result_cache.load_results(key=key, hourly=return_hourly)
+            if run_result["results"] is not None:
+                run_result["cache_hit"] = True
+                return run_result
+
+        with profiling.stage("load_inputs"):
+            class_dict = build_class_dict(data=data)
+        with profiling.stage("calc_results"):
+            if return_hourly is True:
+                run_result["results"], run_result["hourly"] = calc_results(class_dict=class_dict, return_hourly=True,
+                                                                           engine=engine)
+            else:
+                run_result["results"] = calc_results(class_dict=class_dict, engine=engine)
+
+        if key is not None:
+            with profiling.stage("cache_save"):
+                result_cache.save_results(key=key, df_results=run_result["results"], df_hourly=run_result["hourly"])
+        return run_result
 
 
 def main():
@@ -121,317 +227,258 @@ def main():
     parser = argparse.ArgumentParser(description="Import equipment operating parameter data")
     parser.add_argument("--in", help="filename for .yaml file with equipment data", dest="input", type=str,
                         required=True)
-    parser.set_defaults(func=run)
+    parser.add_argument("--store", help="path to the results store (default: results/results_store.sqlite)",
+                        type=str, default=None)
+    parser.add_argument("--excel", help="export the results store to Excel after the analysis",
+                        action="store_true")
+    parser.add_argument("--plots", help="draw the standard plots after the results are stored",
+                        action="store_true")
+    parser.add_argument("--no-cache", help="always run the analysis, without reading or writing the results cache",
+                        dest="use_cache", action="store_false")
+    parser.add_argument("--engine", help="calculation engine (default: {})".format(engines.DEFAULT_ENGINE), type=str,
+                        default=engines.DEFAULT_ENGINE, choices=list(engines.ENGINES))
+    parser.add_argument("--profile", help="record the time spent in each stage and save it as a JSON trace "
+                                          "(default: results/profiles/{city}_{state}_{time}.json)",
+                        dest="profile", type=str, nargs="?", const="", default=None)
+    parser.add_argument("--profile-stats", help="with --profile, also save a cProfile dump (.prof) next to the trace",
+                        action="store_true")
+    parser.add_argument("--profile-memory", help="with --profile, also trace memory allocations (slower)",
+                        action="store_true")
     args = parser.parse_args()
-    args.func(args)
 
-    # Retrieve initialized class from run() function
-    class_dict = dict(run(args))
+    profiler = None
+    if args.profile is not None:
+        profiling.enable(memory=args.profile_memory)
+        if args.profile_stats is True:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+    with profiling.stage("analysis"):
+        run_result = calc_results_cached(yaml_filename=args.input, return_hourly=True, use_cache=args.use_cache,
+                                         engine=args.engine)
+    with profiling.stage("store"):
+        run_key = results_store.append_run(df_results=run_result["results"], df_hourly=run_result["hourly"],
+                                           city=run_result["city"], state=run_result["state"],
+                                           sheet_name=run_result["sheet_name"], source=args.input,
+                                           store_path=args.store)
+    if args.excel is True:
+        with profiling.stage("excel"):
+            results_store.export_excel(store_path=args.store)
+
+    print("Analysis for {}, {} completed (run {}{}).".format(run_result["city"], run_result["state"], run_key,
+                                                             ", from cache" if run_result["cache_hit"] else ""))
+
+    # Plots are drawn from the stored hourly series, after the results are safely saved
+    if args.plots is True:
+        print("...")
+        print("Generating plots.")
+        with profiling.stage("plots"):
+            render_plots.render_runs(run_keys=[run_key], store_path=args.store)
+
+    if args.profile is not None:
+        write_profile(trace_path=args.profile, profiler=profiler, run_result=run_result, run_key=run_key,
+                      yaml_filename=args.input)
+
+
+def write_profile(trace_path=None, profiler=None, run_result=None, run_key=None, yaml_filename=None):
+    """
+    Stops profiling, saves the JSON trace (and cProfile dump) of the run, and prints the time
+    spent in each top level stage.
+
+    Parameters
+    ----------
+    trace_path: str
+        path of the JSON trace. If empty, the trace is saved in /results/profiles.
+    profiler: cProfile.Profile
+        Optional. Running profiler whose statistics are saved next to the trace (.prof file).
+    run_result: dict
+        result of the run (see calc_results_cached()).
+    run_key: str
+        key of the run in the results store.
+    yaml_filename: str
+        .yaml file analyzed.
+    """
+    if trace_path is not None:
+        if profiler is not None:
+            profiler.disable()
+        profiling.disable()
+
+        if trace_path == "":
+            trace_path = results_store.PACKAGE_DIR / "results" / "profiles" / "{}_{}_{}.json".format(
+                run_result["city"], run_result["state"], time.strftime("%Y%m%dT%H%M%S"))
+        trace_path = pathlib.Path(trace_path)
+        profiling.write_trace(trace_path=trace_path,
+                              metadata={"yaml": yaml_filename, "run_key": run_key, "city": run_result["city"],
+                                        "state": run_result["state"], "sheet_name": run_result["sheet_name"],
+                                        "cache_hit": run_result["cache_hit"]})
+
+        print("...")
+        print(profiling.format_summary())
+        print("Profile trace saved to {}".format(trace_path))
+        if profiler is not None:
+            # Readable with pstats, snakeviz, or flameprof (flame graphs)
+            profiler.dump_stats(str(trace_path.with_suffix(".prof")))
+            print("cProfile statistics saved to {}".format(trace_path.with_suffix(".prof")))
+
+
+def calc_results(class_dict=None, return_hourly=False, engine=None):
+    """
+    Runs the energy, cost, and emissions analysis of the ELF, TLF, and PP operating modes
+    for one location.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see load_class_dict())
+    return_hourly: bool
+        if True, the hourly series of each operating mode are returned as well.
+    engine: str
+        "fast" or "reference" (see engines.py). Defaults to "fast".
+
+    Returns
+    -------
+    df_results: pandas.DataFrame
+        table of results comparing the Baseline case with each operating mode.
+    df_hourly: pandas.DataFrame
+        only if return_hourly is True. Hourly demand and equipment series, one column per
+        series named with its mode prefix and units (ie: "elf_chp_gen_btuh").
+    """
+    # pandas is imported on first use, since importing it is most of the start-up time of the package
+    import pandas as pd
+    profiling.begin_stage("sizing")
 
     # Retrieve CHP sizes
     chp_size_tlf = sizing.size_chp(load_following_type='TLF', class_dict=class_dict)
     chp_size_elf = sizing.size_chp(load_following_type='ELF', class_dict=class_dict)
     chp_size_peak = sizing.size_chp(load_following_type='Peak', class_dict=class_dict)
 
-    # Initialize empty dictionaries
-    chp_gen_hourly_kwh_dict = {}
-    chp_gen_hourly_btuh_dict = {}
+    # Hourly dispatch, TES sizes, and utility bills of every operating mode (see engines.py). Hourly
+    # series are float arrays in fixed units (kW, kWh, Btu/hr, Btu); Quantities are attached to the totals
+    profiling.next_stage("dispatch")
+    hourly, tes_sizes_btu, bills = engines.run_engine(class_dict=class_dict, engine=engine,
+                                                      chp_sizes={"ELF": chp_size_elf, "TLF": chp_size_tlf,
+                                                                 "Peak": chp_size_peak})
+    tes_size_elf = Q_(tes_sizes_btu["ELF"], ureg.Btu)
+    tes_size_tlf = Q_(tes_sizes_btu["TLF"], ureg.Btu)
+    tes_size_peak = Q_(tes_sizes_btu["Peak"], ureg.Btu)
+
+    thermal_cost_baseline, elf_thermal_cost_total, tlf_thermal_cost_total, peak_thermal_cost_total = \
+        [Q_(bill, '') for bill in bills["fuel"]]
+    electric_cost_baseline, elf_electric_cost_new, tlf_electric_cost_new, peak_electric_cost_new = \
+        [Q_(bill, '') for bill in bills["electric"]]
+    tlf_pp_revenue, peak_pp_revenue = [Q_(rev, '') for rev in bills["pp_revenue"]]
 
     ##########################################################################################################
 
     """
-    ELF Analysis
+    Annual Totals - ELF, TLF, and PP
     """
-
-    ###########################
-    # Electrical Energy Savings
-    ###########################
-    elf_electric_gen_list = cogen.elf_calc_electricity_generated(chp_size=chp_size_elf, class_dict=class_dict)
-    elf_electricity_bought_hourly = cogen.calc_electricity_bought(chp_size=chp_size_elf, class_dict=class_dict,
-                                                                  chp_gen_hourly_kwh=elf_electric_gen_list)
+    profiling.next_stage("totals")
 
     baseline_electric_energy_use = class_dict['demand'].annual_sum_el / class_dict['demand'].grid_efficiency
-    elf_electric_energy_use = sum(elf_electricity_bought_hourly) / class_dict['demand'].grid_efficiency
-    elf_electric_energy_savings = (baseline_electric_energy_use - elf_electric_energy_use).to(ureg.kWh)
-
-    chp_gen_hourly_kwh_dict["ELF"] = elf_electric_gen_list
-
-    ###########################
-    # Thermal Demand Met by Equipment
-    ###########################
-    elf_chp_gen_btuh = cogen.elf_calc_hourly_heat_generated(chp_gen_hourly_kwh=chp_gen_hourly_kwh_dict["ELF"],
-                                                            class_dict=class_dict)
-    chp_gen_hourly_btuh_dict["ELF"] = elf_chp_gen_btuh
-
-    # Retrieve TES Size
-    tes_size_elf = sizing.size_tes(chp_size=chp_size_elf, class_dict=class_dict)
-
-    # Convert from power to energy
-    elf_chp_gen_btu = class_dict['demand'].convert_units(units_to_str="Btu", values_list=elf_chp_gen_btuh)
-    elf_chp_thermal_gen = sum(elf_chp_gen_btu)
-
-    elf_tes_heat_flow_list, elf_tes_soc = \
-        storage.calc_tes_heat_flow_and_soc(chp_gen_hourly_btuh=elf_chp_gen_btuh, tes_size=tes_size_elf,
-                                           load_following_type="ELF", class_dict=class_dict)
-
-    # Convert from power to energy
-    elf_tes_heat_flow_btu = \
-        class_dict['demand'].convert_units(units_to_str="Btu", values_list=elf_tes_heat_flow_list)
-    elf_tes_thermal_dispatch = -1 * sum([flow for flow in elf_tes_heat_flow_btu if flow.magnitude < 0])
-    if isinstance(elf_tes_thermal_dispatch, pint.Quantity) is False:
-        elf_tes_thermal_dispatch = Q_(elf_tes_thermal_dispatch, elf_tes_heat_flow_btu[0].units)
-    assert elf_tes_thermal_dispatch.units == ureg.Btu
-
-    elf_boiler_dispatch_hourly = boiler.calc_aux_boiler_output_rate(chp_gen_hourly_btuh_dict=chp_gen_hourly_btuh_dict,
-                                                                    chp_size=chp_size_elf, tes_size=tes_size_elf,
-                                                                    class_dict=class_dict, load_following_type="ELF",
-                                                                    tes_heat_flow_btuh=elf_tes_heat_flow_list)
-    # Convert from power to energy
-    elf_boiler_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=elf_boiler_dispatch_hourly)
-    elf_boiler_dispatch = sum(elf_boiler_btu)
-
-    ###########################
-    # Thermal Energy Savings (current energy consumption - proposed energy consumption)
-    ###########################
     thermal_consumption_baseline = class_dict['demand'].annual_sum_hl / class_dict['ab'].eff
+    totals = {}
+    for prefix in engines.MODE_PREFIXES.values():
+        tes_heat_flow_btuh = hourly[prefix + "_tes_heat_flow_btuh"]
+        # Hourly values in Btu/hr sum to Btu
+        totals[prefix] = {
+            "electric_gen": Q_(dispatch.sum_hourly(hourly[prefix + "_electric_gen_kwh"]), ureg.kWh),
+            "electricity_bought": Q_(dispatch.sum_hourly(hourly[prefix + "_electricity_bought_kwh"]), ureg.kWh),
+            "chp_thermal_gen": Q_(dispatch.sum_hourly(hourly[prefix + "_chp_gen_btuh"]), ureg.Btu),
+            "tes_thermal_dispatch": Q_(-1 * dispatch.sum_hourly(tes_heat_flow_btuh[tes_heat_flow_btuh < 0]), ureg.Btu),
+            "boiler_dispatch": Q_(dispatch.sum_hourly(hourly[prefix + "_boiler_dispatch_btuh"]), ureg.Btu),
+            "fuel_chp": Q_(dispatch.sum_hourly(hourly[prefix + "_chp_fuel_use_btu"]), ureg.Btu),
+            "fuel_ab": Q_(dispatch.sum_hourly(hourly[prefix + "_ab_fuel_use_btu"]), ureg.Btu)
+        }
+        totals[prefix]["electric_energy_use"] = \
+            totals[prefix]["electricity_bought"] / class_dict['demand'].grid_efficiency
+        totals[prefix]["thermal_energy_savings"] = \
+            thermal_consumption_baseline - (totals[prefix]["fuel_chp"] + totals[prefix]["fuel_ab"])
+
+    # ELF
+    elf_annual_electric_gen = totals["elf"]["electric_gen"]
+    elf_annual_electricity_bought = totals["elf"]["electricity_bought"]
+    elf_electric_energy_savings = (baseline_electric_energy_use - totals["elf"]["electric_energy_use"]).to(ureg.kWh)
+    elf_chp_thermal_gen = totals["elf"]["chp_thermal_gen"]
+    elf_tes_thermal_dispatch = totals["elf"]["tes_thermal_dispatch"]
+    elf_boiler_dispatch = totals["elf"]["boiler_dispatch"]
+    elf_annual_fuel_chp = totals["elf"]["fuel_chp"]
+    elf_annual_fuel_ab = totals["elf"]["fuel_ab"]
+    elf_thermal_energy_savings = totals["elf"]["thermal_energy_savings"]
+
+    # TLF
+    tlf_annual_electric_gen = totals["tlf"]["electric_gen"]
+    tlf_annual_electricity_bought = totals["tlf"]["electricity_bought"]
+    tlf_electric_energy_savings = (baseline_electric_energy_use - totals["tlf"]["electric_energy_use"]).to(ureg.kWh)
+    tlf_chp_thermal_gen = totals["tlf"]["chp_thermal_gen"]
+    tlf_tes_thermal_dispatch = totals["tlf"]["tes_thermal_dispatch"]
+    tlf_boiler_dispatch = totals["tlf"]["boiler_dispatch"]
+    tlf_annual_fuel_chp = totals["tlf"]["fuel_chp"]
+    tlf_annual_fuel_ab = totals["tlf"]["fuel_ab"]
+    tlf_thermal_energy_savings = totals["tlf"]["thermal_energy_savings"]
+
+    # PP - Peak Load CHP Size
+    peak_annual_electric_gen = totals["peak"]["electric_gen"]
+    peak_annual_electricity_bought = totals["peak"]["electricity_bought"]
+    peak_electric_energy_savings = baseline_electric_energy_use - totals["peak"]["electric_energy_use"]
+    peak_chp_thermal_gen = totals["peak"]["chp_thermal_gen"]
+    peak_tes_thermal_dispatch = totals["peak"]["tes_thermal_dispatch"]
+    peak_boiler_dispatch = totals["peak"]["boiler_dispatch"]
+    peak_annual_fuel_chp = totals["peak"]["fuel_chp"]
+    peak_annual_fuel_ab = totals["peak"]["fuel_ab"]
+    peak_thermal_energy_savings = totals["peak"]["thermal_energy_savings"]
+
+    elf_electric_gen_kwh = hourly["elf_electric_gen_kwh"]
+    elf_tes_heat_flow_btuh = hourly["elf_tes_heat_flow_btuh"]
+    tlf_electric_gen_kwh = hourly["tlf_electric_gen_kwh"]
+    tlf_tes_heat_flow_btuh = hourly["tlf_tes_heat_flow_btuh"]
+    tlf_electricity_sold_kwh = hourly["tlf_electricity_sold_kwh"]
+    peak_electric_gen_kwh = hourly["peak_electric_gen_kwh"]
+    peak_tes_heat_flow_btuh = hourly["peak_tes_heat_flow_btuh"]
+    peak_electric_sold_kwh = hourly["peak_electricity_sold_kwh"]
 
-    elf_thermal_consumption_hourly_chp = cogen.calc_hourly_fuel_use(chp_size=chp_size_elf, class_dict=class_dict,
-                                                                    chp_electric_gen_hourly_kwh=chp_gen_hourly_kwh_dict["ELF"])
-    elf_thermal_consumption_hourly_ab = boiler.calc_hourly_fuel_use(ab_output_rate_list=elf_boiler_dispatch_hourly,
-                                                                    class_dict=class_dict)
-
-    elf_thermal_consumption_total = sum(elf_thermal_consumption_hourly_chp) + sum(elf_thermal_consumption_hourly_ab)
-    elf_thermal_energy_savings = thermal_consumption_baseline - elf_thermal_consumption_total
-
-    ###########################
-    # Thermal Cost Savings (current energy costs - proposed energy costs)
-    ###########################
-    thermal_consumption_baseline_hourly = []
-    for item in class_dict['demand'].hl:
-        new_item = item / class_dict['ab'].eff
-        thermal_consumption_baseline_hourly.append(new_item)
-
-    thermal_cost_baseline = costs.calc_fuel_charges(class_dict=class_dict,
-                                                    fuel_bought_hourly=thermal_consumption_baseline_hourly)
-
-    elf_fuel_use_list = []
-    for index, item in enumerate(thermal_consumption_baseline_hourly):
-        hourly_fuel = elf_thermal_consumption_hourly_chp[index] + elf_thermal_consumption_hourly_ab[index]
-        elf_fuel_use_list.append(hourly_fuel)
-
-    elf_thermal_cost_total = costs.calc_fuel_charges(class_dict=class_dict, fuel_bought_hourly=elf_fuel_use_list)
+    ##########################################################################################################
 
-    ###########################
-    # Electrical Cost Savings
-    ###########################
-    electric_cost_baseline = costs.calc_electric_charges(class_dict=class_dict,
-                                                         electricity_bought_hourly=class_dict['costs'].el)
-    elf_electric_cost_new = costs.calc_electric_charges(class_dict=class_dict,
-                                                        electricity_bought_hourly=elf_electricity_bought_hourly)
+    """
+    Energy Costs - Baseline, ELF, TLF, and PP
+    """
 
     ###########################
     # Simple Payback Period (implementation cost / annual cost savings)
     ###########################
-    incentive_base_pct = 0.375
+    profiling.next_stage("payback")
+    incentive_base_pct = costs.INCENTIVE_BASE_PCT
 
     elf_cost_data_dict = costs.calc_costs(thermal_cost_new=elf_thermal_cost_total, tes_size=tes_size_elf,
                                           electrical_cost_new=elf_electric_cost_new, pct_incentive=incentive_base_pct,
                                           thermal_cost_baseline=thermal_cost_baseline, class_dict=class_dict,
                                           electrical_cost_baseline=electric_cost_baseline, load_following_type="ELF",
-                                          chp_gen_hourly_kwh=chp_gen_hourly_kwh_dict["ELF"], chp_size=chp_size_elf,
-                                          tes_heat_flow_list=elf_tes_heat_flow_list)
-
-    ##########################################################################################################
-
-    """
-    TLF Analysis
-    """
-
-    ###########################
-    # Thermal Demand Met by Equipment
-    ###########################
-    # Retrieve TES Size
-    tes_size_tlf = sizing.size_tes(chp_size=chp_size_tlf, class_dict=class_dict)
-
-    tlf_chp_gen_btuh, tlf_tes_heat_flow_list, tlf_tes_soc_list = \
-        cogen.tlf_calc_hourly_heat_chp_tes_soc(chp_size=chp_size_tlf, tes_size=tes_size_tlf, class_dict=class_dict)
-    chp_gen_hourly_btuh_dict["TLF"] = tlf_chp_gen_btuh
-
-    # Convert from power to energy
-    tlf_chp_gen_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=tlf_chp_gen_btuh)
-    tlf_chp_thermal_gen = sum(tlf_chp_gen_btu)
-
-    # Convert from power to energy
-    tlf_tes_flow_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=tlf_tes_heat_flow_list)
-    tlf_tes_thermal_dispatch = -1 * sum([item for item in tlf_tes_flow_btu if item.magnitude < 0])
-    if isinstance(tlf_tes_thermal_dispatch, pint.Quantity) is False:
-        tlf_tes_thermal_dispatch = Q_(tlf_tes_thermal_dispatch, tlf_tes_flow_btu[0].units)
-    assert tlf_tes_thermal_dispatch.units == ureg.Btu
-
-    ###########################
-    # Electrical Energy Savings
-    ###########################
-    tlf_electric_gen_list = \
-        cogen.tlf_calc_electricity_generated(chp_gen_hourly_btuh=chp_gen_hourly_btuh_dict["TLF"], class_dict=class_dict)
-    tlf_electricity_bought_hourly = cogen.calc_electricity_bought(chp_gen_hourly_kwh=tlf_electric_gen_list,
-                                                                  chp_size=chp_size_tlf, class_dict=class_dict)
-    tlf_electric_energy_use = sum(tlf_electricity_bought_hourly) / class_dict['demand'].grid_efficiency
-    tlf_electric_energy_savings = (baseline_electric_energy_use - tlf_electric_energy_use).to(ureg.kWh)
-
-    chp_gen_hourly_kwh_dict["TLF"] = tlf_electric_gen_list
-
-    # Get Boiler Thermal Output
-    tlf_boiler_dispatch_hourly = boiler.calc_aux_boiler_output_rate(tes_size=tes_size_tlf, chp_size=chp_size_tlf,
-                                                                    class_dict=class_dict, load_following_type="TLF",
-                                                                    chp_gen_hourly_btuh_dict=chp_gen_hourly_btuh_dict,
-                                                                    tes_heat_flow_btuh=tlf_tes_heat_flow_list)
-    # Convert from power to energy
-    tlf_boiler_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=tlf_boiler_dispatch_hourly)
-    tlf_boiler_dispatch = sum(tlf_boiler_btu)
-
-    ###########################
-    # Thermal Energy Savings (current energy consumption - proposed energy consumption)
-    ###########################
-    tlf_thermal_consumption_hourly_chp = cogen.calc_hourly_fuel_use(chp_electric_gen_hourly_kwh=chp_gen_hourly_kwh_dict["TLF"],
-                                                                    chp_size=chp_size_tlf, class_dict=class_dict)
-    tlf_thermal_consumption_hourly_ab = \
-        boiler.calc_hourly_fuel_use(ab_output_rate_list=tlf_boiler_dispatch_hourly, class_dict=class_dict)
-
-    tlf_thermal_consumption_total = sum(tlf_thermal_consumption_hourly_chp) + sum(tlf_thermal_consumption_hourly_ab)
-    tlf_thermal_energy_savings = thermal_consumption_baseline - tlf_thermal_consumption_total
-
-    ###########################
-    # Thermal Cost Savings (current energy costs - proposed energy costs)
-    ###########################
-
-    tlf_fuel_use_list = []
-    for index, item in enumerate(thermal_consumption_baseline_hourly):
-        hourly_fuel = tlf_thermal_consumption_hourly_chp[index] + tlf_thermal_consumption_hourly_ab[index]
-        tlf_fuel_use_list.append(hourly_fuel)
-
-    tlf_thermal_cost_total = costs.calc_fuel_charges(class_dict=class_dict,
-                                                     fuel_bought_hourly=tlf_fuel_use_list)
-
-    ###########################
-    # Electrical Cost Savings
-    ###########################
-    tlf_electric_cost_new = costs.calc_electric_charges(class_dict=class_dict,
-                                                        electricity_bought_hourly=tlf_electricity_bought_hourly)
-    tlf_electricity_sold = cogen.tlf_calc_electricity_sold(class_dict=class_dict,
-                                                           chp_gen_hourly_kwh=tlf_electric_gen_list)
-
-    ###########################
-    # Simple Payback Period (implementation cost / annual cost savings)
-    ###########################
+                                          chp_gen_hourly_kwh=Q_(elf_electric_gen_kwh, ureg.kWh), chp_size=chp_size_elf,
+                                          tes_heat_flow_list=Q_(elf_tes_heat_flow_btuh, ureg.Btu / ureg.hour))
 
     tlf_cost_data_dict = costs.calc_costs(thermal_cost_new=tlf_thermal_cost_total, tes_size=tes_size_tlf,
                                           electrical_cost_new=tlf_electric_cost_new, pct_incentive=incentive_base_pct,
                                           thermal_cost_baseline=thermal_cost_baseline, class_dict=class_dict,
                                           electrical_cost_baseline=electric_cost_baseline, load_following_type="TLF",
-                                          chp_gen_hourly_kwh=chp_gen_hourly_kwh_dict["TLF"],
-                                          tes_heat_flow_list=tlf_tes_heat_flow_list, chp_size=chp_size_tlf,
-                                          electricity_sold_hourly=tlf_electricity_sold)
-
-    ##########################################################################################################
-
-    """
-    PP Analysis - Peak Load CHP Size
-    """
-
-    ###########################
-    # Electrical Energy Savings
-    ###########################
-    peak_electric_gen_list, peak_electric_sold_list = cogen.pp_calc_electricity_gen_sold(chp_size=chp_size_peak,
-                                                                                         class_dict=class_dict)
-    peak_electricity_bought_hourly = cogen.calc_electricity_bought(chp_gen_hourly_kwh=peak_electric_gen_list,
-                                                                   chp_size=chp_size_peak, class_dict=class_dict)
-
-    peak_electric_energy_use = sum(peak_electricity_bought_hourly) / class_dict['demand'].grid_efficiency
-    peak_electric_energy_savings = baseline_electric_energy_use - peak_electric_energy_use
-
-    chp_gen_hourly_kwh_dict["Peak"] = peak_electric_gen_list
-
-    ###########################
-    # Thermal Demand Met by Equipment
-    ###########################
-    peak_chp_gen_btuh = cogen.pp_calc_hourly_heat_generated(chp_gen_hourly_kwh=chp_gen_hourly_kwh_dict["Peak"],
-                                                            class_dict=class_dict)
-    assert peak_chp_gen_btuh[0].units == ureg.Btu / ureg.hours
-    chp_gen_hourly_btuh_dict["Peak"] = peak_chp_gen_btuh
-
-    # Retrieve TES Size
-    tes_size_peak = sizing.size_tes(chp_size=chp_size_peak, class_dict=class_dict)
-
-    # Convert from power to energy
-    peak_chp_gen_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=peak_chp_gen_btuh)
-    assert peak_chp_gen_btu[0].units == ureg.Btu
-    peak_chp_thermal_gen = sum(peak_chp_gen_btu)
-    assert peak_chp_thermal_gen.units == ureg.Btu
-
-    peak_tes_heat_flow_list, peak_tes_soc = \
-        storage.calc_tes_heat_flow_and_soc(chp_gen_hourly_btuh=peak_chp_gen_btuh, tes_size=tes_size_peak,
-                                           load_following_type="Peak", class_dict=class_dict)
-    # Convert from power to energy
-    peak_tes_flow_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=peak_tes_heat_flow_list)
-    peak_tes_thermal_dispatch = -1 * sum([item for item in peak_tes_flow_btu if item.magnitude < 0])
-    if isinstance(peak_tes_thermal_dispatch, pint.Quantity) is False:
-        peak_tes_thermal_dispatch = Q_(peak_tes_thermal_dispatch, peak_tes_flow_btu[0].units)
-    assert peak_tes_thermal_dispatch.units == ureg.Btu
-
-    peak_boiler_dispatch_hourly = boiler.calc_aux_boiler_output_rate(chp_gen_hourly_btuh_dict=chp_gen_hourly_btuh_dict,
-                                                                     tes_size=tes_size_peak, chp_size=chp_size_peak,
-                                                                     class_dict=class_dict, load_following_type="Peak",
-                                                                     tes_heat_flow_btuh=peak_tes_heat_flow_list)
-    # Convert from power to energy
-    peak_boiler_btu = class_dict["demand"].convert_units(units_to_str="Btu", values_list=peak_boiler_dispatch_hourly)
-    peak_boiler_dispatch = sum(peak_boiler_btu)
-
-    ###########################
-    # Thermal Energy Savings (current energy consumption - proposed energy consumption)
-    ###########################
-    peak_thermal_consumption_hourly_chp = \
-        cogen.calc_hourly_fuel_use(chp_size=chp_size_peak, class_dict=class_dict,
-                                   chp_electric_gen_hourly_kwh=chp_gen_hourly_kwh_dict["Peak"])
-    peak_thermal_consumption_hourly_ab = \
-        boiler.calc_hourly_fuel_use(ab_output_rate_list=peak_boiler_dispatch_hourly, class_dict=class_dict)
-
-    peak_thermal_consumption_total = sum(peak_thermal_consumption_hourly_chp) + sum(peak_thermal_consumption_hourly_ab)
-    peak_thermal_energy_savings = thermal_consumption_baseline - peak_thermal_consumption_total
-
-    ###########################
-    # Thermal Cost Savings (current energy costs - proposed energy costs)
-    ###########################
-    peak_fuel_use_list = []
-    for index, item in enumerate(peak_thermal_consumption_hourly_chp):
-        hourly_fuel = peak_thermal_consumption_hourly_chp[index] + peak_thermal_consumption_hourly_ab[index]
-        peak_fuel_use_list.append(hourly_fuel)
-
-    peak_thermal_cost_total = costs.calc_fuel_charges(class_dict=class_dict, fuel_bought_hourly=peak_fuel_use_list)
-
-    ###########################
-    # Electrical Cost Savings
-    ###########################
-    peak_electric_cost_new = costs.calc_electric_charges(class_dict=class_dict,
-                                                         electricity_bought_hourly=peak_electricity_bought_hourly)
-
-    ###########################
-    # Simple Payback Period (implementation cost / annual cost savings)
-    ###########################
+                                          chp_gen_hourly_kwh=Q_(tlf_electric_gen_kwh, ureg.kWh),
+                                          tes_heat_flow_list=Q_(tlf_tes_heat_flow_btuh, ureg.Btu / ureg.hour),
+                                          chp_size=chp_size_tlf, pp_revenue=tlf_pp_revenue)
 
     peak_cost_data_dict = costs.calc_costs(thermal_cost_new=peak_thermal_cost_total, tes_size=tes_size_peak,
                                            electrical_cost_new=peak_electric_cost_new, chp_size=chp_size_peak,
                                            pct_incentive=incentive_base_pct, class_dict=class_dict,
                                            thermal_cost_baseline=thermal_cost_baseline, load_following_type="Peak",
                                            electrical_cost_baseline=electric_cost_baseline,
-                                           chp_gen_hourly_kwh=chp_gen_hourly_kwh_dict["Peak"],
-                                           tes_heat_flow_list=peak_tes_heat_flow_list,
-                                           electricity_sold_hourly=peak_electric_sold_list)
+                                           chp_gen_hourly_kwh=Q_(peak_electric_gen_kwh, ureg.kWh),
+                                           tes_heat_flow_list=Q_(peak_tes_heat_flow_btuh, ureg.Btu / ureg.hour),
+                                           pp_revenue=peak_pp_revenue)
 
     ##########################################################################################################
 
     """
     Tables and Plots
     """
+    profiling.next_stage("tables")
 
     # Baseline Demand Calcs
     annual_el_sum = class_dict['demand'].annual_sum_el.to(ureg.kWh)
@@ -443,16 +490,16 @@ def main():
     tes_size_elf.ito(ureg.kWh)
     tes_size_tlf.ito(ureg.kWh)
     tes_size_peak.ito(ureg.kWh)
-    peak_hl_annual = class_dict['ab'].annual_peak_hl.to(ureg.kW)
+    peak_hl_annual = class_dict['demand'].annual_peak_hl.to(ureg.kW)
 
     # Energy Generation Calcs
-    chp_el_cov_elf = round((sum(elf_electric_gen_list) / class_dict['demand'].annual_sum_el) * 100, 2)
-    chp_el_cov_tlf = round((sum(tlf_electric_gen_list) / class_dict['demand'].annual_sum_el) * 100, 2)
-    chp_el_cov_peak = round((sum(peak_electric_gen_list) / class_dict['demand'].annual_sum_el) * 100, 2)
+    chp_el_cov_elf = round((elf_annual_electric_gen / class_dict['demand'].annual_sum_el) * 100, 2)
+    chp_el_cov_tlf = round((tlf_annual_electric_gen / class_dict['demand'].annual_sum_el) * 100, 2)
+    chp_el_cov_peak = round((peak_annual_electric_gen / class_dict['demand'].annual_sum_el) * 100, 2)
 
-    bought_el_cov_elf = round((sum(elf_electricity_bought_hourly) / class_dict['demand'].annual_sum_el) * 100, 2)
-    bought_el_cov_tlf = round((sum(tlf_electricity_bought_hourly) / class_dict['demand'].annual_sum_el) * 100, 2)
-    bought_el_cov_peak = round((sum(peak_electricity_bought_hourly) / class_dict['demand'].annual_sum_el) * 100, 2)
+    bought_el_cov_elf = round((elf_annual_electricity_bought / class_dict['demand'].annual_sum_el) * 100, 2)
+    bought_el_cov_tlf = round((tlf_annual_electricity_bought / class_dict['demand'].annual_sum_el) * 100, 2)
+    bought_el_cov_peak = round((peak_annual_electricity_bought / class_dict['demand'].annual_sum_el) * 100, 2)
 
     chp_th_cov_elf = round((elf_chp_thermal_gen / class_dict['demand'].annual_sum_hl) * 100, 2)
     chp_th_cov_tlf = round((tlf_chp_thermal_gen / class_dict['demand'].annual_sum_hl) * 100, 2)
@@ -466,11 +513,8 @@ def main():
     ab_th_cov_tlf = round((tlf_boiler_dispatch / class_dict['demand'].annual_sum_hl) * 100, 2)
     ab_th_cov_peak = round((peak_boiler_dispatch / class_dict['demand'].annual_sum_hl) * 100, 2)
 
-    elf_annual_electricity_bought = sum(elf_electricity_bought_hourly)
-    tlf_annual_electricity_bought = sum(tlf_electricity_bought_hourly)
-    peak_annual_electricity_bought = sum(peak_electricity_bought_hourly)
-    tlf_annual_electricity_sold = sum(tlf_electricity_sold)
-    peak_annual_electricity_sold = sum(peak_electric_sold_list)
+    tlf_annual_electricity_sold = Q_(dispatch.sum_hourly(tlf_electricity_sold_kwh), ureg.kWh)
+    peak_annual_electricity_sold = Q_(dispatch.sum_hourly(peak_electric_sold_kwh), ureg.kWh)
     elf_chp_thermal_gen.ito(ureg.kWh)
     tlf_chp_thermal_gen.ito(ureg.kWh)
     peak_chp_thermal_gen.ito(ureg.kWh)
@@ -496,17 +540,17 @@ def main():
     baseline_total_co2 = emissions.calc_baseline_fuel_emissions(class_dict=class_dict) + \
                          emissions.calc_baseline_grid_emissions(class_dict=class_dict)
 
-    tlf_total_co2 = emissions.calc_chp_emissions(electricity_bought_annual=sum(tlf_electricity_bought_hourly),
-                                                 chp_fuel_use_annual=sum(tlf_thermal_consumption_hourly_chp),
-                                                 ab_fuel_use_annual=sum(tlf_thermal_consumption_hourly_ab),
+    tlf_total_co2 = emissions.calc_chp_emissions(electricity_bought_annual=tlf_annual_electricity_bought,
+                                                 chp_fuel_use_annual=tlf_annual_fuel_chp,
+                                                 ab_fuel_use_annual=tlf_annual_fuel_ab,
                                                  class_dict=class_dict)
-    elf_total_co2 = emissions.calc_chp_emissions(electricity_bought_annual=sum(elf_electricity_bought_hourly),
-                                                 chp_fuel_use_annual=sum(elf_thermal_consumption_hourly_chp),
-                                                 ab_fuel_use_annual=sum(elf_thermal_consumption_hourly_ab),
+    elf_total_co2 = emissions.calc_chp_emissions(electricity_bought_annual=elf_annual_electricity_bought,
+                                                 chp_fuel_use_annual=elf_annual_fuel_chp,
+                                                 ab_fuel_use_annual=elf_annual_fuel_ab,
                                                  class_dict=class_dict)
-    peak_total_co2 = emissions.calc_chp_emissions(electricity_bought_annual=sum(peak_electricity_bought_hourly),
-                                                  chp_fuel_use_annual=sum(peak_thermal_consumption_hourly_chp),
-                                                  ab_fuel_use_annual=sum(peak_thermal_consumption_hourly_ab),
+    peak_total_co2 = emissions.calc_chp_emissions(electricity_bought_annual=peak_annual_electricity_bought,
+                                                  chp_fuel_use_annual=peak_annual_fuel_chp,
+                                                  ab_fuel_use_annual=peak_annual_fuel_ab,
                                                   class_dict=class_dict)
 
     baseline_total_co2.ito(ureg.metric_ton)
@@ -550,9 +594,9 @@ def main():
         # Energy Generation Data
         ###########################
         ["CHP Electrical Energy Generation", "N/A", "N/A",
-         round(sum(elf_electric_gen_list).magnitude, 2), elf_electric_gen_list[0].units,
-         round(sum(tlf_electric_gen_list).magnitude, 2), tlf_electric_gen_list[0].units,
-         round(sum(peak_electric_gen_list).magnitude, 2), peak_electric_gen_list[0].units],
+         round(elf_annual_electric_gen.magnitude, 2), elf_annual_electric_gen.units,
+         round(tlf_annual_electric_gen.magnitude, 2), tlf_annual_electric_gen.units,
+         round(peak_annual_electric_gen.magnitude, 2), peak_annual_electric_gen.units],
         ["Electrical Energy Bought", "N/A", "N/A",
          round(elf_annual_electricity_bought.magnitude, 2), elf_annual_electricity_bought.units,
          round(tlf_annual_electricity_bought.magnitude, 2), tlf_annual_electricity_bought.units,
@@ -669,59 +713,13 @@ def main():
          round(peak_total_co2.magnitude), peak_total_co2.units]
     ]
 
-    ###########################
-    # Write results in Table to Excel file
-    ###########################
-
     df_results = pd.DataFrame(results_data, columns=data_header)
+    profiling.end_stage(name="tables")
 
-    results_file_path = \
-        pathlib.Path(__file__).parent.resolve() / "results/{}_{}".format(class_dict['demand'].city,
-                                                                         class_dict['demand'].state) / \
-                                                  "{}_{}_results.xlsx".format(class_dict['demand'].city,
-                                                                              class_dict['demand'].state)
-
-    sheet_name = class_dict['demand'].demand_file_name
-    if os.path.exists(results_file_path):
-        writer = pd.ExcelWriter(results_file_path, engine='openpyxl', mode='a', if_sheet_exists='replace')
-    else:
-        writer = pd.ExcelWriter(results_file_path, engine='openpyxl', mode='w')
-
-    with writer as w:
-        df_results.to_excel(w, sheet_name=sheet_name)
-
-    print("Analysis for {}, {} completed.".format(class_dict["demand"].city, class_dict["demand"].state))
-    print("...")
-    print("Generating plots.")
-
-    ##########################
-    # Plots
-    ##########################
-    # plots.plot_max_rectangle_electric(demand_class=class_dict['demand'], chp_size=chp_size_elf)
-    # plots.plot_max_rectangle_thermal(demand_class=class_dict['demand'], chp_size=chp_size_tlf)
-    #
-    # plots.plot_electrical_demand_curve(demand_class=class_dict['demand'])
-    # plots.plot_thermal_demand_curve(demand_class=class_dict['demand'])
-    #
-    # plots.elf_plot_electric(elf_electric_gen_list=elf_electric_gen_list,
-    #                         elf_electricity_bought_list=elf_electricity_bought_hourly, demand_class=class_dict['demand'])
-    # plots.elf_plot_thermal(elf_chp_gen_btuh=elf_chp_gen_btuh, elf_tes_heat_flow_list=elf_tes_heat_flow_list,
-    #                        elf_boiler_dispatch_hourly=elf_boiler_dispatch_hourly, demand_class=class_dict['demand'])
-    # plots.elf_plot_tes_soc(elf_tes_soc=elf_tes_soc, demand_class=class_dict['demand'])
-    #
-    # plots.tlf_plot_electric(tlf_electric_gen_list=tlf_electric_gen_list,
-    #                         tlf_electricity_bought_list=tlf_electricity_bought_hourly,
-    #                         tlf_electricity_sold_list=tlf_electricity_sold, demand_class=class_dict['demand'])
-    # plots.tlf_plot_thermal(tlf_chp_gen_btuh=tlf_chp_gen_btuh, tlf_tes_heat_flow_list=tlf_tes_heat_flow_list,
-    #                        tlf_boiler_dispatch_hourly=tlf_boiler_dispatch_hourly, demand_class=class_dict['demand'])
-    # plots.tlf_plot_tes_soc(tlf_tes_soc_list=tlf_tes_soc_list, demand_class=class_dict['demand'])
-    #
-    # plots.peak_plot_electric(peak_electric_gen_list=peak_electric_gen_list,
-    #                          peak_electricity_bought_list=peak_electricity_bought_hourly,
-    #                          peak_electricity_sold_list=peak_electric_sold_list, demand_class=class_dict['demand'])
-    # plots.peak_plot_thermal(peak_chp_gen_btuh=peak_chp_gen_btuh, peak_tes_heat_flow_list=peak_tes_heat_flow_list,
-    #                         peak_boiler_dispatch_hourly=peak_boiler_dispatch_hourly, demand_class=class_dict['demand'])
-    # plots.peak_plot_tes_soc(peak_tes_soc=peak_tes_soc, demand_class=class_dict['demand'])
+    if return_hourly is True:
+        df_hourly = pd.DataFrame({name: hourly[name] for name in engines.HOURLY_SERIES})
+        return df_results, df_hourly
+    return df_results
 
 
 if __name__ == "__main__":
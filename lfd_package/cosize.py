@@ -0,0 +1,126 @@
+"""
+Module Description:
+    Co-sizing command line interface - searches a grid of CHP size x TES size designs for each
+    operating mode (see modules/cosizing.py) and reports the designs with the lowest simple
+    payback and the lowest emissions. The response surface of every site (one row per design)
+    and its best designs are written to .csv files.
+
+    Example:
+        python -m lfd_package.cosize --in seattle_wa.yaml --refine 2
+        python -m lfd_package.cosize --in "*.yaml" --modes ELF TLF --chp-points 200 --tes-points 50
+"""
+
+import time
+import pathlib
+import argparse
+import traceback
+
+from lfd_package import command_line, batch
+from lfd_package.modules import cosizing
+
+PACKAGE_DIR = pathlib.Path(command_line.__file__).parent.resolve()
+
+# Columns of the best designs printed to the terminal
+REPORT_COLUMNS = ["objective", "load_following_type", "chp_size_kw", "tes_size_btu", "simple_payback_yrs",
+                  "annual_savings", "total_co2_tons", "co2_reduction_tons"]
+
+
+def cosize_site(yaml_filename=None, load_following_types=cosizing.LOAD_FOLLOWING_TYPES,
+                no_chp_sizes=cosizing.DEFAULT_CHP_POINTS, no_tes_sizes=cosizing.DEFAULT_TES_POINTS, refinements=0,
+                out_dir=None):
+    """
+    Co-sizes CHP and TES for one .yaml file and writes the response surface and best designs.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    load_following_types: tuple
+        operating modes to size ("ELF", "TLF", and/or "Peak").
+    no_chp_sizes: int
+        number of CHP sizes in the grid of each mode.
+    no_tes_sizes: int
+        number of TES sizes in the grid of each mode.
+    refinements: int
+        number of refinement passes around the best designs (see cosizing.cosize()).
+    out_dir: str or pathlib.Path
+        folder the .csv files are written to. Defaults to results/cosizing.
+
+    Returns
+    -------
+    df_best: pandas.DataFrame
+        the best designs of each mode (see cosizing.best_designs()).
+    df_surface: pandas.DataFrame
+        one row per design evaluated.
+    """
+    if yaml_filename is not None:
+        if out_dir is None:
+            out_dir = PACKAGE_DIR / "results" / "cosizing"
+        out_dir = pathlib.Path(out_dir)
+
+        class_dict = command_line.load_class_dict(yaml_filename=yaml_filename)
+        df_surface, df_best = cosizing.cosize(class_dict=class_dict, load_following_types=load_following_types,
+                                              no_chp_sizes=no_chp_sizes, no_tes_sizes=no_tes_sizes,
+                                              refinements=refinements)
+
+        site = "{}_{}".format(class_dict['demand'].city, class_dict['demand'].state)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        df_surface.to_csv(out_dir / "{}_cosizing_surface.csv".format(site), index=False)
+        df_best.to_csv(out_dir / "{}_cosizing_best.csv".format(site), index=False)
+        return df_best, df_surface
+
+
+def main():
+    """
+    Co-sizing command line interface. Co-sizes every .yaml file given by --in and prints the
+    best designs of each site. A site that fails is reported at the end without stopping the
+    others, and the exit status is then 1.
+    """
+    parser = argparse.ArgumentParser(description="Search CHP size x TES size designs for the best payback and "
+                                                 "emissions")
+    parser.add_argument("--in", help="filenames, paths, or glob patterns of .yaml files with equipment data",
+                        dest="inputs", type=str, nargs="+", required=True)
+    parser.add_argument("--modes", help="operating modes to size (default: ELF TLF Peak)", type=str, nargs="+",
+                        choices=cosizing.LOAD_FOLLOWING_TYPES, default=list(cosizing.LOAD_FOLLOWING_TYPES))
+    parser.add_argument("--chp-points", help="CHP sizes in the grid of each mode (default: {})".format(
+        cosizing.DEFAULT_CHP_POINTS), dest="chp_points", type=int, default=cosizing.DEFAULT_CHP_POINTS)
+    parser.add_argument("--tes-points", help="TES sizes in the grid of each mode (default: {})".format(
+        cosizing.DEFAULT_TES_POINTS), dest="tes_points", type=int, default=cosizing.DEFAULT_TES_POINTS)
+    parser.add_argument("--refine", help="refinement passes around the best designs (default: 0)", type=int,
+                        default=0)
+    parser.add_argument("--out", help="folder for the .csv files (default: results/cosizing)", type=str,
+                        default=str(PACKAGE_DIR / "results" / "cosizing"))
+    args = parser.parse_args()
+
+    yaml_paths = batch.expand_yaml_paths(patterns=args.inputs)
+    failures = []
+    for yaml_filename in yaml_paths:
+        start = time.perf_counter()
+        try:
+            df_best, df_surface = cosize_site(yaml_filename=yaml_filename, load_following_types=tuple(args.modes),
+                                              no_chp_sizes=args.chp_points, no_tes_sizes=args.tes_points,
+                                              refinements=args.refine, out_dir=args.out)
+        except Exception:
+            # One bad site does not stop the others
+            print("{}: failed".format(yaml_filename))
+            print("")
+            failures.append((yaml_filename, traceback.format_exc()))
+            continue
+        print("{}: {} designs in {:.1f} s ({} not feasible)".format(
+            yaml_filename, len(df_surface), time.perf_counter() - start, int((~df_surface["feasible"]).sum())))
+        print(df_best[REPORT_COLUMNS].to_string(index=False))
+        print("")
+
+    print("{} of {} sites completed. Response surfaces written to {}".format(len(yaml_paths) - len(failures),
+                                                                             len(yaml_paths), args.out))
+    for yaml_filename, site_traceback in failures:
+        print("")
+        print("{} failed:".format(yaml_filename))
+        print(site_traceback)
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@
 Set global unit registry for use throughout the software package
 """
 
-from pint import UnitRegistry, set_application_registry
-ureg = UnitRegistry()
-set_application_registry(ureg)
-Q_ = ureg.Quantity
+# The registry lives in its own module so it is built once, even though this file is imported
+# both as the package and as "lfd_package.modules.__init__"
+from lfd_package.modules.units import ureg, Q_
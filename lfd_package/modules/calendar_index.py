@@ -0,0 +1,234 @@
+"""
+Module description:
+    Converts the EnergyPlus "Date/Time" column into integer calendar arrays in a single
+    vectorized pass. Used by the EnergyDemand class in place of per-row datetime parsing.
+    The CalendarIndex class holds the month, season, and day boundaries of a profile for
+    monthly and seasonal aggregation.
+"""
+
+import numpy as np
+
+# EnergyPlus annual meter files have 8760 rows and never include Feb 29
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=int)
+MONTH_START_DAY = np.concatenate(([0], np.cumsum(DAYS_IN_MONTH)[:-1]))
+
+
+def parse_energyplus_dates(date_strings=None):
+    """
+    Parses EnergyPlus date strings of the form " MM/DD  HH:MM:SS" into month, day,
+    hour, and hour-of-year integer arrays.
+
+    EnergyPlus stamps each hour at the end of its interval, so the last hour of a day
+    is written as "24:00:00". As in EnergyDemand.standardize_date_str(), these rows are
+    rolled forward to hour 0 of the following day, which moves the last hour of each month
+    into the next month (and the last hour of the year into January).
+
+    Parameters
+    ----------
+    date_strings: array-like
+        Contains the "Date/Time" strings from an EnergyPlus .csv file.
+
+    Returns
+    -------
+    months: numpy.ndarray
+        Month number (1-12) of each row after rolling hour 24 forward.
+    days: numpy.ndarray
+        Day of the month of each row after rolling hour 24 forward.
+    hours: numpy.ndarray
+        Hour of the day (0-23) of each row after rolling hour 24 forward.
+    hour_of_year: numpy.ndarray
+        Hour of the year as stamped by EnergyPlus (1 for "01/01  01:00:00" through 8760
+        for "12/31  24:00:00").
+    """
+    if date_strings is not None:
+        date_list = [str(item) for item in date_strings]
+        text = " ".join(date_list).replace("/", " ").replace(":", " ")
+        fields = text.split()
+        if len(fields) != 5 * len(date_list):
+            raise Exception("Date/Time values must use the EnergyPlus format MM/DD  HH:MM:SS")
+        fields_array = np.array(fields, dtype=int).reshape(-1, 5)
+
+        raw_months = fields_array[:, 0]
+        raw_days = fields_array[:, 1]
+        raw_hours = fields_array[:, 2]
+        if ((raw_months < 1) | (12 < raw_months)).any() or ((raw_hours < 0) | (24 < raw_hours)).any():
+            raise Exception("Date/Time values are outside the expected month or hour range")
+        if ((raw_days < 1) | (DAYS_IN_MONTH[raw_months - 1] < raw_days)).any():
+            raise Exception("Date/Time values are outside the expected day range")
+
+        raw_day_of_year = MONTH_START_DAY[raw_months - 1] + raw_days
+        return _roll_calendar(raw_day_of_year=raw_day_of_year, raw_hours=raw_hours)
+
+
+def energyplus_calendar(no_hours=8760):
+    """
+    Returns the calendar arrays of an EnergyPlus annual meter file without reading one, for
+    demand profiles that are given as arrays. The rows are the hours of a year without Feb 29,
+    stamped at the end of each hour as EnergyPlus does.
+
+    Parameters
+    ----------
+    no_hours: int
+        number of hours in the profile, starting at "01/01  01:00:00". Must not be more than 8760.
+
+    Returns
+    -------
+    months, days, hours, hour_of_year: numpy.ndarray
+        See parse_energyplus_dates().
+    """
+    if not 0 < no_hours <= 8760:
+        raise Exception("Profiles given as arrays must have between 1 and 8760 hours")
+    index = np.arange(no_hours)
+    return _roll_calendar(raw_day_of_year=index // 24 + 1, raw_hours=index % 24 + 1)
+
+
+def _roll_calendar(raw_day_of_year=None, raw_hours=None):
+    # Calendar arrays from the day of the year and hour (1-24) stamped by EnergyPlus
+    hour_of_year = (raw_day_of_year - 1) * 24 + raw_hours
+
+    # Roll "24:00:00" forward to hour 0 of the next day (wrapping Dec 31 to Jan 1)
+    rollover = raw_hours == 24
+    hours = np.where(rollover, 0, raw_hours)
+    day_of_year = (raw_day_of_year + rollover - 1) % 365 + 1
+    months = np.searchsorted(MONTH_START_DAY, day_of_year - 1, side='right')
+    days = day_of_year - MONTH_START_DAY[months - 1]
+
+    return months, days, hours, hour_of_year
+
+
+class CalendarIndex:
+    def __init__(self, months=None, summer_start_month=None, winter_start_month=None):
+        """
+        Precomputed month, season, and day boundaries of an hourly demand profile. Built
+        once per profile (see EnergyDemand) and used for monthly and seasonal aggregation
+        in costs.py, sizing, and plots.
+
+        Monthly values follow EnergyDemand's original grouping: hours are grouped into runs
+        of consecutive rows with the same month, and the final run is left out. For an
+        EnergyPlus annual file the final run is the "12/31  24:00:00" row, which rolls over
+        into January, so this gives exactly 12 months.
+
+        Parameters
+        ----------
+        months: numpy.ndarray
+            Month number (1-12) of each hour, from parse_energyplus_dates().
+        summer_start_month: int
+            Integer value between 1-12 (Jan-Dec) indicating the month summer starts for utility
+            billing purposes.
+        winter_start_month: int
+            See above.
+        """
+        months = np.asarray(months, dtype=int)
+        self.no_hours = len(months)
+        self.summer_start_month = int(summer_start_month)
+        self.winter_start_month = int(winter_start_month)
+
+        # Start index of every run of consecutive rows with the same month
+        self.month_offsets = np.concatenate(([0], np.flatnonzero(np.diff(months)) + 1)).astype(int)
+        self.month_numbers = months[self.month_offsets[:-1]]
+        self.no_months = len(self.month_numbers)
+
+        self.summer_mask = (self.summer_start_month <= months) & (months < self.winter_start_month)
+        self.summer_month_mask = \
+            (self.summer_start_month <= self.month_numbers) & (self.month_numbers < self.winter_start_month)
+
+        # EnergyPlus days are 24 consecutive rows ("01:00:00" through "24:00:00")
+        self.no_days = self.no_hours // 24
+        self.day_offsets = np.arange(self.no_days) * 24
+
+        # Hour indices of each month padded to equal length. Padding points to an extra zero
+        # appended to the data, so monthly sums can be taken as running sums along each row
+        month_lengths = np.diff(self.month_offsets)
+        max_length = int(month_lengths.max()) if self.no_months > 0 else 0
+        position = np.arange(max_length)
+        self._month_gather = np.where(position < month_lengths[:, np.newaxis],
+                                      self.month_offsets[:-1, np.newaxis] + position, self.no_hours)
+
+    def monthly_sums(self, values=None):
+        """
+        Sums hourly values by month. Values are added in hour order so the results match
+        the built-in sum() over each month exactly (np.add.reduceat adds in a different
+        order and can differ in the last digits).
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            hourly values, either 1D (hours) or 2D (scenarios x hours).
+
+        Returns
+        -------
+        monthly_sums: numpy.ndarray
+            one value per month, either 1D (months) or 2D (scenarios x months).
+        """
+        if values is not None:
+            values = np.asarray(values, dtype=float)
+            if self.no_months == 0:
+                return np.zeros(values.shape[:-1] + (0,))
+            padded = np.concatenate((values, np.zeros(values.shape[:-1] + (1,))), axis=-1)
+            return np.cumsum(padded[..., self._month_gather], axis=-1)[..., -1]
+
+    def monthly_peaks(self, values=None):
+        """
+        Finds the peak hourly value of each month.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            hourly values, either 1D (hours) or 2D (scenarios x hours).
+
+        Returns
+        -------
+        monthly_peaks: numpy.ndarray
+            one value per month, either 1D (months) or 2D (scenarios x months).
+        """
+        if values is not None:
+            values = np.asarray(values, dtype=float)
+            return np.maximum.reduceat(values, self.month_offsets, axis=-1)[..., :self.no_months]
+
+    def seasonal_sums(self, values=None):
+        """
+        Sums hourly values over the summer and winter billing seasons, in hour order.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            hourly values, either 1D (hours) or 2D (scenarios x hours).
+
+        Returns
+        -------
+        summer_sum: float or numpy.ndarray
+            sum over summer hours, one per scenario for 2D input.
+        winter_sum: float or numpy.ndarray
+            sum over winter hours, one per scenario for 2D input.
+        """
+        if values is not None:
+            values = np.asarray(values, dtype=float)
+            sums = []
+            for mask in (self.summer_mask, ~self.summer_mask):
+                season_values = values[..., mask]
+                if season_values.shape[-1] == 0:
+                    sums.append(np.zeros(values.shape[:-1]))
+                else:
+                    sums.append(np.cumsum(season_values, axis=-1)[..., -1])
+            if values.ndim == 1:
+                return float(sums[0]), float(sums[1])
+            return sums[0], sums[1]
+
+    def daily_sums(self, values=None):
+        """
+        Sums hourly values by EnergyPlus day (24 consecutive rows), in hour order.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            hourly values, either 1D (hours) or 2D (scenarios x hours).
+
+        Returns
+        -------
+        daily_sums: numpy.ndarray
+            one value per day, either 1D (days) or 2D (scenarios x days).
+        """
+        if values is not None:
+            values = np.asarray(values, dtype=float)[..., :self.no_days * 24]
+            by_day = values.reshape(values.shape[:-1] + (self.no_days, 24))
+            return np.cumsum(by_day, axis=-1)[..., -1]
@@ -4,17 +4,114 @@ Module description:
      initialize the operating parameters of the energy generation and storage systems (CHP, TES, and AuxBoiler class)
 """
 
+import json
 import math
 import pathlib
-import pandas as pd
+import threading
+import collections
 import numpy as np
 from datetime import datetime, timedelta
 from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import calendar_index, profile_cache, dispatch, tariffs, units, sizing_calcs as sizing
+
+
+# Parsed demand profiles shared by every class in the process. Keyed by file name and location parameters.
+# The least recently used entries are dropped first once a cache is full.
+ENERGY_DEMAND_CACHE_SIZE = 32
+_energy_demand_cache = collections.OrderedDict()
+
+# Compiled rate schedules shared by every EnergyCosts class with the same demand profile and rates
+TARIFF_CACHE_SIZE = 64
+_tariff_cache = collections.OrderedDict()
+
+_cache_lock = threading.RLock()
+
+
+def _cached(cache=None, key=None, build=None, max_size=None):
+    """
+    Returns the value stored in an LRU cache under key, calling build() to create it on a miss.
+    """
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = build()
+        cache[key] = value
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+        return value
+
+
+def _split_quantities(dem_profile):
+    """
+    Returns the magnitudes of an hourly Quantity array (or list of Quantities) as a float
+    array, along with the units of the first hour.
+    """
+    if isinstance(dem_profile, ureg.Quantity):
+        return np.asarray(dem_profile.magnitude, dtype=float), dem_profile.units
+    values = np.array([item.magnitude for item in dem_profile], dtype=float)
+    return values, dem_profile[0].units
+
+
+def get_energy_demand(file_name='default_file.csv', city=None, state=None, grid_efficiency=None,
+                      summer_start_inclusive=None, winter_start_inclusive=None, sim_ab_efficiency=None,
+                      save_cache=True):
+    """
+    Returns the EnergyDemand class for the given demand file and parameters. The .csv file is only
+    parsed the first time a given combination is requested; later calls return the same object.
+
+    Parameters
+    ----------
+    See the EnergyDemand class.
+
+    Returns
+    -------
+    demand: EnergyDemand class
+        Initialized class shared by reference across the process.
+    """
+    key = (file_name, str(city).lower(), str(state).lower(), float(grid_efficiency), int(summer_start_inclusive),
+           int(winter_start_inclusive), float(sim_ab_efficiency))
+    return _cached(cache=_energy_demand_cache, key=key, max_size=ENERGY_DEMAND_CACHE_SIZE,
+                   build=lambda: EnergyDemand(file_name=file_name, city=city, state=state,
+                                              grid_efficiency=grid_efficiency,
+                                              summer_start_inclusive=summer_start_inclusive,
+                                              winter_start_inclusive=winter_start_inclusive,
+                                              sim_ab_efficiency=sim_ab_efficiency, save_cache=save_cache))
+
+
+def clear_energy_demand_cache():
+    """
+    Drops every EnergyDemand class held by get_energy_demand() and the tariffs compiled for them.
+    """
+    with _cache_lock:
+        _energy_demand_cache.clear()
+        _tariff_cache.clear()
+
+
+def demand_file_path(file_name=None):
+    """
+    Returns the path of a demand file in the /input_demand_profiles folder.
+
+    Parameters
+    ----------
+    file_name: str
+        name of the .csv file. Must not point outside the folder.
+
+    Returns
+    -------
+    csv_path: pathlib.Path
+    """
+    file_name = str(file_name)
+    if file_name in ("", ".", "..") or "/" in file_name or "\\" in file_name:
+        raise ValueError("demand_filename must be the name of a file in the input_demand_profiles folder, "
+                         "got {}".format(file_name))
+    return pathlib.Path(__file__).parent.parent.resolve() / 'input_demand_profiles' / file_name
 
 
 class EnergyDemand:
     def __init__(self, file_name='default_file.csv', city=None, state=None, grid_efficiency=None,
-                 summer_start_inclusive=None, winter_start_inclusive=None, sim_ab_efficiency=None):
+                 summer_start_inclusive=None, winter_start_inclusive=None, sim_ab_efficiency=None, profile=None,
+                 save_cache=True):
         """
         This class stores information from EnergyPlus building demand profile simulations,
         which are fed in via a .csv file. By default, this class imports data from the
@@ -43,35 +140,35 @@ class EnergyDemand:
         sim_ab_efficiency: float
             User must enter the assumed EnergyPlus boiler efficiency in the .yaml file, so it
             may be modified as needed.
+        profile: dict
+            Optional. Demand and calendar arrays already in memory, with the same keys as the
+            profile cache (see profile_cache.PROFILE_ARRAY_NAMES). If given, no file is read and
+            sim_ab_efficiency is ignored, since the heating demand is already converted.
+        save_cache: bool
+            if False, a .csv file missing from the profile cache is parsed but not saved, and
+            the unit registry cache is not written, so nothing is written to disk.
         """
-        # Reads load profile data from .csv file
-        cwd = pathlib.Path(__file__).parent.parent.resolve() / 'input_demand_profiles'
         self.demand_file_name = file_name
-        df = pd.read_csv(cwd / file_name)
 
-        # Plucks electrical metering data from the file using row and column locations
-        electric_metering_df = df["Electricity:Facility [J](Hourly)"]
-        electric_demand_hourly = electric_metering_df.to_numpy()
-
-        # Plucks thermal metering data from the file using row and column locations
-        try:
-            heating_metering_df = df["Gas:Facility [J](Hourly)"]
-        except KeyError:
-            heating_metering_df = df["Gas:Facility [J](Hourly) "]
-        heating_metering_hourly = heating_metering_df.to_numpy()
-
-        # Plucks month numbers from metering data file
-        meter_dates_array = df["Date/Time"].to_numpy(dtype=str)
-        meter_months_hourly = []
-        for item in meter_dates_array:
-            date = self.standardize_date_str(date_str=item)
-            meter_months_hourly.append(date.month)
-
-        self.meter_months_hourly = np.array(meter_months_hourly, dtype=int)
-        self.sim_ab_efficiency = float(sim_ab_efficiency)
+        if profile is None:
+            # Reads load profile data from the binary profile cache, or from the .csv file on a cache miss
+            csv_path = demand_file_path(file_name=file_name)
+            self.sim_ab_efficiency = float(sim_ab_efficiency)
+            profile = profile_cache.load_profile(csv_path=csv_path, sim_ab_efficiency=self.sim_ab_efficiency)
+            if profile is None:
+                profile = self.read_demand_csv(csv_path=csv_path)
+                if save_cache is True:
+                    profile_cache.save_profile(csv_path=csv_path, sim_ab_efficiency=self.sim_ab_efficiency,
+                                               profile=profile)
+            if save_cache is True:
+                units.save_registry_cache()
+        else:
+            self.sim_ab_efficiency = None if sim_ab_efficiency is None else float(sim_ab_efficiency)
 
-        # Convert heat metering to heating demand using EnergyPlus assumed heating efficiency value
-        heating_demand_hourly = [item * self.sim_ab_efficiency for item in heating_metering_hourly]
+        self.meter_months_hourly = profile["months"]
+        self.meter_days_hourly = profile["days"]
+        self.meter_hours_hourly = profile["hours"]
+        self.meter_hour_of_year = profile["hour_of_year"]
 
         ##############################
         # General Info
@@ -88,27 +185,29 @@ class EnergyDemand:
         self.summer_start_month = int(summer_start_inclusive)
         self.winter_start_month = int(winter_start_inclusive)
 
+        # Month, season, and day boundaries used for monthly and seasonal aggregation
+        self.calendar = calendar_index.CalendarIndex(months=self.meter_months_hourly,
+                                                     summer_start_month=self.summer_start_month,
+                                                     winter_start_month=self.winter_start_month)
+
         ################################
         # Energy Demand Info
         ################################
 
         # Annual and monthly peaks and sums
-        heat_load_joules = self.convert_to_float_numpy(heating_demand_hourly) * (ureg.joules / ureg.hour)
-        electric_load_joules = self.convert_to_float_numpy(electric_demand_hourly) * (ureg.joules / ureg.hour)
-
-        self.hl = heat_load_joules.to(ureg.Btu / ureg.hours)
-        self.el = electric_load_joules.to(ureg.kW)
+        self.hl = Q_(profile["hl_btuh"], ureg.Btu / ureg.hours)
+        self.el = Q_(profile["el_kw"], ureg.kW)
 
         self.summer_weight_el, self.winter_weight_el = self.seasonal_weights_hourly_data(dem_profile=self.el)
         self.summer_weight_hl, self.winter_weight_hl = self.seasonal_weights_hourly_data(dem_profile=self.hl)
 
-        sum_kw = sum(self.el) * Q_(1, ureg.hours)
+        sum_kw = Q_(dispatch.sum_hourly(profile["el_kw"]), ureg.kW) * Q_(1, ureg.hours)
         self.annual_sum_el = sum_kw.to(ureg.kWh)
-        sum_btuh = sum(self.hl) * Q_(1, ureg.hours)
+        sum_btuh = Q_(dispatch.sum_hourly(profile["hl_btuh"]), ureg.Btu / ureg.hours) * Q_(1, ureg.hours)
         self.annual_sum_hl = sum_btuh.to(ureg.Btu)
 
-        self.annual_peak_hl = max(self.hl)
-        self.annual_peak_el = max(self.el)
+        self.annual_peak_hl = Q_(np.max(profile["hl_btuh"]), ureg.Btu / ureg.hours)
+        self.annual_peak_el = Q_(np.max(profile["el_kw"]), ureg.kW)
 
         self.monthly_peaks_list_el = self.monthly_demand_peaks(dem_profile=self.el)
         self.monthly_peaks_list_hl = self.monthly_demand_peaks(dem_profile=self.hl)
@@ -116,10 +215,83 @@ class EnergyDemand:
         self.monthly_sums_list_el = self.monthly_energy_sums(dem_profile=self.el)
         self.monthly_sums_list_hl = self.monthly_energy_sums(dem_profile=self.hl)
 
+        # Load duration curves, built on first use (see duration_curve())
+        self._duration_curves = {}
+
     #####################################
     # Methods
     #####################################
 
+    def duration_curve(self, kind="el"):
+        """
+        Returns the load duration curve of the electrical or heating demand. The curve is
+        sorted once and kept with the class, so sizing and plotting reuse it.
+
+        Parameters
+        ----------
+        kind: str
+            "el" for the electrical demand (kW) or "hl" for the heating demand (Btu/hr).
+
+        Returns
+        -------
+        curve: LoadDurationCurve class
+            see sizing_calcs.LoadDurationCurve.
+        """
+        if kind not in ("el", "hl"):
+            raise Exception("kind must be 'el' or 'hl'")
+        if kind not in self._duration_curves:
+            self._duration_curves[kind] = sizing.LoadDurationCurve(demand=self.el if kind == "el" else self.hl)
+        return self._duration_curves[kind]
+
+    def read_demand_csv(self, csv_path=None):
+        """
+        Parses an EnergyPlus .csv file into unit-normalized demand arrays and calendar arrays.
+
+        Parameters
+        ----------
+        csv_path: pathlib.Path
+            location of the EnergyPlus .csv file.
+
+        Returns
+        -------
+        profile: dict
+            contains electrical demand in kW ("el_kw"), heating demand in Btu/hr ("hl_btuh"),
+            and the month, day, hour, and hour-of-year arrays from parse_energyplus_dates().
+        """
+        import pandas as pd
+        df = pd.read_csv(csv_path)
+
+        # Plucks electrical metering data from the file using row and column locations
+        electric_metering_df = df["Electricity:Facility [J](Hourly)"]
+        electric_demand_hourly = electric_metering_df.to_numpy()
+
+        # Plucks thermal metering data from the file using row and column locations
+        try:
+            heating_metering_df = df["Gas:Facility [J](Hourly)"]
+        except KeyError:
+            heating_metering_df = df["Gas:Facility [J](Hourly) "]
+        heating_metering_hourly = heating_metering_df.to_numpy()
+
+        # Plucks calendar data (month, day, hour) from metering data file
+        meter_dates_array = df["Date/Time"].to_numpy(dtype=str)
+        months, days, hours, hour_of_year = calendar_index.parse_energyplus_dates(date_strings=meter_dates_array)
+
+        # Convert heat metering to heating demand using EnergyPlus assumed heating efficiency value
+        heating_demand_hourly = [item * self.sim_ab_efficiency for item in heating_metering_hourly]
+
+        heat_load_joules = self.convert_to_float_numpy(heating_demand_hourly) * (ureg.joules / ureg.hour)
+        electric_load_joules = self.convert_to_float_numpy(electric_demand_hourly) * (ureg.joules / ureg.hour)
+
+        profile = {
+            "el_kw": electric_load_joules.to(ureg.kW).magnitude,
+            "hl_btuh": heat_load_joules.to(ureg.Btu / ureg.hours).magnitude,
+            "months": months,
+            "days": days,
+            "hours": hours,
+            "hour_of_year": hour_of_year
+        }
+        return profile
+
     def standardize_date_str(self, date_str):
         assert isinstance(date_str, str)
         date_list = date_str.split()
@@ -161,36 +333,15 @@ class EnergyDemand:
         return float_array
 
     def seasonal_weights_hourly_data(self, dem_profile=None):
-        summer_start = int(self.summer_start_month)
-        winter_start = int(self.winter_start_month)
-        month_list = self.meter_months_hourly
-        summer_index_list = []
-        winter_index_list = []
+        values, units = _split_quantities(dem_profile)
 
-        for index, i in enumerate(month_list):
-            if summer_start <= int(i) < winter_start:
-                summer_index_list.append(index)
-            else:
-                winter_index_list.append(index)
-
-        summer_weight_list = []
-        for index in summer_index_list:
-            item = (dem_profile[index] * Q_(1, ureg.hours)).to_reduced_units()
-            summer_weight_list.append(item)
+        # Factor and units of (value * 1 hour).to_reduced_units(), applied to every hour
+        reduced = (Q_(1.0, units) * Q_(1, ureg.hours)).to_reduced_units()
+        summer_sum, winter_sum = self.calendar.seasonal_sums(values=values * reduced.magnitude)
+        summer_sum = Q_(summer_sum, reduced.units)    # Has power or energy units
+        winter_sum = Q_(winter_sum, reduced.units)
 
-        winter_weight_list = []
-        for index in winter_index_list:
-            item = (dem_profile[index] * Q_(1, ureg.hours)).to_reduced_units()
-            winter_weight_list.append(item)
-
-        summer_sum = sum(summer_weight_list)    # Has power or energy units
-        winter_sum = sum(winter_weight_list)
-
-        if summer_sum == 0:
-            summer_sum = Q_(summer_sum, winter_sum.units)
-        elif winter_sum == 0:
-            winter_sum = Q_(winter_sum, summer_sum.units)
-        total = (sum(dem_profile) * Q_(1, ureg.hours)).to_reduced_units()
+        total = Q_(dispatch.sum_hourly(values) * reduced.magnitude, reduced.units)
         assert math.isclose(summer_sum.magnitude + winter_sum.magnitude, total.magnitude)
 
         if math.isclose(total.magnitude, 0) is False:
@@ -203,24 +354,14 @@ class EnergyDemand:
     def seasonal_weights_monthly_data(self, monthly_data=None):
         summer_start = int(self.summer_start_month)
         winter_start = int(self.winter_start_month)
-        summer_index_list = []
-        winter_index_list = []
+        summer_weight_list = []
+        winter_weight_list = []
 
         for index, item in enumerate(monthly_data):
             if summer_start <= int(index+1) < winter_start:
-                summer_index_list.append(index)
+                summer_weight_list.append(item)
             else:
-                winter_index_list.append(index)
-
-        summer_weight_list = []
-        for index in summer_index_list:
-            item = monthly_data[index]
-            summer_weight_list.append(item)
-
-        winter_weight_list = []
-        for index in winter_index_list:
-            item = monthly_data[index]
-            winter_weight_list.append(item)
+                winter_weight_list.append(item)
 
         summer_sum = sum(summer_weight_list)
         winter_sum = sum(winter_weight_list)
@@ -235,50 +376,36 @@ class EnergyDemand:
             return Q_(0, ''), Q_(0, '')
 
     def monthly_demand_peaks(self, dem_profile=None):
-        month_list = self.meter_months_hourly
-        month_demand_list = []
-        monthly_peak_list = []
-        for index, item in enumerate(month_list):
-            if index == 0 or month_list[index] == month_list[index - 1]:
-                month_demand_list.append(dem_profile[index])
-            else:
-                monthly_peak_list.append(max(month_demand_list))
-                month_demand_list = list()
-                month_demand_list.append(dem_profile[index])
+        values, units = _split_quantities(dem_profile)
+        monthly_peak_list = [Q_(peak, units) for peak in self.calendar.monthly_peaks(values=values)]
         return monthly_peak_list
 
     def monthly_energy_sums(self, dem_profile=None):
-        month_list = self.meter_months_hourly
-        month_demand_list = []
-        monthly_sum_list = []
-
-        # Check units, convert energy list to power list
-        if dem_profile[0].check('[energy]'):
-            i = (dem_profile[0] / Q_(1, ureg.hours)).to_reduced_units()
-            units_to = i.units
-            dem_profile = self.convert_units(values_list=dem_profile, units_to_str=str(units_to))
-
-        for index, item in enumerate(month_list):
-            if index == 0 or month_list[index] == month_list[index - 1]:
-                month_demand_list.append(dem_profile[index])
-            else:
-                energy_sum = sum(month_demand_list) * Q_(1, ureg.hours)
-                energy_sum.ito_reduced_units()
-                monthly_sum_list.append(energy_sum)
-                month_demand_list = list()
-                month_demand_list.append(dem_profile[index])
+        values, units = _split_quantities(dem_profile)
+
+        # Check units. Energy values are treated as power over one hour (see convert_units)
+        if Q_(1, units).check('[energy]'):
+            units = (Q_(1, units) / Q_(1, ureg.hours)).units
+
+        # Factor and units of (monthly sum * 1 hour).to_reduced_units()
+        reduced = (Q_(1.0, units) * Q_(1, ureg.hours)).to_reduced_units()
+        monthly_sums = self.calendar.monthly_sums(values=values) * reduced.magnitude
+        monthly_sum_list = [Q_(energy_sum, reduced.units) for energy_sum in monthly_sums]
         return monthly_sum_list
 
 
-class Emissions(EnergyDemand):
-    def __init__(self, file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                 sim_ab_efficiency):
+class Emissions:
+    def __init__(self, demand=None):
         """
         Stores emission intensity values for natural gas and from electricity sub-grids
         for each of the 7 accepted locations.
+
+        Parameters
+        ----------
+        demand: EnergyDemand class
+            The shared demand profile for the location being analyzed.
         """
-        super().__init__(file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                         sim_ab_efficiency)
+        self.demand = demand
 
         # NG Emissions
         self.ng_co2 = 14.43 * (ureg.kg / ureg.megaBtu)
@@ -300,9 +427,8 @@ class Emissions(EnergyDemand):
         }
 
 
-class EnergyCosts(EnergyDemand):
-    def __init__(self, file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                 sim_ab_efficiency, meter_type_el=None, meter_type_fuel=None, schedule_type_el=None, no_apts=None,
+class EnergyCosts:
+    def __init__(self, demand=None, meter_type_el=None, meter_type_fuel=None, schedule_type_el=None, no_apts=None,
                  master_metered_el=None, single_metered_el=None, master_metered_fuel=None, single_metered_fuel=None,
                  schedule_type_fuel=None,):
         """
@@ -311,6 +437,8 @@ class EnergyCosts(EnergyDemand):
 
         Parameters
         ----------
+        demand: EnergyDemand class
+            The shared demand profile for the location being analyzed.
         meter_type_el: str
             contains string representing whether the building is master-metered
             or sub-metered for electricity.
@@ -333,8 +461,7 @@ class EnergyCosts(EnergyDemand):
             contains number of apartments in the building. Used when calculating
             monthly and annual base costs.
         """
-        super().__init__(file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                         sim_ab_efficiency)
+        self.demand = demand
 
         #####################################
         # Electricity Charges
@@ -353,15 +480,25 @@ class EnergyCosts(EnergyDemand):
         self.master_meter_fuel_dict = master_metered_fuel
         self.single_meter_fuel_dict = single_metered_fuel
 
+        # Rate schedules compiled for batched bill evaluation (see tariffs.py). Sites with the same demand
+        # profile and rates share them, so they are only compiled once per process.
+        rates = json.dumps([meter_type_el, meter_type_fuel, schedule_type_el, schedule_type_fuel, self.no_apts,
+                            master_metered_el, single_metered_el, master_metered_fuel, single_metered_fuel],
+                           sort_keys=True, default=str)
+        self.electric_tariff, self.fuel_tariff = _cached(
+            cache=_tariff_cache, key=(demand, rates), max_size=TARIFF_CACHE_SIZE,
+            build=lambda: (tariffs.ElectricTariff(costs_class=self), tariffs.FuelTariff(costs_class=self)))
 
-class CHP(EnergyDemand):
-    def __init__(self, file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                 sim_ab_efficiency, turn_down_ratio=None, chp_installed_cost=None, chp_om_cost=None):
+
+class CHP:
+    def __init__(self, demand=None, turn_down_ratio=None, chp_installed_cost=None, chp_om_cost=None):
         """
         This class defines the specifications and costs of the CHP system.
 
         Parameters
         ----------
+        demand: EnergyDemand class
+            The shared demand profile for the location being analyzed.
         chp_installed_cost: Quantity
             contains the labor, material, and installation cost for the CHP
             unit. Units are in $/kW.
@@ -373,9 +510,7 @@ class CHP(EnergyDemand):
             that CHP can operate at. Dimensionless. This value is converted to a
             decimal percentage of capacity (ie: 50% is 0.5) before being stored.
         """
-
-        super().__init__(file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                         sim_ab_efficiency)
+        self.demand = demand
 
         # CHP Units
         self.chp_size_units = ureg.kW
@@ -392,14 +527,15 @@ class CHP(EnergyDemand):
         self.om_cost = chp_om_cost * 1/ureg.kWh
 
 
-class TES(EnergyDemand):
-    def __init__(self, file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                 sim_ab_efficiency, start=None, tes_installed_cost=None, tes_om_cost=None):
+class TES:
+    def __init__(self, demand=None, start=None, tes_installed_cost=None, tes_om_cost=None):
         """
         This class defines the specifications and costs of the TES (thermal energy storage) system.
 
         Parameters
         ----------
+        demand: EnergyDemand class
+            The shared demand profile for the location being analyzed.
         start: Quantity (float)
             The starting energy level of the TES system when the simulation begins in terms of SOC
         tes_installed_cost: Quantity
@@ -409,8 +545,7 @@ class TES(EnergyDemand):
             contains the annual operation and maintenance cost for the TES units based on energy in/out.
             Units are in $/kWh.
         """
-        super().__init__(file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                         sim_ab_efficiency)
+        self.demand = demand
 
         # Units
         self.tes_size_units = ureg.Btu
@@ -423,20 +558,20 @@ class TES(EnergyDemand):
         self.om_cost = float(tes_om_cost) * (1/ureg.kWh)
 
 
-class AuxBoiler(EnergyDemand):
-    def __init__(self, file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                 sim_ab_efficiency, efficiency=None):
+class AuxBoiler:
+    def __init__(self, demand=None, efficiency=None):
         """
         This class defines the specifications of the Auxiliary Boiler.
 
         Parameters
         ----------
+        demand: EnergyDemand class
+            The shared demand profile for the location being analyzed.
         efficiency: float
             The efficiency of the boiler when operating at full load expressed
             as a decimal value (ie: 50% = 0.5). Dimensionless
         """
-        super().__init__(file_name, city, state, grid_efficiency, summer_start_inclusive, winter_start_inclusive,
-                         sim_ab_efficiency)
+        self.demand = demand
 
         # Aux Boiler Specifications
         self.eff = efficiency
@@ -0,0 +1,502 @@
+"""
+Module Description:
+    CHP and TES co-sizing. size_chp() and size_tes() in sizing_calcs.py each apply a fixed rule
+    (Maximum Rectangle or annual peak for CHP, daily excess heat for TES), which does not
+    guarantee the best payback or the lowest emissions. The functions here evaluate a grid of
+    CHP size x TES size designs for each operating mode with the batched dispatch functions
+    in dispatch.py and the batched tariffs in tariffs.py, and return the payback and
+    emissions of every design (the response surface) along with the best designs.
+
+    Designs are evaluated in chunks so the (designs x hours) arrays stay small. The cost and
+    emissions rules are the same as calc_costs() in costs.py and calc_chp_emissions() in
+    emissions.py, so a design with the CHP and TES sizes of calc_results() gets the same
+    results as the Excel table.
+"""
+
+import numpy as np
+import pandas as pd
+from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import dispatch, emissions, costs, sizing_calcs as sizing
+
+LOAD_FOLLOWING_TYPES = ("ELF", "TLF", "Peak")
+
+# Default number of CHP and TES sizes in the grid of each operating mode (about 10,000 designs in all)
+DEFAULT_CHP_POINTS = 100
+DEFAULT_TES_POINTS = 34
+
+# TES sizes go up to this multiple of the largest size_tes() result over the CHP sizes in the grid
+TES_RANGE_FACTOR = 2.0
+
+# PP CHP sizes go from the annual peak electrical demand up to this multiple of it
+PP_RANGE_FACTOR = 2.0
+
+# Grid points along each axis in a refinement around the best designs of the previous pass
+REFINE_POINTS = 11
+
+# Designs evaluated together. Each (designs x hours) work array of a chunk is about 35 MB
+DESIGN_CHUNK = 512
+
+# Columns of the response surface, in order
+SURFACE_COLUMNS = ("load_following_type", "chp_size_kw", "tes_size_btu", "refinement", "feasible",
+                   "electric_gen_kwh", "electricity_bought_kwh", "electricity_sold_kwh", "chp_fuel_btu", "ab_fuel_btu",
+                   "electric_cost", "fuel_cost", "pp_revenue", "annual_savings", "installed_cost", "om_cost",
+                   "simple_payback_yrs", "incentive_payback_yrs", "total_co2_tons", "co2_reduction_tons")
+
+# Hourly series of each design returned by hourly_designs(), in order
+HOURLY_DESIGN_SERIES = ("electric_gen_kwh", "electricity_bought_kwh", "electricity_sold_kwh", "chp_gen_btuh",
+                        "tes_heat_flow_btuh", "tes_soc", "boiler_dispatch_btuh", "chp_fuel_use_btu",
+                        "ab_fuel_use_btu")
+
+# Hourly series with one row per CHP size rather than per design in ELF and PP
+ELECTRIC_SERIES = ("electric_gen_kwh", "electricity_bought_kwh", "electricity_sold_kwh", "chp_fuel_use_btu")
+
+
+def _site_data(class_dict):
+    # Hourly demand, tariffs, baseline bills and emissions, and unit conversion factors of a location.
+    # Cost and emission factors are found with pint once, using the same units as costs.py and emissions.py
+    demand = class_dict['demand']
+    dem_el_kw = demand.el.to(ureg.kW).magnitude
+    dem_hl_btuh = demand.hl.to(ureg.Btu / ureg.hour).magnitude
+    ab_eff = class_dict['ab'].eff
+    fuel_tariff = class_dict['costs'].fuel_tariff
+    electric_tariff = class_dict['costs'].electric_tariff
+
+    baseline_co2 = emissions.calc_baseline_fuel_emissions(class_dict=class_dict) + \
+        emissions.calc_baseline_grid_emissions(class_dict=class_dict)
+    subgrid_coefficient = emissions.identify_subgrid_coefficients(class_dict=class_dict)
+    return {
+        "dem_el_kw": dem_el_kw,
+        "dem_hl_btuh": dem_hl_btuh,
+        "boiler_size_btuh": demand.annual_peak_hl.to(ureg.Btu / ureg.hour).magnitude,
+        "annual_peak_el_kw": demand.annual_peak_el.to(ureg.kW).magnitude,
+        "min_pl": class_dict['chp'].min_pl,
+        "tes_start": class_dict['tes'].start,
+        "ab_eff": ab_eff,
+        "fuel_tariff": fuel_tariff,
+        "electric_tariff": electric_tariff,
+        "fuel_cost_baseline": fuel_tariff.calc_annual_charges(fuel_bought_hourly=dem_hl_btuh / ab_eff),
+        "electric_cost_baseline": electric_tariff.calc_annual_charges(electricity_bought_hourly=dem_el_kw),
+        "baseline_co2_tons": baseline_co2.to(ureg.metric_ton).magnitude,
+        "chp_installed_per_kw": (Q_(1, ureg.kW) * class_dict['chp'].installed_cost).to('').magnitude,
+        "chp_om_per_kwh": (Q_(1, ureg.kWh) * class_dict['chp'].om_cost).to('').magnitude,
+        "tes_installed_per_btu": (Q_(1, ureg.Btu) * class_dict['tes'].installed_cost).to('').magnitude,
+        "tes_om_per_btu": (Q_(1, ureg.Btu) * class_dict['tes'].om_cost).to('').magnitude,
+        "fuel_lbs_per_btu": (class_dict['emissions'].ng_co2 * Q_(1, ureg.Btu)).to('lbs').magnitude,
+        "grid_lbs_per_kwh": (subgrid_coefficient * Q_(1, ureg.kWh)).to('lbs').magnitude,
+        "tons_per_lb": Q_(1, ureg.lbs).to(ureg.metric_ton).magnitude
+    }
+
+
+def design_grid(class_dict=None, load_following_type=None, no_chp_sizes=DEFAULT_CHP_POINTS,
+                no_tes_sizes=DEFAULT_TES_POINTS):
+    """
+    Returns the CHP and TES sizes of the default design grid of an operating mode.
+
+    CHP sizes go up to the annual peak electrical demand (ELF) or to the CHP size whose heat
+    output meets the annual peak heating demand (TLF). PP requires the CHP to cover the peak
+    electrical demand, so its sizes go from the annual peak to PP_RANGE_FACTOR times the peak.
+    TES sizes go from zero (no TES) to TES_RANGE_FACTOR times the largest TES size given by
+    size_tes() for the CHP sizes in the grid, or to the largest daily heating demand if
+    size_tes() recommends no TES for any of them.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    load_following_type: str
+        "ELF", "TLF", or "Peak".
+    no_chp_sizes: int
+        number of CHP sizes.
+    no_tes_sizes: int
+        number of TES sizes.
+
+    Returns
+    -------
+    chp_sizes_kw: numpy.ndarray
+        CHP sizes in kW.
+    tes_sizes_btu: numpy.ndarray
+        TES sizes in Btu.
+    """
+    args_list = [class_dict, load_following_type]
+    if any(elem is None for elem in args_list) is False:
+        demand = class_dict['demand']
+        peak_el_kw = demand.annual_peak_el.to(ureg.kW).magnitude
+        if load_following_type == "ELF":
+            chp_sizes_kw = np.unique(np.linspace(0, peak_el_kw, int(no_chp_sizes) + 1)[1:])
+        elif load_following_type == "TLF":
+            max_size_kw = sizing.thermal_output_to_electrical_output(
+                thermal_output=demand.annual_peak_hl.to(ureg.kW)).to(ureg.kW).magnitude
+            chp_sizes_kw = np.unique(np.linspace(0, max_size_kw, int(no_chp_sizes) + 1)[1:])
+        elif load_following_type == "Peak":
+            chp_sizes_kw = np.unique(np.linspace(peak_el_kw, PP_RANGE_FACTOR * peak_el_kw, int(no_chp_sizes)))
+        else:
+            raise Exception("load_following_type must be one of {}".format(", ".join(LOAD_FOLLOWING_TYPES)))
+
+        dem_hl_btuh = demand.hl.to(ureg.Btu / ureg.hour).magnitude
+        max_tes_btu = TES_RANGE_FACTOR * np.max(dispatch.size_tes(dem_hl_btuh=dem_hl_btuh, chp_size_kw=chp_sizes_kw))
+        if max_tes_btu == 0:
+            # size_tes() finds no uncovered heat (ie: PP sizes), so TES sizes go up to the largest daily heat demand
+            no_days = len(dem_hl_btuh) // 24
+            max_tes_btu = np.max(dem_hl_btuh[:no_days * 24].reshape(no_days, 24).sum(axis=-1), initial=0)
+        tes_sizes_btu = np.unique(np.linspace(0, max_tes_btu, int(no_tes_sizes)))
+        return chp_sizes_kw, tes_sizes_btu
+
+
+def evaluate_designs(class_dict=None, load_following_type=None, chp_sizes_kw=None, tes_sizes_btu=None,
+                     site_data=None):
+    """
+    Calculates the annual energy, costs, payback, and emissions of many designs (CHP and TES
+    size pairs) of one operating mode.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    load_following_type: str
+        "ELF", "TLF", or "Peak".
+    chp_sizes_kw: numpy.ndarray
+        CHP size of each design in kW.
+    tes_sizes_btu: numpy.ndarray
+        TES size of each design in Btu.
+    site_data: dict
+        Optional. Location data of class_dict (see _site_data()), so that repeated calls do
+        not compile it again.
+
+    Returns
+    -------
+    results: dict
+        contains one float array per column of SURFACE_COLUMNS (except "load_following_type"
+        and "refinement"), one value per design. Costs are in $, energy in kWh or Btu, and
+        emissions in metric tons. A design whose TLF dispatch reaches an hour outside the
+        expected range is not feasible and has NaN results.
+    """
+    args_list = [class_dict, load_following_type, chp_sizes_kw, tes_sizes_btu]
+    if any(elem is None for elem in args_list) is False:
+        chp_sizes_kw, tes_sizes_btu, site_data = _check_designs(
+            class_dict=class_dict, load_following_type=load_following_type, chp_sizes_kw=chp_sizes_kw,
+            tes_sizes_btu=tes_sizes_btu, site_data=site_data)
+        chunks = [_evaluate_chunk(site_data=site_data, load_following_type=load_following_type,
+                                  chp_sizes_kw=chp_sizes_kw[start:start + DESIGN_CHUNK],
+                                  tes_sizes_btu=tes_sizes_btu[start:start + DESIGN_CHUNK])
+                  for start in range(0, len(chp_sizes_kw), DESIGN_CHUNK)]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def hourly_designs(class_dict=None, load_following_type=None, chp_sizes_kw=None, tes_sizes_btu=None,
+                   site_data=None):
+    """
+    Calculates the hourly dispatch of a few designs (CHP and TES size pairs) of one operating
+    mode, ie: the designs picked by best_designs() or on a Pareto frontier (see pareto.py).
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    load_following_type: str
+        "ELF", "TLF", or "Peak".
+    chp_sizes_kw: numpy.ndarray
+        CHP size of each design in kW.
+    tes_sizes_btu: numpy.ndarray
+        TES size of each design in Btu.
+    site_data: dict
+        Optional. Location data of class_dict (see _site_data()).
+
+    Returns
+    -------
+    hourly: dict
+        contains one (designs x hours) float array per series of HOURLY_DESIGN_SERIES, named
+        like the hourly series of engines.py without the mode prefix. Designs that are not
+        feasible (see evaluate_designs()) are all zeros.
+    """
+    args_list = [class_dict, load_following_type, chp_sizes_kw, tes_sizes_btu]
+    if any(elem is None for elem in args_list) is False:
+        chp_sizes_kw, tes_sizes_btu, site_data = _check_designs(
+            class_dict=class_dict, load_following_type=load_following_type, chp_sizes_kw=chp_sizes_kw,
+            tes_sizes_btu=tes_sizes_btu, site_data=site_data)
+        chunks = []
+        for start in range(0, len(chp_sizes_kw), DESIGN_CHUNK):
+            hourly = _dispatch_chunk(site_data=site_data, load_following_type=load_following_type,
+                                     chp_sizes_kw=chp_sizes_kw[start:start + DESIGN_CHUNK],
+                                     tes_sizes_btu=tes_sizes_btu[start:start + DESIGN_CHUNK])
+            by_design = hourly["electric_by_design"]
+            chunks.append({name: hourly[name][by_design] if name in ELECTRIC_SERIES else hourly[name]
+                           for name in HOURLY_DESIGN_SERIES})
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in HOURLY_DESIGN_SERIES}
+
+
+def _check_designs(class_dict, load_following_type, chp_sizes_kw, tes_sizes_btu, site_data):
+    # Validates the designs of evaluate_designs() and hourly_designs() and compiles the location data
+    if load_following_type not in LOAD_FOLLOWING_TYPES:
+        raise Exception("load_following_type must be one of {}".format(", ".join(LOAD_FOLLOWING_TYPES)))
+    chp_sizes_kw = np.atleast_1d(np.asarray(chp_sizes_kw, dtype=float))
+    tes_sizes_btu = np.atleast_1d(np.asarray(tes_sizes_btu, dtype=float))
+    if chp_sizes_kw.shape != tes_sizes_btu.shape or chp_sizes_kw.ndim != 1:
+        raise Exception("chp_sizes_kw and tes_sizes_btu must be 1D arrays with one value per design")
+    if (chp_sizes_kw < 0).any() or (tes_sizes_btu < 0).any():
+        raise Exception("CHP and TES sizes must not be negative")
+    if site_data is None:
+        site_data = _site_data(class_dict)
+    if load_following_type == "Peak" and (chp_sizes_kw < site_data["annual_peak_el_kw"]).any():
+        raise Exception("PP designs need CHP sizes of at least the annual peak electrical demand ({} kW)".format(
+            round(site_data["annual_peak_el_kw"], 2)))
+    return chp_sizes_kw, tes_sizes_btu, site_data
+
+
+def _dispatch_chunk(site_data, load_following_type, chp_sizes_kw, tes_sizes_btu):
+    # Hourly dispatch of a chunk of designs. The electrical series (ELECTRIC_SERIES) have one row per
+    # unique CHP size for ELF and PP; "electric_by_design" gives the row of each design
+    dem_el_kw = site_data["dem_el_kw"]
+    dem_hl_btuh = site_data["dem_hl_btuh"]
+    min_pl = site_data["min_pl"]
+    feasible = np.ones(len(chp_sizes_kw), dtype=bool)
+
+    if load_following_type == "TLF":
+        chp_gen_btuh, tes_flow_btuh, tes_soc, error_hours = dispatch.tlf_calc_hourly_heat_chp_tes_soc_batch(
+            dem_hl_btuh=dem_hl_btuh, chp_sizes_kw=chp_sizes_kw, tes_sizes_btu=tes_sizes_btu, min_pl=min_pl,
+            tes_start=site_data["tes_start"])
+        # Designs outside the expected range are dropped from the bills and reported as NaN
+        feasible = error_hours < 0
+        chp_gen_btuh[~feasible] = 0.0
+        tes_flow_btuh[~feasible] = 0.0
+        tes_soc[~feasible] = 0.0
+        electric_gen_kwh = dispatch.tlf_calc_electricity_generated(chp_gen_btuh=chp_gen_btuh)
+        electricity_sold_kwh = dispatch.tlf_calc_electricity_sold(dem_el_kw=dem_el_kw, chp_gen_kwh=electric_gen_kwh)
+        electricity_bought_kwh = dispatch.calc_electricity_bought(dem_el_kw=dem_el_kw, chp_gen_kwh=electric_gen_kwh)
+        electric_by_design = np.arange(len(chp_sizes_kw))
+    else:
+        # Electrical dispatch depends on the CHP size only, so it is run and billed once per CHP size
+        unique_sizes_kw, electric_by_design = np.unique(chp_sizes_kw, return_inverse=True)
+        electric_dispatch = dispatch.calc_electric_dispatch(dem_el_kw=dem_el_kw, chp_size_kw=unique_sizes_kw,
+                                                            min_pl=min_pl, load_following_type=load_following_type)
+        electric_gen_kwh = electric_dispatch["gen_kwh"]
+        electricity_sold_kwh = electric_dispatch["sold_kwh"]
+        electricity_bought_kwh = electric_dispatch["bought_kwh"]
+        chp_gen_btuh = electric_dispatch["heat_btuh"][electric_by_design]
+        tes_flow_btuh, tes_soc = dispatch.calc_tes_heat_flow_and_soc_batch(
+            excess_and_deficit_btuh=chp_gen_btuh - dem_hl_btuh, tes_sizes_btu=tes_sizes_btu,
+            tes_starts=site_data["tes_start"])
+
+    boiler_btuh = dispatch.calc_aux_boiler_output_rate(dem_hl_btuh=dem_hl_btuh, chp_gen_btuh=chp_gen_btuh,
+                                                       tes_flow_btuh=tes_flow_btuh,
+                                                       boiler_size_btuh=site_data["boiler_size_btuh"])
+    chp_fuel_btu = dispatch.chp_calc_hourly_fuel_use(chp_gen_kwh=electric_gen_kwh)
+    ab_fuel_btu = dispatch.ab_calc_hourly_fuel_use(ab_heat_rate_btuh=boiler_btuh, ab_eff=site_data["ab_eff"])
+    return {
+        "electric_gen_kwh": electric_gen_kwh,
+        "electricity_bought_kwh": electricity_bought_kwh,
+        "electricity_sold_kwh": electricity_sold_kwh,
+        "chp_gen_btuh": chp_gen_btuh,
+        "tes_heat_flow_btuh": tes_flow_btuh,
+        "tes_soc": tes_soc,
+        "boiler_dispatch_btuh": boiler_btuh,
+        "chp_fuel_use_btu": chp_fuel_btu,
+        "ab_fuel_use_btu": ab_fuel_btu,
+        "electric_by_design": electric_by_design,
+        "feasible": feasible
+    }
+
+
+def _evaluate_chunk(site_data, load_following_type, chp_sizes_kw, tes_sizes_btu):
+    hourly = _dispatch_chunk(site_data=site_data, load_following_type=load_following_type,
+                             chp_sizes_kw=chp_sizes_kw, tes_sizes_btu=tes_sizes_btu)
+    electric_gen_kwh = hourly["electric_gen_kwh"]
+    electricity_bought_kwh = hourly["electricity_bought_kwh"]
+    electricity_sold_kwh = hourly["electricity_sold_kwh"]
+    tes_flow_btuh = hourly["tes_heat_flow_btuh"]
+    chp_fuel_btu = hourly["chp_fuel_use_btu"]
+    ab_fuel_btu = hourly["ab_fuel_use_btu"]
+    electric_by_design = hourly["electric_by_design"]
+    feasible = hourly["feasible"]
+    fuel_btu = chp_fuel_btu[electric_by_design] + ab_fuel_btu
+
+    # Bills, as in the fast engine (see engines.py)
+    electric_tariff = site_data["electric_tariff"]
+    fuel_cost = site_data["fuel_tariff"].calc_annual_charges(fuel_bought_hourly=fuel_btu)
+    electric_cost = electric_tariff.calc_annual_charges(electricity_bought_hourly=electricity_bought_kwh)
+    if load_following_type == "ELF":
+        pp_revenue = np.zeros(len(electric_cost))
+    else:
+        pp_revenue = electric_tariff.calc_annual_charges(electricity_bought_hourly=electricity_sold_kwh, pp_rev=True)
+
+    # Annual totals of each design
+    electric_gen_total = dispatch.sum_hourly(electric_gen_kwh)[electric_by_design]
+    chp_fuel_total = dispatch.sum_hourly(chp_fuel_btu)[electric_by_design]
+    ab_fuel_total = dispatch.sum_hourly(ab_fuel_btu)
+    bought_total = dispatch.sum_hourly(electricity_bought_kwh)[electric_by_design]
+    electric_cost = electric_cost[electric_by_design]
+    pp_revenue = pp_revenue[electric_by_design]
+
+    # Payback, as in calc_costs()
+    chp_om_cost = dispatch.sum_hourly(np.abs(electric_gen_kwh) * site_data["chp_om_per_kwh"])[electric_by_design]
+    tes_om_cost = np.where(tes_sizes_btu == 0, 0.0,
+                           dispatch.sum_hourly(np.abs(tes_flow_btuh) * site_data["tes_om_per_btu"]))
+    installed_cost = chp_sizes_kw * site_data["chp_installed_per_kw"] + \
+        tes_sizes_btu * site_data["tes_installed_per_btu"]
+    om_cost = chp_om_cost + tes_om_cost
+    total_cost_savings = (site_data["electric_cost_baseline"] - electric_cost) + \
+        (site_data["fuel_cost_baseline"] - fuel_cost)
+    annual_savings = pp_revenue + total_cost_savings - om_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        simple_payback = installed_cost / annual_savings
+        incentive_payback = (installed_cost - (costs.INCENTIVE_BASE_PCT * installed_cost)) / annual_savings
+
+    # Emissions, as in calc_chp_emissions()
+    total_co2_lbs = bought_total * site_data["grid_lbs_per_kwh"] + chp_fuel_total * site_data["fuel_lbs_per_btu"] + \
+        ab_fuel_total * site_data["fuel_lbs_per_btu"]
+    total_co2_tons = total_co2_lbs * site_data["tons_per_lb"]
+
+    results = {
+        "chp_size_kw": chp_sizes_kw,
+        "tes_size_btu": tes_sizes_btu,
+        "feasible": feasible,
+        "electric_gen_kwh": electric_gen_total,
+        "electricity_bought_kwh": bought_total,
+        "electricity_sold_kwh": dispatch.sum_hourly(electricity_sold_kwh)[electric_by_design],
+        "chp_fuel_btu": chp_fuel_total,
+        "ab_fuel_btu": ab_fuel_total,
+        "electric_cost": electric_cost,
+        "fuel_cost": fuel_cost,
+        "pp_revenue": pp_revenue,
+        "annual_savings": annual_savings,
+        "installed_cost": installed_cost,
+        "om_cost": om_cost,
+        "simple_payback_yrs": simple_payback,
+        "incentive_payback_yrs": incentive_payback,
+        "total_co2_tons": total_co2_tons,
+        "co2_reduction_tons": site_data["baseline_co2_tons"] - total_co2_tons
+    }
+    for name, values in results.items():
+        if name not in ("chp_size_kw", "tes_size_btu", "feasible"):
+            results[name] = np.where(feasible, values, np.nan)
+    return results
+
+
+def best_designs(surface=None):
+    """
+    Picks the payback-minimizing and emissions-minimizing design of each operating mode.
+
+    Only feasible designs that save money each year (positive annual savings after O&M) have a
+    payback; if no design of a mode does, its payback row is left out.
+
+    Parameters
+    ----------
+    surface: pandas.DataFrame
+        response surface from cosize() or evaluate_designs(), with the columns of SURFACE_COLUMNS.
+
+    Returns
+    -------
+    df_best: pandas.DataFrame
+        one row per operating mode and objective ("objective" column: "payback" or "emissions"),
+        with the columns of the surface.
+    """
+    if surface is not None:
+        rows = []
+        for load_following_type, df_mode in surface.groupby("load_following_type", sort=False):
+            feasible = df_mode[df_mode["feasible"]]
+            paying = feasible[feasible["annual_savings"] > 0]
+            if not paying.empty:
+                rows.append(dict(paying.loc[paying["simple_payback_yrs"].idxmin()], objective="payback"))
+            if not feasible.empty:
+                rows.append(dict(feasible.loc[feasible["total_co2_tons"].idxmin()], objective="emissions"))
+        return pd.DataFrame(rows, columns=["objective"] + list(SURFACE_COLUMNS))
+
+
+def cosize(class_dict=None, load_following_types=LOAD_FOLLOWING_TYPES, no_chp_sizes=DEFAULT_CHP_POINTS,
+           no_tes_sizes=DEFAULT_TES_POINTS, refinements=0, chp_sizes_kw=None, tes_sizes_btu=None):
+    """
+    Evaluates every CHP size x TES size design of a grid for each operating mode and picks the
+    designs with the lowest simple payback and the lowest emissions.
+
+    Each refinement adds a REFINE_POINTS x REFINE_POINTS grid spanning one grid step on either
+    side of the best payback and best emissions designs of the previous pass, so the optimum
+    is found more precisely without a finer grid over the whole range.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    load_following_types: tuple
+        operating modes to size ("ELF", "TLF", and/or "Peak").
+    no_chp_sizes: int
+        number of CHP sizes in the grid of each mode (see design_grid()).
+    no_tes_sizes: int
+        number of TES sizes in the grid of each mode.
+    refinements: int
+        number of refinement passes around the best designs.
+    chp_sizes_kw: numpy.ndarray
+        Optional. CHP sizes in kW to use for every mode instead of the default grid. Peak only
+        uses the sizes at or above the annual electrical peak, and keeps its default grid if
+        there are none.
+    tes_sizes_btu: numpy.ndarray
+        Optional. TES sizes in Btu to use for every mode instead of the default grid.
+
+    Returns
+    -------
+    df_surface: pandas.DataFrame
+        one row per design with the columns of SURFACE_COLUMNS. "refinement" is 0 for the grid
+        and the pass number for designs added by a refinement.
+    df_best: pandas.DataFrame
+        the best designs of each mode (see best_designs()).
+    """
+    if class_dict is not None:
+        site_data = _site_data(class_dict)
+        frames = []
+        for load_following_type in load_following_types:
+            grid_chp_kw, grid_tes_btu = design_grid(class_dict=class_dict, load_following_type=load_following_type,
+                                                    no_chp_sizes=no_chp_sizes, no_tes_sizes=no_tes_sizes)
+            if chp_sizes_kw is not None:
+                custom_chp_kw = np.unique(np.asarray(chp_sizes_kw, dtype=float))
+                # Peak designs must cover the annual peak, so smaller custom sizes only apply to ELF and TLF
+                if load_following_type == "Peak":
+                    custom_chp_kw = custom_chp_kw[custom_chp_kw >= site_data["annual_peak_el_kw"]]
+                if custom_chp_kw.size > 0:
+                    grid_chp_kw = custom_chp_kw
+            if tes_sizes_btu is not None:
+                grid_tes_btu = np.unique(np.asarray(tes_sizes_btu, dtype=float))
+            chp_bounds = (grid_chp_kw.min(), grid_chp_kw.max())
+            tes_bounds = (grid_tes_btu.min(), grid_tes_btu.max())
+            chp_step = np.max(np.diff(grid_chp_kw), initial=0)
+            tes_step = np.max(np.diff(grid_tes_btu), initial=0)
+
+            chp_designs, tes_designs = [axis.ravel() for axis in np.meshgrid(grid_chp_kw, grid_tes_btu,
+                                                                             indexing="ij")]
+            df_mode = _surface_frame(class_dict=class_dict, load_following_type=load_following_type,
+                                     chp_sizes_kw=chp_designs, tes_sizes_btu=tes_designs, refinement=0,
+                                     site_data=site_data)
+            for refinement in range(1, int(refinements) + 1):
+                best = best_designs(surface=df_mode)
+                new_designs = []
+                for _, row in best.iterrows():
+                    chp_axis = np.unique(np.clip(np.linspace(row["chp_size_kw"] - chp_step,
+                                                             row["chp_size_kw"] + chp_step, REFINE_POINTS),
+                                                 *chp_bounds))
+                    tes_axis = np.unique(np.clip(np.linspace(row["tes_size_btu"] - tes_step,
+                                                             row["tes_size_btu"] + tes_step, REFINE_POINTS),
+                                                 *tes_bounds))
+                    new_designs += list(zip(*[axis.ravel() for axis in np.meshgrid(chp_axis, tes_axis,
+                                                                                   indexing="ij")]))
+                # Designs already evaluated are not repeated
+                evaluated = set(zip(df_mode["chp_size_kw"], df_mode["tes_size_btu"]))
+                new_designs = [design for design in dict.fromkeys(new_designs) if design not in evaluated]
+                if not new_designs:
+                    break
+                new_chp, new_tes = [np.array(axis, dtype=float) for axis in zip(*new_designs)]
+                df_new = _surface_frame(class_dict=class_dict, load_following_type=load_following_type,
+                                        chp_sizes_kw=new_chp, tes_sizes_btu=new_tes, refinement=refinement,
+                                        site_data=site_data)
+                df_mode = pd.concat([df_mode, df_new], ignore_index=True)
+                chp_step = chp_step * 2 / (REFINE_POINTS - 1)
+                tes_step = tes_step * 2 / (REFINE_POINTS - 1)
+            frames.append(df_mode)
+
+        df_surface = pd.concat(frames, ignore_index=True)
+        return df_surface, best_designs(surface=df_surface)
+
+
+def _surface_frame(class_dict, load_following_type, chp_sizes_kw, tes_sizes_btu, refinement, site_data):
+    # Evaluates designs of one mode as rows of the response surface
+    results = evaluate_designs(class_dict=class_dict, load_following_type=load_following_type,
+                               chp_sizes_kw=chp_sizes_kw, tes_sizes_btu=tes_sizes_btu, site_data=site_data)
+    results["load_following_type"] = load_following_type
+    results["refinement"] = refinement
+    return pd.DataFrame(results, columns=list(SURFACE_COLUMNS))
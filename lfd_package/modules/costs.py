@@ -2,7 +2,12 @@
 Description: Where energy costs are calculated
 """
 
+import numpy as np
 from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import dispatch
+
+# Share of the installed cost of CHP + TES covered by incentives, for the payback with incentives
+INCENTIVE_BASE_PCT = 0.375
 
 
 def calc_electric_charges(class_dict=None, electricity_bought_hourly=None, pp_rev=False):
@@ -147,14 +152,15 @@ def seasonal_block_rates(sch=None, units=None, el_cost_dict=None, costs_class=No
     """
     args_list = [sch, units, el_cost_dict, costs_class, electricity_bought_hourly]
     if any(elem is None for elem in args_list) is False:
-        summer_length = costs_class.winter_start_month - costs_class.summer_start_month
+        demand = costs_class.demand
+        summer_length = demand.winter_start_month - demand.summer_start_month
 
         annual_base_cost = []
         annual_rate_cost = []
 
         if electricity_bought_hourly[0].units == ureg.kWh:
             electricity_bought_hourly = \
-                costs_class.convert_units(values_list=electricity_bought_hourly, units_to_str="kW")
+                demand.convert_units(values_list=electricity_bought_hourly, units_to_str="kW")
 
         if sch == "schedule_seasonal_energy_block":
             block1_cap = Q_(el_cost_dict[sch]["energy_block1_cap"], '{}'.format(units))
@@ -162,7 +168,7 @@ def seasonal_block_rates(sch=None, units=None, el_cost_dict=None, costs_class=No
             rate_winter_b1 = Q_(el_cost_dict[sch]["energy_charge_winter_block1"], '1/{}'.format(units))
             rate_summer_b2 = Q_(el_cost_dict[sch]["energy_charge_summer_block2"], '1/{}'.format(units))
             rate_winter_b2 = Q_(el_cost_dict[sch]["energy_charge_winter_block2"], '1/{}'.format(units))
-            monthly_energy_or_peaks_list = costs_class.monthly_energy_sums(dem_profile=electricity_bought_hourly)
+            monthly_energy_or_peaks_list = demand.monthly_energy_sums(dem_profile=electricity_bought_hourly)
             monthly_min = min(monthly_energy_or_peaks_list)
         elif sch == "schedule_seasonal_demand_block":
             block1_cap = Q_(el_cost_dict[sch]["dem_block1_cap"], '{}'.format(units))
@@ -170,7 +176,7 @@ def seasonal_block_rates(sch=None, units=None, el_cost_dict=None, costs_class=No
             rate_winter_b1 = Q_(el_cost_dict[sch]["dem_charge_winter_block1"], '1/{}'.format(units))
             rate_summer_b2 = Q_(el_cost_dict[sch]["dem_charge_summer_block2"], '1/{}'.format(units))
             rate_winter_b2 = Q_(el_cost_dict[sch]["dem_charge_winter_block2"], '1/{}'.format(units))
-            monthly_energy_or_peaks_list = costs_class.monthly_demand_peaks(dem_profile=electricity_bought_hourly)
+            monthly_energy_or_peaks_list = demand.monthly_demand_peaks(dem_profile=electricity_bought_hourly)
             monthly_min = min(monthly_energy_or_peaks_list)
         else:
             raise Exception("schedule must be either seasonal demand block or seasonal energy block")
@@ -183,7 +189,7 @@ def seasonal_block_rates(sch=None, units=None, el_cost_dict=None, costs_class=No
 
             monthly_energy_bought_b2 = [item - block1_cap for item in monthly_energy_or_peaks_list]
             summer_weight_b2, winter_weight_b2 = \
-                costs_class.seasonal_weights_monthly_data(monthly_data=monthly_energy_bought_b2)
+                demand.seasonal_weights_monthly_data(monthly_data=monthly_energy_bought_b2)
 
             effective_rate_b2 = (rate_summer_b2 * summer_weight_b2) + (rate_winter_b2 * winter_weight_b2)
             annual_b2_rate_cost = effective_rate_b2 * sum(monthly_energy_bought_b2)
@@ -194,7 +200,7 @@ def seasonal_block_rates(sch=None, units=None, el_cost_dict=None, costs_class=No
         else:
             monthly_cost = []
             for index, monthly_energy in enumerate(monthly_energy_or_peaks_list):
-                if costs_class.summer_start_month <= int(index + 1) < costs_class.winter_start_month:
+                if demand.summer_start_month <= int(index + 1) < demand.winter_start_month:
                     if monthly_energy < block1_cap:
                         monthly_cost.append(monthly_energy * rate_summer_b1)
                     else:
@@ -337,7 +343,7 @@ def calc_installed_om_cost(class_dict=None, dispatch_hourly=None, size=None, cla
     ----------
     class_dict: dict
         contains initialized class data using CLI inputs (see command_line.py)
-    dispatch_hourly: list
+    dispatch_hourly: numpy.ndarray (Quantity) or list
         contains the hourly heat or electricity dispatched by the TES or CHP system.
     size: Quantity
         the size of the CHP or TES system in kW or Btu.
@@ -354,25 +360,26 @@ def calc_installed_om_cost(class_dict=None, dispatch_hourly=None, size=None, cla
     args_list = [class_dict, dispatch_hourly, size, class_str]
     if any(elem is None for elem in args_list) is False:
         class_info = class_dict[str(class_str)]
-        om_cost_list = []
 
         if size.magnitude == 0:
             return Q_(0, ''), Q_(0, '')
 
-        for rate in dispatch_hourly:
-            if class_str == "tes":
-                rate = rate * Q_(1, ureg.hours)
-            cost_hourly = (abs(rate) * class_info.om_cost).to('')
-            om_cost_list.append(cost_hourly)
+        # Hourly costs are calculated for the whole array at once and added in hour order
+        if not isinstance(dispatch_hourly, ureg.Quantity):
+            dispatch_hourly = Q_(np.array([rate.magnitude for rate in dispatch_hourly], dtype=float),
+                                 dispatch_hourly[0].units)
+        if class_str == "tes":
+            dispatch_hourly = dispatch_hourly * Q_(1, ureg.hours)
+        cost_hourly = (abs(dispatch_hourly) * class_info.om_cost).to('')
 
-        om_cost = sum(om_cost_list)
+        om_cost = Q_(dispatch.sum_hourly(cost_hourly.magnitude), '')
         installed_cost = (size * class_info.installed_cost).to('')
         return installed_cost, om_cost
 
 
 def calc_costs(thermal_cost_new=None, electrical_cost_new=None, tes_size=None, pct_incentive=0, class_dict=None,
                thermal_cost_baseline=None, electrical_cost_baseline=None, load_following_type="ELF", chp_size=None,
-               chp_gen_hourly_kwh=None, tes_heat_flow_list=None, electricity_sold_hourly=None):
+               chp_gen_hourly_kwh=None, tes_heat_flow_list=None, electricity_sold_hourly=None, pp_revenue=None):
     """
     Calculates the payback period of CHP and TES installation.
 
@@ -404,6 +411,9 @@ def calc_costs(thermal_cost_new=None, electrical_cost_new=None, tes_size=None, p
     electricity_sold_hourly: list
         contains excess electricity generated hourly by CHP and sold to grid.
         Units are in kWh. Optional argument.
+    pp_revenue: Quantity
+        Dimensionless quantity representing the annual buyback revenue, if already calculated (see
+        ElectricTariff in tariffs.py). Optional argument. If None, it is calculated from electricity_sold_hourly.
 
     Returns
     -------
@@ -415,7 +425,9 @@ def calc_costs(thermal_cost_new=None, electrical_cost_new=None, tes_size=None, p
                  electrical_cost_baseline, load_following_type, chp_size, chp_gen_hourly_kwh, tes_heat_flow_list]
     if any(elem is None for elem in args_list) is False:
         # Calculate Cost Savings
-        if load_following_type == "TLF" or load_following_type == "Peak":
+        if (load_following_type == "TLF" or load_following_type == "Peak") and pp_revenue is not None:
+            revenue = pp_revenue
+        elif load_following_type == "TLF" or load_following_type == "Peak":
             revenue = calc_pp_revenue(class_dict=class_dict, electricity_sold_hourly=electricity_sold_hourly)
         else:
             revenue = Q_(0, '')
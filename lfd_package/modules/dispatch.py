@@ -0,0 +1,638 @@
+"""
+Module Description:
+    Float64 array versions of the hourly CHP, TES, and aux boiler calculations in chp.py,
+    thermal_storage.py, aux_boiler.py, and sizing_calcs.size_tes(). Inputs and outputs
+    are plain NumPy arrays in fixed units (kW, kWh, Btu/hr, Btu) so the hourly loops
+    never touch pint. Quantities are attached by the caller once results leave the
+    analysis (see command_line.py).
+
+    Each function applies the same branch logic and the same floating point operations
+    as the Quantity-based function it replaces, so results are numerically identical.
+"""
+
+import math
+import numpy as np
+from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import sizing_calcs as sizing, kernels
+
+# Conversion factors, computed once with pint using the same unit expressions as the
+# Quantity-based functions. Hourly values in kW and kWh (or Btu/hr and Btu) are numerically equal.
+KW_TO_BTUH = Q_(1, ureg.kW).to(ureg.Btu / ureg.hour).magnitude
+BTUH_TO_KW = Q_(1, ureg.Btu / ureg.hour).to(ureg.kW).magnitude
+KW_HOUR_TO_BTU = (Q_(1, ureg.kW) * Q_(1, ureg.hours)).to(ureg.Btu).magnitude
+
+# CHP sizes sized together by size_tes(). Small chunks keep the (sizes x days) work arrays in the CPU cache
+TES_SIZING_CHUNK = 64
+
+
+def sum_hourly(values=None):
+    """
+    Sums hourly values from first to last hour along the last axis. Uses a running sum so
+    the result matches the built-in sum() of the equivalent list of Quantities bit for bit
+    (np.sum() adds in pairs and can differ in the last digits).
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        hourly values, either 1D (hours) or 2D (scenarios x hours).
+
+    Returns
+    -------
+    total: numpy.float64 or numpy.ndarray
+        sum of the hourly values, one per scenario for 2D input. Empty input sums to 0.
+    """
+    if values is not None:
+        values = np.asarray(values, dtype=float)
+        if values.shape[-1] == 0:
+            totals = np.zeros(values.shape[:-1])
+        else:
+            totals = np.cumsum(values, axis=-1)[..., -1]
+        if totals.ndim == 0:
+            # NumPy scalar like the sum of Quantities, so dividing by a zero total gives nan instead of raising
+            return totals[()]
+        return totals
+
+
+def _per_scenario(value):
+    """
+    Reshapes a per-scenario vector (CHP sizes, for example) into a column so that it
+    broadcasts against (scenarios x hours) arrays. Scalars are returned unchanged.
+    """
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 0:
+        return value
+    return value[..., np.newaxis]
+
+
+def electrical_output_to_thermal_output_btuh(electrical_output_kw=None):
+    """
+    Array version of sizing.electrical_output_to_thermal_output(), converted to Btu/hr.
+
+    Parameters
+    ----------
+    electrical_output_kw: numpy.ndarray or float
+        electrical output of CHP in kW.
+
+    Returns
+    -------
+    thermal_output_btuh: numpy.ndarray or float
+        thermal output of CHP in Btu/hr.
+    """
+    if electrical_output_kw is not None:
+        return (sizing.THERMAL_OUTPUT_RATIO * np.asarray(electrical_output_kw, dtype=float)) * KW_TO_BTUH
+
+
+"""
+CHP Functions
+
+The electrical dispatch functions accept demand as a 1D array (hours) or a 2D array
+(scenarios x hours), so many buildings or CHP sizes can be dispatched in one call.
+chp_size_kw may be a float or a vector with one size per scenario. A vector of sizes
+with 1D demand gives one row per size.
+"""
+
+
+def elf_calc_electricity_generated(dem_el_kw=None, chp_size_kw=None, min_pl=None):
+    """
+    Array version of chp.elf_calc_electricity_generated().
+
+    Parameters
+    ----------
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW (hours or scenarios x hours).
+    chp_size_kw: float or numpy.ndarray
+        size of CHP in kW, or one size per scenario.
+    min_pl: float
+        minimum part load of CHP (CHP class attribute).
+
+    Returns
+    -------
+    chp_gen_kwh: numpy.ndarray
+        electricity generated hourly in kWh.
+    """
+    args_list = [dem_el_kw, chp_size_kw, min_pl]
+    if any(elem is None for elem in args_list) is False:
+        dem_el_kw = np.asarray(dem_el_kw, dtype=float)
+        # Verifies acceptable input value range
+        if not (dem_el_kw >= 0).all():
+            raise Exception("Electrical demand values must be non-negative")
+        chp_size_kw = _per_scenario(chp_size_kw)
+        chp_min_output = min_pl * chp_size_kw
+        return np.where(dem_el_kw < chp_min_output, 0.0, np.minimum(dem_el_kw, chp_size_kw))
+
+
+def pp_calc_electricity_gen_sold(dem_el_kw=None, chp_size_kw=None, min_pl=None):
+    """
+    Array version of chp.pp_calc_electricity_gen_sold().
+
+    Parameters
+    ----------
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW (hours or scenarios x hours).
+    chp_size_kw: float or numpy.ndarray
+        size of CHP in kW, or one size per scenario.
+    min_pl: float
+        minimum part load of CHP (CHP class attribute).
+
+    Returns
+    -------
+    chp_gen_kwh: numpy.ndarray
+        electricity generated hourly by CHP in kWh.
+    chp_sold_kwh: numpy.ndarray
+        excess electricity generated hourly by CHP and sold to grid in kWh.
+    """
+    args_list = [dem_el_kw, chp_size_kw, min_pl]
+    if any(elem is None for elem in args_list) is False:
+        dem_el_kw = np.asarray(dem_el_kw, dtype=float)
+        chp_size_kw = _per_scenario(chp_size_kw)
+        chp_min_gen_kw = chp_size_kw * min_pl
+        running = (chp_min_gen_kw <= dem_el_kw) & (dem_el_kw <= chp_size_kw)
+        if not (running | (dem_el_kw < chp_min_gen_kw)).all():
+            raise Exception("CHP not sized to peak electrical demand")
+        chp_gen_kwh = np.where(running, chp_size_kw, 0.0)
+        chp_sold_kwh = np.where(running, chp_size_kw - dem_el_kw, 0.0)
+        return chp_gen_kwh, chp_sold_kwh
+
+
+def calc_hourly_heat_generated(chp_gen_kwh=None):
+    """
+    Array version of chp.elf_calc_hourly_heat_generated() and chp.pp_calc_hourly_heat_generated().
+
+    Parameters
+    ----------
+    chp_gen_kwh: numpy.ndarray
+        electricity generated hourly by CHP in kWh.
+
+    Returns
+    -------
+    hourly_heat_rate_btuh: numpy.ndarray
+        hourly thermal output of the CHP unit in Btu/hr.
+    """
+    if chp_gen_kwh is not None:
+        return electrical_output_to_thermal_output_btuh(chp_gen_kwh)
+
+
+def calc_electricity_bought(dem_el_kw=None, chp_gen_kwh=None):
+    """
+    Array version of chp.calc_electricity_bought().
+
+    Parameters
+    ----------
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW (hours or scenarios x hours).
+    chp_gen_kwh: numpy.ndarray
+        electricity generated hourly by CHP in kWh, with the same shape as dem_el_kw or
+        broadcastable to it.
+
+    Returns
+    -------
+    bought_kwh: numpy.ndarray
+        hourly electricity bought in kWh.
+    """
+    args_list = [dem_el_kw, chp_gen_kwh]
+    if any(elem is None for elem in args_list) is False:
+        dem_el_kw = np.asarray(dem_el_kw, dtype=float)
+        return np.where(chp_gen_kwh < dem_el_kw, dem_el_kw - chp_gen_kwh, 0.0)
+
+
+def tlf_calc_electricity_sold(dem_el_kw=None, chp_gen_kwh=None):
+    """
+    Array version of chp.tlf_calc_electricity_sold().
+
+    Parameters
+    ----------
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW (hours or scenarios x hours).
+    chp_gen_kwh: numpy.ndarray
+        electricity generated hourly by CHP in kWh, with the same shape as dem_el_kw or
+        broadcastable to it.
+
+    Returns
+    -------
+    sold_kwh: numpy.ndarray
+        hourly electricity sold to the grid in kWh.
+    """
+    args_list = [dem_el_kw, chp_gen_kwh]
+    if any(elem is None for elem in args_list) is False:
+        dem_el_kw = np.asarray(dem_el_kw, dtype=float)
+        return np.where(dem_el_kw < chp_gen_kwh, chp_gen_kwh - dem_el_kw, 0.0)
+
+
+def calc_electric_dispatch(dem_el_kw=None, chp_size_kw=None, min_pl=None, load_following_type=None):
+    """
+    Runs the full electrical dispatch for ELF or PP operation: CHP generation, electricity
+    bought, electricity sold, and the associated CHP heat output.
+
+    Parameters
+    ----------
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW (hours or scenarios x hours).
+    chp_size_kw: float or numpy.ndarray
+        size of CHP in kW, or one size per scenario.
+    min_pl: float
+        minimum part load of CHP (CHP class attribute).
+    load_following_type: str
+        either "ELF" or "Peak".
+
+    Returns
+    -------
+    dispatch_dict: dict
+        contains the hourly arrays "gen_kwh", "bought_kwh", "sold_kwh" and "heat_btuh".
+        Sold electricity is zero for ELF operation.
+    """
+    args_list = [dem_el_kw, chp_size_kw, min_pl, load_following_type]
+    if any(elem is None for elem in args_list) is False:
+        if load_following_type == "ELF":
+            gen_kwh = elf_calc_electricity_generated(dem_el_kw=dem_el_kw, chp_size_kw=chp_size_kw, min_pl=min_pl)
+            sold_kwh = np.zeros_like(gen_kwh)
+        elif load_following_type == "Peak":
+            gen_kwh, sold_kwh = pp_calc_electricity_gen_sold(dem_el_kw=dem_el_kw, chp_size_kw=chp_size_kw,
+                                                             min_pl=min_pl)
+        else:
+            raise Exception("load_following_type must be ELF or Peak for electrical dispatch")
+
+        dispatch_dict = {
+            "gen_kwh": gen_kwh,
+            "bought_kwh": calc_electricity_bought(dem_el_kw=dem_el_kw, chp_gen_kwh=gen_kwh),
+            "sold_kwh": sold_kwh,
+            "heat_btuh": calc_hourly_heat_generated(chp_gen_kwh=gen_kwh)
+        }
+        return dispatch_dict
+
+
+def tlf_calc_electricity_generated(chp_gen_btuh=None):
+    """
+    Array version of chp.tlf_calc_electricity_generated().
+
+    Parameters
+    ----------
+    chp_gen_btuh: numpy.ndarray
+        hourly heat generated by CHP in Btu/hr.
+
+    Returns
+    -------
+    hourly_electricity_gen_kwh: numpy.ndarray
+        CHP electricity generated each hour in kWh.
+    """
+    if chp_gen_btuh is not None:
+        electric_gen_kw = (np.asarray(chp_gen_btuh, dtype=float) * BTUH_TO_KW) * sizing.ELECTRICAL_OUTPUT_RATIO
+        return np.where(electric_gen_kw <= 0, 0.0, electric_gen_kw)
+
+
+def tlf_calc_hourly_heat_chp_tes_soc(dem_hl_btuh=None, chp_size_kw=None, tes_size_btu=None, min_pl=None,
+                                     tes_start=None):
+    """
+    Float version of chp.tlf_calc_hourly_heat_chp_tes_soc(). The TES state carries over
+    from hour to hour, so the hourly loop runs in kernels.tlf_chp_tes_soc() (compiled
+    with numba when it is installed).
+
+    Parameters
+    ----------
+    dem_hl_btuh: numpy.ndarray
+        hourly heating demand in Btu/hr.
+    chp_size_kw: float
+        size of CHP in kW.
+    tes_size_btu: float
+        size of TES in Btu.
+    min_pl: float
+        minimum part load of CHP (CHP class attribute).
+    tes_start: float
+        initial state of charge of TES (TES class attribute).
+
+    Returns
+    -------
+    chp_heat_btuh: numpy.ndarray
+        hourly heat generated by CHP in Btu/hr.
+    tes_flow_btuh: numpy.ndarray
+        hourly TES charging (positive) or discharging (negative) in Btu/hr.
+    soc: numpy.ndarray
+        hourly state of charge of TES (0 to 1).
+    """
+    args_list = [dem_hl_btuh, chp_size_kw, tes_size_btu, min_pl, tes_start]
+    if any(elem is None for elem in args_list) is False:
+        tes_size = float(tes_size_btu)
+        heat_min = float(electrical_output_to_thermal_output_btuh(min_pl * chp_size_kw))
+        heat_cap = float(electrical_output_to_thermal_output_btuh(chp_size_kw))
+        return kernels.tlf_chp_tes_soc(dem_hl_btuh=dem_hl_btuh, heat_min=heat_min, heat_cap=heat_cap,
+                                       tes_size=tes_size, tes_start=tes_start,
+                                       tes_is_empty=math.isclose(tes_size, 0))
+
+
+def tlf_calc_hourly_heat_chp_tes_soc_batch(dem_hl_btuh=None, chp_sizes_kw=None, tes_sizes_btu=None, min_pl=None,
+                                           tes_start=None):
+    """
+    Batched version of tlf_calc_hourly_heat_chp_tes_soc() for many designs (CHP and TES size
+    pairs) at once (see kernels.tlf_chp_tes_soc_batch()). Each row of the results matches
+    tlf_calc_hourly_heat_chp_tes_soc() for that design exactly. A design with an hour outside
+    the expected range does not raise an exception; it is reported in error_hours instead.
+
+    Parameters
+    ----------
+    dem_hl_btuh: numpy.ndarray
+        hourly heating demand in Btu/hr.
+    chp_sizes_kw: numpy.ndarray
+        size of CHP in kW, one per design.
+    tes_sizes_btu: numpy.ndarray
+        size of TES in Btu, one per design.
+    min_pl: float
+        minimum part load of CHP (CHP class attribute).
+    tes_start: float
+        initial state of charge of TES (TES class attribute).
+
+    Returns
+    -------
+    chp_heat_btuh: numpy.ndarray
+        (designs x hours) heat generated by CHP in Btu/hr.
+    tes_flow_btuh: numpy.ndarray
+        (designs x hours) TES charging (positive) or discharging (negative) in Btu/hr.
+    soc: numpy.ndarray
+        (designs x hours) state of charge of TES (0 to 1).
+    error_hours: numpy.ndarray
+        first hour of each design outside the expected range, or -1. The hourly results of a
+        design are not valid from that hour on.
+    """
+    args_list = [dem_hl_btuh, chp_sizes_kw, tes_sizes_btu, min_pl, tes_start]
+    if any(elem is None for elem in args_list) is False:
+        chp_sizes_kw = np.atleast_1d(np.asarray(chp_sizes_kw, dtype=float))
+        tes_sizes_btu = np.atleast_1d(np.asarray(tes_sizes_btu, dtype=float))
+        if chp_sizes_kw.shape != tes_sizes_btu.shape:
+            raise Exception("chp_sizes_kw and tes_sizes_btu must have one value per design")
+        chp_heat, tes_flow, soc, error_hours = kernels.tlf_chp_tes_soc_batch(
+            dem_hl_btuh=dem_hl_btuh, heat_min=electrical_output_to_thermal_output_btuh(min_pl * chp_sizes_kw),
+            heat_cap=electrical_output_to_thermal_output_btuh(chp_sizes_kw), tes_sizes=tes_sizes_btu,
+            tes_start=tes_start)
+        # Rows are made contiguous so that sums over the hours of each design run along memory
+        return np.ascontiguousarray(chp_heat.T), np.ascontiguousarray(tes_flow.T), np.ascontiguousarray(soc.T), \
+            error_hours
+
+
+def chp_calc_hourly_fuel_use(chp_gen_kwh=None):
+    """
+    Array version of chp.calc_hourly_fuel_use().
+
+    Parameters
+    ----------
+    chp_gen_kwh: numpy.ndarray
+        electricity generated hourly by CHP in kWh.
+
+    Returns
+    -------
+    fuel_use_btu: numpy.ndarray
+        hourly CHP fuel use in Btu.
+    """
+    if chp_gen_kwh is not None:
+        return (sizing.FUEL_CONSUMPTION_RATIO * np.asarray(chp_gen_kwh, dtype=float)) * KW_HOUR_TO_BTU
+
+
+"""
+TES Functions
+"""
+
+
+def calc_tes_heat_flow_and_soc(dem_hl_btuh=None, chp_gen_btuh=None, tes_size_btu=None, tes_start=None):
+    """
+    Float version of thermal_storage.calc_tes_heat_flow_and_soc() for ELF and PP operation.
+    Like the original, the SOC reported for each hour is the status at the start of the hour.
+
+    Parameters
+    ----------
+    dem_hl_btuh: numpy.ndarray
+        hourly heating demand in Btu/hr.
+    chp_gen_btuh: numpy.ndarray
+        hourly heat generated by CHP in Btu/hr.
+    tes_size_btu: float
+        size of TES in Btu.
+    tes_start: float
+        initial state of charge of TES (TES class attribute).
+
+    Returns
+    -------
+    tes_flow_btuh: numpy.ndarray
+        hourly TES charging (positive) or discharging (negative) in Btu/hr.
+    soc: numpy.ndarray
+        hourly state of charge of TES (0 to 1).
+    """
+    args_list = [dem_hl_btuh, chp_gen_btuh, tes_size_btu, tes_start]
+    if any(elem is None for elem in args_list) is False:
+        dem_hl_btuh = np.asarray(dem_hl_btuh, dtype=float)
+        # Exit function if TES is not recommended
+        if tes_size_btu == 0:
+            return np.zeros(len(dem_hl_btuh)), np.zeros(len(dem_hl_btuh))
+
+        # Negative values indicate CHP gen is less than demand (TES needs to discharge)
+        excess_and_deficit = np.asarray(chp_gen_btuh, dtype=float) - dem_hl_btuh
+        if np.isnan(excess_and_deficit).any():
+            raise Exception('Error in thermal_storage module function: calc_excess_heat')
+
+        tes_size = float(tes_size_btu)
+        tes_flow = []
+        soc = []
+        current_status = tes_start * tes_size
+        for excess in excess_and_deficit.tolist():
+            new_status = excess + current_status
+            if excess == 0:
+                # If demand is met exactly by CHP
+                tes_flow.append(0.0)
+                soc.append(current_status / tes_size)
+                current_status = new_status
+            elif 0 < excess and new_status <= tes_size:
+                # If CHP is over-generating and TES has room for heat
+                tes_flow.append(excess)
+                soc.append(current_status / tes_size)
+                current_status = new_status
+            elif 0 < excess:
+                # If CHP is over-generating and excess heat would over-fill TES
+                tes_flow.append(tes_size - current_status)
+                soc.append(current_status / tes_size)
+                current_status = tes_size
+            elif 0 < new_status:
+                # If heat is needed and dispatching heat would not empty TES
+                tes_flow.append(excess)
+                soc.append(current_status / tes_size)
+                current_status = new_status
+            else:
+                # If heat is needed and dispatching heat WOULD empty TES
+                tes_flow.append(-1 * current_status)
+                soc.append(0.0)
+                current_status = 0.0
+
+        return np.array(tes_flow), np.array(soc)
+
+
+def calc_tes_heat_flow_and_soc_batch(excess_and_deficit_btuh=None, tes_sizes_btu=None, tes_starts=None):
+    """
+    Batched version of calc_tes_heat_flow_and_soc() that simulates many TES sizes at once.
+    Without numba, small batches run one size at a time and large batches are advanced together
+    hour by hour (see kernels.tes_heat_flow_and_soc_batch()), so a batch is never much slower
+    than separate calls and each size of a batch of several hundred costs about a tenth of one.
+    Each row of the results matches calc_tes_heat_flow_and_soc() for that size exactly.
+
+    Parameters
+    ----------
+    excess_and_deficit_btuh: numpy.ndarray
+        hourly CHP heat generation minus heating demand in Btu/hr. Either 1D (shared by all
+        sizes) or 2D (sizes x hours).
+    tes_sizes_btu: numpy.ndarray
+        TES sizes to simulate in Btu.
+    tes_starts: float or numpy.ndarray
+        initial state of charge of TES, either shared or one per size.
+
+    Returns
+    -------
+    tes_flow_btuh: numpy.ndarray
+        (sizes x hours) TES charging (positive) or discharging (negative) in Btu/hr.
+    soc: numpy.ndarray
+        (sizes x hours) state of charge of TES (0 to 1).
+    """
+    args_list = [excess_and_deficit_btuh, tes_sizes_btu, tes_starts]
+    if any(elem is None for elem in args_list) is False:
+        tes_sizes = np.atleast_1d(np.asarray(tes_sizes_btu, dtype=float))
+        excess_and_deficit = np.broadcast_to(np.asarray(excess_and_deficit_btuh, dtype=float),
+                                             (len(tes_sizes), np.shape(excess_and_deficit_btuh)[-1]))
+        if np.isnan(excess_and_deficit).any():
+            raise Exception('Error in thermal_storage module function: calc_excess_heat')
+
+        no_sizes, no_hours = excess_and_deficit.shape
+        tes_flow = np.zeros((no_sizes, no_hours))
+        soc = np.zeros((no_sizes, no_hours))
+        # Sizes of zero keep zero flow and SOC (TES is not recommended)
+        has_tes = tes_sizes != 0
+        tes_sizes = tes_sizes[has_tes]
+        excess_and_deficit = np.ascontiguousarray(excess_and_deficit[has_tes].T)
+        current_status = np.broadcast_to(np.asarray(tes_starts, dtype=float), has_tes.shape)[has_tes] * tes_sizes
+
+        flow_by_hour, soc_by_hour = kernels.tes_heat_flow_and_soc_batch(excess_and_deficit_btuh=excess_and_deficit,
+                                                                         tes_sizes=tes_sizes,
+                                                                         current_status=current_status)
+        tes_flow[has_tes] = flow_by_hour.T
+        soc[has_tes] = soc_by_hour.T
+        return tes_flow, soc
+
+
+"""
+Aux Boiler Functions
+"""
+
+
+def calc_aux_boiler_output_rate(dem_hl_btuh=None, chp_gen_btuh=None, tes_flow_btuh=None, boiler_size_btuh=None):
+    """
+    Array version of aux_boiler.calc_aux_boiler_output_rate().
+
+    Parameters
+    ----------
+    dem_hl_btuh: numpy.ndarray
+        hourly heating demand in Btu/hr.
+    chp_gen_btuh: numpy.ndarray
+        hourly heat generated by CHP in Btu/hr.
+    tes_flow_btuh: numpy.ndarray
+        hourly TES charging (positive) or discharging (negative) in Btu/hr.
+    boiler_size_btuh: float
+        capacity of the aux boiler in Btu/hr.
+
+    Returns
+    -------
+    ab_heat_rate_btuh: numpy.ndarray
+        hourly heat output of the auxiliary boiler in Btu/hr.
+    """
+    args_list = [dem_hl_btuh, chp_gen_btuh, tes_flow_btuh, boiler_size_btuh]
+    if any(elem is None for elem in args_list) is False:
+        dem_hl_btuh = np.asarray(dem_hl_btuh, dtype=float)
+        # TES flow is negative if heat is dispatched. Dispatch is now turned positive
+        chp_tes_sum = chp_gen_btuh + (-1 * np.asarray(tes_flow_btuh, dtype=float))
+        ab_heat_rate_btuh = np.where(dem_hl_btuh <= chp_tes_sum, 0.0, dem_hl_btuh - chp_tes_sum)
+
+        # Check that hourly heat demand is within aux boiler operating parameters
+        short_hours = np.flatnonzero(boiler_size_btuh < ab_heat_rate_btuh)
+        if short_hours.size > 0:
+            index = int(short_hours[0])
+            short = Q_(round(abs(ab_heat_rate_btuh[index] - boiler_size_btuh), 2), ureg.Btu / ureg.hour)
+            raise Exception('ALERT: Boiler size is insufficient to meet heating demand! Output is short by '
+                            '{} at hour number {}'.format(short, index))
+        return ab_heat_rate_btuh
+
+
+def ab_calc_hourly_fuel_use(ab_heat_rate_btuh=None, ab_eff=None):
+    """
+    Array version of aux_boiler.calc_hourly_fuel_use().
+
+    Parameters
+    ----------
+    ab_heat_rate_btuh: numpy.ndarray
+        hourly heat output of the auxiliary boiler in Btu/hr.
+    ab_eff: float
+        efficiency of the aux boiler (AuxBoiler class attribute).
+
+    Returns
+    -------
+    fuel_use_btu: numpy.ndarray
+        hourly fuel use of the auxiliary boiler in Btu.
+    """
+    args_list = [ab_heat_rate_btuh, ab_eff]
+    if any(elem is None for elem in args_list) is False:
+        return np.asarray(ab_heat_rate_btuh, dtype=float) / ab_eff
+
+
+"""
+Sizing Functions
+"""
+
+
+def size_tes(dem_hl_btuh=None, chp_size_kw=None):
+    """
+    Array version of sizing.size_tes(). The heating demand is reshaped into a (days x 24)
+    matrix. With the CHP at full output, the excess CHP heat and the uncovered heat demand
+    of each hour are the positive and negative parts of the difference, which are summed
+    by day. The smaller of the two is taken for each day, and the largest of those daily
+    values is the recommended TES size.
+
+    Parameters
+    ----------
+    dem_hl_btuh: numpy.ndarray
+        hourly heating demand in Btu/hr.
+    chp_size_kw: float or numpy.ndarray
+        size of CHP in kW, or a vector of candidate sizes that are all sized in one call.
+
+    Returns
+    -------
+    tes_size_btu: float or numpy.ndarray
+        recommended thermal storage size in Btu, with one size per CHP size for a vector.
+    """
+    args_list = [dem_hl_btuh, chp_size_kw]
+    if any(elem is None for elem in args_list) is False:
+        dem_hl_btuh = np.asarray(dem_hl_btuh, dtype=float)
+        chp_sizes_kw = np.asarray(chp_size_kw, dtype=float)
+        # Assumes CHP runs at constant max generation for sizing purposes
+        heat_caps = electrical_output_to_thermal_output_btuh(chp_sizes_kw.ravel())
+        if np.isnan(dem_hl_btuh).any() or np.isnan(heat_caps).any():
+            raise Exception('Error in sizing_calcs.py function, size_tes()')
+
+        # (24 x days) matrix, so each hour of the day is a contiguous row
+        no_days = len(dem_hl_btuh) // 24
+        dem_by_hour_btuh = np.ascontiguousarray(dem_hl_btuh[:no_days * 24].reshape(no_days, 24).T)
+        tes_sizes_btu = np.empty(len(heat_caps))
+        for start in range(0, len(heat_caps), TES_SIZING_CHUNK):
+            caps = heat_caps[start:start + TES_SIZING_CHUNK, np.newaxis]
+
+            # Turn hourly values into (sizes x days) daily sums, adding one hour of the day at a time to
+            # match sum() over a list (see sum_hourly()). The uncovered heat, max(-x, 0), is computed
+            # exactly as max(x, 0) - x
+            daily_excess = np.zeros((len(caps), no_days))
+            daily_uncovered = np.zeros((len(caps), no_days))
+            hourly_excess_and_deficit = np.empty((len(caps), no_days))
+            excess_chp_heat = np.empty((len(caps), no_days))
+            for hour in range(24):
+                np.subtract(caps, dem_by_hour_btuh[hour], out=hourly_excess_and_deficit)
+                np.maximum(hourly_excess_and_deficit, 0.0, out=excess_chp_heat)
+                daily_excess += excess_chp_heat
+                excess_chp_heat -= hourly_excess_and_deficit
+                daily_uncovered += excess_chp_heat
+
+            # Pick the min for each day, then the max of those values is the TES size
+            tes_sizes_btu[start:start + TES_SIZING_CHUNK] = np.max(np.minimum(daily_excess, daily_uncovered),
+                                                                   axis=-1)
+
+        if (tes_sizes_btu < 0).any():
+            raise Exception('TES size is negative - error in size_tes() function')
+        if chp_sizes_kw.ndim == 0:
+            return float(tes_sizes_btu[0])
+        return tes_sizes_btu.reshape(chp_sizes_kw.shape)
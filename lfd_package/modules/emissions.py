@@ -23,7 +23,7 @@ def identify_subgrid_coefficients(class_dict=None):
     if class_dict is not None:
         emissions_class = class_dict['emissions']
 
-        dict_key = "{}, {}".format(emissions_class.city, emissions_class.state)
+        dict_key = "{}, {}".format(emissions_class.demand.city, emissions_class.demand.state)
         subgrid_coefficient_average = emissions_class.avg_emissions[dict_key]
         return subgrid_coefficient_average
 
@@ -46,7 +46,7 @@ def calc_baseline_grid_emissions(class_dict=None):
         emissions_class = class_dict['emissions']
 
         subgrid_coefficient_average = identify_subgrid_coefficients(class_dict=class_dict)
-        electric_demand_annual = emissions_class.annual_sum_el
+        electric_demand_annual = emissions_class.demand.annual_sum_el
         assert electric_demand_annual.units == ureg.kWh
 
         electric_emissions_annual_avg = (electric_demand_annual * subgrid_coefficient_average).to('lbs')
@@ -71,7 +71,7 @@ def calc_baseline_fuel_emissions(class_dict=None):
     if class_dict is not None:
         emissions_class = class_dict['emissions']
 
-        heating_demand_annual = emissions_class.annual_sum_hl
+        heating_demand_annual = emissions_class.demand.annual_sum_hl
         assert heating_demand_annual.units == ureg.Btu
 
         fuel_emissions_annual = (heating_demand_annual * emissions_class.ng_co2).to('lbs')
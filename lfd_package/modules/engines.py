@@ -0,0 +1,239 @@
+"""
+Module Description:
+    Calculation engines for the hourly dispatch and utility bills of the ELF, TLF, and PP
+    operating modes. Both engines take the same classes and CHP sizes and return the same
+    hourly series (float arrays in kW, kWh, Btu/hr, and Btu), TES sizes, and annual bills, so
+    calc_results() builds the same tables from either one.
+
+    "fast" uses the whole-array functions in dispatch.py and the batched rate schedules in
+    tariffs.py. "reference" uses the original hour-by-hour Quantity functions in chp.py,
+    thermal_storage.py, aux_boiler.py, sizing_calcs.size_tes(), and costs.py, and takes about
+    a minute per location. The reference engine is kept to check the fast engine against
+    (see verify_engines.py).
+"""
+
+import numpy as np
+from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import dispatch, profiling
+from lfd_package.modules import chp, thermal_storage, aux_boiler, sizing_calcs as sizing, costs
+
+ENGINES = ("fast", "reference")
+DEFAULT_ENGINE = "fast"
+
+# Hourly series returned by calc_results(return_hourly=True), in column order
+HOURLY_SERIES = ("dem_el_kw", "dem_hl_btuh",
+                 "elf_electric_gen_kwh", "elf_electricity_bought_kwh", "elf_chp_gen_btuh", "elf_tes_heat_flow_btuh",
+                 "elf_tes_soc", "elf_boiler_dispatch_btuh", "elf_fuel_use_btu",
+                 "tlf_electric_gen_kwh", "tlf_electricity_bought_kwh", "tlf_electricity_sold_kwh", "tlf_chp_gen_btuh",
+                 "tlf_tes_heat_flow_btuh", "tlf_tes_soc", "tlf_boiler_dispatch_btuh", "tlf_fuel_use_btu",
+                 "peak_electric_gen_kwh", "peak_electricity_bought_kwh", "peak_electricity_sold_kwh",
+                 "peak_chp_gen_btuh", "peak_tes_heat_flow_btuh", "peak_tes_soc", "peak_boiler_dispatch_btuh",
+                 "peak_fuel_use_btu")
+
+# Operating mode key in the classes and sizing functions, for the prefix of each hourly series
+MODE_PREFIXES = {"ELF": "elf", "TLF": "tlf", "Peak": "peak"}
+
+
+def run_engine(class_dict=None, chp_sizes=None, engine=None):
+    """
+    Calculates the hourly dispatch and annual utility bills of every operating mode.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    chp_sizes: dict
+        contains the CHP size (Quantity, kW) of each operating mode, keyed by "ELF", "TLF", and "Peak".
+    engine: str
+        "fast" or "reference". Defaults to "fast".
+
+    Returns
+    -------
+    hourly: dict
+        contains the float arrays in HOURLY_SERIES, plus the CHP and aux boiler fuel use of
+        each mode ("{prefix}_chp_fuel_use_btu" and "{prefix}_ab_fuel_use_btu").
+    tes_sizes_btu: dict
+        contains the TES size (float, Btu) of each operating mode.
+    bills: dict
+        contains the annual fuel and electricity bills (floats) in the order Baseline, ELF,
+        TLF, PP under "fuel" and "electric", and the buyback revenue of TLF and PP under
+        "pp_revenue".
+    """
+    args_list = [class_dict, chp_sizes]
+    if any(elem is None for elem in args_list) is False:
+        if engine is None:
+            engine = DEFAULT_ENGINE
+        if engine == "fast":
+            return _run_fast(class_dict=class_dict, chp_sizes=chp_sizes)
+        elif engine == "reference":
+            return _run_reference(class_dict=class_dict, chp_sizes=chp_sizes)
+        raise Exception("Unknown engine {}. Choose from {}".format(engine, list(ENGINES)))
+
+
+def _run_fast(class_dict, chp_sizes):
+    # Hourly data as float arrays in fixed units (kW, kWh, Btu/hr, Btu)
+    dem_el_kw = class_dict['demand'].el.to(ureg.kW).magnitude
+    dem_hl_btuh = class_dict['demand'].hl.to(ureg.Btu / ureg.hour).magnitude
+    boiler_size_btuh = class_dict['demand'].annual_peak_hl.to(ureg.Btu / ureg.hour).magnitude
+    min_pl = class_dict['chp'].min_pl
+    tes_start = class_dict['tes'].start
+    ab_eff = class_dict['ab'].eff
+    chp_sizes_kw = {mode: size.to(ureg.kW).magnitude for mode, size in chp_sizes.items()}
+
+    hourly = {"dem_el_kw": dem_el_kw, "dem_hl_btuh": dem_hl_btuh}
+
+    # TES size of every operating mode in one call
+    with profiling.stage("tes_sizing"):
+        modes = list(chp_sizes_kw)
+        tes_sizes = dispatch.size_tes(dem_hl_btuh=dem_hl_btuh, chp_size_kw=[chp_sizes_kw[mode] for mode in modes])
+        tes_sizes_btu = {mode: float(tes_size) for mode, tes_size in zip(modes, tes_sizes)}
+
+    with profiling.stage("elf_dispatch"):
+        elf_electric_gen_kwh = dispatch.elf_calc_electricity_generated(dem_el_kw=dem_el_kw, min_pl=min_pl,
+                                                                       chp_size_kw=chp_sizes_kw["ELF"])
+        elf_chp_gen_btuh = dispatch.calc_hourly_heat_generated(chp_gen_kwh=elf_electric_gen_kwh)
+        elf_tes_heat_flow_btuh, elf_tes_soc = \
+            dispatch.calc_tes_heat_flow_and_soc(dem_hl_btuh=dem_hl_btuh, chp_gen_btuh=elf_chp_gen_btuh,
+                                                tes_size_btu=tes_sizes_btu["ELF"], tes_start=tes_start)
+        hourly.update({"elf_electric_gen_kwh": elf_electric_gen_kwh, "elf_chp_gen_btuh": elf_chp_gen_btuh,
+                       "elf_tes_heat_flow_btuh": elf_tes_heat_flow_btuh, "elf_tes_soc": elf_tes_soc})
+        _fill_fast_mode(hourly=hourly, prefix="elf", boiler_size_btuh=boiler_size_btuh, ab_eff=ab_eff)
+
+    with profiling.stage("tlf_dispatch"):
+        tlf_chp_gen_btuh, tlf_tes_heat_flow_btuh, tlf_tes_soc = \
+            dispatch.tlf_calc_hourly_heat_chp_tes_soc(dem_hl_btuh=dem_hl_btuh, chp_size_kw=chp_sizes_kw["TLF"],
+                                                      tes_size_btu=tes_sizes_btu["TLF"], min_pl=min_pl,
+                                                      tes_start=tes_start)
+        tlf_electric_gen_kwh = dispatch.tlf_calc_electricity_generated(chp_gen_btuh=tlf_chp_gen_btuh)
+        hourly.update({"tlf_electric_gen_kwh": tlf_electric_gen_kwh, "tlf_chp_gen_btuh": tlf_chp_gen_btuh,
+                       "tlf_tes_heat_flow_btuh": tlf_tes_heat_flow_btuh, "tlf_tes_soc": tlf_tes_soc,
+                       "tlf_electricity_sold_kwh": dispatch.tlf_calc_electricity_sold(
+                           dem_el_kw=dem_el_kw, chp_gen_kwh=tlf_electric_gen_kwh)})
+        _fill_fast_mode(hourly=hourly, prefix="tlf", boiler_size_btuh=boiler_size_btuh, ab_eff=ab_eff)
+
+    with profiling.stage("pp_dispatch"):
+        peak_electric_gen_kwh, peak_electric_sold_kwh = \
+            dispatch.pp_calc_electricity_gen_sold(dem_el_kw=dem_el_kw, chp_size_kw=chp_sizes_kw["Peak"],
+                                                  min_pl=min_pl)
+        peak_chp_gen_btuh = dispatch.calc_hourly_heat_generated(chp_gen_kwh=peak_electric_gen_kwh)
+        peak_tes_heat_flow_btuh, peak_tes_soc = \
+            dispatch.calc_tes_heat_flow_and_soc(dem_hl_btuh=dem_hl_btuh, chp_gen_btuh=peak_chp_gen_btuh,
+                                                tes_size_btu=tes_sizes_btu["Peak"], tes_start=tes_start)
+        hourly.update({"peak_electric_gen_kwh": peak_electric_gen_kwh, "peak_chp_gen_btuh": peak_chp_gen_btuh,
+                       "peak_electricity_sold_kwh": peak_electric_sold_kwh,
+                       "peak_tes_heat_flow_btuh": peak_tes_heat_flow_btuh, "peak_tes_soc": peak_tes_soc})
+        _fill_fast_mode(hourly=hourly, prefix="peak", boiler_size_btuh=boiler_size_btuh, ab_eff=ab_eff)
+
+    # Each tariff bills every operating mode in one batched evaluation (rows: Baseline, ELF, TLF, PP)
+    with profiling.stage("tariffs"):
+        fuel_tariff = class_dict['costs'].fuel_tariff
+        electric_tariff = class_dict['costs'].electric_tariff
+        bills = {
+            "fuel": fuel_tariff.calc_annual_charges(
+                fuel_bought_hourly=np.vstack([dem_hl_btuh / ab_eff, hourly["elf_fuel_use_btu"],
+                                              hourly["tlf_fuel_use_btu"], hourly["peak_fuel_use_btu"]])),
+            "electric": electric_tariff.calc_annual_charges(
+                electricity_bought_hourly=np.vstack([dem_el_kw, hourly["elf_electricity_bought_kwh"],
+                                                     hourly["tlf_electricity_bought_kwh"],
+                                                     hourly["peak_electricity_bought_kwh"]])),
+            # Buyback revenue uses the same rate schedule, without monthly base charges
+            "pp_revenue": electric_tariff.calc_annual_charges(
+                electricity_bought_hourly=np.vstack([hourly["tlf_electricity_sold_kwh"],
+                                                     hourly["peak_electricity_sold_kwh"]]), pp_rev=True)
+        }
+    return hourly, tes_sizes_btu, bills
+
+
+def _fill_fast_mode(hourly, prefix, boiler_size_btuh, ab_eff):
+    # Electricity bought, aux boiler dispatch, and fuel use of one mode, from its generation and TES flow
+    hourly[prefix + "_electricity_bought_kwh"] = dispatch.calc_electricity_bought(
+        dem_el_kw=hourly["dem_el_kw"], chp_gen_kwh=hourly[prefix + "_electric_gen_kwh"])
+    hourly[prefix + "_boiler_dispatch_btuh"] = dispatch.calc_aux_boiler_output_rate(
+        dem_hl_btuh=hourly["dem_hl_btuh"], chp_gen_btuh=hourly[prefix + "_chp_gen_btuh"],
+        tes_flow_btuh=hourly[prefix + "_tes_heat_flow_btuh"], boiler_size_btuh=boiler_size_btuh)
+    hourly[prefix + "_chp_fuel_use_btu"] = dispatch.chp_calc_hourly_fuel_use(
+        chp_gen_kwh=hourly[prefix + "_electric_gen_kwh"])
+    hourly[prefix + "_ab_fuel_use_btu"] = dispatch.ab_calc_hourly_fuel_use(
+        ab_heat_rate_btuh=hourly[prefix + "_boiler_dispatch_btuh"], ab_eff=ab_eff)
+    hourly[prefix + "_fuel_use_btu"] = hourly[prefix + "_chp_fuel_use_btu"] + hourly[prefix + "_ab_fuel_use_btu"]
+
+
+def _to_array(values, units):
+    # Hourly Quantity list (or Quantity array) to a float array in the given units
+    if isinstance(values, ureg.Quantity):
+        return np.asarray(values.to(units).magnitude, dtype=float)
+    return np.array([Q_(value).to(units).magnitude for value in values], dtype=float)
+
+
+def _run_reference(class_dict, chp_sizes):
+    # Same steps as the original command line analysis, one hour at a time with Quantities
+    demand = class_dict['demand']
+    hourly = {"dem_el_kw": demand.el.to(ureg.kW).magnitude, "dem_hl_btuh": demand.hl.to(ureg.Btu / ureg.hour).magnitude}
+    tes_sizes_btu = {}
+    chp_gen_hourly_btuh_dict = {}
+    fuel_lists = {}
+    bought_lists = {}
+    sold_lists = {}
+
+    for mode, prefix in MODE_PREFIXES.items():
+        chp_size = chp_sizes[mode]
+        with profiling.stage(prefix + "_dispatch"):
+            tes_size = sizing.size_tes(chp_size=chp_size, class_dict=class_dict)
+            if mode == "TLF":
+                chp_gen_btuh, tes_heat_flow, tes_soc = \
+                    chp.tlf_calc_hourly_heat_chp_tes_soc(chp_size=chp_size, tes_size=tes_size, class_dict=class_dict)
+                electric_gen = chp.tlf_calc_electricity_generated(chp_gen_hourly_btuh=chp_gen_btuh,
+                                                                  class_dict=class_dict)
+                sold_lists[mode] = chp.tlf_calc_electricity_sold(chp_gen_hourly_kwh=electric_gen,
+                                                                 class_dict=class_dict)
+            else:
+                if mode == "ELF":
+                    electric_gen = chp.elf_calc_electricity_generated(chp_size=chp_size, class_dict=class_dict)
+                    chp_gen_btuh = chp.elf_calc_hourly_heat_generated(chp_gen_hourly_kwh=electric_gen,
+                                                                      class_dict=class_dict)
+                else:
+                    electric_gen, sold_lists[mode] = chp.pp_calc_electricity_gen_sold(chp_size=chp_size,
+                                                                                      class_dict=class_dict)
+                    chp_gen_btuh = chp.pp_calc_hourly_heat_generated(chp_gen_hourly_kwh=electric_gen,
+                                                                     class_dict=class_dict)
+                tes_heat_flow, tes_soc = \
+                    thermal_storage.calc_tes_heat_flow_and_soc(chp_gen_hourly_btuh=chp_gen_btuh, tes_size=tes_size,
+                                                               load_following_type=mode, class_dict=class_dict)
+            chp_gen_hourly_btuh_dict[mode] = chp_gen_btuh
+
+            bought_lists[mode] = chp.calc_electricity_bought(chp_gen_hourly_kwh=electric_gen, chp_size=chp_size,
+                                                             class_dict=class_dict)
+            boiler_dispatch = aux_boiler.calc_aux_boiler_output_rate(
+                chp_gen_hourly_btuh_dict=chp_gen_hourly_btuh_dict, chp_size=chp_size, tes_size=tes_size,
+                class_dict=class_dict, load_following_type=mode, tes_heat_flow_btuh=tes_heat_flow)
+            chp_fuel = chp.calc_hourly_fuel_use(chp_size=chp_size, class_dict=class_dict,
+                                                chp_electric_gen_hourly_kwh=electric_gen)
+            ab_fuel = aux_boiler.calc_hourly_fuel_use(ab_output_rate_list=boiler_dispatch, class_dict=class_dict)
+            fuel_lists[mode] = [chp_fuel[index] + ab_fuel[index] for index in range(len(ab_fuel))]
+
+            tes_sizes_btu[mode] = Q_(tes_size).to(ureg.Btu).magnitude
+            hourly.update({
+                prefix + "_electric_gen_kwh": _to_array(electric_gen, ureg.kWh),
+                prefix + "_electricity_bought_kwh": _to_array(bought_lists[mode], ureg.kWh),
+                prefix + "_chp_gen_btuh": _to_array(chp_gen_btuh, ureg.Btu / ureg.hour),
+                prefix + "_tes_heat_flow_btuh": _to_array(tes_heat_flow, ureg.Btu / ureg.hour),
+                prefix + "_tes_soc": _to_array(tes_soc, ureg.dimensionless),
+                prefix + "_boiler_dispatch_btuh": _to_array(boiler_dispatch, ureg.Btu / ureg.hour),
+                prefix + "_chp_fuel_use_btu": _to_array(chp_fuel, ureg.Btu),
+                prefix + "_ab_fuel_use_btu": _to_array(ab_fuel, ureg.Btu),
+                prefix + "_fuel_use_btu": _to_array(fuel_lists[mode], ureg.Btu)})
+            if mode in sold_lists:
+                hourly[prefix + "_electricity_sold_kwh"] = _to_array(sold_lists[mode], ureg.kWh)
+
+    with profiling.stage("tariffs"):
+        fuel_baseline = [item / class_dict['ab'].eff for item in demand.hl]
+        bills = {
+            "fuel": [Q_(costs.calc_fuel_charges(class_dict=class_dict, fuel_bought_hourly=fuel)).to('').magnitude
+                     for fuel in [fuel_baseline, fuel_lists["ELF"], fuel_lists["TLF"], fuel_lists["Peak"]]],
+            "electric": [Q_(costs.calc_electric_charges(class_dict=class_dict, electricity_bought_hourly=bought))
+                         .to('').magnitude
+                         for bought in [demand.el, bought_lists["ELF"], bought_lists["TLF"], bought_lists["Peak"]]],
+            "pp_revenue": [Q_(costs.calc_pp_revenue(class_dict=class_dict, electricity_sold_hourly=sold))
+                           .to('').magnitude for sold in [sold_lists["TLF"], sold_lists["Peak"]]]
+        }
+    return hourly, tes_sizes_btu, bills
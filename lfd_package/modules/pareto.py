@@ -0,0 +1,274 @@
+"""
+Module Description:
+    Multi-objective exploration of CHP and TES designs. The choice between ELF, TLF, and PP and
+    between CHP and TES sizes trades the simple payback of calc_costs() against the CO2 of
+    calc_chp_emissions(), so no single design is best. The functions here evaluate a large pool
+    of candidate designs of every operating mode with the batched functions in cosizing.py,
+    spread over worker processes, and keep the designs that no other design beats on both
+    payback and emissions (the non-dominated set, or Pareto frontier). The frontier is updated
+    as each batch of candidates finishes, so only the frontier is kept in memory.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from lfd_package.modules import cosizing, dispatch
+
+# Objectives of the frontier, both minimized
+OBJECTIVES = ("simple_payback_yrs", "total_co2_tons")
+
+# Designs sent to a worker process at a time
+CANDIDATE_BATCH = 4 * cosizing.DESIGN_CHUNK
+
+# Columns added to the frontier by frontier_hourly(), summarizing the hourly dispatch of each design
+HOURLY_SUMMARY_COLUMNS = ("chp_operating_hours", "chp_capacity_factor", "hours_selling", "peak_bought_kw",
+                          "boiler_operating_hours", "peak_boiler_btuh", "tes_discharged_btu", "tes_full_cycles")
+
+# Location data of the worker processes (see _init_worker())
+_WORKER_SITE = {}
+
+
+def non_dominated(payback=None, co2=None):
+    """
+    Finds the designs that no other design beats on both objectives.
+
+    A design is dominated if another design has a payback and emissions that are no higher
+    and at least one that is lower. Designs are sorted by payback (then emissions) and a design
+    is kept if its emissions are lower than those of every design before it, so exact
+    duplicates are only kept once.
+
+    Parameters
+    ----------
+    payback: numpy.ndarray
+        simple payback of each design in years.
+    co2: numpy.ndarray
+        total emissions of each design in metric tons.
+
+    Returns
+    -------
+    keep: numpy.ndarray
+        bool array, True for the designs on the frontier.
+    """
+    args_list = [payback, co2]
+    if any(elem is None for elem in args_list) is False:
+        payback = np.asarray(payback, dtype=float)
+        co2 = np.asarray(co2, dtype=float)
+        order = np.lexsort((co2, payback))
+        sorted_co2 = co2[order]
+        lowest_before = np.minimum.accumulate(np.concatenate(([np.inf], sorted_co2[:-1])))
+        keep = np.zeros(len(payback), dtype=bool)
+        keep[order[sorted_co2 < lowest_before]] = True
+        return keep
+
+
+class ParetoFront:
+    """
+    Non-dominated set of designs, updated one batch of evaluated designs at a time.
+
+    Only feasible designs with positive annual savings have a payback, so the other designs
+    are counted but never enter the frontier.
+
+    Attributes
+    ----------
+    designs: pandas.DataFrame
+        designs on the frontier with the columns of cosizing.SURFACE_COLUMNS, sorted by payback.
+    no_evaluated: int
+        number of designs passed to update().
+    no_eligible: int
+        number of those designs that were feasible and had positive annual savings.
+    """
+    def __init__(self):
+        self.designs = pd.DataFrame(columns=list(cosizing.SURFACE_COLUMNS))
+        self.no_evaluated = 0
+        self.no_eligible = 0
+
+    def update(self, candidates=None):
+        """
+        Merges a batch of evaluated designs into the frontier.
+
+        Parameters
+        ----------
+        candidates: pandas.DataFrame
+            evaluated designs with the columns of cosizing.SURFACE_COLUMNS.
+
+        Returns
+        -------
+        no_added: int
+            number of candidates that are on the updated frontier.
+        """
+        if candidates is not None:
+            self.no_evaluated += len(candidates)
+            eligible = candidates[candidates["feasible"].astype(bool) & (candidates["annual_savings"] > 0)]
+            self.no_eligible += len(eligible)
+            if eligible.empty:
+                return 0
+
+            merged = eligible if self.designs.empty else pd.concat([self.designs, eligible], ignore_index=True)
+            # Designs already on the frontier come first, so a candidate that ties one of them is not added
+            is_new = np.arange(len(merged)) >= len(merged) - len(eligible)
+            keep = non_dominated(payback=merged[OBJECTIVES[0]].to_numpy(), co2=merged[OBJECTIVES[1]].to_numpy())
+            self.designs = merged[keep].sort_values(list(OBJECTIVES)).reset_index(drop=True)
+            return int((keep & is_new).sum())
+
+
+def candidate_designs(class_dict=None, load_following_types=cosizing.LOAD_FOLLOWING_TYPES,
+                      no_chp_sizes=cosizing.DEFAULT_CHP_POINTS, no_tes_sizes=cosizing.DEFAULT_TES_POINTS):
+    """
+    Lists the candidate pool: every CHP size x TES size design of the grid of each operating
+    mode (see cosizing.design_grid()).
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    load_following_types: tuple
+        operating modes to include ("ELF", "TLF", and/or "Peak").
+    no_chp_sizes: int
+        number of CHP sizes in the grid of each mode.
+    no_tes_sizes: int
+        number of TES sizes in the grid of each mode.
+
+    Returns
+    -------
+    candidates: list
+        contains one (load_following_type, chp_sizes_kw, tes_sizes_btu) tuple per mode, with one
+        array value per design.
+    """
+    if class_dict is not None:
+        candidates = []
+        for load_following_type in load_following_types:
+            chp_sizes_kw, tes_sizes_btu = cosizing.design_grid(class_dict=class_dict,
+                                                               load_following_type=load_following_type,
+                                                               no_chp_sizes=no_chp_sizes, no_tes_sizes=no_tes_sizes)
+            chp_designs, tes_designs = [axis.ravel() for axis in np.meshgrid(chp_sizes_kw, tes_sizes_btu,
+                                                                             indexing="ij")]
+            candidates.append((load_following_type, chp_designs, tes_designs))
+        return candidates
+
+
+def explore(class_dict=None, candidates=None, workers=1, front=None, progress=None):
+    """
+    Evaluates a pool of candidate designs in batches and keeps their Pareto frontier.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    candidates: list
+        contains (load_following_type, chp_sizes_kw, tes_sizes_btu) tuples (see
+        candidate_designs()).
+    workers: int
+        number of worker processes. Defaults to 1, which evaluates the batches in this process.
+        None uses the number of CPUs.
+    front: ParetoFront
+        Optional. Frontier to update, ie: from an earlier call with other candidates.
+    progress: function
+        Optional. Called with the frontier after each batch is merged.
+
+    Returns
+    -------
+    front: ParetoFront
+        the updated frontier.
+    """
+    args_list = [class_dict, candidates]
+    if any(elem is None for elem in args_list) is False:
+        if front is None:
+            front = ParetoFront()
+        site_data = cosizing._site_data(class_dict)
+        batches = [(load_following_type, chp_sizes_kw[start:start + CANDIDATE_BATCH],
+                    tes_sizes_btu[start:start + CANDIDATE_BATCH])
+                   for load_following_type, chp_sizes_kw, tes_sizes_btu in candidates
+                   for start in range(0, len(chp_sizes_kw), CANDIDATE_BATCH)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(int(workers), len(batches)))
+
+        if workers == 1:
+            _init_worker(class_dict=class_dict, site_data=site_data)
+            for batch in batches:
+                front.update(candidates=_evaluate_batch(*batch))
+                if progress is not None:
+                    progress(front)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(class_dict, site_data)) as executor:
+                futures = [executor.submit(_evaluate_batch, *batch) for batch in batches]
+                for future in as_completed(futures):
+                    front.update(candidates=future.result())
+                    if progress is not None:
+                        progress(front)
+        return front
+
+
+def _init_worker(class_dict, site_data):
+    # Keeps the location data in the worker process so each batch only sends the design sizes
+    _WORKER_SITE["class_dict"] = class_dict
+    _WORKER_SITE["site_data"] = site_data
+
+
+def _evaluate_batch(load_following_type, chp_sizes_kw, tes_sizes_btu):
+    # Evaluates a batch of designs of one mode as rows of the response surface
+    results = cosizing.evaluate_designs(class_dict=_WORKER_SITE["class_dict"],
+                                        load_following_type=load_following_type, chp_sizes_kw=chp_sizes_kw,
+                                        tes_sizes_btu=tes_sizes_btu, site_data=_WORKER_SITE["site_data"])
+    results["load_following_type"] = load_following_type
+    results["refinement"] = 0
+    return pd.DataFrame(results, columns=list(cosizing.SURFACE_COLUMNS))
+
+
+def frontier_hourly(class_dict=None, frontier=None):
+    """
+    Calculates the hourly dispatch of every design on a frontier and summarizes it.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    frontier: pandas.DataFrame
+        designs on the frontier (see ParetoFront.designs).
+
+    Returns
+    -------
+    df_frontier: pandas.DataFrame
+        the frontier with a "point" column (0 is the design with the shortest payback) and the
+        columns of HOURLY_SUMMARY_COLUMNS added.
+    hourly: dict
+        contains one (points x hours) float array per series of cosizing.HOURLY_DESIGN_SERIES,
+        one row per frontier point in the order of df_frontier.
+    """
+    args_list = [class_dict, frontier]
+    if any(elem is None for elem in args_list) is False:
+        site_data = cosizing._site_data(class_dict)
+        no_hours = len(site_data["dem_el_kw"])
+        df_frontier = frontier.reset_index(drop=True)
+        df_frontier.insert(0, "point", np.arange(len(df_frontier)))
+        hourly = {name: np.zeros((len(df_frontier), no_hours)) for name in cosizing.HOURLY_DESIGN_SERIES}
+        for load_following_type, df_mode in df_frontier.groupby("load_following_type", sort=False):
+            mode_hourly = cosizing.hourly_designs(class_dict=class_dict, load_following_type=load_following_type,
+                                                  chp_sizes_kw=df_mode["chp_size_kw"].to_numpy(),
+                                                  tes_sizes_btu=df_mode["tes_size_btu"].to_numpy(),
+                                                  site_data=site_data)
+            for name in cosizing.HOURLY_DESIGN_SERIES:
+                hourly[name][df_mode.index.to_numpy()] = mode_hourly[name]
+
+        chp_sizes_kw = df_frontier["chp_size_kw"].to_numpy(dtype=float)
+        tes_sizes_btu = df_frontier["tes_size_btu"].to_numpy(dtype=float)
+        tes_discharged_btu = dispatch.sum_hourly(np.maximum(-hourly["tes_heat_flow_btuh"], 0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            capacity_factor = df_frontier["electric_gen_kwh"].to_numpy(dtype=float) / (chp_sizes_kw * no_hours)
+            tes_full_cycles = np.where(tes_sizes_btu > 0, tes_discharged_btu / tes_sizes_btu, 0.0)
+        summary = {
+            "chp_operating_hours": np.count_nonzero(hourly["electric_gen_kwh"] > 0, axis=-1),
+            "chp_capacity_factor": capacity_factor,
+            "hours_selling": np.count_nonzero(hourly["electricity_sold_kwh"] > 0, axis=-1),
+            "peak_bought_kw": np.max(hourly["electricity_bought_kwh"], axis=-1, initial=0),
+            "boiler_operating_hours": np.count_nonzero(hourly["boiler_dispatch_btuh"] > 0, axis=-1),
+            "peak_boiler_btuh": np.max(hourly["boiler_dispatch_btuh"], axis=-1, initial=0),
+            "tes_discharged_btu": tes_discharged_btu,
+            "tes_full_cycles": tes_full_cycles
+        }
+        for name in HOURLY_SUMMARY_COLUMNS:
+            df_frontier[name] = summary[name]
+        return df_frontier, hourly
@@ -2,165 +2,306 @@
 Module Description:
     This module will create plots of data passed to the program
     as well as relevant data calculated by the program
+
+    Plots are drawn on their own matplotlib Figure with the Agg canvas instead of the global
+    pyplot state, so they can be rendered in batch jobs and worker processes without a display.
+    Each figure is saved to the /plots folder and cleared right after, and the resolution and
+    file format (png, svg, or pdf) can be set for every plot. Hourly data are float arrays in
+    the units used by calc_results() (kW, kWh, Btu/hr, SOC from 0 to 1).
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pathlib
 from lfd_package.modules import sizing_calcs as sizing
-from lfd_package.modules.__init__ import ureg
-
-
-def plot_max_rectangle_electric(demand_class=None, chp_size=None):
+from lfd_package.modules.__init__ import ureg, Q_
+
+PLOTS_DIR = pathlib.Path(__file__).parent.parent.resolve() / "plots"
+DEFAULT_DPI = 900
+DEFAULT_FORMAT = "png"
+FILE_FORMATS = ("png", "svg", "pdf")
+
+BTUH_TO_KW = Q_(1, ureg.Btu / ureg.hour).to(ureg.kW).magnitude
+
+
+def _new_figure(no_axes=1):
+    # Figure with an Agg canvas attached, so nothing is registered with pyplot. matplotlib is
+    # imported here so the analysis does not pay for it unless plots are drawn
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, no_axes, sharex='all', sharey='all')
+    return fig, axes
+
+
+def _save_figure(fig=None, city=None, state=None, plot_name=None, dpi=None, file_format=None, plots_dir=None):
+    # Saves the figure to /plots/{city}_{state}/{city}_{state}_{plot_name}.{file_format} and clears it
+    if dpi is None:
+        dpi = DEFAULT_DPI
+    if file_format is None:
+        file_format = DEFAULT_FORMAT
+    if file_format not in FILE_FORMATS:
+        raise Exception("Plot file format {} is not supported. Choose from {}".format(file_format, FILE_FORMATS))
+    if plots_dir is None:
+        plots_dir = PLOTS_DIR
+
+    file_path = pathlib.Path(plots_dir) / "{}_{}".format(city, state) / "{}_{}_{}.{}".format(city, state, plot_name,
+                                                                                          file_format)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(file_path, dpi=dpi, format=file_format)
+    fig.clear()
+    return file_path
+
+
+def _daily_sums(hourly=None):
+    # Sums of each full day (24 hours) in the year
+    no_days = len(hourly) // 24
+    return np.asarray(hourly[:no_days * 24], dtype=float).reshape(no_days, 24).sum(axis=1)
+
+
+def _set_demand_yticks(ax=None, hourly=None, sorted_demand=None):
+    if np.sum(hourly) <= 1:
+        ax.set_yticks(np.arange(0, 10, 1))
+    else:
+        ax.set_yticks(np.arange(0, sorted_demand.max(), sorted_demand.max() / 10))
+
+
+def _duration_curve_kw(demand_kw=None, duration_curve=None):
+    # Percent hours and sorted demand in kW, from the curve built for sizing when one is given
+    if duration_curve is None:
+        duration_curve = sizing.LoadDurationCurve(demand=demand_kw)
+    elif duration_curve.units is not None:
+        return duration_curve.percent_days, duration_curve.sorted_demand * Q_(1, duration_curve.units).to(
+            ureg.kW).magnitude
+    return duration_curve.percent_days, duration_curve.sorted_demand
+
+
+def _plot_max_rectangle(demand_kw=None, chp_size_kw=None, curve_label=None, city=None, state=None, plot_name=None,
+                        dpi=None, file_format=None, plots_dir=None, duration_curve=None):
+    x1, y1 = _duration_curve_kw(demand_kw=demand_kw, duration_curve=duration_curve)
+
+    y2_index = int(np.argmin(np.abs(y1 - chp_size_kw)))
+    x2_value = x1[y2_index]
+
+    # Set up plot
+    fig, ax = _new_figure()
+    ax.plot(x1, y1, label=curve_label)
+    ax.vlines(x=x2_value, colors='purple', ymin=0, ymax=chp_size_kw, linestyles='--')
+    ax.plot((0, x2_value), (chp_size_kw, chp_size_kw), color='purple', label='Max Rectangle CHP Size',
+            linestyle='--')
+    ax.set_ylabel('Demand (kW)')
+    _set_demand_yticks(ax=ax, hourly=demand_kw, sorted_demand=y1)
+    ax.set_xlabel('Percent Hours')
+    ax.legend()
+    return _save_figure(fig=fig, city=city, state=state, plot_name=plot_name, dpi=dpi, file_format=file_format,
+                        plots_dir=plots_dir)
+
+
+def _plot_demand_curve(demand_kw=None, title=None, city=None, state=None, plot_name=None, dpi=None,
+                       file_format=None, plots_dir=None, duration_curve=None):
+    x1, y1 = _duration_curve_kw(demand_kw=demand_kw, duration_curve=duration_curve)
+
+    # Set up plot
+    fig, ax = _new_figure()
+    ax.plot(x1, y1)
+    ax.set_title(title)
+    ax.set_ylabel('Demand (kW)')
+    _set_demand_yticks(ax=ax, hourly=demand_kw, sorted_demand=y1)
+    ax.set_xlabel('Percent Hours')
+    return _save_figure(fig=fig, city=city, state=state, plot_name=plot_name, dpi=dpi, file_format=file_format,
+                        plots_dir=plots_dir)
+
+
+def _plot_daily_electric(series_kwh=None, labels=None, title=None, city=None, state=None, plot_name=None, dpi=None,
+                         file_format=None, plots_dir=None):
+    # One panel per series, each showing daily sums
+    fig, axes = _new_figure(no_axes=len(series_kwh))
+    fig.suptitle(title)
+    for ax, hourly, label in zip(axes, series_kwh, labels):
+        ax.plot(_daily_sums(hourly=hourly))
+        ax.set_ylabel(label)
+    axes[-1].set_xlabel('Time (days)')
+    return _save_figure(fig=fig, city=city, state=state, plot_name=plot_name, dpi=dpi, file_format=file_format,
+                        plots_dir=plots_dir)
+
+
+def _plot_daily_thermal(dem_hl_btuh=None, chp_gen_btuh=None, tes_heat_flow_btuh=None, boiler_dispatch_btuh=None,
+                        title=None, city=None, state=None, plot_name=None, dpi=None, file_format=None,
+                        plots_dir=None):
+    # For TES, only negative values (discharging) are shown
+    tes_flow = np.asarray(tes_heat_flow_btuh, dtype=float)
+    tes_discharge_btuh = np.where(tes_flow <= 0, -1 * tes_flow, 0.0)
+
+    series_kw = [np.asarray(hourly, dtype=float) * BTUH_TO_KW for hourly in
+                 (dem_hl_btuh, chp_gen_btuh, tes_discharge_btuh, boiler_dispatch_btuh)]
+    labels = ['Demand (kWh)', 'CHP (kWh)', 'TES Discharge (kWh)', 'Aux Boiler (kWh)']
+    return _plot_daily_electric(series_kwh=series_kw, labels=labels, title=title, city=city, state=state,
+                                plot_name=plot_name, dpi=dpi, file_format=file_format, plots_dir=plots_dir)
+
+
+def _plot_daily_soc(tes_soc=None, title=None, city=None, state=None, plot_name=None, dpi=None, file_format=None,
+                    plots_dir=None):
+    no_days = len(tes_soc) // 24
+    daily_avg = np.asarray(tes_soc[:no_days * 24], dtype=float).reshape(no_days, 24).mean(axis=1)
+
+    # Set up plot
+    fig, ax = _new_figure()
+    ax.plot(daily_avg)
+    ax.set_title(title)
+    ax.set_ylabel('SOC')
+    ax.set_yticks(np.arange(0, 1, 0.1))
+    ax.set_xlabel('Time (days)')
+    return _save_figure(fig=fig, city=city, state=state, plot_name=plot_name, dpi=dpi, file_format=file_format,
+                        plots_dir=plots_dir)
+
+
+def plot_max_rectangle_electric(dem_el_kw=None, chp_size_kw=None, city=None, state=None, dpi=None, file_format=None,
+                                plots_dir=None, duration_curve=None):
     """
-    Uses thermal demand curve to graphically display the Maximum Rectangle CHP size.
+    Uses electrical demand curve to graphically display the Maximum Rectangle CHP size.
 
+    Parameters
+    ----------
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW.
+    chp_size_kw: float
+        CHP size in kW (ELF operating mode).
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+    duration_curve: LoadDurationCurve class
+        Optional. Curve of the same demand built earlier (ie: EnergyDemand.duration_curve("el")),
+        so the demand is not sorted again.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [demand_class, chp_size]
+    args_list = [dem_el_kw, chp_size_kw, city, state]
     if any(elem is None for elem in args_list) is False:
-        el_demand = demand_class.el.to(ureg.kW)
-        y1 = sizing.create_demand_curve_array(el_demand)[1].magnitude
-        x1 = sizing.create_demand_curve_array(el_demand)[0]
-
-        y2_value = chp_size.magnitude
-        y2_index = min(range(len(y1)), key=lambda i: abs(y1[i] - y2_value))
-        x2_value = x1[y2_index]
-
-        # Set up plot
-        plt.plot(x1, y1, label='Electrical Demand Curve')
-        plt.vlines(x=x2_value, colors='purple', ymin=0, ymax=y2_value, linestyles='--')
-        plt.plot((0, x2_value), (y2_value, y2_value), color='purple', label='Max Rectangle CHP Size', linestyle='--')
-        plt.ylabel('Demand (kW)')
-        annual_sum = sum(el_demand)
-        if annual_sum.magnitude <= 1:
-            plt.yticks(np.arange(0, 10, 1))
-        else:
-            plt.yticks(np.arange(0, y1.max(), y1.max()/10))
-        plt.xlabel('Percent Hours')
-        plt.legend()
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_MR_size_thermal.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def plot_max_rectangle_thermal(demand_class=None, chp_size=None):
+        return _plot_max_rectangle(demand_kw=np.asarray(dem_el_kw, dtype=float), chp_size_kw=float(chp_size_kw),
+                                   curve_label='Electrical Demand Curve', city=city, state=state,
+                                   plot_name="MR_size_electrical", dpi=dpi, file_format=file_format,
+                                   plots_dir=plots_dir, duration_curve=duration_curve)
+
+
+def plot_max_rectangle_thermal(dem_hl_btuh=None, chp_size_kw=None, city=None, state=None, dpi=None, file_format=None,
+                               plots_dir=None, duration_curve=None):
     """
     Uses thermal demand curve to graphically display the Maximum Rectangle CHP size.
 
+    Parameters
+    ----------
+    dem_hl_btuh: numpy.ndarray
+        hourly thermal demand in Btu/hr.
+    chp_size_kw: float
+        CHP electrical size in kW (TLF operating mode). The thermal output at this size is shown.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+    duration_curve: LoadDurationCurve class
+        Optional. Curve of the same demand built earlier (ie: EnergyDemand.duration_curve("hl")),
+        so the demand is not sorted again.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [demand_class, chp_size]
+    args_list = [dem_hl_btuh, chp_size_kw, city, state]
     if any(elem is None for elem in args_list) is False:
-        th_demand = demand_class.hl.to(ureg.kW)
-        y1 = sizing.create_demand_curve_array(th_demand)[1].magnitude
-        x1 = sizing.create_demand_curve_array(th_demand)[0]
-
-        y2_value = sizing.electrical_output_to_thermal_output(chp_size).magnitude
-        y2_index = min(range(len(y1)), key=lambda i: abs(y1[i] - y2_value))
-        x2_value = x1[y2_index]
-
-        # Set up plot
-        plt.plot(x1, y1, label='Thermal Demand Curve')
-        plt.vlines(x=x2_value, colors='purple', ymin=0, ymax=y2_value, linestyles='--')
-        plt.plot((0, x2_value), (y2_value, y2_value), color='purple', label='Max Rectangle CHP Size', linestyle='--')
-        plt.ylabel('Demand (kW)')
-        annual_sum = sum(th_demand)
-        if annual_sum.magnitude <= 1:
-            plt.yticks(np.arange(0, 10, 1))
-        else:
-            plt.yticks(np.arange(0, y1.max(), y1.max() / 10))
-        plt.xlabel('Percent Hours')
-        plt.legend()
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_MR_size_electrical.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def plot_electrical_demand_curve(demand_class=None):
+        heat_size_kw = sizing.electrical_output_to_thermal_output(Q_(float(chp_size_kw), ureg.kW)).to(ureg.kW)
+        return _plot_max_rectangle(demand_kw=np.asarray(dem_hl_btuh, dtype=float) * BTUH_TO_KW,
+                                   chp_size_kw=heat_size_kw.magnitude, curve_label='Thermal Demand Curve', city=city,
+                                   state=state, plot_name="MR_size_thermal", dpi=dpi, file_format=file_format,
+                                   plots_dir=plots_dir, duration_curve=duration_curve)
+
+
+def plot_electrical_demand_curve(dem_el_kw=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None,
+                                 duration_curve=None):
     """
     Orders the hourly electrical demand from the largest values to the smallest values with percent days on the
-    x-axis. From these values, plots the electrical demand curve. Demand values from the EnergyDemand class are used.
-    Plot is saved in the /plots folder for future use.
+    x-axis. From these values, plots the electrical demand curve. Plot is saved in the /plots folder for future use.
 
     Parameters
     ----------
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+    duration_curve: LoadDurationCurve class
+        Optional. Curve of the same demand built earlier (ie: EnergyDemand.duration_curve("el")),
+        so the demand is not sorted again.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    if demand_class is not None:
-        el_demand = demand_class.el.to(ureg.kW)
-        y1 = sizing.create_demand_curve_array(el_demand)[1].magnitude
-        x1 = sizing.create_demand_curve_array(el_demand)[0]
-
-        # Set up plot
-        plt.plot(x1, y1)
-        plt.title('Electrical Demand Curve')
-        plt.ylabel('Demand (kW)')
-        annual_sum = sum(el_demand)
-        if annual_sum.magnitude <= 1:
-            plt.yticks(np.arange(0, 10, 1))
-        else:
-            plt.yticks(np.arange(0, y1.max(), y1.max()/10))
-        plt.xlabel('Percent Hours')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_electrical_demand.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def plot_thermal_demand_curve(demand_class=None):
+    args_list = [dem_el_kw, city, state]
+    if any(elem is None for elem in args_list) is False:
+        return _plot_demand_curve(demand_kw=np.asarray(dem_el_kw, dtype=float), title='Electrical Demand Curve',
+                                  city=city, state=state, plot_name="electrical_demand", dpi=dpi,
+                                  file_format=file_format, plots_dir=plots_dir, duration_curve=duration_curve)
+
+
+def plot_thermal_demand_curve(dem_hl_btuh=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None,
+                              duration_curve=None):
     """
     Orders the hourly thermal demand from the largest values to the smallest values with percent days on the
-    x-axis. From these values, plots the thermal demand curve. Demand values from the EnergyDemand class are used.
-    Plot is saved in the /plots folder for future use.
+    x-axis. From these values, plots the thermal demand curve. Plot is saved in the /plots folder for future use.
 
     Parameters
     ----------
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_hl_btuh: numpy.ndarray
+        hourly thermal demand in Btu/hr.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+    duration_curve: LoadDurationCurve class
+        Optional. Curve of the same demand built earlier (ie: EnergyDemand.duration_curve("hl")),
+        so the demand is not sorted again.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    if demand_class is not None:
-        hl_demand = demand_class.hl.to(ureg.kW)
-        y2 = sizing.create_demand_curve_array(hl_demand)[1].magnitude
-        x2 = sizing.create_demand_curve_array(hl_demand)[0]
-
-        # Set up plot
-        plt.plot(x2, y2)
-        plt.title('Thermal Demand Curve')
-        plt.ylabel('Demand (kW)')
-        annual_sum = sum(hl_demand)
-        if annual_sum.magnitude <= 1:
-            plt.yticks(np.arange(0, 10, 1))
-        else:
-            plt.yticks(np.arange(0, y2.max(), y2.max()/10))
-        plt.xlabel('Percent Hours')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_thermal_demand.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
+    args_list = [dem_hl_btuh, city, state]
+    if any(elem is None for elem in args_list) is False:
+        return _plot_demand_curve(demand_kw=np.asarray(dem_hl_btuh, dtype=float) * BTUH_TO_KW,
+                                  title='Thermal Demand Curve', city=city, state=state, plot_name="thermal_demand",
+                                  dpi=dpi, file_format=file_format, plots_dir=plots_dir, duration_curve=duration_curve)
 
 
 """
@@ -168,68 +309,47 @@ ELF Plots
 """
 
 
-def elf_plot_electric(elf_electric_gen_list=None, elf_electricity_bought_list=None, demand_class=None):
+def elf_plot_electric(dem_el_kw=None, elf_electric_gen_kwh=None, elf_electricity_bought_kwh=None, city=None,
+                      state=None, dpi=None, file_format=None, plots_dir=None):
     """
     Plots the daily sums of the CHP electricity generated and electricity bought from the grid for
     ELF operation mode. Plot is saved to the /plots folder for future use.
 
     Parameters
     ----------
-    elf_electric_gen_list: list
-        contains hourly CHP electricity generated in units of kWh.
-    elf_electricity_bought_list: list
-        contains hourly electricity bought form the grid in units of kWh.
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW.
+    elf_electric_gen_kwh: numpy.ndarray
+        hourly CHP electricity generated in kWh.
+    elf_electricity_bought_kwh: numpy.ndarray
+        hourly electricity bought from the grid in kWh.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [elf_electric_gen_list, elf_electricity_bought_list, demand_class]
+    args_list = [dem_el_kw, elf_electric_gen_kwh, elf_electricity_bought_kwh, city, state]
     if any(elem is None for elem in args_list) is False:
-        data0 = demand_class.el.to(ureg.kW)
-        data1 = elf_electric_gen_list
-        data2 = elf_electricity_bought_list
-
-        # Convert to base units before creating numpy array for plotting
-        y0 = np.array(data0.magnitude)
-        y1 = np.array([gen.magnitude for gen in data1])
-        y2 = np.array([gen.magnitude for gen in data2])
-
-        # Calculate daily sums
-        daily_kwh_dem = []
-        daily_kwh_chp = []
-        daily_kwh_buy = []
-
-        for i in range(24, len(y0) + 1, 24):
-            daily_kwh_dem.append(y0[(i - 24):i].sum())
-            daily_kwh_chp.append(y1[(i - 24):i].sum())
-            daily_kwh_buy.append(y2[(i - 24):i].sum())
-
-        daily_kwh_dem_array = np.array(daily_kwh_dem)
-        daily_kwh_chp_array = np.array(daily_kwh_chp)
-        daily_kwh_buy_array = np.array(daily_kwh_buy)
-
-        # Set up plot
-        fig, (ax1, ax2, ax3) = plt.subplots(1, 3, sharex='all', sharey='all')
-        fig.suptitle('ELF Electrical Demand and Generation, Daily Sums')
-        ax1.plot(daily_kwh_dem_array)
-        ax1.set_ylabel('Demand (kWh)')
-        ax2.plot(daily_kwh_chp_array)
-        ax2.set_ylabel('CHP')
-        ax3.plot(daily_kwh_buy_array)
-        ax3.set_ylabel('Electricity Bought')
-        ax3.set_xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_elf_plot_electric.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def elf_plot_thermal(elf_chp_gen_btuh=None, elf_tes_heat_flow_list=None, elf_boiler_dispatch_hourly=None, demand_class=None):
+        return _plot_daily_electric(series_kwh=[dem_el_kw, elf_electric_gen_kwh, elf_electricity_bought_kwh],
+                                    labels=['Demand (kWh)', 'CHP', 'Electricity Bought'],
+                                    title='ELF Electrical Demand and Generation, Daily Sums', city=city, state=state,
+                                    plot_name="elf_plot_electric", dpi=dpi, file_format=file_format,
+                                    plots_dir=plots_dir)
+
+
+def elf_plot_thermal(dem_hl_btuh=None, elf_chp_gen_btuh=None, elf_tes_heat_flow_btuh=None,
+                     elf_boiler_dispatch_btuh=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None):
     """
     Plots the daily sums of CHP thermal generation, boiler thermal output, and TES heat flows (kW) for ELF operation
     mode. Includes negative and positive heat flow values, with negative discharging convention. Plot is saved to
@@ -237,118 +357,68 @@ def elf_plot_thermal(elf_chp_gen_btuh=None, elf_tes_heat_flow_list=None, elf_boi
 
     Parameters
     ----------
-    elf_chp_gen_btuh: list
-        contains hourly CHP heat generation in units of Btu/hr.
-    elf_tes_heat_flow_list: list
-        contains hourly TES heat flow values in units of Btu/hr.
-    elf_boiler_dispatch_hourly: list
-        contains hourly boiler heat dispatch in units of Btu/hr
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
+    dem_hl_btuh: numpy.ndarray
+        hourly thermal demand in Btu/hr.
+    elf_chp_gen_btuh: numpy.ndarray
+        hourly CHP heat generation in Btu/hr.
+    elf_tes_heat_flow_btuh: numpy.ndarray
+        hourly TES heat flow in Btu/hr.
+    elf_boiler_dispatch_btuh: numpy.ndarray
+        hourly boiler heat dispatch in Btu/hr.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [elf_chp_gen_btuh, elf_tes_heat_flow_list, elf_boiler_dispatch_hourly, demand_class]
+    args_list = [dem_hl_btuh, elf_chp_gen_btuh, elf_tes_heat_flow_btuh, elf_boiler_dispatch_btuh, city, state]
     if any(elem is None for elem in args_list) is False:
-        data1 = []
-        data2 = []
-        data3 = []
-        for index, item in enumerate(elf_chp_gen_btuh):
-            data1.append(item.to(ureg.kW))
-            # For TES, append only negative values (discharging)
-            if elf_tes_heat_flow_list[index].magnitude <= 0:
-                data2.append(-1 * elf_tes_heat_flow_list[index].to(ureg.kW))
-            else:
-                data2.append(0 * ureg.kW)
-            data3.append(elf_boiler_dispatch_hourly[index].to(ureg.kW))
-        hl_demand = demand_class.hl.to(ureg.kW)
-
-        # Convert to base units before creating numpy array for plotting
-        y0 = np.array([dem.magnitude for dem in hl_demand])
-        y1 = np.array([gen.magnitude for gen in data1])
-        y2 = np.array([gen.magnitude for gen in data2])
-        y3 = np.array([gen.magnitude for gen in data3])
-
-        # Calculate daily sums
-        daily_btu_dem = []
-        daily_btu_chp = []
-        daily_btu_tes = []
-        daily_btu_ab = []
-
-        for i in range(24, len(y0) + 1, 24):
-            daily_btu_dem.append(y0[(i - 24):i].sum())
-            daily_btu_chp.append(y1[(i - 24):i].sum())
-            daily_btu_tes.append(y2[(i - 24):i].sum())
-            daily_btu_ab.append(y3[(i - 24):i].sum())
-
-        daily_btu_dem_array = np.array(daily_btu_dem)
-        daily_btu_chp_array = np.array(daily_btu_chp)
-        daily_btu_tes_array = np.array(daily_btu_tes)
-        daily_btu_ab_array = np.array(daily_btu_ab)
-
-        # Set up plot
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4, sharex='all', sharey='all')
-        fig.suptitle('ELF Thermal Demand and Generation, Daily Sums')
-        ax1.plot(daily_btu_dem_array)
-        ax1.set_ylabel('Demand (kWh)')
-        ax2.plot(daily_btu_chp_array)
-        ax2.set_ylabel('CHP (kWh)')
-        ax3.plot(daily_btu_tes_array)
-        ax3.set_ylabel('TES Discharge (kWh)')
-        ax4.plot(daily_btu_ab_array)
-        ax4.set_ylabel('Aux Boiler (kWh)')
-        ax4.set_xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_elf_plot_thermal.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def elf_plot_tes_soc(elf_tes_soc=None, demand_class=None):
+        return _plot_daily_thermal(dem_hl_btuh=dem_hl_btuh, chp_gen_btuh=elf_chp_gen_btuh,
+                                   tes_heat_flow_btuh=elf_tes_heat_flow_btuh,
+                                   boiler_dispatch_btuh=elf_boiler_dispatch_btuh,
+                                   title='ELF Thermal Demand and Generation, Daily Sums', city=city, state=state,
+                                   plot_name="elf_plot_thermal", dpi=dpi, file_format=file_format,
+                                   plots_dir=plots_dir)
+
+
+def elf_plot_tes_soc(elf_tes_soc=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None):
     """
     Plots the average TES SOC values for the ELF operating mode. Plot is saved to the /plots folder for future use.
 
     Parameters
     ----------
-    elf_tes_soc: list
-        contains hourly TES SOC values for the ELF operating mode
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    elf_tes_soc: numpy.ndarray
+        hourly TES SOC values for the ELF operating mode.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [elf_tes_soc, demand_class]
+    args_list = [elf_tes_soc, city, state]
     if any(elem is None for elem in args_list) is False:
-        data = elf_tes_soc
-
-        # Convert to base units before creating numpy array for plotting
-        y = np.array([status.magnitude for status in data])
-
-        # Calculate daily avg for discharge plot
-        daily_btu = []
-
-        for i in range(24, len(y) + 1, 24):
-            daily_btu.append(np.average(y[(i - 24):i]))
-
-        daily_btu_array = np.array(daily_btu)
-
-        # Set up plots
-        plt.plot(daily_btu_array)
-        plt.title('ELF TES SOC, Daily Avg')
-        plt.ylabel('SOC')
-        plt.yticks(np.arange(0, 1, 0.1))
-        plt.xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_elf_plot_soc.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
+        return _plot_daily_soc(tes_soc=elf_tes_soc, title='ELF TES SOC, Daily Avg', city=city, state=state,
+                               plot_name="elf_plot_soc", dpi=dpi, file_format=file_format, plots_dir=plots_dir)
 
 
 """
@@ -356,79 +426,50 @@ TLF Plots
 """
 
 
-def tlf_plot_electric(tlf_electric_gen_list=None, tlf_electricity_bought_list=None, tlf_electricity_sold_list=None,
-                      demand_class=None):
+def tlf_plot_electric(dem_el_kw=None, tlf_electric_gen_kwh=None, tlf_electricity_bought_kwh=None,
+                      tlf_electricity_sold_kwh=None, city=None, state=None, dpi=None, file_format=None,
+                      plots_dir=None):
     """
     Plots the daily sums of the CHP electricity generated, electricity bought, and electricity sold to the grid for
     TLF operation mode. Plot is saved to the /plots folder for future use.
 
     Parameters
     ----------
-    tlf_electric_gen_list: list
-        contains hourly CHP electricity generated in units of kWh.
-    tlf_electricity_bought_list: list
-        contains hourly electricity bought form the grid in units of kWh.
-    tlf_electricity_sold_list: list
-        contains hourly electricity sold to the grid in units of kWh.
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW.
+    tlf_electric_gen_kwh: numpy.ndarray
+        hourly CHP electricity generated in kWh.
+    tlf_electricity_bought_kwh: numpy.ndarray
+        hourly electricity bought from the grid in kWh.
+    tlf_electricity_sold_kwh: numpy.ndarray
+        hourly electricity sold to the grid in kWh.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [tlf_electric_gen_list, tlf_electricity_bought_list, tlf_electricity_sold_list, demand_class]
+    args_list = [dem_el_kw, tlf_electric_gen_kwh, tlf_electricity_bought_kwh, tlf_electricity_sold_kwh, city, state]
     if any(elem is None for elem in args_list) is False:
-        data0 = demand_class.el.to(ureg.kW)
-        data1 = tlf_electric_gen_list
-        data2 = tlf_electricity_bought_list
-        data3 = tlf_electricity_sold_list
-
-        # Convert to base units before creating numpy array for plotting
-        y0 = np.array(data0.magnitude)
-        y1 = np.array([gen.magnitude for gen in data1])
-        y2 = np.array([buy.magnitude for buy in data2])
-        y3 = np.array([sell.magnitude for sell in data3])
-
-        # Calculate daily sums
-        daily_kwh_dem = []
-        daily_kwh_chp = []
-        daily_kwh_buy = []
-        daily_kwh_sell = []
-
-        for i in range(24, len(y0) + 1, 24):
-            daily_kwh_dem.append(y0[(i - 24):i].sum())
-            daily_kwh_chp.append(y1[(i - 24):i].sum())
-            daily_kwh_buy.append(y2[(i - 24):i].sum())
-            daily_kwh_sell.append(y3[(i - 24):i].sum())
-
-        daily_kwh_dem_array = np.array(daily_kwh_dem)
-        daily_kwh_chp_array = np.array(daily_kwh_chp)
-        daily_kwh_buy_array = np.array(daily_kwh_buy)
-        daily_kwh_sell_array = np.array(daily_kwh_sell)
-
-        # Set up plot
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4, sharex='all', sharey='all')
-        fig.suptitle('TLF Electrical Demand, Generation, and Exports, Daily Sums')
-        ax1.plot(daily_kwh_dem_array)
-        ax1.set_ylabel('Demand (kWh)')
-        ax2.plot(daily_kwh_chp_array)
-        ax2.set_ylabel('CHP (kWh)')
-        ax3.plot(daily_kwh_buy_array)
-        ax3.set_ylabel('Electricity Bought (kWh)')
-        ax4.plot(daily_kwh_sell_array)
-        ax4.set_ylabel('Electricity Sold (kWh)')
-        ax3.set_xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_tlf_plot_electric.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def tlf_plot_thermal(tlf_chp_gen_btuh=None, tlf_tes_heat_flow_list=None, tlf_boiler_dispatch_hourly=None,
-                     demand_class=None):
+        return _plot_daily_electric(
+            series_kwh=[dem_el_kw, tlf_electric_gen_kwh, tlf_electricity_bought_kwh, tlf_electricity_sold_kwh],
+            labels=['Demand (kWh)', 'CHP (kWh)', 'Electricity Bought (kWh)', 'Electricity Sold (kWh)'],
+            title='TLF Electrical Demand, Generation, and Exports, Daily Sums', city=city, state=state,
+            plot_name="tlf_plot_electric", dpi=dpi, file_format=file_format, plots_dir=plots_dir)
+
+
+def tlf_plot_thermal(dem_hl_btuh=None, tlf_chp_gen_btuh=None, tlf_tes_heat_flow_btuh=None,
+                     tlf_boiler_dispatch_btuh=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None):
     """
     Plots the daily sums of CHP thermal generation, boiler thermal output, and TES heat flows (kW) for TLF operation
     mode. Includes negative and positive heat flow values, with negative discharging convention. Plot is saved to
@@ -436,124 +477,68 @@ def tlf_plot_thermal(tlf_chp_gen_btuh=None, tlf_tes_heat_flow_list=None, tlf_boi
 
     Parameters
     ----------
-    tlf_chp_gen_btuh: list
-        contains hourly CHP heat generation in units of Btu/hr.
-    tlf_tes_heat_flow_list: list
-        contains hourly TES heat flow values in units of Btu/hr.
-    tlf_boiler_dispatch_hourly: list
-        contains hourly boiler heat dispatch in units of Btu/hr
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_hl_btuh: numpy.ndarray
+        hourly thermal demand in Btu/hr.
+    tlf_chp_gen_btuh: numpy.ndarray
+        hourly CHP heat generation in Btu/hr.
+    tlf_tes_heat_flow_btuh: numpy.ndarray
+        hourly TES heat flow in Btu/hr.
+    tlf_boiler_dispatch_btuh: numpy.ndarray
+        hourly boiler heat dispatch in Btu/hr.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [tlf_chp_gen_btuh, tlf_tes_heat_flow_list, tlf_boiler_dispatch_hourly, demand_class]
+    args_list = [dem_hl_btuh, tlf_chp_gen_btuh, tlf_tes_heat_flow_btuh, tlf_boiler_dispatch_btuh, city, state]
     if any(elem is None for elem in args_list) is False:
-        data1 = []
-        data2 = []
-        data3 = []
-        for index, item in enumerate(tlf_chp_gen_btuh):
-            data1.append(item.to(ureg.kW))
-            # For TES, append only negative values (discharging)
-            if tlf_tes_heat_flow_list[index].magnitude <= 0:
-                data2.append(-1 * tlf_tes_heat_flow_list[index].to(ureg.kW))
-            else:
-                data2.append(0 * ureg.kW)
-            data3.append(tlf_boiler_dispatch_hourly[index].to(ureg.kW))
-        hl_demand = demand_class.hl.to(ureg.kW)
-
-        # Check units
-        assert data1[100].units == ureg.kW
-        assert data2[100].units == ureg.kW
-        assert data3[100].units == ureg.kW
-
-        # Convert to base units before creating numpy array for plotting
-        y0 = np.array([dem.magnitude for dem in hl_demand])
-        y1 = np.array([gen.magnitude for gen in data1])
-        y2 = np.array([gen.magnitude for gen in data2])
-        y3 = np.array([gen.magnitude for gen in data3])
-
-        # Calculate daily sums
-        daily_btu_dem = []
-        daily_btu_chp = []
-        daily_btu_tes = []
-        daily_btu_ab = []
-
-        for i in range(24, len(y0) + 1, 24):
-            daily_btu_dem.append(y0[(i - 24):i].sum())
-            daily_btu_chp.append(y1[(i - 24):i].sum())
-            daily_btu_tes.append(y2[(i - 24):i].sum())
-            daily_btu_ab.append(y3[(i - 24):i].sum())
-
-        daily_btu_dem_array = np.array(daily_btu_dem)
-        daily_btu_chp_array = np.array(daily_btu_chp)
-        daily_btu_tes_array = np.array(daily_btu_tes)
-        daily_btu_ab_array = np.array(daily_btu_ab)
-
-        # Set up plot
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4, sharex='all', sharey='all')
-        fig.suptitle('TLF Thermal Demand and Generation, Daily Sums')
-        ax1.plot(daily_btu_dem_array)
-        ax1.set_ylabel('Demand (kWh)')
-        ax2.plot(daily_btu_chp_array)
-        ax2.set_ylabel('CHP (kWh)')
-        ax3.plot(daily_btu_tes_array)
-        ax3.set_ylabel('TES Discharge (kWh)')
-        ax4.plot(daily_btu_ab_array)
-        ax4.set_ylabel('Aux Boiler (kWh)')
-        ax4.set_xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_tlf_plot_thermal.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def tlf_plot_tes_soc(tlf_tes_soc_list=None, demand_class=None):
+        return _plot_daily_thermal(dem_hl_btuh=dem_hl_btuh, chp_gen_btuh=tlf_chp_gen_btuh,
+                                   tes_heat_flow_btuh=tlf_tes_heat_flow_btuh,
+                                   boiler_dispatch_btuh=tlf_boiler_dispatch_btuh,
+                                   title='TLF Thermal Demand and Generation, Daily Sums', city=city, state=state,
+                                   plot_name="tlf_plot_thermal", dpi=dpi, file_format=file_format,
+                                   plots_dir=plots_dir)
+
+
+def tlf_plot_tes_soc(tlf_tes_soc=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None):
     """
     Plots the average TES SOC values for the TLF operating mode. Plot is saved to the /plots folder for future use.
 
     Parameters
     ----------
-    tlf_tes_soc_list: list
-        contains hourly TES SOC values for the TLF operating mode
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    tlf_tes_soc: numpy.ndarray
+        hourly TES SOC values for the TLF operating mode.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [tlf_tes_soc_list, demand_class]
+    args_list = [tlf_tes_soc, city, state]
     if any(elem is None for elem in args_list) is False:
-        data = tlf_tes_soc_list   # TES SOC data
-
-        # Convert to base units before creating numpy array for plotting
-        y = np.array([status.magnitude for status in data])
-
-        # Calculate daily avg for discharge plot
-        daily_btu = []
-
-        for i in range(24, len(y) + 1, 24):
-            daily_btu.append(np.average(y[(i - 24):i]))
-
-        daily_btu_array = np.array(daily_btu)
-
-        # Set up plots
-        plt.plot(daily_btu_array)
-        plt.title('TLF TES SOC, Daily Avg')
-        plt.ylabel('SOC')
-        plt.yticks(np.arange(0, 1, 0.1))
-        plt.xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_tlf_plot_soc.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
+        return _plot_daily_soc(tes_soc=tlf_tes_soc, title='TLF TES SOC, Daily Avg', city=city, state=state,
+                               plot_name="tlf_plot_soc", dpi=dpi, file_format=file_format, plots_dir=plots_dir)
 
 
 """
@@ -561,79 +546,52 @@ PP Peak Plots
 """
 
 
-def peak_plot_electric(peak_electric_gen_list=None, peak_electricity_bought_list=None, peak_electricity_sold_list=None,
-                       demand_class=None):
+def peak_plot_electric(dem_el_kw=None, peak_electric_gen_kwh=None, peak_electricity_bought_kwh=None,
+                       peak_electricity_sold_kwh=None, city=None, state=None, dpi=None, file_format=None,
+                       plots_dir=None):
     """
     Plots the daily sums of the CHP electricity generated, electricity bought, and electricity sold to the grid for
     PP operation mode. Plot is saved to the /plots folder for future use.
 
     Parameters
     ----------
-    peak_electric_gen_list: list
-        contains hourly CHP electricity generated in units of kWh.
-    peak_electricity_bought_list: list
-        contains hourly electricity bought form the grid in units of kWh.
-    peak_electricity_sold_list: list
-        contains hourly electricity sold to the grid in units of kWh.
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_el_kw: numpy.ndarray
+        hourly electrical demand in kW.
+    peak_electric_gen_kwh: numpy.ndarray
+        hourly CHP electricity generated in kWh.
+    peak_electricity_bought_kwh: numpy.ndarray
+        hourly electricity bought from the grid in kWh.
+    peak_electricity_sold_kwh: numpy.ndarray
+        hourly electricity sold to the grid in kWh.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [peak_electric_gen_list, peak_electricity_bought_list, peak_electricity_sold_list, demand_class]
+    args_list = [dem_el_kw, peak_electric_gen_kwh, peak_electricity_bought_kwh, peak_electricity_sold_kwh, city,
+                 state]
     if any(elem is None for elem in args_list) is False:
-        data0 = demand_class.el.to(ureg.kW)
-        data1 = peak_electric_gen_list
-        data2 = peak_electricity_bought_list
-        data3 = peak_electricity_sold_list
-
-        # Convert to base units before creating numpy array for plotting
-        y0 = np.array(data0.magnitude)
-        y1 = np.array([gen.magnitude for gen in data1])
-        y2 = np.array([buy.magnitude for buy in data2])
-        y3 = np.array([sell.magnitude for sell in data3])
-
-        # Calculate daily sums
-        daily_kwh_dem = []
-        daily_kwh_chp = []
-        daily_kwh_buy = []
-        daily_kwh_sold = []
-
-        for i in range(24, len(y0) + 1, 24):
-            daily_kwh_dem.append(y0[(i - 24):i].sum())
-            daily_kwh_chp.append(y1[(i - 24):i].sum())
-            daily_kwh_buy.append(y2[(i - 24):i].sum())
-            daily_kwh_sold.append(y3[(i - 24):i].sum())
-
-        daily_kwh_dem_array = np.array(daily_kwh_dem)
-        daily_kwh_chp_array = np.array(daily_kwh_chp)
-        daily_kwh_buy_array = np.array(daily_kwh_buy)
-        daily_kwh_sell_array = np.array(daily_kwh_sold)
-
-        # Set up plot
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4, sharex='all', sharey='all')
-        fig.suptitle('PP Electrical Demand, Generation, and Exports, Daily Sums')
-        ax1.plot(daily_kwh_dem_array)
-        ax1.set_ylabel('Demand (kWh)')
-        ax2.plot(daily_kwh_chp_array)
-        ax2.set_ylabel('CHP (kWh)')
-        ax3.plot(daily_kwh_buy_array)
-        ax3.set_ylabel('Electricity Bought (kWh)')
-        ax4.plot(daily_kwh_sell_array)
-        ax4.set_ylabel('Electricity Sold (kWh)')
-        ax4.set_xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_peak_plot_electric.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def peak_plot_thermal(peak_chp_gen_btuh=None, peak_tes_heat_flow_list=None, peak_boiler_dispatch_hourly=None,
-                      demand_class=None):
+        return _plot_daily_electric(
+            series_kwh=[dem_el_kw, peak_electric_gen_kwh, peak_electricity_bought_kwh, peak_electricity_sold_kwh],
+            labels=['Demand (kWh)', 'CHP (kWh)', 'Electricity Bought (kWh)', 'Electricity Sold (kWh)'],
+            title='PP Electrical Demand, Generation, and Exports, Daily Sums', city=city, state=state,
+            plot_name="peak_plot_electric", dpi=dpi, file_format=file_format, plots_dir=plots_dir)
+
+
+def peak_plot_thermal(dem_hl_btuh=None, peak_chp_gen_btuh=None, peak_tes_heat_flow_btuh=None,
+                      peak_boiler_dispatch_btuh=None, city=None, state=None, dpi=None, file_format=None,
+                      plots_dir=None):
     """
     Plots the daily sums of CHP thermal generation, boiler thermal output, and TES heat flows (kW) for PP operation
     mode. Includes negative and positive heat flow values, with negative discharging convention. Plot is saved to
@@ -641,117 +599,135 @@ def peak_plot_thermal(peak_chp_gen_btuh=None, peak_tes_heat_flow_list=None, peak
 
     Parameters
     ----------
-    peak_chp_gen_btuh: list
-        contains hourly CHP heat generation in units of Btu/hr.
-    peak_tes_heat_flow_list: list
-        contains hourly TES heat flow values in units of Btu/hr.
-    peak_boiler_dispatch_hourly: list
-        contains hourly boiler heat dispatch in units of Btu/hr
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    dem_hl_btuh: numpy.ndarray
+        hourly thermal demand in Btu/hr.
+    peak_chp_gen_btuh: numpy.ndarray
+        hourly CHP heat generation in Btu/hr.
+    peak_tes_heat_flow_btuh: numpy.ndarray
+        hourly TES heat flow in Btu/hr.
+    peak_boiler_dispatch_btuh: numpy.ndarray
+        hourly boiler heat dispatch in Btu/hr.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [peak_chp_gen_btuh, peak_tes_heat_flow_list, peak_boiler_dispatch_hourly, demand_class]
+    args_list = [dem_hl_btuh, peak_chp_gen_btuh, peak_tes_heat_flow_btuh, peak_boiler_dispatch_btuh, city, state]
     if any(elem is None for elem in args_list) is False:
-        data1 = []
-        data2 = []
-        data3 = []
-        for index, item in enumerate(peak_chp_gen_btuh):
-            data1.append(item.to(ureg.kW))
-            # For TES, append only negative values (discharging)
-            if peak_tes_heat_flow_list[index].magnitude <= 0:
-                data2.append(-1 * peak_tes_heat_flow_list[index].to(ureg.kW))
-            else:
-                data2.append(0 * ureg.kW)
-            data3.append(peak_boiler_dispatch_hourly[index].to(ureg.kW))
-        hl_demand = demand_class.hl.to(ureg.kW)
-
-        # Convert to base units before creating numpy array for plotting
-        y0 = np.array([dem.magnitude for dem in hl_demand])
-        y1 = np.array([gen.magnitude for gen in data1])
-        y2 = np.array([tes.magnitude for tes in data2])
-        y3 = np.array([boil.magnitude for boil in data3])
-
-        # Calculate daily sums
-        daily_btu_dem = []
-        daily_btu_chp = []
-        daily_btu_tes = []
-        daily_btu_ab = []
-
-        for i in range(24, len(y0) + 1, 24):
-            daily_btu_dem.append(y0[(i - 24):i].sum())
-            daily_btu_chp.append(y1[(i - 24):i].sum())
-            daily_btu_tes.append(y2[(i - 24):i].sum())
-            daily_btu_ab.append(y3[(i - 24):i].sum())
-
-        daily_btu_dem_array = np.array(daily_btu_dem)
-        daily_btu_chp_array = np.array(daily_btu_chp)
-        daily_btu_tes_array = np.array(daily_btu_tes)
-        daily_btu_ab_array = np.array(daily_btu_ab)
-
-        # Set up plot
-        fig, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4, sharex='all', sharey='all')
-        fig.suptitle('PP Thermal Demand and Generation, Daily Sums')
-        ax1.plot(daily_btu_dem_array)
-        ax1.set_ylabel('Demand (kWh)')
-        ax2.plot(daily_btu_chp_array)
-        ax2.set_ylabel('CHP (kWh)')
-        ax3.plot(daily_btu_tes_array)
-        ax3.set_ylabel('TES Discharge (kWh)')
-        ax4.plot(daily_btu_ab_array)
-        ax4.set_ylabel('Aux Boiler (kWh)')
-        ax4.set_xlabel('Time (days)')
-
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_peak_plot_thermal.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
-
-        plt.show()
-
-
-def peak_plot_tes_soc(peak_tes_soc=None, demand_class=None):
+        return _plot_daily_thermal(dem_hl_btuh=dem_hl_btuh, chp_gen_btuh=peak_chp_gen_btuh,
+                                   tes_heat_flow_btuh=peak_tes_heat_flow_btuh,
+                                   boiler_dispatch_btuh=peak_boiler_dispatch_btuh,
+                                   title='PP Thermal Demand and Generation, Daily Sums', city=city, state=state,
+                                   plot_name="peak_plot_thermal", dpi=dpi, file_format=file_format,
+                                   plots_dir=plots_dir)
+
+
+def peak_plot_tes_soc(peak_tes_soc=None, city=None, state=None, dpi=None, file_format=None, plots_dir=None):
     """
     Plots the average TES SOC values for the PP operating mode (uses "peak" CHP size). Plot is saved to the /plots
     folder for future use.
 
     Parameters
     ----------
-    peak_tes_soc: list
-        contains hourly TES SOC values for the PP operating mode (uses "peak" CHP size)
-    demand_class: EnergyDemand class
-        contains initialized EnergyDemand class from command_line.py
-
+    peak_tes_soc: numpy.ndarray
+        hourly TES SOC values for the PP operating mode (uses "peak" CHP size).
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
     """
-    args_list = [peak_tes_soc, demand_class]
+    args_list = [peak_tes_soc, city, state]
     if any(elem is None for elem in args_list) is False:
-        data = peak_tes_soc
-
-        # Convert to base units before creating numpy array for plotting
-        y = np.array([status.magnitude for status in data])
-
-        # Calculate daily avg for discharge plot
-        daily_btu = []
-
-        for i in range(24, len(y) + 1, 24):
-            daily_btu.append(np.average(y[(i - 24):i]))
+        return _plot_daily_soc(tes_soc=peak_tes_soc, title='PP TES SOC, Daily Avg', city=city, state=state,
+                               plot_name="peak_plot_soc", dpi=dpi, file_format=file_format, plots_dir=plots_dir)
 
-        daily_btu_array = np.array(daily_btu)
 
-        # Set up plots
-        plt.plot(daily_btu_array)
-        plt.title('PP TES SOC, Daily Avg')
-        plt.ylabel('SOC')
-        plt.yticks(np.arange(0, 1, 0.1))
-        plt.xlabel('Time (days)')
+"""
+Standard Plots
+"""
 
-        file_path = pathlib.Path(__file__).parent.parent.resolve() / "plots/{}_{}".format(demand_class.city,
-                                                                                          demand_class.state) / \
-                    "{}_{}_peak_plot_soc.png".format(demand_class.city, demand_class.state)
-        if file_path.is_file():
-            pathlib.Path.unlink(file_path)
-        plt.savefig(file_path, dpi=900)
+# Standard plots of one run: plot function, hourly series it needs (see calc_results()), and the
+# operating mode whose CHP size it shows (None if no CHP size is needed)
+STANDARD_PLOTS = {
+    "MR_size_electrical": (plot_max_rectangle_electric, ["dem_el_kw"], "ELF"),
+    "MR_size_thermal": (plot_max_rectangle_thermal, ["dem_hl_btuh"], "TLF"),
+    "electrical_demand": (plot_electrical_demand_curve, ["dem_el_kw"], None),
+    "thermal_demand": (plot_thermal_demand_curve, ["dem_hl_btuh"], None),
+    "elf_plot_electric": (elf_plot_electric, ["dem_el_kw", "elf_electric_gen_kwh", "elf_electricity_bought_kwh"],
+                          None),
+    "elf_plot_thermal": (elf_plot_thermal, ["dem_hl_btuh", "elf_chp_gen_btuh", "elf_tes_heat_flow_btuh",
+                                            "elf_boiler_dispatch_btuh"], None),
+    "elf_plot_soc": (elf_plot_tes_soc, ["elf_tes_soc"], None),
+    "tlf_plot_electric": (tlf_plot_electric, ["dem_el_kw", "tlf_electric_gen_kwh", "tlf_electricity_bought_kwh",
+                                              "tlf_electricity_sold_kwh"], None),
+    "tlf_plot_thermal": (tlf_plot_thermal, ["dem_hl_btuh", "tlf_chp_gen_btuh", "tlf_tes_heat_flow_btuh",
+                                            "tlf_boiler_dispatch_btuh"], None),
+    "tlf_plot_soc": (tlf_plot_tes_soc, ["tlf_tes_soc"], None),
+    "peak_plot_electric": (peak_plot_electric, ["dem_el_kw", "peak_electric_gen_kwh", "peak_electricity_bought_kwh",
+                                                "peak_electricity_sold_kwh"], None),
+    "peak_plot_thermal": (peak_plot_thermal, ["dem_hl_btuh", "peak_chp_gen_btuh", "peak_tes_heat_flow_btuh",
+                                              "peak_boiler_dispatch_btuh"], None),
+    "peak_plot_soc": (peak_plot_tes_soc, ["peak_tes_soc"], None),
+}
+
+
+def plot_standard(plot_name=None, hourly=None, chp_size_kw=None, city=None, state=None, dpi=None, file_format=None,
+                  plots_dir=None):
+    """
+    Draws one of the standard plots of a run (see STANDARD_PLOTS).
 
-        plt.show()
+    Parameters
+    ----------
+    plot_name: str
+        key of the plot in STANDARD_PLOTS.
+    hourly: dict or pandas.DataFrame
+        hourly series of the run, keyed by the names used in calc_results(). Only the series
+        the plot needs are used.
+    chp_size_kw: float
+        CHP size in kW of the operating mode shown. Only used by the Max Rectangle plots.
+    city: str
+        city of the location, used in the file name.
+    state: str
+        two-letter abbreviation of the state of the location, used in the file name.
+    dpi: int
+        resolution of the saved plot. Defaults to DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plot is saved in. Defaults to /plots.
+
+    Returns
+    -------
+    file_path: pathlib.Path
+        path of the saved plot.
+    """
+    args_list = [plot_name, hourly, city, state]
+    if any(elem is None for elem in args_list) is False:
+        plot_function, series_names, size_mode = STANDARD_PLOTS[plot_name]
+        kwargs = {name: np.asarray(hourly[name], dtype=float) for name in series_names}
+        if size_mode is not None:
+            kwargs["chp_size_kw"] = chp_size_kw
+        return plot_function(city=city, state=state, dpi=dpi, file_format=file_format, plots_dir=plots_dir,
+                             **kwargs)
@@ -0,0 +1,138 @@
+"""
+Module description:
+    On-disk cache of parsed demand profiles. Each entry is a .npz file holding the unit-normalized
+    electrical demand (kW), heating demand (Btu/hr), and calendar arrays of one .csv file. Entries
+    are keyed by a content hash of the .csv file and the EnergyPlus boiler efficiency, so editing
+    the .csv file automatically misses the old entry.
+
+    The cache directory defaults to ~/.cache/load_following_decision and can be changed with the
+    LFD_CACHE_DIR environment variable. Setting LFD_CACHE_DIR to an empty string disables the cache.
+"""
+
+import os
+import hashlib
+import pathlib
+import numpy as np
+
+# Bump when the layout of the cached arrays changes
+CACHE_FORMAT_VERSION = 1
+
+PROFILE_ARRAY_NAMES = ("el_kw", "hl_btuh", "months", "days", "hours", "hour_of_year")
+
+
+def get_cache_dir():
+    """
+    Returns the directory used for cached profiles, or None if caching is disabled.
+    """
+    cache_dir = os.environ.get("LFD_CACHE_DIR")
+    if cache_dir is None:
+        return pathlib.Path.home() / ".cache" / "load_following_decision"
+    elif cache_dir == "":
+        return None
+    return pathlib.Path(cache_dir)
+
+
+def calc_file_digest(file_path=None):
+    """
+    Returns the SHA-256 hexadecimal digest of a file's contents.
+    """
+    if file_path is not None:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+def calc_profile_key(csv_path=None, sim_ab_efficiency=None):
+    """
+    Builds the cache key of a demand profile from the .csv file contents and the
+    EnergyPlus boiler efficiency.
+
+    Parameters
+    ----------
+    csv_path: pathlib.Path
+        location of the EnergyPlus .csv file.
+    sim_ab_efficiency: float
+        the assumed EnergyPlus boiler efficiency used to convert gas metering to heating demand.
+
+    Returns
+    -------
+    key: str
+        hexadecimal digest identifying the parsed profile.
+    """
+    args_list = [csv_path, sim_ab_efficiency]
+    if any(elem is None for elem in args_list) is False:
+        csv_digest = calc_file_digest(file_path=csv_path)
+        key_str = "{}|{}|{}".format(CACHE_FORMAT_VERSION, csv_digest, repr(float(sim_ab_efficiency)))
+        return hashlib.sha256(key_str.encode()).hexdigest()
+
+
+def _entry_path(cache_dir, csv_path, key):
+    return cache_dir / "{}-{}.npz".format(pathlib.Path(csv_path).stem, key[:24])
+
+
+def load_profile(csv_path=None, sim_ab_efficiency=None):
+    """
+    Loads a parsed demand profile from the cache.
+
+    Parameters
+    ----------
+    csv_path: pathlib.Path
+        location of the EnergyPlus .csv file.
+    sim_ab_efficiency: float
+        the assumed EnergyPlus boiler efficiency.
+
+    Returns
+    -------
+    profile: dict
+        contains the arrays named in PROFILE_ARRAY_NAMES, or None if the profile is not cached.
+    """
+    args_list = [csv_path, sim_ab_efficiency]
+    if any(elem is None for elem in args_list) is False:
+        cache_dir = get_cache_dir()
+        if cache_dir is None:
+            return None
+
+        key = calc_profile_key(csv_path=csv_path, sim_ab_efficiency=sim_ab_efficiency)
+        entry = _entry_path(cache_dir, csv_path, key)
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                if str(npz["key"]) != key:
+                    return None
+                return {name: npz[name] for name in PROFILE_ARRAY_NAMES}
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def save_profile(csv_path=None, sim_ab_efficiency=None, profile=None):
+    """
+    Writes a parsed demand profile to the cache. Failures to write (read-only home
+    directory, full disk) are ignored since the cache is only an optimization.
+
+    Parameters
+    ----------
+    csv_path: pathlib.Path
+        location of the EnergyPlus .csv file.
+    sim_ab_efficiency: float
+        the assumed EnergyPlus boiler efficiency.
+    profile: dict
+        contains the arrays named in PROFILE_ARRAY_NAMES.
+    """
+    args_list = [csv_path, sim_ab_efficiency, profile]
+    if any(elem is None for elem in args_list) is False:
+        cache_dir = get_cache_dir()
+        if cache_dir is None:
+            return
+
+        key = calc_profile_key(csv_path=csv_path, sim_ab_efficiency=sim_ab_efficiency)
+        entry = _entry_path(cache_dir, csv_path, key)
+        arrays = {name: np.ascontiguousarray(profile[name]) for name in PROFILE_ARRAY_NAMES}
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so concurrent runs never read a partial entry
+            tmp_entry = entry.with_name("{}.{}.tmp.npz".format(entry.stem, os.getpid()))
+            np.savez(tmp_entry, key=np.array(key), **arrays)
+            os.replace(tmp_entry, entry)
+        except OSError:
+            pass
@@ -0,0 +1,394 @@
+"""
+Module Description:
+    Lightweight stage timers for finding where the time of an analysis goes. Stages are named
+    blocks of code (ie: "elf_dispatch") that record wall time, CPU time, peak resident memory,
+    the net number of allocated memory blocks, and, if memory tracing is on, the net and peak
+    memory allocated in the stage (tracemalloc). Stages can be nested.
+
+    Profiling is off by default and a disabled stage only checks one flag, so the stage calls
+    can stay in the analysis code. enable() can also wrap the public functions and methods of
+    the calculation modules so every call to them is recorded as a stage of its own.
+
+    The recorded stages are written as a JSON trace in the Chrome trace event format, which
+    can be opened in chrome://tracing, https://ui.perfetto.dev, or https://www.speedscope.app.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import functools
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, so peak memory is not recorded there
+    resource = None
+
+_enabled = False
+_memory = False
+_started_tracemalloc = False
+_origin = None
+_open_stages = []
+_records = []
+_wrapped = []
+
+# Modules whose public functions are recorded when enable() is called with instrument=True
+INSTRUMENTED_MODULES = ("classes", "sizing_calcs", "dispatch", "kernels", "tariffs", "costs", "emissions",
+                        "profile_cache", "result_cache")
+
+
+def is_enabled():
+    """
+    Returns True if stages are being recorded.
+    """
+    return _enabled
+
+
+def enable(memory=False, instrument=True):
+    """
+    Starts recording stages. Earlier records are discarded.
+
+    Parameters
+    ----------
+    memory: bool
+        if True, memory allocations are traced with tracemalloc. Tracing slows down the
+        analysis, so wall times are less accurate with this option.
+    instrument: bool
+        if True, the public functions and methods of the calculation modules (see
+        INSTRUMENTED_MODULES) are wrapped so each call is recorded as a stage.
+    """
+    global _enabled, _memory, _started_tracemalloc, _origin
+    _open_stages.clear()
+    _records.clear()
+    _origin = time.perf_counter()
+    _memory = memory
+    if memory is True and tracemalloc.is_tracing() is False:
+        tracemalloc.start()
+        _started_tracemalloc = True
+    if instrument is True and not _wrapped:
+        import importlib
+        for module_name in INSTRUMENTED_MODULES:
+            instrument_module(module=importlib.import_module("lfd_package.modules." + module_name))
+    _enabled = True
+
+
+def disable():
+    """
+    Stops recording stages and removes the function wrappers. The records are kept until the
+    next call to enable().
+    """
+    global _enabled, _memory, _started_tracemalloc
+    while _open_stages:
+        end_stage()
+    _enabled = False
+    _memory = False
+    if _started_tracemalloc is True:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+    for owner, name, original in reversed(_wrapped):
+        setattr(owner, name, original)
+    _wrapped.clear()
+
+
+def _peak_rss_mb():
+    # Peak resident memory of the process so far. ru_maxrss is in kilobytes, except on macOS
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return max_rss / 1024 ** 2
+    return max_rss / 1024
+
+
+def begin_stage(name=None):
+    """
+    Starts a stage inside the stage that is currently open, if any.
+
+    Parameters
+    ----------
+    name: str
+        name of the stage (ie: "tlf_dispatch").
+    """
+    if _enabled is False:
+        return
+
+    record = {"name": name, "path": "/".join([stage["name"] for stage in _open_stages] + [name]),
+              "depth": len(_open_stages), "start": time.perf_counter(), "cpu_start": time.process_time(),
+              "rss_start": _peak_rss_mb(), "blocks_start": sys.getallocatedblocks()}
+    if _memory is True:
+        current, peak = tracemalloc.get_traced_memory()
+        # The peak is reset for the new stage, so the open stages keep the peak they have seen so far
+        for stage in _open_stages:
+            stage["tm_peak"] = max(stage["tm_peak"], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        record["tm_start"] = current
+        record["tm_peak"] = current
+    _open_stages.append(record)
+
+
+def end_stage(name=None):
+    """
+    Ends the stage that is currently open.
+
+    Parameters
+    ----------
+    name: str
+        Optional. If given, stages are ended up to and including the innermost stage with this
+        name, so stages left open by an exception are closed with their parent.
+    """
+    if _enabled is False or not _open_stages:
+        return
+
+    if name is not None and name in [stage["name"] for stage in _open_stages]:
+        while _open_stages[-1]["name"] != name:
+            end_stage()
+
+    end = time.perf_counter()
+    cpu_end = time.process_time()
+    record = _open_stages.pop()
+    rss_end = _peak_rss_mb()
+    entry = {"name": record["name"], "path": record["path"], "depth": record["depth"],
+             "start_s": record["start"] - _origin, "wall_s": end - record["start"],
+             "cpu_s": cpu_end - record["cpu_start"], "peak_rss_mb": rss_end,
+             "rss_growth_mb": None if rss_end is None else rss_end - record["rss_start"],
+             "alloc_blocks": sys.getallocatedblocks() - record["blocks_start"]}
+    if _memory is True:
+        current, peak = tracemalloc.get_traced_memory()
+        record["tm_peak"] = max(record["tm_peak"], peak)
+        for stage in _open_stages:
+            stage["tm_peak"] = max(stage["tm_peak"], record["tm_peak"])
+        entry["alloc_net_mb"] = (current - record["tm_start"]) / 1024 ** 2
+        entry["alloc_peak_mb"] = (record["tm_peak"] - record["tm_start"]) / 1024 ** 2
+    _records.append(entry)
+
+
+def next_stage(name=None):
+    """
+    Ends the stage that is currently open and starts the next one at the same level.
+
+    Parameters
+    ----------
+    name: str
+        name of the next stage.
+    """
+    if _enabled is False:
+        return
+    if _open_stages:
+        end_stage()
+    begin_stage(name=name)
+
+
+class _Stage:
+    # Context manager form of begin_stage() and end_stage()
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        begin_stage(name=self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        end_stage(name=self.name)
+        return False
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name=None):
+    """
+    Records the block of a with statement as a stage.
+
+    Parameters
+    ----------
+    name: str
+        name of the stage.
+
+    Returns
+    -------
+    Context manager. When profiling is off, the same do-nothing context manager is returned
+    every time.
+    """
+    if _enabled is False:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def timed(func=None, name=None):
+    """
+    Wraps a function so each call is recorded as a stage while profiling is on.
+
+    Parameters
+    ----------
+    func: function
+        function to wrap.
+    name: str
+        name of the stage. Defaults to "{module}.{function}".
+
+    Returns
+    -------
+    wrapper: function
+        calls func inside a stage, or calls it directly when profiling is off.
+    """
+    if func is not None:
+        if name is None:
+            name = "{}.{}".format(func.__module__.rsplit(".", 1)[-1], func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _enabled is False:
+                return func(*args, **kwargs)
+            begin_stage(name=name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end_stage(name=name)
+
+        wrapper.__profiling_original__ = func
+        return wrapper
+
+
+def instrument_module(module=None):
+    """
+    Replaces the public functions of a module, and the public methods of its classes, with
+    timed() wrappers until disable() is called. Callers that look the functions up on the
+    module (ie: dispatch.size_tes()) are recorded; names imported with "from module import"
+    before this call are not.
+
+    Parameters
+    ----------
+    module: module
+        module to instrument.
+    """
+    if module is not None:
+        for name, obj in list(vars(module).items()):
+            if name.startswith("_") or getattr(obj, "__module__", None) != module.__name__:
+                continue
+            if inspect.isfunction(obj) and not hasattr(obj, "__profiling_original__"):
+                setattr(module, name, timed(func=obj))
+                _wrapped.append((module, name, obj))
+            elif inspect.isclass(obj):
+                for method_name, method in list(vars(obj).items()):
+                    if method_name.startswith("_") or not inspect.isfunction(method):
+                        continue
+                    setattr(obj, method_name, timed(func=method))
+                    _wrapped.append((obj, method_name, method))
+
+
+def get_records():
+    """
+    Returns the recorded stages.
+
+    Returns
+    -------
+    records: list
+        contains one dict per finished stage, in the order they started. Times are in seconds
+        and memory in MB.
+    """
+    return sorted(_records, key=lambda record: record["start_s"])
+
+
+def summarize(records=None):
+    """
+    Totals the recorded stages by path, so repeated calls of the same function are one row.
+
+    Parameters
+    ----------
+    records: list
+        stages from get_records(). Defaults to the current records.
+
+    Returns
+    -------
+    summary: list
+        contains one dict per stage path with the number of calls and the total wall and CPU
+        time, sorted by total wall time.
+    """
+    if records is None:
+        records = get_records()
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record["path"], {"path": record["path"], "depth": record["depth"], "calls": 0,
+                                                   "wall_s": 0.0, "cpu_s": 0.0, "alloc_blocks": 0})
+        total["calls"] += 1
+        total["wall_s"] += record["wall_s"]
+        total["cpu_s"] += record["cpu_s"]
+        total["alloc_blocks"] += record["alloc_blocks"]
+        if "alloc_peak_mb" in record:
+            total["alloc_peak_mb"] = max(total.get("alloc_peak_mb", 0.0), record["alloc_peak_mb"])
+    return sorted(totals.values(), key=lambda total: total["wall_s"], reverse=True)
+
+
+def format_summary(records=None, max_depth=3):
+    """
+    Formats the totals of the stages as a table for the terminal. Each stage is listed under
+    its parent, indented by its depth, and stages with the same parent are sorted by total
+    wall time.
+
+    Parameters
+    ----------
+    records: list
+        stages from get_records(). Defaults to the current records.
+    max_depth: int
+        deepest level of stages listed, where 0 is the top level.
+
+    Returns
+    -------
+    table: str
+    """
+    totals = summarize(records=records)
+    wall_by_path = {total["path"]: total["wall_s"] for total in totals}
+
+    def tree_order(total):
+        parts = total["path"].split("/")
+        prefixes = ["/".join(parts[:i + 1]) for i in range(len(parts))]
+        return [(-wall_by_path.get(prefix, 0.0), prefix) for prefix in prefixes]
+
+    lines = ["{:<48} {:>6} {:>10} {:>10}".format("Stage", "Calls", "Wall [s]", "CPU [s]")]
+    for total in sorted(totals, key=tree_order):
+        if total["depth"] <= max_depth:
+            name = "  " * total["depth"] + total["path"].split("/")[-1]
+            lines.append("{:<48} {:>6} {:>10.4f} {:>10.4f}".format(name[:48], total["calls"], total["wall_s"],
+                                                                   total["cpu_s"]))
+    return "\n".join(lines)
+
+
+def write_trace(trace_path=None, metadata=None):
+    """
+    Writes the recorded stages as a JSON trace in the Chrome trace event format, with the
+    per-path totals from summarize() under "summary".
+
+    Parameters
+    ----------
+    trace_path: str or pathlib.Path
+        path of the .json file. Missing folders are created.
+    metadata: dict
+        Optional. Extra information saved with the trace (ie: the .yaml file analyzed).
+    """
+    if trace_path is not None:
+        records = get_records()
+        pid = os.getpid()
+        events = []
+        for record in records:
+            args = {key: value for key, value in record.items() if key not in ("name", "start_s", "wall_s")}
+            events.append({"name": record["name"], "cat": "stage", "ph": "X", "pid": pid, "tid": 0,
+                           "ts": round(record["start_s"] * 1e6, 3), "dur": round(record["wall_s"] * 1e6, 3),
+                           "args": args})
+        trace = {"traceEvents": events, "displayTimeUnit": "ms", "summary": summarize(records=records),
+                 "otherData": dict(metadata or {}, memory_traced=any("alloc_peak_mb" in r for r in records))}
+
+        trace_path = os.path.abspath(trace_path)
+        os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+        with open(trace_path, "w") as f:
+            json.dump(trace, f, indent=1, default=str)
@@ -0,0 +1,272 @@
+"""
+Module description:
+    On-disk cache of complete analysis results. Each entry is a .npz file holding the results
+    table of one analysis (as JSON) and, if it was requested, its hourly series. Entries are keyed
+    by a content hash of the fully resolved .yaml inputs, the demand .csv file, the package
+    version, and the source code of the calculations, so a hit can skip the dispatch and tariff
+    calculations and any change to the calculations starts a new set of entries.
+
+    Entries live in the "results" folder of the profile cache directory (see profile_cache.py)
+    and are evicted least recently used first once the folder grows past LFD_RESULT_CACHE_MB
+    megabytes (default 512). Setting LFD_CACHE_DIR to an empty string disables this cache too.
+"""
+
+import os
+import json
+import pathlib
+import hashlib
+import functools
+import numpy as np
+
+try:
+    from importlib import metadata
+except ImportError:
+    # Python 3.7 has no importlib.metadata, so the version is read with pkg_resources instead
+    metadata = None
+
+from lfd_package.modules import profile_cache
+
+# Bump when the layout of an entry changes
+CACHE_FORMAT_VERSION = 1
+
+# Source files of the calculations in calc_results(). Their contents are part of every key
+PACKAGE_DIR = pathlib.Path(__file__).parent.parent.resolve()
+ENGINE_SOURCES = ("command_line.py", "modules/*.py")
+
+DEFAULT_MAX_MB = 512
+
+PACKAGE_NAME = "load_following_decision"
+
+
+def get_cache_dir():
+    """
+    Returns the directory used for cached results, or None if caching is disabled.
+    """
+    cache_dir = profile_cache.get_cache_dir()
+    if cache_dir is None:
+        return None
+    return cache_dir / "results"
+
+
+def get_max_bytes():
+    """
+    Returns the size limit of the results cache in bytes (LFD_RESULT_CACHE_MB megabytes).
+    """
+    max_mb = os.environ.get("LFD_RESULT_CACHE_MB")
+    try:
+        return int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_MB * 1024 * 1024
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+def get_package_version():
+    """
+    Returns the installed version of the package, or "unknown" if it is run from a source tree.
+    """
+    if metadata is None:
+        try:
+            import pkg_resources
+            return pkg_resources.get_distribution(PACKAGE_NAME).version
+        except Exception:
+            return "unknown"
+    try:
+        return metadata.version(PACKAGE_NAME)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@functools.lru_cache(maxsize=None)
+def get_engine_version():
+    """
+    Returns a digest of the source code of the dispatch, sizing, tariff, and cost calculations
+    (ENGINE_SOURCES), so that editing any of them invalidates the cached results.
+    """
+    digest = hashlib.sha256()
+    source_paths = sorted(path for pattern in ENGINE_SOURCES for path in PACKAGE_DIR.glob(pattern))
+    for source_path in source_paths:
+        digest.update(source_path.relative_to(PACKAGE_DIR).as_posix().encode())
+        digest.update(source_path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def calc_result_key(inputs=None, csv_path=None, engine=None):
+    """
+    Builds the cache key of an analysis.
+
+    Parameters
+    ----------
+    inputs: dict
+        .yaml inputs after overrides (see command_line.read_inputs()).
+    csv_path: pathlib.Path
+        location of the demand .csv file.
+    engine: str
+        name of the calculation engine. Optional.
+
+    Returns
+    -------
+    key: str
+        hexadecimal digest identifying the analysis.
+    """
+    args_list = [inputs, csv_path]
+    if any(elem is None for elem in args_list) is False:
+        inputs_str = json.dumps(inputs, sort_keys=True, default=str)
+        csv_digest = profile_cache.calc_file_digest(file_path=csv_path)
+        key_str = "|".join([str(CACHE_FORMAT_VERSION), get_package_version(), get_engine_version(), str(engine),
+                            csv_digest, inputs_str])
+        return hashlib.sha256(key_str.encode()).hexdigest()
+
+
+def _entry_path(cache_dir, key):
+    return cache_dir / "{}.npz".format(key[:32])
+
+
+def load_results(key=None, hourly=False):
+    """
+    Loads the results of an analysis from the cache. A hit marks the entry as recently used.
+
+    Parameters
+    ----------
+    key: str
+        cache key from calc_result_key().
+    hourly: bool
+        if True, the hourly series are needed too. Entries saved without them count as a miss.
+
+    Returns
+    -------
+    df_results: pandas.DataFrame
+        table of results as returned by calc_results(), with units as strings. None if the
+        analysis is not cached.
+    df_hourly: pandas.DataFrame
+        hourly series, or None if hourly is False or the analysis is not cached.
+    """
+    import pandas as pd
+    if key is not None:
+        cache_dir = get_cache_dir()
+        if cache_dir is None:
+            return None, None
+
+        entry = _entry_path(cache_dir, key)
+        try:
+            with np.load(entry, allow_pickle=False) as npz:
+                if str(npz["key"]) != key:
+                    return None, None
+                table = json.loads(str(npz["results"]))
+                series_names = json.loads(str(npz["hourly_names"]))
+                if hourly is True and not series_names:
+                    return None, None
+                df_hourly = None
+                if hourly is True:
+                    df_hourly = pd.DataFrame({name: npz["hourly_{}".format(i)] for i, name in enumerate(series_names)})
+            os.utime(entry)
+        except (OSError, KeyError, ValueError):
+            return None, None
+
+        df_results = pd.DataFrame(table["data"], columns=table["columns"])
+        return df_results, df_hourly
+    return None, None
+
+
+def save_results(key=None, df_results=None, df_hourly=None):
+    """
+    Writes the results of an analysis to the cache, then evicts the least recently used entries
+    if the cache is over its size limit. Failures to write are ignored since the cache is only
+    an optimization.
+
+    Parameters
+    ----------
+    key: str
+        cache key from calc_result_key().
+    df_results: pandas.DataFrame
+        table of results from calc_results().
+    df_hourly: pandas.DataFrame
+        hourly series from calc_results(return_hourly=True). Optional.
+    """
+    args_list = [key, df_results]
+    if any(elem is None for elem in args_list) is False:
+        cache_dir = get_cache_dir()
+        if cache_dir is None:
+            return
+
+        # Units are stored as strings; numbers and "N/A" keep their type
+        table = {"columns": list(df_results.columns),
+                 "data": [[_to_json_value(value) for value in row]
+                          for row in df_results.itertuples(index=False, name=None)]}
+        arrays = {}
+        series_names = []
+        if df_hourly is not None:
+            series_names = [str(name) for name in df_hourly.columns]
+            arrays = {"hourly_{}".format(i): np.ascontiguousarray(df_hourly[name], dtype=float)
+                      for i, name in enumerate(df_hourly.columns)}
+
+        entry = _entry_path(cache_dir, key)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so concurrent runs never read a partial entry
+            tmp_entry = entry.with_name("{}.{}.tmp.npz".format(entry.stem, os.getpid()))
+            np.savez(tmp_entry, key=np.array(key), results=np.array(json.dumps(table)),
+                     hourly_names=np.array(json.dumps(series_names)), **arrays)
+            os.replace(tmp_entry, entry)
+            prune(max_bytes=get_max_bytes())
+        except OSError:
+            pass
+
+
+def _to_json_value(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    return str(value)
+
+
+def prune(max_bytes=None):
+    """
+    Deletes the least recently used entries until the cache is no larger than max_bytes.
+
+    Parameters
+    ----------
+    max_bytes: int
+        size limit in bytes. Defaults to the LFD_RESULT_CACHE_MB setting.
+
+    Returns
+    -------
+    no_deleted: int
+        number of entries deleted.
+    """
+    if max_bytes is None:
+        max_bytes = get_max_bytes()
+    cache_dir = get_cache_dir()
+    if cache_dir is None or not cache_dir.is_dir():
+        return 0
+
+    entries = []
+    for entry in cache_dir.glob("*.npz"):
+        if entry.name.endswith(".tmp.npz"):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    no_deleted = 0
+    for _, size, entry in sorted(entries, key=lambda item: item[0]):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            entry.unlink()
+        except OSError:
+            continue
+        total_bytes -= size
+        no_deleted += 1
+    return no_deleted
+
+
+def clear():
+    """
+    Deletes every entry in the results cache.
+    """
+    return prune(max_bytes=0)
@@ -6,19 +6,100 @@ Module description:
 import numpy as np
 from lfd_package.modules.__init__ import ureg, Q_
 
+# Linear fits of CHP performance (<100kW) from the CHP TAP's eCatalog: https://chp.ecatalog.ornl.gov
+FUEL_CONSUMPTION_RATIO = 3.6376     # kW fuel per kW electrical output
+THERMAL_OUTPUT_RATIO = 1.8721       # kW thermal per kW electrical output
+ELECTRICAL_OUTPUT_RATIO = 0.5188    # kW electrical per kW thermal output
+
+
+class LoadDurationCurve:
+    def __init__(self, demand=None, units=None):
+        """
+        Load duration curve of one or more hourly demand profiles: the demand sorted from the
+        largest to the smallest value, against the percent of the hours in the profile. The
+        curve is built once and used for Maximum Rectangle (MR) sizing and the demand curve
+        plots. A 2D array of profiles (profiles x hours) is sorted and sized in one call.
+
+        Parameters
+        ----------
+        demand: numpy.ndarray (Quantity or float)
+            hourly demand data (thermal or electrical), either 1D (hours) or 2D (profiles x
+            hours). A Quantity array keeps its units.
+        units: pint.Unit
+            Optional. Units of a float array. Sizes are returned as Quantities when the units
+            are known.
+        """
+        if isinstance(demand, ureg.Quantity):
+            units = demand.units
+            demand = demand.magnitude
+        demand = np.asarray(demand, dtype=float)
+        assert demand.ndim in (1, 2)
+
+        self.units = units
+        self.no_hours = demand.shape[-1]
+        self.sorted_demand = np.sort(demand, axis=-1)[..., ::-1]
+
+        # Same operations as ((i+1) / len(array))*100 for each hour
+        self.percent_days = (np.arange(1, self.no_hours + 1) / self.no_hours) * 100
+
+    def max_rect_index(self):
+        """
+        Returns the position on the curve of the Maximum Rectangle, the point where percent
+        hours times demand is largest (the first one if there are ties). One index per profile
+        for a 2D curve.
+        """
+        return np.argmax(self.percent_days * self.sorted_demand, axis=-1)
+
+    def max_rect_size(self):
+        """
+        Returns the recommended CHP size (thermal or electrical) by the Maximum Rectangle method,
+        in the units of the demand. One size per profile for a 2D curve.
+        """
+        index = self.max_rect_index()
+        size = np.take_along_axis(self.sorted_demand, np.asarray(index)[..., np.newaxis], axis=-1)[..., 0]
+        return self._with_units(size)
+
+    def demand_at_percent(self, percent_hours=None):
+        """
+        Returns the demand that is met or exceeded during the given percent of the hours.
+
+        Parameters
+        ----------
+        percent_hours: float or numpy.ndarray
+            percent of the hours in the profile (0-100). A vector gives one column per value.
+
+        Returns
+        -------
+        demand: float, numpy.ndarray, or Quantity
+            demand at each percent, with one row per profile for a 2D curve.
+        """
+        if percent_hours is not None:
+            percent_hours = np.asarray(percent_hours, dtype=float)
+            if ((percent_hours < 0) | (100 < percent_hours)).any():
+                raise Exception("percent_hours must be between 0 and 100")
+            index = np.clip(np.ceil(percent_hours / 100 * self.no_hours).astype(int) - 1, 0, self.no_hours - 1)
+            return self._with_units(self.sorted_demand[..., index])
+
+    def _with_units(self, values):
+        if np.ndim(values) == 0:
+            values = values[()]
+        if self.units is None:
+            return values
+        return Q_(values, self.units)
+
 
 def create_demand_curve_array(array=None):
     """
     Creates two 1D numpy arrays containing percent total days (days / days in 1 year)
     and associated energy demand data (thermal or electrical), respectively.
 
-    Used in the max_rect_chp_size function for CHP sizing using the Max Rectangle (MR) method.
+    Used to plot demand curves. See LoadDurationCurve for sizing.
 
     Parameters
     ----------
     array: numpy.ndarray (Quantity)
         One dimensional numpy array containing energy demand data (thermal or electrical).
-        Items in the array are Quantity values.
+        Items in the array are Quantity values, or floats.
 
     Returns
     -------
@@ -26,18 +107,14 @@ def create_demand_curve_array(array=None):
         1D array of percent total days (day in year / total days in 1 year) values.
     sorted_demand_array: numpy.ndarray (Quantity)
         1D array of energy demand data associated with the percent-days data. Contains
-        Quantity values.
+        Quantity values, or floats if the input array has no units.
     """
     if array is not None:
         assert array.ndim == 1
-        reverse_sort_array = np.sort(array, axis=0)
-        sorted_demand_array = reverse_sort_array[::-1]
-        percent_days = []
-        for i, k in enumerate(array):
-            percent = ((i+1) / len(array))*100
-            percent_days.append(percent)
-        percent_days_array = np.array(percent_days)
-        return percent_days_array, sorted_demand_array
+        curve = LoadDurationCurve(demand=array)
+        if curve.units is None:
+            return curve.percent_days, curve.sorted_demand
+        return curve.percent_days, Q_(curve.sorted_demand, curve.units)
 
 
 def electrical_output_to_fuel_consumption(electrical_output=None):
@@ -65,7 +142,7 @@ def electrical_output_to_fuel_consumption(electrical_output=None):
         if electrical_output.magnitude == 0:
             return Q_(0, ureg.kW)
         else:
-            a = 3.6376
+            a = FUEL_CONSUMPTION_RATIO
             assert electrical_output.units == ureg.kW
             fuel_consumption_kw = (a * electrical_output.magnitude) * ureg.kW
             return fuel_consumption_kw
@@ -99,7 +176,7 @@ def electrical_output_to_thermal_output(electrical_output=None):
         if electrical_output.magnitude == 0:
             return Q_(0, ureg.kW)
         else:
-            a = 1.8721
+            a = THERMAL_OUTPUT_RATIO
             thermal_output_kw = (a * electrical_output.magnitude) * ureg.kW
             return thermal_output_kw
 
@@ -130,7 +207,7 @@ def thermal_output_to_electrical_output(thermal_output=None):
         if thermal_output.magnitude == 0:
             return Q_(0, ureg.kW)
         else:
-            a = 0.5188
+            a = ELECTRICAL_OUTPUT_RATIO
             electrical_output_kw = (thermal_output.magnitude * a) * ureg.kW
             if electrical_output_kw.magnitude <= 0:
                 return Q_(0, ureg.kW)
@@ -165,9 +242,9 @@ def size_chp(load_following_type=None, class_dict=None):
         if load_following_type == "Peak":
             chp_size = class_dict['demand'].annual_peak_el
         elif load_following_type == "ELF":
-            chp_size = calc_max_rect_chp_size(array=class_dict['demand'].el)
+            chp_size = class_dict['demand'].duration_curve(kind="el").max_rect_size()
         elif load_following_type == "TLF":
-            thermal_size = (calc_max_rect_chp_size(array=class_dict['demand'].hl)).to(ureg.kW)
+            thermal_size = (class_dict['demand'].duration_curve(kind="hl").max_rect_size()).to(ureg.kW)
             chp_size = thermal_output_to_electrical_output(thermal_output=thermal_size)
         else:
             raise Exception("Error in size_chp function in module sizing_calcs.py")
@@ -184,27 +261,22 @@ def calc_max_rect_chp_size(array=None):
     Calculates the recommended CHP size in kW based on the Maximum Rectangle (MR)
     sizing method. The input array is either electrical or thermal demand.
 
-    Used in the size_chp function
+    The size_chp function uses the same method on the curves cached by the EnergyDemand class
 
     Parameters
     ----------
     array: numpy.ndarray
-        One 1D numpy array containing either electrical or thermal energy demand data.
-        Items in this array are Quantity values with units of either kW or Btu/hr.
+        Either electrical or thermal energy demand data, as a Quantity array with units of
+        either kW or Btu/hr. A 2D array (profiles x hours) is sized in one call.
 
     Returns
     -------
-    max_value: Quantity (float)
-        The recommended size (either thermal or electrical) of the CHP system. Units
-        will be either kW or Btu/hr.
+    max_value: Quantity (float or numpy.ndarray)
+        The recommended size (either thermal or electrical) of the CHP system, one per
+        profile for a 2D array. Units will be either kW or Btu/hr.
     """
     if array is not None:
-        assert array.ndim == 1
-        percent_days_array, sorted_demand_array = create_demand_curve_array(array=array)
-        prod_array = np.multiply(percent_days_array, sorted_demand_array)
-        max_index = np.argmax(prod_array)
-        max_value = sorted_demand_array[max_index]
-        return max_value
+        return LoadDurationCurve(demand=array).max_rect_size()
 
 
 def size_tes(chp_size=None, class_dict=None):
@@ -0,0 +1,338 @@
+"""
+Module description:
+    Utility rate schedules compiled for batched bill evaluation. The rate dictionaries from the
+    .yaml file are parsed once into rates, block caps, and season masks, and the tariff objects
+    then bill a whole matrix of hourly purchase profiles (one row per profile) with array
+    operations. The billing rules are the same as calc_electric_charges(), seasonal_block_rates(),
+    and calc_fuel_charges() in costs.py.
+"""
+
+import numpy as np
+from lfd_package.modules.__init__ import ureg, Q_
+from lfd_package.modules import dispatch
+
+ENERGY_SCHEDULES = ("schedule_basic", "schedule_energy_block", "schedule_seasonal_energy",
+                    "schedule_seasonal_energy_block")
+DEMAND_SCHEDULES = ("schedule_seasonal_demand", "schedule_seasonal_demand_block")
+
+
+def _select_cost_dict(costs_class=None, energy_type=None):
+    # Returns the rate dictionary for the metering type and the multiplier of the monthly base charge
+    meter_type = getattr(costs_class, "meter_type_{}".format(energy_type))
+    if meter_type == "master_metered_{}".format(energy_type):
+        return getattr(costs_class, "master_meter_{}_dict".format(energy_type)), 1
+    elif meter_type == "single_metered_{}".format(energy_type):
+        return getattr(costs_class, "single_meter_{}_dict".format(energy_type)), costs_class.no_apts + 1
+    elif energy_type == "el":
+        raise Exception("Issue parsing electric metering type (master meter vs individually metered apartments)")
+    else:
+        raise Exception("Issue parsing fuel metering type (master meter vs individually metered apartments)")
+
+
+def _calc_weight(season_sum=None, total=None):
+    # Share of the total that falls in one season. Zero where the total is zero
+    weight = np.zeros(np.shape(total))
+    np.divide(season_sum, total, out=weight, where=total != 0)
+    return weight
+
+
+class ElectricTariff:
+    def __init__(self, costs_class=None):
+        """
+        Electricity rate schedules of a location, compiled once from the EnergyCosts class.
+        Rates are stored per kWh (energy schedules) or per kW (demand schedules) and block
+        caps in kWh or kW, so bills are evaluated without any unit conversion.
+
+        Parameters
+        ----------
+        costs_class: EnergyCosts class
+            The initialized EnergyCosts class.
+        """
+        demand = costs_class.demand
+        self.calendar = demand.calendar
+        self.summer_length = demand.winter_start_month - demand.summer_start_month
+
+        el_cost_dict, base_multiplier = _select_cost_dict(costs_class=costs_class, energy_type="el")
+
+        # Schedules after "schedule_basic" are never reached in calc_electric_charges()
+        self.schedules = []
+        for sch in costs_class.schedule_type_el:
+            rates = el_cost_dict[sch]
+            schedule = {
+                "name": sch,
+                "annual_base_cost": 12 * (rates["monthly_base_charge"] * base_multiplier)
+            }
+            if sch in ENERGY_SCHEDULES:
+                to_base_units = Q_(1, rates["units"]).to(ureg.kWh).magnitude
+            elif sch in DEMAND_SCHEDULES:
+                to_base_units = Q_(1, rates["units"]).to(ureg.kW).magnitude
+            else:
+                to_base_units = 1
+
+            if sch == "schedule_basic":
+                schedule["rate"] = rates["monthly_energy_charge"] / to_base_units
+            elif sch == "schedule_energy_block":
+                schedule["block1_cap"] = rates["energy_block1_cap"] * to_base_units
+                schedule["rate_b1"] = rates["energy_charge_block1"] / to_base_units
+                schedule["rate_b2"] = rates["energy_charge_block2"] / to_base_units
+            elif sch == "schedule_seasonal_energy":
+                schedule["rate_summer"] = rates["energy_charge_summer"] / to_base_units
+                schedule["rate_winter"] = rates["energy_charge_winter"] / to_base_units
+            elif sch == "schedule_seasonal_demand":
+                schedule["rate_summer"] = rates["dem_charge_summer"] / to_base_units
+                schedule["rate_winter"] = rates["dem_charge_winter"] / to_base_units
+            elif sch in ("schedule_seasonal_energy_block", "schedule_seasonal_demand_block"):
+                prefix = "energy" if sch == "schedule_seasonal_energy_block" else "dem"
+                schedule["block1_cap"] = rates["{}_block1_cap".format(prefix)] * to_base_units
+                for season in ("summer", "winter"):
+                    for block in ("1", "2"):
+                        schedule["rate_{}_b{}".format(season, block)] = \
+                            rates["{}_charge_{}_block{}".format(prefix, season, block)] / to_base_units
+            self.schedules.append(schedule)
+            if sch == "schedule_basic":
+                break
+
+    def calc_annual_charges(self, electricity_bought_hourly=None, pp_rev=False):
+        """
+        Calculates the annual electricity charges of one or more hourly purchase profiles.
+
+        Parameters
+        ----------
+        electricity_bought_hourly: numpy.ndarray
+            hourly electricity bought from the utility in kWh (the average kW over each hour), either
+            1D (hours) or 2D (profiles x hours).
+        pp_rev: bool
+            indicates whether electricity buyback revenue is being calculated. If true, monthly base
+            charges are excluded from the total.
+
+        Returns
+        -------
+        total: float or numpy.ndarray
+            total electricity charges for the year in $, one per profile for 2D input.
+        """
+        if electricity_bought_hourly is not None:
+            bought = np.asarray(electricity_bought_hourly, dtype=float)
+            if bought.ndim == 1:
+                return float(self.calc_annual_charges(electricity_bought_hourly=bought[np.newaxis, :],
+                                                      pp_rev=pp_rev)[0])
+
+            calendar = self.calendar
+            monthly_energy = calendar.monthly_sums(values=bought)
+            annual_energy = dispatch.sum_hourly(monthly_energy)
+            monthly_peaks = None
+            base_cost = np.zeros(len(bought))
+            rate_cost = np.zeros(len(bought))
+
+            for schedule in self.schedules:
+                sch = schedule["name"]
+                if pp_rev is False:
+                    base_cost = base_cost + schedule["annual_base_cost"]
+                if sch in DEMAND_SCHEDULES and monthly_peaks is None:
+                    monthly_peaks = calendar.monthly_peaks(values=bought)
+
+                if sch == "schedule_basic":
+                    # Replaces the rate costs of any earlier schedules
+                    rate_cost = schedule["rate"] * annual_energy
+
+                elif sch == "schedule_energy_block":
+                    block1_cap = schedule["block1_cap"]
+                    full_b1 = block1_cap <= np.min(monthly_energy, axis=-1)
+                    base_cost = base_cost + np.where(full_b1, schedule["rate_b1"] * block1_cap * 12, 0)
+                    b2_cost = schedule["rate_b2"] * dispatch.sum_hourly(monthly_energy - block1_cap)
+                    rate_cost = rate_cost + np.where(full_b1, b2_cost, schedule["rate_b1"] * annual_energy)
+
+                elif sch == "schedule_seasonal_energy":
+                    summer_sum, winter_sum = calendar.seasonal_sums(values=bought)
+                    total = dispatch.sum_hourly(bought)
+                    effective_rate = (schedule["rate_winter"] * _calc_weight(season_sum=winter_sum, total=total)) + \
+                                     (schedule["rate_summer"] * _calc_weight(season_sum=summer_sum, total=total))
+                    rate_cost = rate_cost + effective_rate * annual_energy
+
+                elif sch == "schedule_seasonal_demand":
+                    month_rates = np.where(calendar.summer_month_mask, schedule["rate_summer"],
+                                           schedule["rate_winter"])
+                    rate_cost = rate_cost + dispatch.sum_hourly(monthly_peaks * month_rates)
+
+                elif sch in ("schedule_seasonal_energy_block", "schedule_seasonal_demand_block"):
+                    if sch == "schedule_seasonal_energy_block":
+                        monthly_values = monthly_energy
+                    else:
+                        monthly_values = monthly_peaks
+                    block_base_cost, block_rate_cost = self._calc_seasonal_block_costs(schedule=schedule,
+                                                                                       monthly_values=monthly_values)
+                    base_cost = base_cost + block_base_cost
+                    rate_cost = rate_cost + block_rate_cost
+
+                if sch == "schedule_basic":
+                    break
+
+            total = base_cost + rate_cost
+            return np.where(dispatch.sum_hourly(bought) == 0, 0.0, total)
+
+    def calc_annual_base_charges(self, pp_rev=False):
+        """
+        Calculates the monthly base charges for the year, the part of calc_annual_charges() that
+        does not depend on the energy and demand rates. Profiles that buy no electricity are not
+        billed at all.
+
+        Parameters
+        ----------
+        pp_rev: bool
+            indicates whether electricity buyback revenue is being calculated. If true, monthly base
+            charges are excluded, so the result is zero.
+
+        Returns
+        -------
+        base_cost: float
+            monthly base charges for the year in $.
+        """
+        if pp_rev is True:
+            return 0.0
+        return float(sum(schedule["annual_base_cost"] for schedule in self.schedules))
+
+    def _calc_seasonal_block_costs(self, schedule=None, monthly_values=None):
+        """
+        Seasonal energy block and seasonal demand block costs, as in seasonal_block_rates().
+
+        Parameters
+        ----------
+        schedule: dict
+            compiled seasonal block schedule.
+        monthly_values: numpy.ndarray
+            (profiles x months) monthly energy in kWh or monthly peaks in kW.
+
+        Returns
+        -------
+        base_cost: numpy.ndarray
+            block 1 charges billed as a fixed cost, one per profile.
+        rate_cost: numpy.ndarray
+            remaining rate charges, one per profile.
+        """
+        summer_months = self.calendar.summer_month_mask
+        block1_cap = schedule["block1_cap"]
+        full_b1 = block1_cap <= np.min(monthly_values, axis=-1)
+
+        # Block 1 is used up every month: it is billed as a fixed cost and the remainder at the
+        # seasonally weighted block 2 rates
+        b1_cost = schedule["rate_summer_b1"] * block1_cap * self.summer_length + \
+            schedule["rate_winter_b1"] * block1_cap * (12 - self.summer_length)
+        monthly_b2 = monthly_values - block1_cap
+        b2_total = dispatch.sum_hourly(monthly_b2)
+        summer_weight_b2 = _calc_weight(season_sum=dispatch.sum_hourly(monthly_b2[..., summer_months]),
+                                        total=b2_total)
+        winter_weight_b2 = _calc_weight(season_sum=dispatch.sum_hourly(monthly_b2[..., ~summer_months]),
+                                        total=b2_total)
+        effective_rate_b2 = (schedule["rate_summer_b2"] * summer_weight_b2) + \
+                            (schedule["rate_winter_b2"] * winter_weight_b2)
+        full_b1_rate_cost = effective_rate_b2 * b2_total
+
+        # Otherwise each month is billed entirely at the rate of the block it falls in
+        below_cap = monthly_values < block1_cap
+        month_rates = np.where(summer_months,
+                               np.where(below_cap, schedule["rate_summer_b1"], schedule["rate_summer_b2"]),
+                               np.where(below_cap, schedule["rate_winter_b1"], schedule["rate_winter_b2"]))
+        monthly_rate_cost = dispatch.sum_hourly(monthly_values * month_rates)
+
+        base_cost = np.where(full_b1, b1_cost, 0)
+        rate_cost = np.where(full_b1, full_b1_rate_cost, monthly_rate_cost)
+        return base_cost, rate_cost
+
+
+class FuelTariff:
+    def __init__(self, costs_class=None):
+        """
+        Natural gas rate schedules of a location, compiled once from the EnergyCosts class.
+        Rates are stored per Btu and block caps in Btu.
+
+        Parameters
+        ----------
+        costs_class: EnergyCosts class
+            The initialized EnergyCosts class.
+        """
+        self.calendar = costs_class.demand.calendar
+
+        fuel_cost_dict, base_multiplier = _select_cost_dict(costs_class=costs_class, energy_type="fuel")
+
+        # calc_fuel_charges() returns at the first "schedule_basic" or "schedule_energy_block"
+        self.schedules = []
+        for sch in costs_class.schedule_type_fuel:
+            rates = fuel_cost_dict[sch]
+            schedule = {
+                "name": sch,
+                "annual_base_cost": 12 * (rates["monthly_base_charge"] * base_multiplier)
+            }
+            to_btu = Q_(1, rates["units"]).to(ureg.Btu).magnitude
+            if sch == "schedule_basic":
+                schedule["rate"] = rates["monthly_energy_charge"] / to_btu
+            elif sch == "schedule_energy_block":
+                schedule["block1_cap"] = rates["energy_block1_cap"] * to_btu
+                schedule["block2_cap"] = rates["energy_block2_cap"] * to_btu
+                for block in ("1", "2", "3"):
+                    schedule["rate_b{}".format(block)] = rates["energy_charge_block{}".format(block)] / to_btu
+            self.schedules.append(schedule)
+            if sch in ("schedule_basic", "schedule_energy_block"):
+                break
+
+    def calc_annual_charges(self, fuel_bought_hourly=None):
+        """
+        Calculates the annual natural gas charges of one or more hourly fuel use profiles.
+
+        Parameters
+        ----------
+        fuel_bought_hourly: numpy.ndarray
+            hourly fuel bought in Btu (the average Btu/hr over each hour), either 1D (hours) or
+            2D (profiles x hours).
+
+        Returns
+        -------
+        total: float or numpy.ndarray
+            total natural gas charges for the year in $, one per profile for 2D input.
+        """
+        if fuel_bought_hourly is not None:
+            bought = np.asarray(fuel_bought_hourly, dtype=float)
+            if bought.ndim == 1:
+                return float(self.calc_annual_charges(fuel_bought_hourly=bought[np.newaxis, :])[0])
+
+            monthly_energy = self.calendar.monthly_sums(values=bought)
+            base_cost = np.zeros(len(bought))
+
+            for schedule in self.schedules:
+                base_cost = base_cost + schedule["annual_base_cost"]
+
+                if schedule["name"] == "schedule_basic":
+                    return schedule["rate"] * dispatch.sum_hourly(bought) + base_cost
+
+                elif schedule["name"] == "schedule_energy_block":
+                    block1_cap = schedule["block1_cap"]
+                    block2_cap = schedule["block2_cap"]
+                    rate_b1 = schedule["rate_b1"]
+                    rate_b2 = schedule["rate_b2"]
+                    min_energy_use_annual = np.min(monthly_energy, axis=-1)
+                    in_b1 = min_energy_use_annual < block1_cap
+                    in_b3 = block2_cap <= min_energy_use_annual
+
+                    # Blocks used up every month are billed as a fixed cost
+                    b1_cost = rate_b1 * block1_cap * 12
+                    b2_cost = rate_b2 * (block2_cap - block1_cap) * 12
+                    base_cost = base_cost + np.where(in_b1, 0, np.where(in_b3, b1_cost + b2_cost, b1_cost))
+
+                    b1_rate_cost = rate_b1 * dispatch.sum_hourly(monthly_energy)
+                    b2_rate_cost = rate_b2 * dispatch.sum_hourly(monthly_energy - block1_cap)
+                    b3_rate_cost = schedule["rate_b3"] * dispatch.sum_hourly(monthly_energy - block2_cap)
+                    rate_cost = np.where(in_b1, b1_rate_cost, np.where(in_b3, b3_rate_cost, b2_rate_cost))
+                    return base_cost + rate_cost
+
+            raise Exception("No supported fuel rate schedule (schedule_basic or schedule_energy_block) in "
+                            "schedule_type_fuel")
+
+    def calc_annual_base_charges(self):
+        """
+        Calculates the monthly base charges for the year, the part of calc_annual_charges() that
+        does not depend on the energy rates.
+
+        Returns
+        -------
+        base_cost: float
+            monthly base charges for the year in $.
+        """
+        return float(sum(schedule["annual_base_cost"] for schedule in self.schedules))
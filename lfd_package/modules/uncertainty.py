@@ -0,0 +1,420 @@
+"""
+Module Description:
+    Monte Carlo analysis of price, cost, and efficiency uncertainty. calc_costs() returns one
+    payback per operating mode for the rates and costs in the .yaml file. The functions here
+    sample those inputs from distributions and return the distribution of payback, savings,
+    and emissions of each mode.
+
+    None of the sampled inputs change the hourly dispatch, so each mode is dispatched and
+    billed once (see cosizing.evaluate_designs()). Bills are linear in the rates once the
+    purchase profile is fixed: each bill is split into its monthly base charges and the part
+    that scales with the rates, and every sample is then evaluated as an array expression.
+    Samples are drawn in blocks, each from its own random stream spawned from one seed, so
+    the results depend on the seed and the number of samples but not on the number of workers.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from lfd_package.modules.__init__ import ureg
+from lfd_package.modules import cosizing, costs, emissions, dispatch, sizing_calcs as sizing
+
+# Uncertain inputs, in the order they are drawn from each random stream
+UNCERTAIN_INPUTS = ("fuel_rate", "electric_rate", "installed_cost", "incentive", "grid_efficiency", "grid_co2")
+
+# Smallest and largest value of each input. Samples outside the range are clipped to it
+INPUT_BOUNDS = {
+    "fuel_rate": (0, np.inf),               # multiplier on the natural gas rates
+    "electric_rate": (0, np.inf),           # multiplier on the electricity and buyback rates
+    "installed_cost": (0, np.inf),          # multiplier on the CHP and TES installed costs
+    "incentive": (0, 1),                    # share of the installed cost paid by an incentive
+    "grid_efficiency": (np.nextafter(0, 1), 1),
+    "grid_co2": (0, np.inf)                 # multiplier on the grid emission intensity
+}
+
+# Distributions and their parameters (named as in numpy.random.Generator)
+DISTRIBUTIONS = {
+    "fixed": ("value",),
+    "uniform": ("low", "high"),
+    "normal": ("loc", "scale"),
+    "lognormal": ("mean", "sigma"),
+    "triangular": ("left", "mode", "right")
+}
+
+DEFAULT_SAMPLES = 100000
+DEFAULT_SEED = 0
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Samples drawn from each random stream
+SAMPLE_BLOCK = 10000
+
+# Outputs of each sample, summarized by summarize()
+OUTPUTS = ("simple_payback_yrs", "incentive_payback_yrs", "annual_savings", "total_co2_tons", "co2_reduction_tons",
+           "electric_energy_savings_kwh")
+
+# Deterministic data of the worker processes (see _init_worker())
+_WORKER_DATA = {}
+
+
+def default_inputs(class_dict=None):
+    """
+    Returns the value of every uncertain input in the .yaml file, as "fixed" distributions.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+
+    Returns
+    -------
+    inputs: dict
+        contains one distribution dict per input of UNCERTAIN_INPUTS. Rates, installed costs, and
+        the grid emission intensity are multipliers, so their value is 1.
+    """
+    if class_dict is not None:
+        values = {"fuel_rate": 1.0, "electric_rate": 1.0, "installed_cost": 1.0,
+                  "incentive": costs.INCENTIVE_BASE_PCT, "grid_efficiency": class_dict['demand'].grid_efficiency,
+                  "grid_co2": 1.0}
+        return {name: {"distribution": "fixed", "value": values[name]} for name in UNCERTAIN_INPUTS}
+
+
+def check_inputs(inputs=None):
+    """
+    Checks the distribution of each uncertain input.
+
+    Parameters
+    ----------
+    inputs: dict
+        contains a distribution dict per input name, ie:
+        {"fuel_rate": {"distribution": "normal", "loc": 1.0, "scale": 0.1}}.
+
+    Returns
+    -------
+    inputs: dict
+        the same distributions, with float parameters.
+    """
+    if inputs is not None:
+        checked = {}
+        for name, spec in inputs.items():
+            if name not in UNCERTAIN_INPUTS:
+                raise Exception("Unknown uncertain input {}. Choose from {}".format(name, list(UNCERTAIN_INPUTS)))
+            distribution = spec.get("distribution") if isinstance(spec, dict) else None
+            if distribution not in DISTRIBUTIONS:
+                raise Exception("Unknown distribution {} for {}. Choose from {}".format(distribution, name,
+                                                                                     list(DISTRIBUTIONS)))
+            missing = [param for param in DISTRIBUTIONS[distribution] if param not in spec]
+            if missing:
+                raise Exception("The {} distribution of {} needs {}".format(distribution, name, ", ".join(missing)))
+            checked[name] = dict({param: float(spec[param]) for param in DISTRIBUTIONS[distribution]},
+                                 distribution=distribution)
+        return checked
+
+
+def draw_samples(inputs=None, no_samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED, block=None):
+    """
+    Draws samples of every uncertain input.
+
+    Parameters
+    ----------
+    inputs: dict
+        contains a distribution dict per input of UNCERTAIN_INPUTS (see check_inputs()).
+    no_samples: int
+        total number of samples.
+    seed: int
+        seed of the random streams.
+    block: int
+        Optional. Only draws the samples of this block (SAMPLE_BLOCK samples per block).
+
+    Returns
+    -------
+    samples: dict
+        contains one float array per input of UNCERTAIN_INPUTS.
+    """
+    if inputs is not None:
+        no_blocks = -(-int(no_samples) // SAMPLE_BLOCK)
+        streams = np.random.SeedSequence(int(seed)).spawn(no_blocks)
+        blocks = range(no_blocks) if block is None else [block]
+        drawn = []
+        for index in blocks:
+            size = min(SAMPLE_BLOCK, int(no_samples) - index * SAMPLE_BLOCK)
+            rng = np.random.default_rng(streams[index])
+            values = {}
+            for name in UNCERTAIN_INPUTS:
+                spec = inputs[name]
+                params = [spec[param] for param in DISTRIBUTIONS[spec["distribution"]]]
+                if spec["distribution"] == "fixed":
+                    values[name] = np.full(size, params[0])
+                else:
+                    values[name] = getattr(rng, spec["distribution"])(*params, size=size)
+                values[name] = np.clip(values[name], *INPUT_BOUNDS[name])
+            drawn.append(values)
+        return {name: np.concatenate([values[name] for values in drawn]) for name in UNCERTAIN_INPUTS}
+
+
+def mode_terms(class_dict=None, load_following_types=cosizing.LOAD_FOLLOWING_TYPES, designs=None):
+    """
+    Dispatches and bills each operating mode once and splits the results into the terms the
+    uncertain inputs scale.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    load_following_types: tuple
+        operating modes to include ("ELF", "TLF", and/or "Peak").
+    designs: dict
+        Optional. (CHP size in kW, TES size in Btu) of each mode. Defaults to the sizes used by
+        calc_results().
+
+    Returns
+    -------
+    terms: dict
+        contains one dict of floats per mode: the CHP and TES sizes, the base and rate parts of
+        the baseline and new bills, the buyback revenue, O&M and installed costs, electricity
+        bought, and the grid and fuel emissions in metric tons. "site" holds the terms shared by
+        every mode.
+    """
+    if class_dict is not None:
+        site_data = cosizing._site_data(class_dict)
+        fuel_tariff = site_data["fuel_tariff"]
+        electric_tariff = site_data["electric_tariff"]
+        fuel_base = fuel_tariff.calc_annual_base_charges()
+        electric_base = electric_tariff.calc_annual_base_charges()
+        tons_per_lb = site_data["tons_per_lb"]
+        annual_el_kwh = dispatch.sum_hourly(site_data["dem_el_kw"])
+
+        terms = {"site": {
+            "annual_el_kwh": annual_el_kwh,
+            "fuel_base_baseline": fuel_base,
+            "fuel_rate_baseline": site_data["fuel_cost_baseline"] - fuel_base,
+            "electric_base_baseline": electric_base if annual_el_kwh != 0 else 0.0,
+            "electric_rate_baseline": site_data["electric_cost_baseline"] - (electric_base if annual_el_kwh != 0
+                                                                             else 0.0),
+            "grid_co2_baseline": emissions.calc_baseline_grid_emissions(class_dict=class_dict).to(
+                ureg.metric_ton).magnitude,
+            "fuel_co2_baseline": emissions.calc_baseline_fuel_emissions(class_dict=class_dict).to(
+                ureg.metric_ton).magnitude
+        }}
+        for load_following_type in load_following_types:
+            if designs is not None and load_following_type in designs:
+                chp_size_kw, tes_size_btu = designs[load_following_type]
+            else:
+                chp_size_kw = sizing.size_chp(load_following_type=load_following_type,
+                                              class_dict=class_dict).to(ureg.kW).magnitude
+                tes_size_btu = dispatch.size_tes(dem_hl_btuh=site_data["dem_hl_btuh"], chp_size_kw=chp_size_kw)
+            results = cosizing.evaluate_designs(class_dict=class_dict, load_following_type=load_following_type,
+                                                chp_sizes_kw=[chp_size_kw], tes_sizes_btu=[tes_size_btu],
+                                                site_data=site_data)
+            results = {name: values[0] for name, values in results.items()}
+            # calc_annual_charges() does not bill a profile that buys no electricity
+            electric_base_new = electric_base if results["electricity_bought_kwh"] != 0 else 0.0
+            terms[load_following_type] = {
+                "chp_size_kw": float(chp_size_kw),
+                "tes_size_btu": float(tes_size_btu),
+                "fuel_base": fuel_base,
+                "fuel_rate": results["fuel_cost"] - fuel_base,
+                "electric_base": electric_base_new,
+                "electric_rate": results["electric_cost"] - electric_base_new,
+                "pp_revenue": results["pp_revenue"],
+                "om_cost": results["om_cost"],
+                "installed_cost": results["installed_cost"],
+                "electricity_bought_kwh": results["electricity_bought_kwh"],
+                "grid_co2": results["electricity_bought_kwh"] * site_data["grid_lbs_per_kwh"] * tons_per_lb,
+                "fuel_co2": (results["chp_fuel_btu"] + results["ab_fuel_btu"]) * site_data["fuel_lbs_per_btu"] *
+                tons_per_lb
+            }
+        return terms
+
+
+def evaluate_samples(terms=None, samples=None):
+    """
+    Calculates the payback, savings, and emissions of each operating mode for every sample.
+
+    Samples whose annual savings are not positive never pay back, so their payback is infinite.
+
+    Parameters
+    ----------
+    terms: dict
+        terms of each mode (see mode_terms()).
+    samples: dict
+        contains one float array per input of UNCERTAIN_INPUTS (see draw_samples()).
+
+    Returns
+    -------
+    outputs: dict
+        contains one dict per mode with one float array per output of OUTPUTS. Costs are in $,
+        emissions in metric tons, and energy in kWh.
+    """
+    args_list = [terms, samples]
+    if any(elem is None for elem in args_list) is False:
+        site = terms["site"]
+        fuel_rate = samples["fuel_rate"]
+        electric_rate = samples["electric_rate"]
+        grid_co2 = samples["grid_co2"]
+        fuel_cost_baseline = site["fuel_base_baseline"] + fuel_rate * site["fuel_rate_baseline"]
+        electric_cost_baseline = site["electric_base_baseline"] + electric_rate * site["electric_rate_baseline"]
+        baseline_co2 = grid_co2 * site["grid_co2_baseline"] + site["fuel_co2_baseline"]
+
+        outputs = {}
+        for load_following_type, mode in terms.items():
+            if load_following_type == "site":
+                continue
+            fuel_cost = mode["fuel_base"] + fuel_rate * mode["fuel_rate"]
+            electric_cost = mode["electric_base"] + electric_rate * mode["electric_rate"]
+            annual_savings = electric_rate * mode["pp_revenue"] + (electric_cost_baseline - electric_cost) + \
+                (fuel_cost_baseline - fuel_cost) - mode["om_cost"]
+            installed_cost = samples["installed_cost"] * mode["installed_cost"]
+            paying = annual_savings > 0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                simple_payback = np.where(paying, installed_cost / annual_savings, np.inf)
+                incentive_payback = np.where(paying, installed_cost * (1 - samples["incentive"]) / annual_savings,
+                                             np.inf)
+            total_co2 = grid_co2 * mode["grid_co2"] + mode["fuel_co2"]
+            outputs[load_following_type] = {
+                "simple_payback_yrs": simple_payback,
+                "incentive_payback_yrs": incentive_payback,
+                "annual_savings": annual_savings,
+                "total_co2_tons": total_co2,
+                "co2_reduction_tons": baseline_co2 - total_co2,
+                "electric_energy_savings_kwh": (site["annual_el_kwh"] - mode["electricity_bought_kwh"]) /
+                samples["grid_efficiency"]
+            }
+        return outputs
+
+
+def simulate(class_dict=None, inputs=None, no_samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED, workers=1,
+             load_following_types=cosizing.LOAD_FOLLOWING_TYPES, designs=None):
+    """
+    Runs the Monte Carlo analysis of one location.
+
+    Parameters
+    ----------
+    class_dict: dict
+        contains initialized class data using CLI inputs (see command_line.py)
+    inputs: dict
+        contains a distribution dict per uncertain input (see check_inputs()). Inputs that are
+        left out keep their value in the .yaml file (see default_inputs()).
+    no_samples: int
+        number of samples.
+    seed: int
+        seed of the random streams.
+    workers: int
+        number of worker processes, each drawing and evaluating whole blocks of samples.
+        Defaults to 1, which runs in this process. None uses the number of CPUs.
+    load_following_types: tuple
+        operating modes to include ("ELF", "TLF", and/or "Peak").
+    designs: dict
+        Optional. (CHP size in kW, TES size in Btu) of each mode (see mode_terms()).
+
+    Returns
+    -------
+    samples: dict
+        contains one float array per input of UNCERTAIN_INPUTS.
+    outputs: dict
+        contains one dict per mode with one float array per output of OUTPUTS.
+    terms: dict
+        deterministic terms of each mode (see mode_terms()).
+    """
+    args_list = [class_dict, inputs]
+    if any(elem is None for elem in args_list) is False:
+        if int(no_samples) < 1:
+            raise Exception("The Monte Carlo analysis needs at least one sample")
+        all_inputs = default_inputs(class_dict=class_dict)
+        all_inputs.update(check_inputs(inputs=inputs))
+        terms = mode_terms(class_dict=class_dict, load_following_types=load_following_types, designs=designs)
+
+        blocks = list(range(-(-int(no_samples) // SAMPLE_BLOCK)))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(int(workers), len(blocks)))
+        if workers == 1:
+            _init_worker(inputs=all_inputs, no_samples=no_samples, seed=seed, terms=terms)
+            block_results = [_simulate_block(block) for block in blocks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(all_inputs, no_samples, seed, terms)) as executor:
+                block_results = list(executor.map(_simulate_block, blocks))
+
+        samples = {name: np.concatenate([block[0][name] for block in block_results]) for name in UNCERTAIN_INPUTS}
+        outputs = {mode: {name: np.concatenate([block[1][mode][name] for block in block_results])
+                          for name in OUTPUTS} for mode in block_results[0][1]}
+        return samples, outputs, terms
+
+
+def _init_worker(inputs, no_samples, seed, terms):
+    # Keeps the distributions and the deterministic terms in the worker process
+    _WORKER_DATA.update({"inputs": inputs, "no_samples": no_samples, "seed": seed, "terms": terms})
+
+
+def _simulate_block(block):
+    # Draws and evaluates one block of samples from its own random stream
+    samples = draw_samples(inputs=_WORKER_DATA["inputs"], no_samples=_WORKER_DATA["no_samples"],
+                           seed=_WORKER_DATA["seed"], block=block)
+    return samples, evaluate_samples(terms=_WORKER_DATA["terms"], samples=samples)
+
+
+def inverted_cdf_percentiles(values=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Returns percentiles of the samples that are always one of the samples: the smallest sample
+    whose share of samples at or below it reaches the percentile. This is np.percentile(...,
+    method="inverted_cdf"), which needs numpy 1.22.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        1D array of samples. Infinite samples are kept.
+    percentiles: tuple
+        percentiles to return, between 0 and 100.
+
+    Returns
+    -------
+    quantiles: numpy.ndarray
+        one value per percentile, or NaN for every percentile if a sample is NaN.
+    """
+    if values is not None:
+        values = np.sort(np.asarray(values, dtype=float))
+        no_samples = len(values)
+        if no_samples == 0 or np.isnan(values[-1]):
+            return np.full(len(percentiles), np.nan)
+        index = np.ceil(np.asarray(percentiles, dtype=float) * no_samples / 100).astype(int) - 1
+        return values[np.clip(index, 0, no_samples - 1)]
+
+
+def summarize(outputs=None, percentiles=DEFAULT_PERCENTILES):
+    """
+    Summarizes the distribution of every output of each operating mode.
+
+    Percentiles are the sample values at or above each share of the samples, so infinite
+    paybacks (samples that never pay back) give infinite percentiles rather than NaN.
+
+    Parameters
+    ----------
+    outputs: dict
+        contains one dict per mode with one float array per output (see evaluate_samples()).
+    percentiles: tuple
+        percentiles to report, between 0 and 100.
+
+    Returns
+    -------
+    df_summary: pandas.DataFrame
+        one row per mode and output, with the mean, standard deviation, and percentiles ("p5",
+        "p50", ...) of the samples and the share of samples whose savings are positive. The
+        mean of an output with infinite samples is infinite and its standard deviation NaN.
+    """
+    if outputs is not None:
+        rows = []
+        for load_following_type, mode_outputs in outputs.items():
+            share_paying = float(np.mean(mode_outputs["annual_savings"] > 0))
+            for name in OUTPUTS:
+                values = mode_outputs[name]
+                with np.errstate(invalid="ignore"):
+                    row = {"load_following_type": load_following_type, "output": name, "mean": np.mean(values),
+                           "std": np.std(values)}
+                quantiles = inverted_cdf_percentiles(values=values, percentiles=percentiles)
+                for percentile, quantile in zip(percentiles, quantiles):
+                    row["p{:g}".format(percentile)] = quantile
+                row["share_paying"] = share_paying
+                rows.append(row)
+        return pd.DataFrame(rows)
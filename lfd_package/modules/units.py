@@ -0,0 +1,72 @@
+"""
+Module Description:
+    Builds the unit registry shared by the whole package. Parsing unit definitions is a large
+    part of the cost of starting the package, so the registry only defines the units the
+    package uses (units_en.txt, a subset of pint's default definitions with the same names)
+    instead of all of pint's. The parsed definitions are also saved in the "pint" folder of the
+    cache directory (see profile_cache.get_cache_dir()) and loaded from there on later starts.
+    Each version of pint and of units_en.txt has its own subfolder, so changing either starts
+    a new cache.
+
+    Importing the package only reads the cache: if it has not been written yet, the registry
+    is built without it. The cache is written by save_registry_cache(), which runs when a
+    demand profile is loaded with caching turned on (see classes.EnergyDemand), so the Python
+    interface (api.py) never writes it.
+"""
+
+import pathlib
+import hashlib
+import pint
+from pint import UnitRegistry, set_application_registry
+from lfd_package.modules import profile_cache
+
+DEFINITIONS_PATH = pathlib.Path(__file__).parent.resolve() / "units_en.txt"
+
+
+def _registry_cache_folder():
+    # Folder of pint's cache for the installed version of pint and the definitions file, or None if caching is
+    # disabled
+    cache_dir = profile_cache.get_cache_dir()
+    if cache_dir is None:
+        return None
+    definitions_digest = hashlib.sha256(DEFINITIONS_PATH.read_bytes()).hexdigest()[:16]
+    return cache_dir / "pint" / pint.__version__ / definitions_digest
+
+
+def _has_cache(cache_folder):
+    try:
+        return cache_folder.is_dir() and any(cache_folder.iterdir())
+    except OSError:
+        return False
+
+
+def build_registry():
+    """
+    Returns a unit registry, reading pint's cache of parsed definitions if it has been written.
+    """
+    cache_folder = _registry_cache_folder()
+    if cache_folder is not None and _has_cache(cache_folder):
+        try:
+            return UnitRegistry(str(DEFINITIONS_PATH), cache_folder=cache_folder)
+        except Exception:
+            pass
+    return UnitRegistry(str(DEFINITIONS_PATH))
+
+
+def save_registry_cache():
+    """
+    Writes pint's cache of parsed definitions if it has not been written yet, so later starts
+    of the package can read it. Failures to write are ignored since the cache is only an
+    optimization.
+    """
+    cache_folder = _registry_cache_folder()
+    if cache_folder is not None and not _has_cache(cache_folder):
+        try:
+            UnitRegistry(str(DEFINITIONS_PATH), cache_folder=cache_folder)
+        except Exception:
+            pass
+
+
+ureg = build_registry()
+set_application_registry(ureg)
+Q_ = ureg.Quantity
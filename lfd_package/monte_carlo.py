@@ -0,0 +1,185 @@
+"""
+Module Description:
+    Monte Carlo command line interface - samples the gas and electric rates, installed cost,
+    incentive, grid efficiency, and grid emission intensity from the distributions in a .yaml
+    file (see /input_scenarios/bundled_uncertainty.yaml and modules/uncertainty.py) and reports
+    percentiles of the payback, savings, and emissions of each operating mode. The percentiles
+    of each site are written to a .csv file.
+
+    Example:
+        python -m lfd_package.monte_carlo --in seattle_wa.yaml
+        python -m lfd_package.monte_carlo --in "*.yaml" --dist bundled_uncertainty.yaml --samples 1000000 --seed 7
+"""
+
+import time
+import pathlib
+import argparse
+import traceback
+
+import pandas as pd
+import yaml
+from lfd_package import command_line, batch
+from lfd_package.modules import cosizing, uncertainty
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+PACKAGE_DIR = pathlib.Path(command_line.__file__).parent.resolve()
+DIST_DIR = PACKAGE_DIR / 'input_scenarios'
+
+
+def load_distributions(dist_filename=None):
+    """
+    Reads a .yaml file of input distributions.
+
+    Parameters
+    ----------
+    dist_filename: str
+        name of a .yaml file in the /input_scenarios folder, or the path to a .yaml file elsewhere.
+
+    Returns
+    -------
+    dist: dict
+        contains the number of samples ("samples"), the seed ("seed"), and the distribution of
+        each uncertain input ("inputs", see uncertainty.check_inputs()).
+    """
+    if dist_filename is not None:
+        dist_path = pathlib.Path(dist_filename)
+        if not dist_path.exists():
+            dist_path = DIST_DIR / dist_filename
+
+        with open(dist_path) as f:
+            dist = yaml.load(f, Loader=Loader)
+
+        dist.setdefault("samples", uncertainty.DEFAULT_SAMPLES)
+        dist.setdefault("seed", uncertainty.DEFAULT_SEED)
+        dist["inputs"] = uncertainty.check_inputs(inputs=dist.get("inputs") or {})
+        return dist
+
+
+def simulate_site(yaml_filename=None, dist=None, workers=1, load_following_types=cosizing.LOAD_FOLLOWING_TYPES,
+                  percentiles=uncertainty.DEFAULT_PERCENTILES, write_samples=False, out_dir=None):
+    """
+    Runs the Monte Carlo analysis of one .yaml file and writes the percentiles to a .csv file.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    dist: dict
+        number of samples, seed, and input distributions (see load_distributions()).
+    workers: int
+        number of worker processes (see uncertainty.simulate()).
+    load_following_types: tuple
+        operating modes to include ("ELF", "TLF", and/or "Peak").
+    percentiles: tuple
+        percentiles to report, between 0 and 100.
+    write_samples: bool
+        if True, the inputs and outputs of every sample are also written, one row per sample.
+    out_dir: str or pathlib.Path
+        folder the .csv files are written to. Defaults to results/uncertainty.
+
+    Returns
+    -------
+    df_summary: pandas.DataFrame
+        percentiles of each mode and output (see uncertainty.summarize()).
+    """
+    args_list = [yaml_filename, dist]
+    if any(elem is None for elem in args_list) is False:
+        if out_dir is None:
+            out_dir = PACKAGE_DIR / "results" / "uncertainty"
+        out_dir = pathlib.Path(out_dir)
+
+        class_dict = command_line.load_class_dict(yaml_filename=yaml_filename)
+        samples, outputs, terms = uncertainty.simulate(class_dict=class_dict, inputs=dist["inputs"],
+                                                       no_samples=dist["samples"], seed=dist["seed"],
+                                                       workers=workers, load_following_types=load_following_types)
+        df_summary = uncertainty.summarize(outputs=outputs, percentiles=percentiles)
+        df_summary.insert(1, "chp_size_kw", df_summary["load_following_type"].map(
+            lambda mode: terms[mode]["chp_size_kw"]))
+        df_summary.insert(2, "tes_size_btu", df_summary["load_following_type"].map(
+            lambda mode: terms[mode]["tes_size_btu"]))
+
+        site = "{}_{}".format(class_dict['demand'].city, class_dict['demand'].state)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        df_summary.to_csv(out_dir / "{}_uncertainty_percentiles.csv".format(site), index=False)
+        if write_samples:
+            df_samples = pd.DataFrame(samples)
+            for load_following_type, mode_outputs in outputs.items():
+                for name, values in mode_outputs.items():
+                    df_samples["{}_{}".format(load_following_type, name)] = values
+            df_samples.to_csv(out_dir / "{}_uncertainty_samples.csv".format(site), index=False)
+        return df_summary
+
+
+def main():
+    """
+    Monte Carlo command line interface. Runs every .yaml file given by --in and prints the
+    payback and emissions percentiles of each site. A site that fails is reported at the end
+    without stopping the others, and the exit status is then 1.
+    """
+    parser = argparse.ArgumentParser(description="Sample rate, cost, and efficiency uncertainty and report payback "
+                                                 "and emissions percentiles")
+    parser.add_argument("--in", help="filenames, paths, or glob patterns of .yaml files with equipment data",
+                        dest="inputs", type=str, nargs="+", required=True)
+    parser.add_argument("--dist", help="name or path of the .yaml file of input distributions (default: "
+                                       "bundled_uncertainty.yaml)", type=str, default="bundled_uncertainty.yaml")
+    parser.add_argument("--samples", help="number of samples per site (default: from the --dist file)", type=int,
+                        default=None)
+    parser.add_argument("--seed", help="seed of the random streams (default: from the --dist file)", type=int,
+                        default=None)
+    parser.add_argument("--workers", help="number of worker processes (default: 1)", type=int, default=1)
+    parser.add_argument("--modes", help="operating modes to include (default: ELF TLF Peak)", type=str, nargs="+",
+                        choices=cosizing.LOAD_FOLLOWING_TYPES, default=list(cosizing.LOAD_FOLLOWING_TYPES))
+    parser.add_argument("--percentiles", help="percentiles to report (default: {})".format(
+        " ".join(str(p) for p in uncertainty.DEFAULT_PERCENTILES)), type=float, nargs="+",
+        default=list(uncertainty.DEFAULT_PERCENTILES))
+    parser.add_argument("--write-samples", help="also write the inputs and outputs of every sample",
+                        dest="write_samples", action="store_true")
+    parser.add_argument("--out", help="folder for the .csv files (default: results/uncertainty)", type=str,
+                        default=str(PACKAGE_DIR / "results" / "uncertainty"))
+    args = parser.parse_args()
+
+    dist = load_distributions(dist_filename=args.dist)
+    if args.samples is not None:
+        dist["samples"] = args.samples
+    if args.seed is not None:
+        dist["seed"] = args.seed
+
+    report_columns = ["load_following_type", "output"] + ["p{:g}".format(p) for p in args.percentiles] + \
+                     ["share_paying"]
+    yaml_paths = batch.expand_yaml_paths(patterns=args.inputs)
+    failures = []
+    for yaml_filename in yaml_paths:
+        start = time.perf_counter()
+        try:
+            df_summary = simulate_site(yaml_filename=yaml_filename, dist=dist, workers=args.workers,
+                                       load_following_types=tuple(args.modes), percentiles=tuple(args.percentiles),
+                                       write_samples=args.write_samples, out_dir=args.out)
+        except Exception:
+            # One bad site does not stop the others
+            print("{}: failed".format(yaml_filename))
+            print("")
+            failures.append((yaml_filename, traceback.format_exc()))
+            continue
+        print("{}: {} samples in {:.1f} s (seed {})".format(yaml_filename, dist["samples"],
+                                                           time.perf_counter() - start, dist["seed"]))
+        df_report = df_summary[df_summary["output"].isin(["simple_payback_yrs", "total_co2_tons"])]
+        print(df_report[report_columns].to_string(index=False))
+        print("")
+
+    print("{} of {} sites completed. Percentiles written to {}".format(len(yaml_paths) - len(failures),
+                                                                      len(yaml_paths), args.out))
+    for yaml_filename, site_traceback in failures:
+        print("")
+        print("{} failed:".format(yaml_filename))
+        print(site_traceback)
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
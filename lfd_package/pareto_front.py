@@ -0,0 +1,139 @@
+"""
+Module Description:
+    Pareto frontier command line interface - evaluates a pool of CHP size x TES size designs of
+    every operating mode over worker processes and keeps the designs with the best trade-off
+    between simple payback and emissions (see modules/pareto.py). The frontier of each site,
+    with a summary of the hourly dispatch of each design on it, is written to a .csv file.
+
+    Example:
+        python -m lfd_package.pareto_front --in seattle_wa.yaml --workers 4
+        python -m lfd_package.pareto_front --in "*.yaml" --chp-points 200 --tes-points 50 --hourly
+"""
+
+import time
+import pathlib
+import argparse
+import traceback
+
+import numpy as np
+import pandas as pd
+from lfd_package import command_line, batch
+from lfd_package.modules import cosizing, pareto
+
+PACKAGE_DIR = pathlib.Path(command_line.__file__).parent.resolve()
+
+# Columns of the frontier printed to the terminal
+REPORT_COLUMNS = ["point", "load_following_type", "chp_size_kw", "tes_size_btu", "simple_payback_yrs",
+                  "total_co2_tons", "chp_operating_hours", "tes_full_cycles"]
+
+
+def pareto_site(yaml_filename=None, load_following_types=cosizing.LOAD_FOLLOWING_TYPES,
+                no_chp_sizes=cosizing.DEFAULT_CHP_POINTS, no_tes_sizes=cosizing.DEFAULT_TES_POINTS, workers=1,
+                write_hourly=False, out_dir=None):
+    """
+    Finds the Pareto frontier of one .yaml file and writes it to .csv files.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    load_following_types: tuple
+        operating modes to include ("ELF", "TLF", and/or "Peak").
+    no_chp_sizes: int
+        number of CHP sizes in the grid of each mode.
+    no_tes_sizes: int
+        number of TES sizes in the grid of each mode.
+    workers: int
+        number of worker processes evaluating the candidates (see pareto.explore()).
+    write_hourly: bool
+        if True, the hourly dispatch of every frontier point is also written, one row per point
+        and hour.
+    out_dir: str or pathlib.Path
+        folder the .csv files are written to. Defaults to results/pareto.
+
+    Returns
+    -------
+    df_frontier: pandas.DataFrame
+        the frontier with the hourly summary of each point (see pareto.frontier_hourly()).
+    front: pareto.ParetoFront
+        the frontier and the number of designs evaluated.
+    """
+    if yaml_filename is not None:
+        if out_dir is None:
+            out_dir = PACKAGE_DIR / "results" / "pareto"
+        out_dir = pathlib.Path(out_dir)
+
+        class_dict = command_line.load_class_dict(yaml_filename=yaml_filename)
+        candidates = pareto.candidate_designs(class_dict=class_dict, load_following_types=load_following_types,
+                                              no_chp_sizes=no_chp_sizes, no_tes_sizes=no_tes_sizes)
+        front = pareto.explore(class_dict=class_dict, candidates=candidates, workers=workers)
+        df_frontier, hourly = pareto.frontier_hourly(class_dict=class_dict, frontier=front.designs)
+
+        site = "{}_{}".format(class_dict['demand'].city, class_dict['demand'].state)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        df_frontier.to_csv(out_dir / "{}_pareto_frontier.csv".format(site), index=False)
+        if write_hourly:
+            no_points, no_hours = hourly[cosizing.HOURLY_DESIGN_SERIES[0]].shape
+            df_hourly = pd.DataFrame({"point": np.repeat(np.arange(no_points), no_hours),
+                                      "hour": np.tile(np.arange(no_hours), no_points)})
+            for name in cosizing.HOURLY_DESIGN_SERIES:
+                df_hourly[name] = hourly[name].ravel()
+            df_hourly.to_csv(out_dir / "{}_pareto_hourly.csv".format(site), index=False)
+        return df_frontier, front
+
+
+def main():
+    """
+    Pareto frontier command line interface. Finds the frontier of every .yaml file given by
+    --in and prints it. A site that fails is reported at the end without stopping the others,
+    and the exit status is then 1.
+    """
+    parser = argparse.ArgumentParser(description="Find the designs with the best trade-off between payback and "
+                                                 "emissions")
+    parser.add_argument("--in", help="filenames, paths, or glob patterns of .yaml files with equipment data",
+                        dest="inputs", type=str, nargs="+", required=True)
+    parser.add_argument("--modes", help="operating modes to include (default: ELF TLF Peak)", type=str, nargs="+",
+                        choices=cosizing.LOAD_FOLLOWING_TYPES, default=list(cosizing.LOAD_FOLLOWING_TYPES))
+    parser.add_argument("--chp-points", help="CHP sizes in the grid of each mode (default: {})".format(
+        cosizing.DEFAULT_CHP_POINTS), dest="chp_points", type=int, default=cosizing.DEFAULT_CHP_POINTS)
+    parser.add_argument("--tes-points", help="TES sizes in the grid of each mode (default: {})".format(
+        cosizing.DEFAULT_TES_POINTS), dest="tes_points", type=int, default=cosizing.DEFAULT_TES_POINTS)
+    parser.add_argument("--workers", help="number of worker processes (default: 1)", type=int, default=1)
+    parser.add_argument("--hourly", help="also write the hourly dispatch of every frontier point",
+                        action="store_true")
+    parser.add_argument("--out", help="folder for the .csv files (default: results/pareto)", type=str,
+                        default=str(PACKAGE_DIR / "results" / "pareto"))
+    args = parser.parse_args()
+
+    yaml_paths = batch.expand_yaml_paths(patterns=args.inputs)
+    failures = []
+    for yaml_filename in yaml_paths:
+        start = time.perf_counter()
+        try:
+            df_frontier, front = pareto_site(yaml_filename=yaml_filename, load_following_types=tuple(args.modes),
+                                             no_chp_sizes=args.chp_points, no_tes_sizes=args.tes_points,
+                                             workers=args.workers, write_hourly=args.hourly, out_dir=args.out)
+        except Exception:
+            # One bad site does not stop the others
+            print("{}: failed".format(yaml_filename))
+            print("")
+            failures.append((yaml_filename, traceback.format_exc()))
+            continue
+        print("{}: {} designs in {:.1f} s ({} with a payback), {} on the frontier".format(
+            yaml_filename, front.no_evaluated, time.perf_counter() - start, front.no_eligible, len(df_frontier)))
+        print(df_frontier[REPORT_COLUMNS].to_string(index=False))
+        print("")
+
+    print("{} of {} sites completed. Frontiers written to {}".format(len(yaml_paths) - len(failures),
+                                                                     len(yaml_paths), args.out))
+    for yaml_filename, site_traceback in failures:
+        print("")
+        print("{} failed:".format(yaml_filename))
+        print(site_traceback)
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
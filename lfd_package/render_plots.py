@@ -0,0 +1,207 @@
+"""
+Module Description:
+    Plot rendering command line interface - draws the standard plots (see plots.py) of runs
+    that are already saved in the results store, over a pool of worker processes. Plots are
+    rendered from the stored hourly series, so plotting never holds up the analysis itself.
+
+    Example:
+        python -m lfd_package.render_plots --latest 3 --format svg --dpi 200 --workers 4
+"""
+
+import os
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lfd_package import results_store
+from lfd_package.modules import plots
+
+# Row of the CHP size in the results table, and the store column of each operating mode
+CHP_SIZE_VARIABLE = "CHP Size"
+MODE_STORE_COLUMNS = {"ELF": "elf", "TLF": "tlf", "PP": "pp"}
+
+
+def list_plot_tasks(run_keys=None, plot_names=None, store_path=None):
+    """
+    Reads the data of each run from the store and lists one task per plot.
+
+    Parameters
+    ----------
+    run_keys: list
+        keys of the runs to plot (see results_store.append_run()).
+    plot_names: list
+        keys of the plots to draw (see plots.STANDARD_PLOTS). Defaults to all standard plots.
+    store_path: str or pathlib.Path
+        path to the results store. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    tasks: list
+        contains one dict per plot with the run key, plot name, hourly series, CHP size, city,
+        and state.
+    skipped: list
+        contains the keys of runs that were not found or have no hourly series.
+    """
+    if run_keys is not None:
+        if plot_names is None:
+            plot_names = list(plots.STANDARD_PLOTS)
+
+        df_runs = results_store.read_runs(store_path=store_path).set_index("run_key")
+        df_sizes = results_store.read_results(run_keys=run_keys, store_path=store_path)
+        df_sizes = df_sizes[df_sizes["variable"] == CHP_SIZE_VARIABLE].set_index("run_key")
+
+        tasks = []
+        skipped = []
+        for run_key in run_keys:
+            df_hourly = results_store.read_hourly(run_key=run_key, store_path=store_path)
+            if run_key not in df_runs.index or df_hourly.empty:
+                skipped.append(run_key)
+                continue
+            for plot_name in plot_names:
+                plot_function, series_names, size_mode = plots.STANDARD_PLOTS[plot_name]
+                chp_size_kw = None
+                if size_mode is not None:
+                    chp_size_kw = float(df_sizes.loc[run_key, MODE_STORE_COLUMNS[size_mode]])
+                tasks.append({"run_key": run_key, "plot_name": plot_name, "chp_size_kw": chp_size_kw,
+                              "hourly": {name: df_hourly[name].to_numpy() for name in series_names},
+                              "city": df_runs.loc[run_key, "city"], "state": df_runs.loc[run_key, "state"]})
+        return tasks, skipped
+
+
+def render_task(task=None, dpi=None, file_format=None, plots_dir=None):
+    """
+    Draws the plot of one task. Exceptions are caught and returned so one plot does not stop
+    the others.
+
+    Parameters
+    ----------
+    task: dict
+        task from list_plot_tasks().
+    dpi: int
+        resolution of the saved plot. Defaults to plots.DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plots are saved in. Defaults to /plots.
+
+    Returns
+    -------
+    plot_result: dict
+        contains the run key, plot name, path of the saved plot, and the error message and
+        traceback if the plot failed (None otherwise).
+    """
+    if task is not None:
+        plot_result = {"run_key": task["run_key"], "plot_name": task["plot_name"], "path": None, "error": None,
+                       "traceback": None}
+        try:
+            plot_result["path"] = plots.plot_standard(plot_name=task["plot_name"], hourly=task["hourly"],
+                                                      chp_size_kw=task["chp_size_kw"], city=task["city"],
+                                                      state=task["state"], dpi=dpi, file_format=file_format,
+                                                      plots_dir=plots_dir)
+        except Exception as e:
+            plot_result["error"] = "{}: {}".format(type(e).__name__, e)
+            plot_result["traceback"] = traceback.format_exc()
+        return plot_result
+
+
+def render_runs(run_keys=None, plot_names=None, workers=None, dpi=None, file_format=None, plots_dir=None,
+                store_path=None):
+    """
+    Draws the standard plots of runs in the results store over a pool of worker processes.
+
+    Parameters
+    ----------
+    run_keys: list
+        keys of the runs to plot (see results_store.append_run()).
+    plot_names: list
+        keys of the plots to draw (see plots.STANDARD_PLOTS). Defaults to all standard plots.
+    workers: int
+        number of worker processes. Defaults to the number of CPUs. With one worker the plots
+        are drawn in this process.
+    dpi: int
+        resolution of the saved plots. Defaults to plots.DEFAULT_DPI.
+    file_format: str
+        png, svg, or pdf. Defaults to png.
+    plots_dir: str or pathlib.Path
+        folder the plots are saved in. Defaults to /plots.
+    store_path: str or pathlib.Path
+        path to the results store. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    plot_results: list
+        contains one dict per plot (see render_task()).
+    skipped: list
+        contains the keys of runs that were not found or have no hourly series.
+    """
+    if run_keys is not None:
+        tasks, skipped = list_plot_tasks(run_keys=run_keys, plot_names=plot_names, store_path=store_path)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(int(workers), len(tasks)))
+
+        if workers == 1:
+            plot_results = [render_task(task=task, dpi=dpi, file_format=file_format, plots_dir=plots_dir)
+                            for task in tasks]
+        else:
+            plot_results = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(render_task, task, dpi, file_format, plots_dir): task for task in tasks}
+                for future in as_completed(futures):
+                    try:
+                        plot_results.append(future.result())
+                    except Exception as e:
+                        # The worker itself died (ie: out of memory), so no result was returned
+                        task = futures[future]
+                        plot_results.append({"run_key": task["run_key"], "plot_name": task["plot_name"],
+                                             "path": None, "error": "{}: {}".format(type(e).__name__, e),
+                                             "traceback": traceback.format_exc()})
+        return plot_results, skipped
+
+
+def main():
+    """
+    Plot rendering command line interface. Draws the standard plots of the runs given by --run
+    or of the latest runs in the store. The exit status is 1 if any plot failed.
+    """
+    parser = argparse.ArgumentParser(description="Draw the standard plots of runs in the results store")
+    parser.add_argument("--run", help="keys of the runs to plot", dest="run_keys", type=str, nargs="+", default=None)
+    parser.add_argument("--latest", help="plot the latest N runs in the store (default: 1)", type=int, default=1)
+    parser.add_argument("--plots", help="names of the plots to draw (default: all)", dest="plot_names", type=str,
+                        nargs="+", default=None, choices=list(plots.STANDARD_PLOTS))
+    parser.add_argument("--format", help="file format of the plots", dest="file_format", type=str,
+                        default=plots.DEFAULT_FORMAT, choices=list(plots.FILE_FORMATS))
+    parser.add_argument("--dpi", help="resolution of the plots (default: {})".format(plots.DEFAULT_DPI), type=int,
+                        default=plots.DEFAULT_DPI)
+    parser.add_argument("--workers", help="number of worker processes (default: number of CPUs)", type=int,
+                        default=None)
+    parser.add_argument("--store", help="path to the results store (default: results/results_store.sqlite)",
+                        type=str, default=None)
+    args = parser.parse_args()
+
+    run_keys = args.run_keys
+    if run_keys is None:
+        run_keys = list(results_store.read_runs(store_path=args.store)["run_key"].iloc[-args.latest:])
+
+    start = time.perf_counter()
+    plot_results, skipped = render_runs(run_keys=run_keys, plot_names=args.plot_names, workers=args.workers,
+                                        dpi=args.dpi, file_format=args.file_format, store_path=args.store)
+    failures = [plot_result for plot_result in plot_results if plot_result["error"] is not None]
+
+    print("{} of {} plots drawn in {:.1f} s.".format(len(plot_results) - len(failures), len(plot_results),
+                                                     time.perf_counter() - start))
+    if skipped:
+        print("No hourly series stored for runs: {}".format(", ".join(skipped)))
+    for plot_result in failures:
+        print("")
+        print("{} of run {} failed:".format(plot_result["plot_name"], plot_result["run_key"]))
+        print(plot_result["traceback"])
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Module Description:
+    Results store - keeps the results table and hourly series of every run in one SQLite
+    file (/results/results_store.sqlite by default). Runs are only ever appended, each
+    under its own run key, so concurrent runs for the same location do not overwrite each
+    other. Excel workbooks are written on demand from the whole store in one pass.
+
+    Tables:
+        runs: one row per run (run key, time, location, demand file, .yaml file, overrides, label)
+        results: the rows of the results table of each run (see command_line.calc_results())
+        hourly: the hourly series of each run, stored as float64 bytes
+
+    Example:
+        python -m lfd_package.results_store --export
+"""
+
+import os
+import json
+import uuid
+import shutil
+import pathlib
+import sqlite3
+import argparse
+import datetime
+
+import numpy as np
+
+PACKAGE_DIR = pathlib.Path(__file__).parent.resolve()
+DEFAULT_STORE = PACKAGE_DIR / "results" / "results_store.sqlite"
+
+# Column names of the results table in the store, in the order of the columns from calc_results()
+RESULTS_COLUMNS = ["variable", "baseline", "baseline_units", "elf", "elf_units", "tlf", "tlf_units", "pp",
+                   "pp_units"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_key TEXT PRIMARY KEY,
+    created_utc TEXT NOT NULL,
+    city TEXT,
+    state TEXT,
+    sheet_name TEXT,
+    source TEXT,
+    overrides TEXT,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_key TEXT NOT NULL REFERENCES runs (run_key),
+    row_no INTEGER NOT NULL,
+    variable TEXT, baseline, baseline_units TEXT, elf, elf_units TEXT, tlf, tlf_units TEXT, pp, pp_units TEXT,
+    PRIMARY KEY (run_key, row_no)
+);
+CREATE TABLE IF NOT EXISTS hourly (
+    run_key TEXT NOT NULL REFERENCES runs (run_key),
+    series TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_key, series)
+);
+"""
+
+
+def connect(store_path=None):
+    """
+    Opens the results store, creating the file and its tables if needed.
+
+    Parameters
+    ----------
+    store_path: str or pathlib.Path
+        path to the SQLite file. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    connection: sqlite3.Connection
+        open connection to the store. Waits up to one minute for other writers.
+    """
+    if store_path is None:
+        store_path = DEFAULT_STORE
+    store_path = pathlib.Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+
+    connection = sqlite3.connect(str(store_path), timeout=60)
+    # Write-ahead logging lets readers (ie: an Excel export) run while other processes append
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def append_run(df_results=None, df_hourly=None, city=None, state=None, sheet_name=None, source=None,
+               overrides=None, label=None, store_path=None):
+    """
+    Appends the results of one run to the store.
+
+    Parameters
+    ----------
+    df_results: pandas.DataFrame
+        table of results from calc_results().
+    df_hourly: pandas.DataFrame
+        hourly series from calc_results(return_hourly=True). Optional.
+    city: str
+        city of the location analyzed.
+    state: str
+        two-letter abbreviation of the state of the location analyzed.
+    sheet_name: str
+        name of the demand .csv file, used as the Excel sheet name on export.
+    source: str
+        .yaml file of the run. Optional.
+    overrides: dict
+        values that were changed from the .yaml file (see load_class_dict()). Optional.
+    label: str
+        free text to find the run again (ie: the scenario grid it belongs to). Optional.
+    store_path: str or pathlib.Path
+        path to the SQLite file. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    run_key: str
+        key of the new run, starting with its UTC time (ie: "20240105T143000-1f0c...").
+    """
+    args_list = [df_results, city, state, sheet_name]
+    if any(elem is None for elem in args_list) is False:
+        created = datetime.datetime.now(datetime.timezone.utc)
+        run_key = "{:%Y%m%dT%H%M%S}-{}".format(created, uuid.uuid4().hex)
+
+        result_rows = [(run_key, row_no) + tuple(_to_sql_value(value) for value in row)
+                       for row_no, row in enumerate(df_results.itertuples(index=False, name=None))]
+        hourly_rows = []
+        if df_hourly is not None:
+            hourly_rows = [(run_key, str(series), np.ascontiguousarray(df_hourly[series], dtype="<f8").tobytes())
+                           for series in df_hourly.columns]
+
+        connection = connect(store_path=store_path)
+        try:
+            # One transaction per run, so a failed or interrupted write leaves no partial run behind
+            with connection:
+                connection.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                   (run_key, created.isoformat(), city, state, sheet_name,
+                                    None if source is None else str(source), json.dumps(overrides or {}), label))
+                connection.executemany("INSERT INTO results VALUES ({})".format(", ".join(["?"] * 11)), result_rows)
+                connection.executemany("INSERT INTO hourly VALUES (?, ?, ?)", hourly_rows)
+        finally:
+            connection.close()
+        return run_key
+
+
+def _to_sql_value(value):
+    # Numbers are stored as numbers, units and "N/A" as text
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    return str(value)
+
+
+def read_runs(store_path=None):
+    """
+    Reads the list of runs in the store.
+
+    Parameters
+    ----------
+    store_path: str or pathlib.Path
+        path to the SQLite file. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    df_runs: pandas.DataFrame
+        one row per run, oldest first. Overrides are returned as dicts.
+    """
+    import pandas as pd
+    connection = connect(store_path=store_path)
+    try:
+        df_runs = pd.read_sql_query("SELECT * FROM runs ORDER BY created_utc, rowid", connection)
+    finally:
+        connection.close()
+    df_runs["overrides"] = [json.loads(overrides) if overrides else {} for overrides in df_runs["overrides"]]
+    return df_runs
+
+
+def read_results(run_keys=None, store_path=None):
+    """
+    Reads the results tables of many runs at once.
+
+    Parameters
+    ----------
+    run_keys: list
+        keys of the runs to read. Defaults to every run in the store.
+    store_path: str or pathlib.Path
+        path to the SQLite file. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    df_results: pandas.DataFrame
+        rows of the results tables, with the run key and row number of each row.
+    """
+    import pandas as pd
+    query = "SELECT * FROM results"
+    params = []
+    if run_keys is not None:
+        params = list(run_keys)
+        query += " WHERE run_key IN ({})".format(", ".join(["?"] * len(params)))
+    connection = connect(store_path=store_path)
+    try:
+        df_results = pd.read_sql_query(query + " ORDER BY run_key, row_no", connection, params=params)
+    finally:
+        connection.close()
+    return df_results
+
+
+def read_hourly(run_key=None, store_path=None):
+    """
+    Reads the hourly series of one run.
+
+    Parameters
+    ----------
+    run_key: str
+        key of the run (see append_run()).
+    store_path: str or pathlib.Path
+        path to the SQLite file. Defaults to /results/results_store.sqlite.
+
+    Returns
+    -------
+    df_hourly: pandas.DataFrame
+        one column per hourly series, in the order they were stored.
+    """
+    import pandas as pd
+    if run_key is not None:
+        connection = connect(store_path=store_path)
+        try:
+            rows = connection.execute("SELECT series, data FROM hourly WHERE run_key = ? ORDER BY rowid",
+                                      (run_key,)).fetchall()
+        finally:
+            connection.close()
+        return pd.DataFrame({series: np.frombuffer(data, dtype="<f8") for series, data in rows})
+
+
+def export_excel(store_path=None, results_dir=None):
+    """
+    Writes the latest results of every location and demand file in the store to Excel, as
+    /results/{city}_{state}/{city}_{state}_results.xlsx with one sheet per demand file. The
+    store is read once and each workbook is written once. Sheets of an existing workbook are
+    replaced only if the store has results for them; its other sheets are kept. Runs with
+    overrides (ie: from the scenario matrix) are not exported.
+
+    Parameters
+    ----------
+    store_path: str or pathlib.Path
+        path to the SQLite file. Defaults to /results/results_store.sqlite.
+    results_dir: str or pathlib.Path
+        folder the workbooks are written to. Defaults to /results.
+
+    Returns
+    -------
+    workbook_paths: list
+        contains the paths of the workbooks written.
+    """
+    import pandas as pd
+    if results_dir is None:
+        results_dir = PACKAGE_DIR / "results"
+
+    connection = connect(store_path=store_path)
+    try:
+        # Latest plain run of each location and demand file, with its results rows
+        df_rows = pd.read_sql_query(
+            """
+            SELECT runs.city, runs.state, runs.sheet_name, results.* FROM results
+            JOIN runs ON runs.run_key = results.run_key
+            WHERE runs.rowid IN (
+                SELECT MAX(rowid) FROM runs WHERE overrides = '{}' GROUP BY city, state, sheet_name)
+            ORDER BY runs.city, runs.state, runs.sheet_name, results.row_no
+            """, connection)
+    finally:
+        connection.close()
+
+    workbook_paths = []
+    for (city, state), df_location in df_rows.groupby(["city", "state"], sort=True):
+        workbook_path = pathlib.Path(results_dir) / "{}_{}".format(city, state) / "{}_{}_results.xlsx".format(city,
+                                                                                                             state)
+        workbook_path.parent.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first so a reader (or another export) never sees a partial workbook
+        tmp_path = workbook_path.with_name("{}.{}.tmp.xlsx".format(workbook_path.stem, os.getpid()))
+        if workbook_path.exists():
+            # Sheets of demand files that are not in the store stay in the workbook
+            shutil.copyfile(workbook_path, tmp_path)
+            writer_args = {"mode": "a", "if_sheet_exists": "replace"}
+        else:
+            writer_args = {"mode": "w"}
+        with pd.ExcelWriter(tmp_path, engine='openpyxl', **writer_args) as writer:
+            for sheet_name, df_sheet in df_location.groupby("sheet_name", sort=True):
+                df_table = df_sheet[RESULTS_COLUMNS].reset_index(drop=True)
+                # Same headers as the table from calc_results()
+                df_table.columns = ["Variable Name", "Baseline", "", "ELF", "", "TLF", "", "PP Peak", ""]
+                df_table.to_excel(writer, sheet_name=sheet_name)
+        os.replace(tmp_path, workbook_path)
+        workbook_paths.append(workbook_path)
+    return workbook_paths
+
+
+def main():
+    """
+    Results store command line interface. Lists the runs in the store or exports them to Excel.
+    """
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="List or export the runs in the results store")
+    parser.add_argument("--store", help="path to the results store (default: results/results_store.sqlite)",
+                        type=str, default=None)
+    parser.add_argument("--export", help="write the latest results of each location to Excel",
+                        action="store_true")
+    args = parser.parse_args()
+
+    if args.export is True:
+        workbook_paths = export_excel(store_path=args.store)
+        for workbook_path in workbook_paths:
+            print("Results written to {}".format(workbook_path))
+        print("{} workbooks written.".format(len(workbook_paths)))
+    else:
+        df_runs = read_runs(store_path=args.store)
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(df_runs[["run_key", "city", "state", "sheet_name", "overrides", "label"]].to_string(index=False))
+        print("{} runs in the store.".format(len(df_runs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Module Description:
+    Scenario matrix command line interface - expands a declarative grid of demand profiles,
+    location .yaml files, operating modes, and equipment overrides into jobs, runs the jobs
+    over a pool of worker processes, and collects every result into one table.
+
+    The grid is a .yaml file (see /input_scenarios/bundled_matrix.yaml):
+
+        locations: ["*.yaml"]                   # location .yaml files or glob patterns (see batch.py)
+        profiles: ["STD2004", "pre1980"]        # construction vintages and/or .csv file names
+        modes: ["ELF", "TLF", "PP"]             # rows kept for each job (Baseline is also accepted)
+        overrides:                              # optional, every combination of values is run
+            chp_turn_down: [3.3, 2.0]
+
+    A vintage replaces the vintage of the location's own demand_filename (ie: "STD2019_Fairbanks_AK.csv"
+    becomes "STD2004_Fairbanks_AK.csv"). Combinations whose .csv file does not exist are skipped.
+    One job analyzes all operating modes of a profile/location/override combination at once, and
+    jobs that share a profile run in the same worker so the profile is only parsed once. Each job
+    is appended to the results store (see results_store.py) under its own run key.
+
+    Example:
+        python -m lfd_package.scenario_matrix --grid bundled_matrix.yaml --workers 4
+"""
+
+import os
+import glob
+import time
+import pathlib
+import argparse
+import itertools
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import yaml
+from lfd_package import command_line, batch, results_store
+
+try:
+    from yaml import CLoader as Loader
+except ImportError:
+    from yaml import Loader
+
+PACKAGE_DIR = pathlib.Path(command_line.__file__).parent.resolve()
+PROFILE_DIR = PACKAGE_DIR / 'input_demand_profiles'
+GRID_DIR = PACKAGE_DIR / 'input_scenarios'
+
+# Value column of each operating mode in the results table from calc_results(). Units are in the next column
+MODE_COLUMNS = {"Baseline": 1, "ELF": 3, "TLF": 5, "PP": 7}
+
+
+def load_grid(grid_filename=None):
+    """
+    Reads a scenario grid .yaml file.
+
+    Parameters
+    ----------
+    grid_filename: str
+        name of a .yaml file in the /input_scenarios folder, or the path to a .yaml file elsewhere.
+
+    Returns
+    -------
+    grid: dict
+        contains the lists of locations, profiles, and modes, the dict of overrides, and the name
+        of the grid file.
+    """
+    if grid_filename is not None:
+        grid_path = pathlib.Path(grid_filename)
+        if not grid_path.exists():
+            grid_path = GRID_DIR / grid_filename
+
+        with open(grid_path) as f:
+            grid = yaml.load(f, Loader=Loader)
+
+        for key in ("locations", "profiles"):
+            if not grid.get(key):
+                raise Exception("Scenario grid {} has no {} listed".format(grid_path, key))
+        grid.setdefault("modes", ["ELF", "TLF", "PP"])
+        grid.setdefault("overrides", {})
+        if grid["overrides"] is None:
+            grid["overrides"] = {}
+
+        grid["name"] = grid_path.stem
+        for mode in grid["modes"]:
+            if mode not in MODE_COLUMNS:
+                raise Exception("Unknown operating mode {} in scenario grid. Choose from {}".format(
+                    mode, list(MODE_COLUMNS)))
+        return grid
+
+
+def expand_jobs(grid=None):
+    """
+    Expands a scenario grid into jobs (profile x location x overrides).
+
+    Parameters
+    ----------
+    grid: dict
+        scenario grid from load_grid().
+
+    Returns
+    -------
+    jobs: list
+        contains one dict per job with the scenario number, .yaml file, demand profile (.csv
+        file name), and overrides.
+    skipped: list
+        contains (.yaml file, profile) pairs that were skipped because the .csv file does not exist.
+    """
+    if grid is not None:
+        yaml_paths = batch.expand_yaml_paths(patterns=grid["locations"])
+
+        override_keys = list(grid["overrides"])
+        override_values = [value if isinstance(value, list) else [value] for value in grid["overrides"].values()]
+        override_sets = [dict(zip(override_keys, values)) for values in itertools.product(*override_values)]
+
+        jobs = []
+        skipped = []
+        for yaml_path in yaml_paths:
+            profile_files = _list_profile_files(yaml_path=yaml_path, profiles=grid["profiles"])
+            for profile_file in profile_files:
+                if not (PROFILE_DIR / profile_file).exists():
+                    skipped.append((yaml_path, profile_file))
+                    continue
+                for override_set in override_sets:
+                    jobs.append({"scenario": len(jobs), "yaml": yaml_path, "profile": profile_file,
+                                 "overrides": override_set})
+        return jobs, skipped
+
+
+def _list_profile_files(yaml_path=None, profiles=None):
+    # Returns the .csv file names of the profiles for one location
+    try:
+        with open(batch.YAML_DIR / yaml_path) as f:
+            own_profile = str(yaml.load(f, Loader=Loader).get("demand_filename"))
+    except (OSError, yaml.YAMLError, AttributeError):
+        own_profile = ""
+
+    profile_files = []
+    for profile in profiles:
+        if str(profile).endswith(".csv"):
+            matches = sorted(pathlib.Path(match).name for match in glob.glob(str(PROFILE_DIR / profile)))
+            profile_files.extend(matches or [profile])
+        else:
+            # Construction vintage, ie: "STD2004" or "pre1980"
+            profile_files.append("{}_{}".format(profile, own_profile.split("_", 1)[-1]))
+    return list(dict.fromkeys(profile_files))
+
+
+def run_profile_jobs(jobs=None, modes=None, hourly=False, use_cache=True):
+    """
+    Runs every job of one demand profile in this process, so the profile is only parsed once.
+
+    Parameters
+    ----------
+    jobs: list
+        contains job dicts from expand_jobs() that share a profile.
+    modes: list
+        operating modes kept in the results (see MODE_COLUMNS).
+    hourly: bool
+        if True, the hourly series of each job are returned as well.
+    use_cache: bool
+        if False, the results cache is neither read nor written (see calc_results_cached()).
+
+    Returns
+    -------
+    job_results: list
+        contains one dict per job with the job, the location (city and state), the results table
+        and hourly series (pandas.DataFrame, hourly is None unless requested), its result rows (one
+        per mode), the run time in seconds, and the error message and traceback if the job failed
+        (None otherwise).
+    """
+    args_list = [jobs, modes]
+    if any(elem is None for elem in args_list) is False:
+        job_results = []
+        for job in jobs:
+            start = time.perf_counter()
+            job_result = {"job": job, "city": None, "state": None, "results": None, "hourly": None, "rows": None,
+                          "error": None, "traceback": None}
+            try:
+                overrides = dict(job["overrides"], demand_filename=job["profile"])
+                run_result = command_line.calc_results_cached(yaml_filename=job["yaml"], overrides=overrides,
+                                                              return_hourly=hourly, use_cache=use_cache)
+                for name in ("city", "state", "results", "hourly"):
+                    job_result[name] = run_result[name]
+                job_result["rows"] = results_to_rows(df_results=job_result["results"], job=job, modes=modes,
+                                                     city=job_result["city"], state=job_result["state"])
+            except Exception as e:
+                job_result["error"] = "{}: {}".format(type(e).__name__, e)
+                job_result["traceback"] = traceback.format_exc()
+            job_result["time"] = time.perf_counter() - start
+            job_results.append(job_result)
+        return job_results
+
+
+def results_to_rows(df_results=None, job=None, modes=None, city=None, state=None):
+    """
+    Turns the results table of one job into one row per operating mode. Each variable becomes a
+    column named "Variable Name [units]"; values marked "N/A" become NaN.
+
+    Parameters
+    ----------
+    df_results: pandas.DataFrame
+        table of results from calc_results().
+    job: dict
+        job from expand_jobs().
+    modes: list
+        operating modes to keep (see MODE_COLUMNS).
+    city: str
+        city of the location analyzed.
+    state: str
+        two-letter abbreviation of the state of the location analyzed.
+
+    Returns
+    -------
+    rows: list
+        contains one dict per mode.
+    """
+    args_list = [df_results, job, modes, city, state]
+    if any(elem is None for elem in args_list) is False:
+        column_names = []
+        for i in range(len(df_results)):
+            units = ""
+            for value_column in MODE_COLUMNS.values():
+                unit_str = str(df_results.iat[i, value_column + 1])
+                if unit_str not in ("", "N/A", "dimensionless"):
+                    units = unit_str
+                    break
+            name = df_results.iat[i, 0]
+            column_names.append("{} [{}]".format(name, units) if units else name)
+
+        rows = []
+        for mode in modes:
+            row = {"scenario": job["scenario"], "location": pathlib.Path(job["yaml"]).stem, "city": city,
+                   "state": state, "profile": job["profile"], "vintage": job["profile"].split("_", 1)[0]}
+            row.update(job["overrides"])
+            row["mode"] = mode
+            for i, name in enumerate(column_names):
+                value = df_results.iat[i, MODE_COLUMNS[mode]]
+                row[name] = np.nan if isinstance(value, str) else float(value)
+            rows.append(row)
+        return rows
+
+
+def run_matrix(grid=None, workers=None, store_path=None, hourly=False, use_cache=True):
+    """
+    Runs every job of a scenario grid over a pool of worker processes and appends each job
+    to the results store.
+
+    Parameters
+    ----------
+    grid: dict
+        scenario grid from load_grid().
+    workers: int
+        number of worker processes. Defaults to the number of CPUs. With one worker the jobs
+        run in this process.
+    store_path: str or pathlib.Path
+        path to the results store. Defaults to /results/results_store.sqlite.
+    hourly: bool
+        if True, the hourly series of each job are stored along with its results table.
+    use_cache: bool
+        if False, the results cache is neither read nor written (see calc_results_cached()).
+
+    Returns
+    -------
+    df_matrix: pandas.DataFrame
+        consolidated results with one row per job and operating mode, sorted by scenario number.
+        The run_key column links each row to its run in the results store.
+    job_results: list
+        contains the result dict of every job (see run_profile_jobs()).
+    skipped: list
+        contains (.yaml file, profile) pairs that were skipped (see expand_jobs()).
+    """
+    if grid is not None:
+        jobs, skipped = expand_jobs(grid=grid)
+
+        # Jobs that share a profile run in the same worker
+        profile_groups = {}
+        for job in jobs:
+            profile_groups.setdefault(job["profile"], []).append(job)
+        profile_groups = list(profile_groups.values())
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(int(workers), len(profile_groups)))
+
+        job_results = []
+        if workers == 1:
+            batch.init_worker()
+            for group in profile_groups:
+                group_results = run_profile_jobs(jobs=group, modes=grid["modes"], hourly=hourly,
+                                                 use_cache=use_cache)
+                _report_jobs(job_results=group_results, grid=grid, store_path=store_path)
+                job_results.extend(group_results)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=batch.init_worker) as executor:
+                # Largest groups first so the last worker to finish is not left with a long group
+                futures = {executor.submit(run_profile_jobs, group, grid["modes"], hourly, use_cache): group
+                           for group in sorted(profile_groups, key=len, reverse=True)}
+                for future in as_completed(futures):
+                    try:
+                        group_results = future.result()
+                    except Exception as e:
+                        # The worker itself died (ie: out of memory), so no result was returned
+                        group_results = [{"job": job, "results": None, "hourly": None, "rows": None, "time": None,
+                                          "error": "{}: {}".format(type(e).__name__, e),
+                                          "traceback": traceback.format_exc()} for job in futures[future]]
+                    _report_jobs(job_results=group_results, grid=grid, store_path=store_path)
+                    job_results.extend(group_results)
+
+        job_results.sort(key=lambda job_result: job_result["job"]["scenario"])
+        rows = [row for job_result in job_results if job_result["rows"] is not None for row in job_result["rows"]]
+        df_matrix = pd.DataFrame(rows)
+        return df_matrix, job_results, skipped
+
+
+def _report_jobs(job_results=None, grid=None, store_path=None):
+    # Stores the results of finished jobs (in the parent process) and prints their status
+    for job_result in job_results:
+        job = job_result["job"]
+        if job_result["error"] is None:
+            try:
+                overrides = dict(job["overrides"], demand_filename=job["profile"])
+                job_result["run_key"] = results_store.append_run(
+                    df_results=job_result["results"], df_hourly=job_result["hourly"], city=job_result["city"],
+                    state=job_result["state"], sheet_name=job["profile"], source=job["yaml"], overrides=overrides,
+                    label="scenario_matrix:{}#{}".format(grid["name"], job["scenario"]), store_path=store_path)
+                for row in job_result["rows"]:
+                    row["run_key"] = job_result["run_key"]
+            except Exception as e:
+                job_result["rows"] = None
+                job_result["error"] = "Storing results failed - {}: {}".format(type(e).__name__, e)
+                job_result["traceback"] = traceback.format_exc()
+        # The tables are in the store now
+        job_result["results"] = None
+        job_result["hourly"] = None
+
+        label = "Scenario {} ({}, {}, {})".format(job["scenario"], pathlib.Path(job["yaml"]).name, job["profile"],
+                                                 job["overrides"])
+        if job_result["error"] is None:
+            print("{} completed in {:.1f} s.".format(label, job_result["time"]))
+        else:
+            print("{} FAILED: {}".format(label, job_result["error"]))
+
+
+def main():
+    """
+    Scenario matrix command line interface. Runs the grid given by --grid and writes the
+    consolidated results to a .csv file. The exit status is 1 if any job failed.
+    """
+    parser = argparse.ArgumentParser(description="Run a matrix of profiles x locations x modes x overrides")
+    parser.add_argument("--grid", help="filename for .yaml file with the scenario grid", type=str, required=True)
+    parser.add_argument("--workers", help="number of worker processes (default: number of CPUs)", type=int,
+                        default=None)
+    parser.add_argument("--out", help="filename for the consolidated results .csv file "
+                                      "(default: results/scenario_matrix_results.csv)", type=str,
+                        default=str(PACKAGE_DIR / "results" / "scenario_matrix_results.csv"))
+    parser.add_argument("--store", help="path to the results store (default: results/results_store.sqlite)",
+                        type=str, default=None)
+    parser.add_argument("--hourly", help="store the hourly series of every job as well", action="store_true")
+    parser.add_argument("--no-cache", help="always run the analyses, without reading or writing the results cache",
+                        dest="use_cache", action="store_false")
+    args = parser.parse_args()
+
+    grid = load_grid(grid_filename=args.grid)
+    start = time.perf_counter()
+    df_matrix, job_results, skipped = run_matrix(grid=grid, workers=args.workers, store_path=args.store,
+                                                 hourly=args.hourly, use_cache=args.use_cache)
+    failures = [job_result for job_result in job_results if job_result["error"] is not None]
+
+    pathlib.Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    df_matrix.to_csv(args.out, index=False)
+
+    print("...")
+    print("{} of {} jobs completed in {:.1f} s. {} profile/location combinations skipped (no .csv file).".format(
+        len(job_results) - len(failures), len(job_results), time.perf_counter() - start, len(skipped)))
+    print("Results written to {}".format(args.out))
+    for job_result in failures:
+        print("")
+        print("Scenario {} failed:".format(job_result["job"]["scenario"]))
+        print(job_result["traceback"])
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
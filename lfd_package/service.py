@@ -0,0 +1,336 @@
+"""
+Module Description:
+    Analysis service - a long-running process that answers analysis requests sent as JSON over
+    HTTP, on a local TCP port or a Unix socket. The unit registry, parsed demand profiles, and
+    compiled tariffs stay in memory between requests, so a request only pays for the dispatch
+    and billing calculations. Requests are queued onto a pool of workers; with more than one
+    worker each one is a separate process with its own warm state (see batch.init_worker()).
+
+    Endpoints:
+        GET  /health    status of the service and the number of requests answered
+        POST /analyze   body: inputs with the same keys as the .yaml files, or a list of them.
+                        Add ?hourly=1 to also return the hourly series, and ?engine=reference
+                        to use the reference engine (see engines.py).
+
+    Example:
+        python -m lfd_package.service --port 8765 --workers 2 --preload "*.yaml"
+        curl -X POST --data @inputs.json "http://127.0.0.1:8765/analyze?hourly=1"
+"""
+
+import os
+import json
+import math
+import time
+import stat
+import signal
+import argparse
+import threading
+import traceback
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from lfd_package import command_line, batch
+from lfd_package.modules import engines
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 16 * 1024 ** 2
+
+
+def init_worker(yaml_paths=None):
+    """
+    Warms up a worker before its first request (see batch.init_worker()) and parses the demand
+    profiles of the given .yaml files, so the first request for those sites is fast too.
+
+    Parameters
+    ----------
+    yaml_paths: list
+        Optional. Contains .yaml file names or paths (see batch.expand_yaml_paths()).
+    """
+    batch.init_worker()
+    for yaml_path in yaml_paths or []:
+        try:
+            command_line.load_class_dict(yaml_filename=yaml_path)
+        except Exception as e:
+            print("Preloading {} failed - {}: {}".format(yaml_path, type(e).__name__, e))
+
+
+def _init_process_worker(yaml_paths=None):
+    # Worker processes are stopped by the service, so they keep the default SIGTERM handler
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    init_worker(yaml_paths=yaml_paths)
+
+
+def analyze_inputs(inputs=None, return_hourly=False, engine=None):
+    """
+    Runs the analysis of one set of inputs and returns the results in a form that can be
+    written as JSON. Runs in a worker.
+
+    Parameters
+    ----------
+    inputs: dict
+        input data with the same keys as the .yaml files.
+    return_hourly: bool
+        if True, the hourly series of each operating mode are returned as well.
+    engine: str
+        "fast" or "reference" (see engines.py). Defaults to "fast".
+
+    Returns
+    -------
+    response: dict
+        contains the city, state, and demand file, the results table ("columns" and "data"),
+        the hourly series (one list per series, or None), and the run time in seconds. If
+        the analysis failed, contains the error message and whether the inputs were at fault.
+    """
+    start = time.perf_counter()
+    if not isinstance(inputs, dict):
+        return {"error": "inputs must be a JSON object with the keys of a .yaml file", "input_error": True}
+    try:
+        class_dict = command_line.build_class_dict(data=inputs)
+        if return_hourly is True:
+            df_results, df_hourly = command_line.calc_results(class_dict=class_dict, return_hourly=True,
+                                                              engine=engine)
+        else:
+            df_results = command_line.calc_results(class_dict=class_dict, engine=engine)
+            df_hourly = None
+    except KeyError as e:
+        return {"error": "missing input {}".format(e), "input_error": True}
+    except (ValueError, TypeError, FileNotFoundError) as e:
+        return {"error": "{}: {}".format(type(e).__name__, e), "input_error": True}
+    except Exception as e:
+        return {"error": "{}: {}".format(type(e).__name__, e), "input_error": False,
+                "traceback": traceback.format_exc()}
+
+    response = {"city": str(inputs["city"]).lower(), "state": str(inputs["state"]).lower(),
+                "sheet_name": inputs["demand_filename"],
+                "results": {"columns": list(df_results.columns),
+                            "data": [[_json_value(value) for value in row] for row in df_results.values]},
+                "hourly": None}
+    if df_hourly is not None:
+        response["hourly"] = {name: _json_series(df_hourly[name].to_numpy()) for name in df_hourly.columns}
+    response["time"] = time.perf_counter() - start
+    return response
+
+
+def _json_value(value):
+    # Cell of the results table as a JSON value. NaN is not valid JSON, so it becomes null
+    if isinstance(value, (str, bool)) or value is None:
+        return value
+    if isinstance(value, (int, float, np.number)):
+        value = value.item() if isinstance(value, np.number) else value
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+        return value
+    return str(value)
+
+
+def _json_series(values):
+    # Hourly series as a list, with NaN as null
+    values = np.asarray(values, dtype=float)
+    if np.isfinite(values).all():
+        return values.tolist()
+    return [value if math.isfinite(value) else None for value in values.tolist()]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "lfd_package/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            self._send_json(status=404, body={"error": "not found"})
+            return
+        self._send_json(status=200, body={"status": "ok", "workers": self.server.workers,
+                                          "requests": self.server.request_count,
+                                          "uptime_s": time.perf_counter() - self.server.start_time})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/analyze":
+            self._send_json(status=404, body={"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(status=400 if length <= 0 else 413, body={"error": "request body missing or too large"})
+            return
+        data = self.rfile.read(length)
+
+        query = parse_qs(url.query)
+        return_hourly = query.get("hourly", ["0"])[-1].lower() in ("1", "true", "yes")
+        engine = query.get("engine", [engines.DEFAULT_ENGINE])[-1]
+        if engine not in engines.ENGINES:
+            self._send_json(status=400, body={"error": "engine must be one of {}".format(", ".join(engines.ENGINES))})
+            return
+        try:
+            body = json.loads(data)
+        except ValueError as e:
+            self._send_json(status=400, body={"error": "invalid JSON: {}".format(e)})
+            return
+
+        if not isinstance(body, (dict, list)):
+            self._send_json(status=400, body={"error": "body must be a JSON object or a list of objects"})
+            return
+
+        # A list of inputs is spread over the workers and answered with a list in the same order
+        requests = body if isinstance(body, list) else [body]
+        futures = [self.server.executor.submit(analyze_inputs, inputs, return_hourly, engine) for inputs in requests]
+        with self.server.count_lock:
+            self.server.pending.update(futures)
+        try:
+            responses = [future.result() for future in futures]
+        finally:
+            with self.server.count_lock:
+                self.server.pending.difference_update(futures)
+        with self.server.count_lock:
+            self.server.request_count += len(responses)
+
+        if isinstance(body, list):
+            self._send_json(status=200, body=responses)
+        elif "error" in responses[0]:
+            self._send_json(status=400 if responses[0]["input_error"] is True else 500, body=responses[0])
+        else:
+            self._send_json(status=200, body=responses[0])
+
+    def _send_json(self, status=None, body=None):
+        data = json.dumps(body, allow_nan=False).encode("utf-8")
+        # After an error the rest of the request may still be unread, so the connection is not reused
+        if status >= 400:
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if status >= 400:
+            self.send_header("Connection", "close")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose is True:
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, workers=1, preload=None, verbose=False):
+    """
+    Creates the service. Call serve_forever() on the result to start answering requests.
+
+    Parameters
+    ----------
+    host: str
+        address to listen on. Ignored if socket_path is given.
+    port: int
+        TCP port to listen on. Ignored if socket_path is given.
+    socket_path: str
+        Optional. Path of a Unix socket to listen on instead of a TCP port. A stale socket at
+        this path is replaced.
+    workers: int
+        number of workers. With one worker the analyses run in a thread of the service
+        process; with more, each worker is a separate process.
+    preload: list
+        Optional. Contains .yaml file names or glob patterns whose demand profiles are parsed
+        by every worker at start (see batch.expand_yaml_paths()).
+    verbose: bool
+        if True, every request is logged.
+
+    Returns
+    -------
+    server: socketserver.BaseServer
+    """
+    workers = max(1, int(workers))
+    yaml_paths = batch.expand_yaml_paths(patterns=preload) if preload else []
+    if workers == 1:
+        executor = ThreadPoolExecutor(max_workers=1, initializer=init_worker, initargs=(yaml_paths,))
+        # Warm up now instead of on the first request
+        executor.submit(int).result()
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker,
+                                       initargs=(yaml_paths,))
+
+    if socket_path is not None:
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+        server.daemon_threads = True
+    server.executor = executor
+    server.workers = workers
+    server.verbose = verbose
+    server.socket_path = socket_path
+    server.request_count = 0
+    server.count_lock = threading.Lock()
+    # Futures of requests being answered, cancelled by close_server() if they have not started
+    server.pending = set()
+    server.start_time = time.perf_counter()
+    return server
+
+
+def close_server(server=None):
+    """
+    Stops the workers of a service created by make_server() and removes its Unix socket.
+    """
+    if server is not None:
+        server.server_close()
+        # Executor.shutdown(cancel_futures=True) needs Python 3.9, so queued requests are cancelled here
+        with server.count_lock:
+            for future in server.pending:
+                future.cancel()
+        server.executor.shutdown(wait=True)
+        if server.socket_path is not None and os.path.exists(server.socket_path):
+            os.remove(server.socket_path)
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    """
+    Service command line interface. Answers analysis requests until stopped with Ctrl+C or
+    SIGTERM.
+    """
+    parser = argparse.ArgumentParser(description="Answer analysis requests sent as JSON over HTTP")
+    parser.add_argument("--host", help="address to listen on (default: {})".format(DEFAULT_HOST), type=str,
+                        default=DEFAULT_HOST)
+    parser.add_argument("--port", help="TCP port to listen on (default: {})".format(DEFAULT_PORT), type=int,
+                        default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="path of a Unix socket to listen on instead of a TCP port",
+                        dest="socket_path", type=str, default=None)
+    parser.add_argument("--workers", help="number of workers (default: 1)", type=int, default=1)
+    parser.add_argument("--preload", help="filenames or glob patterns of .yaml files whose demand profiles are "
+                                          "parsed at start", type=str, nargs="+", default=None)
+    parser.add_argument("--verbose", help="log every request", action="store_true")
+    args = parser.parse_args()
+
+    server = make_server(host=args.host, port=args.port, socket_path=args.socket_path, workers=args.workers,
+                         preload=args.preload, verbose=args.verbose)
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    if args.socket_path is not None:
+        print("Analysis service listening on {} with {} worker(s).".format(args.socket_path, server.workers))
+    else:
+        print("Analysis service listening on http://{}:{} with {} worker(s).".format(
+            server.server_address[0], server.server_address[1], server.workers))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_server(server=server)
+        print("Analysis service stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Module Description:
+    Engine verification command line interface - runs the fast and reference engines (see
+    engines.py) on the same inputs and compares every hourly series and the results table.
+    For each series that differs, the first hour outside the tolerance is reported with its
+    month, day, and hour and the values of both engines. The reference engine runs the
+    original hour-by-hour functions, so each site takes about a minute.
+
+    Example:
+        python -m lfd_package.verify_engines --in seattle_wa.yaml fairbanks_ak.yaml
+"""
+
+import time
+import argparse
+import numpy as np
+
+from lfd_package import command_line, batch
+from lfd_package.modules import engines
+
+# Columns of the results table that hold values (the others hold variable names and units)
+VALUE_COLUMNS = (1, 3, 5, 7)
+
+# Values in the results table are rounded, so they are compared with an absolute tolerance
+SUMMARY_ATOL = 0.01
+
+
+def compare_series(reference=None, fast=None, months=None, days=None, hours=None, rtol=1e-9, atol=1e-9):
+    """
+    Compares one hourly series of the two engines.
+
+    Parameters
+    ----------
+    reference: numpy.ndarray
+        hourly series calculated by the reference engine.
+    fast: numpy.ndarray
+        the same series calculated by the fast engine.
+    months, days, hours: numpy.ndarray
+        Optional. Month, day, and hour of each row of the series, used to report the first
+        diverging hour.
+    rtol: float
+        relative tolerance (see numpy.isclose()).
+    atol: float
+        absolute tolerance, in the units of the series.
+
+    Returns
+    -------
+    comparison: dict
+        contains whether the series are identical ("exact") and equal within the tolerance
+        ("match"), the largest absolute and relative difference, the number of diverging
+        hours, and the index, time, and values of the first diverging hour (None if all match).
+    """
+    if reference is not None and fast is not None:
+        reference = np.asarray(reference, dtype=float)
+        fast = np.asarray(fast, dtype=float)
+        if reference.shape != fast.shape:
+            raise Exception("Series lengths differ: {} (reference) and {} (fast)".format(len(reference), len(fast)))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            abs_diff = np.abs(reference - fast)
+            rel_diff = abs_diff / np.abs(reference)
+        diverging = ~np.isclose(fast, reference, rtol=rtol, atol=atol, equal_nan=True)
+
+        comparison = {"exact": bool(np.array_equal(reference, fast, equal_nan=True)), "match": not diverging.any(),
+                      "max_abs_diff": float(np.nanmax(abs_diff)) if np.isfinite(abs_diff).any() else 0.0,
+                      "max_rel_diff": float(np.nanmax(rel_diff[np.isfinite(rel_diff)], initial=0.0)),
+                      "diverging_hours": int(diverging.sum()), "first_index": None, "first_time": None,
+                      "reference_value": None, "fast_value": None}
+        if diverging.any():
+            index = int(np.argmax(diverging))
+            comparison["first_index"] = index
+            comparison["reference_value"] = float(reference[index])
+            comparison["fast_value"] = float(fast[index])
+            if months is not None and days is not None and hours is not None:
+                comparison["first_time"] = "month {}, day {}, hour {}".format(int(months[index]), int(days[index]),
+                                                                            int(hours[index]))
+        return comparison
+
+
+def compare_tables(reference=None, fast=None, atol=SUMMARY_ATOL):
+    """
+    Compares the results tables of the two engines.
+
+    Parameters
+    ----------
+    reference: pandas.DataFrame
+        results table of the reference engine (see command_line.calc_results()).
+    fast: pandas.DataFrame
+        results table of the fast engine.
+    atol: float
+        absolute tolerance for numeric values.
+
+    Returns
+    -------
+    differences: list
+        contains one dict per differing cell with the variable name, column, and both values.
+    """
+    if reference is not None and fast is not None:
+        if reference.shape != fast.shape:
+            raise Exception("Results tables differ in shape: {} (reference) and {} (fast)".format(reference.shape,
+                                                                                             fast.shape))
+        differences = []
+        for row in range(reference.shape[0]):
+            for column in range(1, reference.shape[1]):
+                ref_value = reference.iat[row, column]
+                fast_value = fast.iat[row, column]
+                if column in VALUE_COLUMNS and _is_number(ref_value) and _is_number(fast_value):
+                    equal = bool(np.isclose(float(fast_value), float(ref_value), rtol=0, atol=atol, equal_nan=True))
+                else:
+                    equal = str(ref_value) == str(fast_value)
+                if equal is False:
+                    differences.append({"variable": reference.iat[row, 0], "column": reference.columns[column],
+                                        "reference_value": ref_value, "fast_value": fast_value})
+        return differences
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def verify_site(yaml_filename=None, rtol=1e-9, atol=1e-9):
+    """
+    Runs both engines on one .yaml file and compares their results. The classes are built once,
+    so both engines see the same inputs. The results cache is not used.
+
+    Parameters
+    ----------
+    yaml_filename: str
+        name of a .yaml file in the /input_yaml folder, or the path to a .yaml file elsewhere.
+    rtol: float
+        relative tolerance for the hourly series.
+    atol: float
+        absolute tolerance for the hourly series.
+
+    Returns
+    -------
+    verification: dict
+        contains the .yaml file, the comparison of each hourly series (see compare_series()),
+        the differences in the results table (see compare_tables()), the run time of each
+        engine in seconds, and whether the engines match.
+    """
+    if yaml_filename is not None:
+        class_dict = command_line.load_class_dict(yaml_filename=yaml_filename)
+        demand = class_dict['demand']
+
+        tables = {}
+        hourly = {}
+        run_times = {}
+        for engine in ("reference", "fast"):
+            start = time.perf_counter()
+            tables[engine], hourly[engine] = command_line.calc_results(class_dict=class_dict, return_hourly=True,
+                                                                       engine=engine)
+            run_times[engine] = time.perf_counter() - start
+
+        series = {}
+        for name in engines.HOURLY_SERIES:
+            series[name] = compare_series(reference=hourly["reference"][name].to_numpy(),
+                                          fast=hourly["fast"][name].to_numpy(), months=demand.meter_months_hourly,
+                                          days=demand.meter_days_hourly, hours=demand.meter_hours_hourly, rtol=rtol,
+                                          atol=atol)
+        table_differences = compare_tables(reference=tables["reference"], fast=tables["fast"])
+
+        return {"yaml": yaml_filename, "series": series, "table_differences": table_differences,
+                "run_times": run_times,
+                "match": all(comparison["match"] for comparison in series.values()) and not table_differences}
+
+
+def format_verification(verification=None):
+    """
+    Formats the result of verify_site() as a report for the terminal.
+
+    Parameters
+    ----------
+    verification: dict
+        result of verify_site().
+
+    Returns
+    -------
+    report: str
+    """
+    if verification is not None:
+        lines = ["{}: {} (reference {:.1f} s, fast {:.2f} s)".format(
+            verification["yaml"], "MATCH" if verification["match"] is True else "DIVERGED",
+            verification["run_times"]["reference"], verification["run_times"]["fast"])]
+        lines.append("    {:<30} {:>8} {:>12} {:>12} {:>8}  {}".format("Series", "Exact", "Max abs", "Max rel",
+                                                                       "Hours", "First diverging hour"))
+        for name, comparison in verification["series"].items():
+            first = ""
+            if comparison["first_index"] is not None:
+                first = "row {} ({}): reference {:.6g}, fast {:.6g}".format(
+                    comparison["first_index"], comparison["first_time"], comparison["reference_value"],
+                    comparison["fast_value"])
+            lines.append("    {:<30} {:>8} {:>12.4g} {:>12.4g} {:>8}  {}".format(
+                name, "yes" if comparison["exact"] is True else "no", comparison["max_abs_diff"],
+                comparison["max_rel_diff"], comparison["diverging_hours"], first))
+        if verification["table_differences"]:
+            lines.append("    Results table differences:")
+            for difference in verification["table_differences"]:
+                lines.append("        {} [{}]: reference {}, fast {}".format(
+                    difference["variable"], difference["column"], difference["reference_value"],
+                    difference["fast_value"]))
+        else:
+            lines.append("    Results table: all values match.")
+        return "\n".join(lines)
+
+
+def main():
+    """
+    Engine verification command line interface. Compares the engines on every .yaml file
+    given by --in and prints a report. The exit status is 1 if the engines diverge on any site.
+    """
+    parser = argparse.ArgumentParser(description="Compare the fast and reference calculation engines")
+    parser.add_argument("--in", help="filenames, paths, or glob patterns of .yaml files with equipment data",
+                        dest="inputs", type=str, nargs="+", required=True)
+    parser.add_argument("--rtol", help="relative tolerance for the hourly series (default: 1e-9)", type=float,
+                        default=1e-9)
+    parser.add_argument("--atol", help="absolute tolerance for the hourly series (default: 1e-9)", type=float,
+                        default=1e-9)
+    args = parser.parse_args()
+
+    diverged = []
+    for yaml_filename in batch.expand_yaml_paths(patterns=args.inputs):
+        verification = verify_site(yaml_filename=yaml_filename, rtol=args.rtol, atol=args.atol)
+        print(format_verification(verification=verification))
+        print("")
+        if verification["match"] is False:
+            diverged.append(yaml_filename)
+
+    if diverged:
+        print("Engines diverged on: {}".format(", ".join(diverged)))
+        raise SystemExit(1)
+    print("Engines match on all sites.")
+
+
+if __name__ == "__main__":
+    main()